@@ -3,25 +3,14 @@ import pandas as pd
 from scipy import spatial, interpolate
 from xml.etree.ElementTree import Element
 
-from Box2D import b2World, b2_dynamicBody
+from Box2D import b2World
 
 
 # Creates a dataframe with all bodies, and one with all contacts,
 # and their values given a b2World
 def dataframes_from_b2World(world:b2World):
-    # Bodies
-    bs = [[b.userData.id,
-           b.position.x,
-           b.position.y,
-           b.mass,
-           b.inertia,
-           b.linearVelocity.x,
-           b.linearVelocity.y,
-           b.angle,
-           b.angularVelocity
-    ] for b in world.bodies if b.type is b2_dynamicBody]
-
-    df_b = pd.DataFrame(data=bs, columns=["id", "px", "py", "mass", "inertia", "vx", "vy", "theta", "omega"])
+    # Bodies, fetched in one call (the id column is body.userId)
+    df_b = pd.DataFrame(data=world.GetBodyStates(dynamicOnly=True), columns=list(world.bodyStateColumns))
     df_b.id = df_b.id.astype(int)
     df_b = df_b.set_index("id")
 
@@ -57,6 +46,17 @@ def dataframes_from_b2World(world:b2World):
     return df_b, df_c
 
 
+# Creates a contact dataframe from the table recorded by a world during its last step
+# (see b2World.recordContacts). ni and ti are the solved impulses
+def dataframe_from_contact_records(records):
+    df_c = pd.DataFrame({c: records[c] for c in ["px", "py", "nx", "ny", "ni", "ti"]},
+                        columns=["master", "slave", "px", "py", "nx", "ny", "ni", "ti"])
+    df_c.master = records["master"].astype(int)
+    df_c.slave = records["slave"].astype(int)
+
+    return df_c
+
+
 # Creates a dataframe with all bodies, and one with all contacts,
 # given an xml tree representing a world
 def dataframes_from_xml(world:Element):
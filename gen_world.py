@@ -17,6 +17,22 @@ def create_circle(world, pos, radius):
     circ.userData.shape = str(shape)
 
 
+# circles - array of rows (x, y, radius). Creates all the circles in one native call,
+# the bodies' ids are their indices in world.bodies
+def create_circles(world, circles):
+    if len(circles) == 0:
+        return
+    # The generators disable sleeping for the whole world anyway
+    ids = world.CreateCircleBodies(circles[:, 0:2], circles[:, 2],
+                                   density=dcCircleShape.density,
+                                   friction=dcCircleShape.friction,
+                                   restitution=dcCircleShape.restitution,
+                                   allowSleep=False)
+    bodies = world.bodies[-len(ids):]
+    for body, b_id, radius in zip(bodies, ids, circles[:, 2]):
+        body.userData = BodyData(b_id=int(b_id), shape=str(dcCircleShape(radius)))
+
+
 # p_ll - position lower left , p_hr - position higher right
 def create_fixed_box(world,p_ll:b2Vec2, p_hr:b2Vec2,pos=(0,0)):
     xlow, ylow = p_ll
@@ -31,6 +47,7 @@ def create_fixed_box(world,p_ll:b2Vec2, p_hr:b2Vec2,pos=(0,0)):
 
     box.userData=BodyData()
     box.userData.shape = str(shape)
+    return box
 
 
 def new_confined_clustered_circles_world(world, n_bodies, p_ll , p_hr, radius_range, sigma, seed=None):
@@ -38,13 +55,11 @@ def new_confined_clustered_circles_world(world, n_bodies, p_ll , p_hr, radius_ra
     Use this as the entry point generator. This uses the others classes in this file to generate a world
     radius_range = 2d tuple/array that holds minimum and maximum range for the circles
     '''
-    create_fixed_box(world,p_ll,p_hr)
+    box = create_fixed_box(world,p_ll,p_hr)
+    box.userData.id = world.bodyCount - 1
+    box.userId = box.userData.id
+    # The circles get their ids on creation
     GenClusteredCirclesRegion(world, seed=seed).fill(n_bodies, p_ll, p_hr, radius_range, sigma)
-
-    for i in range(world.bodyCount):
-        body = world.bodies[i]
-        body.userData.id = i
-        body.sleepingAllowed = False
     world.initialized = True
 
 
@@ -60,7 +75,7 @@ class GenRandomCirclesRegion(GenWorld):
     def fill(self, n, p_ll:b2Vec2, p_hr:b2Vec2, radius_range):
         super(GenRandomCirclesRegion, self).fill()
         min_radius, max_radius = radius_range
-        circ = np.empty((0,3))
+        circ = np.empty((n,3))
         len_x, len_y = p_hr - p_ll
         sz = min_radius + self.random.rand(n) * (max_radius - min_radius)
         i = 0
@@ -77,9 +92,9 @@ class GenRandomCirclesRegion(GenWorld):
                     break
                 continue
             #overlaps other circle -  not good
-            P=circ[:,0:2]
+            P=circ[:i,0:2]
             dist = np.linalg.norm(P - np.asarray(p), axis=1)
-            R=circ[:,2]
+            R=circ[:i,2]
             no_overlap=np.all(R+rad<dist)
             if no_overlap ==  False:
                 #logging.info("Overlap detected")
@@ -88,15 +103,12 @@ class GenRandomCirclesRegion(GenWorld):
                     failed = True
                     break
                 continue
-            c = np.array([p.x, p.y, rad])
-            circ = np.vstack((circ,c))
+            circ[i] = (p.x, p.y, rad)
             failed = 0
             i += 1
         # done with the circle generation, now populate the world
-        for i in range(circ.shape[0]):
-            c = circ[i,:]
-            logging.debug("creating circle " + str(c))
-            create_circle(self.world,c[0:2],c[2])
+        circ = circ[:i]
+        create_circles(self.world, circ)
         if failed is True:
             raise Exception("Unable to place a circle after " + str(self.max_consec_tries) + "tries . Only " + str(i)
                             + " out of " + str(n) + " circles could fit")
@@ -122,7 +134,7 @@ class GenClusteredCirclesRegion(GenWorld):
             sigma = np.sqrt((p_hr - p_ll)/2)*sigma_coef
         else:
             sigma = self.sigma
-        circ = np.empty((0,3))
+        circ = np.empty((n,3))
         sz = min_radius + self.random.rand(n) * (max_radius - min_radius)
         i = 0
         failed = 0
@@ -138,9 +150,9 @@ class GenClusteredCirclesRegion(GenWorld):
                     break
                 continue
             #overlaps other circle -  not good
-            P=circ[:,0:2]
+            P=circ[:i,0:2]
             dist = np.linalg.norm(P - np.asarray(p), axis=1)
-            R=circ[:,2]
+            R=circ[:i,2]
             no_overlap=np.all(R+rad<dist)
             if no_overlap ==  False:
                 #logging.info("Overlap detected")
@@ -149,15 +161,12 @@ class GenClusteredCirclesRegion(GenWorld):
                     failed = True
                     break
                 continue
-            c = np.array([p.x, p.y, rad])
-            circ = np.vstack((circ,c))
+            circ[i] = (p.x, p.y, rad)
             failed = 0
             i += 1
         # done with the circle generation, now populate the world
-        for i in range(circ.shape[0]):
-            c = circ[i,:]
-            logging.debug("creating circle " + str(c))
-            create_circle(self.world,c[0:2],c[2])
+        circ = circ[:i]
+        create_circles(self.world, circ)
         if failed is True:
             raise Exception("Unable to place a circle after " + str(self.max_consec_tries) + "tries . Only " + str(i)
                             + " out of " + str(n) + " circles could fit")
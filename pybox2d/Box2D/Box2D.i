@@ -22,11 +22,15 @@
 * This is the main Python SWIG interface file.
 */
 
-%module(directors="1") Box2D
+%module(directors="1", threads="1") Box2D
 %{
     #include "Box2D/Box2D.h"
 %}
 
+/* Thread support only makes director callbacks take the GIL for themselves.
+   Wrappers keep holding it, except for those marked %threadallow below. */
+%nothreadallow;
+
 /*note:
   swig generated names: _Box2D.<class>_<name>
   python obfuscated names: __<class>_<name> 
@@ -41,11 +45,22 @@
         an exception if USE_EXCEPTIONS is defined. */
         %include "exception.i"
 
+        %{
+            /* b2Assert does not set the Python error itself, as it may fail on
+               a thread without the GIL. Set it here, unless one is already set
+               (e.g. by a director). */
+            static void pybox2d_set_assert_error(const b2AssertException& e) {
+                if (!PyErr_Occurred()) {
+                    PyErr_SetString(PyExc_AssertionError, e.what());
+                }
+            }
+        %}
+
         %exception {
             try {
                 $action
-            } catch(b2AssertException) { 
-                // error already set, pass it on to python
+            } catch(b2AssertException& e) { 
+                pybox2d_set_assert_error(e);
                 SWIG_fail;
             } 
             if (PyErr_Occurred()) {
@@ -66,35 +81,39 @@
        they turn into director exceptions then and will crash the application
        unless handled in C++ (try/catch) and then passed to Python (SWIG_fail).
        */
+    /* Step runs without the GIL, so other Python threads (stepping their own
+       worlds, say) run alongside it. Contact listeners and filters implemented
+       in Python take it back only while they are called. */
+    %threadallow b2World::Step;
     %exception b2World::Step {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
     %exception b2World::DrawDebugData {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
     %exception b2World::QueryAABB {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
     %exception b2World::RayCast {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
     %exception b2World::DestroyJoint {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
     %exception b2World::DestroyBody {
         try { $action }
         catch (Swig::DirectorException) { SWIG_fail; }
-        catch (b2AssertException) { SWIG_fail; }
+        catch (b2AssertException& e) { pybox2d_set_assert_error(e); SWIG_fail; }
     }
 
     #pragma SWIG nowarn=314
@@ -107,6 +126,9 @@
     %ignore b2Chunk;
     %ignore b2DynamicTree;
     %ignore b2DynamicTreeNode;
+    %ignore b2UniformGrid;
+    %ignore b2GridProxy;
+    %ignore b2GridEntry;
     %ignore b2Island;
     %ignore b2Position;
     %ignore b2Velocity;
@@ -126,6 +148,7 @@
 
     /* Add callback support for the following classes */
     %feature("director") b2ContactListener;
+    %feature("director") b2BatchContactListener;
     %feature("director") b2ContactFilter;
     %feature("director") b2DestructionListener;
     %feature("director") b2Draw;
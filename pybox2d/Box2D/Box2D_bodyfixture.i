@@ -342,6 +342,7 @@ public:
         inertia = property(__GetInertia, __SetInertia)
         position = property(__GetPosition, lambda self, pos: self.__SetTransform(pos, self.angle))
         gravityScale = property(__GetGravityScale, __SetGravityScale)
+        userId = property(__GetUserId, __SetUserId)
 
         # Read-only
         joints = property(lambda self: _list_from_linked_list(self.__GetJointList_internal()), None, 
@@ -405,5 +406,7 @@ public:
 %rename(__SetAwake) b2Body::SetAwake;
 %rename(__SetLinearDamping) b2Body::SetLinearDamping;
 %rename(__SetType) b2Body::SetType;
+%rename(__GetUserId) b2Body::GetUserId;
+%rename(__SetUserId) b2Body::SetUserId;
 
 //
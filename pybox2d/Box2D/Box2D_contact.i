@@ -98,9 +98,11 @@ public:
 %rename(broadPhase) b2ContactManager::m_broadPhase;
 %rename(contactList) b2ContactManager::m_contactList;
 %rename(contactCount) b2ContactManager::m_contactCount;
+%rename(version) b2ContactManager::m_version;
 %rename(contactFilter) b2ContactManager::m_contactFilter;
 %rename(contactListener) b2ContactManager::m_contactListener;
 %rename(allocator) b2ContactManager::m_allocator;
+%ignore b2ContactManager::Collide(b2ThreadPool*, b2StackAllocator*);
 
 %extend b2ContactManager {
 public:
@@ -136,6 +138,60 @@ public:
 %ignore b2ContactImpulse::normalImpulses;
 %ignore b2ContactImpulse::tangentImpulses;
 
+/**** ContactBatch ****/
+%extend b2ContactBatch {
+public:
+    /* A view of one column, by index in declaration order. All columns but
+       the keys are 4 bytes wide, and only the impulses are writable. */
+    PyObject* __GetColumn(int column) {
+        void* columns[] = { $self->contactIds, $self->master, $self->slave,
+                            $self->px, $self->py, $self->nx, $self->ny,
+                            $self->normalImpulses, $self->tangentImpulses, $self->keys };
+        if (column < 0 || column > 9) {
+            PyErr_SetString(PyExc_IndexError, "Column index out of range");
+            return NULL;
+        }
+        Py_ssize_t width = column == 9 ? sizeof(uint64) : sizeof(float32);
+        return pybox2d_memory_view(columns[column], $self->count * width, column == 7 || column == 8);
+    }
+
+    %pythoncode %{
+        # Numpy views of the world's buffers, one value per point. Only the
+        # impulses are writable. The buffers are reused by the next step, copy
+        # the views to keep the values.
+        def __view(column, dtype):
+            def get(self):
+                import numpy as np
+                return np.frombuffer(self.__GetColumn(column), dtype=dtype)
+            return property(get, None)
+
+        contactIds      = __view(0, 'int32')
+        master          = __view(1, 'int32')
+        slave           = __view(2, 'int32')
+        px              = __view(3, 'float32')
+        py              = __view(4, 'float32')
+        nx              = __view(5, 'float32')
+        ny              = __view(6, 'float32')
+        normalImpulses  = __view(7, 'float32')
+        tangentImpulses = __view(8, 'float32')
+        keys            = __view(9, 'uint64')
+        del __view
+    %}
+}
+
+%immutable b2ContactBatch::count;
+%immutable b2ContactBatch::contactCount;
+%ignore b2ContactBatch::contactIds;
+%ignore b2ContactBatch::master;
+%ignore b2ContactBatch::slave;
+%ignore b2ContactBatch::px;
+%ignore b2ContactBatch::py;
+%ignore b2ContactBatch::nx;
+%ignore b2ContactBatch::ny;
+%ignore b2ContactBatch::normalImpulses;
+%ignore b2ContactBatch::tangentImpulses;
+%ignore b2ContactBatch::keys;
+
 /**** WorldManifold ****/
 %ignore b2WorldManifold::points;
 
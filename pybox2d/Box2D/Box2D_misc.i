@@ -294,46 +294,130 @@ public:
 
 
 /**** Convergence Rates ****/
+%{
+#if PY_VERSION_HEX >= 0x03030000
+/* Exporter of world memory: holds a reference to its owner (the Python world)
+   and keeps the world's buffers locked (see b2World::LockBuffers) until the
+   last view of it is released. */
+typedef struct {
+    PyObject_HEAD
+    PyObject* owner;
+    b2World* world;
+    void* data;
+    Py_ssize_t size;
+    int readonly;
+} pybox2d_buffer;
+
+static int pybox2d_buffer_getbuffer(PyObject* obj, Py_buffer* view, int flags) {
+    pybox2d_buffer* self = (pybox2d_buffer*) obj;
+    return PyBuffer_FillInfo(view, obj, self->data, self->size, self->readonly, flags);
+}
+
+static void pybox2d_buffer_dealloc(PyObject* obj) {
+    pybox2d_buffer* self = (pybox2d_buffer*) obj;
+    PyTypeObject* type = Py_TYPE(obj);
+    self->world->UnlockBuffers();
+    Py_DECREF(self->owner);
+    PyObject_Free(obj);
+    Py_DECREF(type);
+}
+
+static PyType_Slot pybox2d_buffer_slots[] = {
+    {Py_tp_dealloc, (void*) pybox2d_buffer_dealloc},
+    {Py_bf_getbuffer, (void*) pybox2d_buffer_getbuffer},
+    {0, NULL}
+};
+
+static PyType_Spec pybox2d_buffer_spec = {
+    "Box2D._b2Buffer", sizeof(pybox2d_buffer), 0, Py_TPFLAGS_DEFAULT, pybox2d_buffer_slots
+};
+#endif
+
+/* A view of size bytes, without copying them, writable if requested. With an
+   owner, the view holds a reference to it and the buffers of world stay
+   readable for as long as the view lives: replaced buffers read as NaN. */
+static PyObject* pybox2d_memory_view(void* data, Py_ssize_t size, bool writable,
+                                     PyObject* owner = NULL, b2World* world = NULL) {
+    static float32 empty = 0.0f;
+    if (data == NULL || size <= 0) {
+        data = &empty;
+        size = 0;
+    }
+#if PY_VERSION_HEX >= 0x03030000
+    if (owner != NULL && world != NULL) {
+        static PyObject* type = NULL;
+        if (type == NULL && (type = PyType_FromSpec(&pybox2d_buffer_spec)) == NULL) {
+            return NULL;
+        }
+        pybox2d_buffer* buffer = PyObject_New(pybox2d_buffer, (PyTypeObject*) type);
+        if (buffer == NULL) {
+            return NULL;
+        }
+        Py_INCREF(owner);
+        buffer->owner = owner;
+        buffer->world = world;
+        buffer->data = data;
+        buffer->size = size;
+        buffer->readonly = !writable;
+        world->LockBuffers();
+        PyObject* view = PyMemoryView_FromObject((PyObject*) buffer);
+        Py_DECREF(buffer);
+        return view;
+    }
+    return PyMemoryView_FromMemory((char*) data, size, writable ? PyBUF_WRITE : PyBUF_READ);
+#else
+    if (writable) {
+        return PyBuffer_FromReadWriteMemory(data, size);
+    }
+    return PyBuffer_FromMemory(data, size);
+#endif
+}
+
+/* A read-only view of count floats of the world behind owner, without copying
+   them, see pybox2d_memory_view. */
+static PyObject* pybox2d_float32_view(const float32* data, int32 count, PyObject* owner) {
+    b2World* world = NULL;
+    if (owner != Py_None && !SWIG_IsOK(SWIG_ConvertPtr(owner, (void**) &world, SWIGTYPE_p_b2World, 0))) {
+        PyErr_SetString(PyExc_TypeError, "Expected a b2World");
+        return NULL;
+    }
+    return pybox2d_memory_view((void*) data, count * sizeof(float32), false, owner, world);
+}
+%}
+
 %extend b2Profile {
 public:
-    PyObject* __GetVelocityLambdaTwoNorms() {
-        if ($self->convergenceRates) {
-            PyObject* list = PyList_New($self->maxIslandVelocityIterations);
-            for (int i = 0; i < $self->maxIslandVelocityIterations; i++) {
-                PyObject* o = PyFloat_FromDouble((double) $self->velocityLambdaTwoNorms[i]);
-                PyList_SetItem(list, i, o);
-            }
-            return list;
-        } else
-            return PyList_New(0);
+    PyObject* __GetVelocityLambdaTwoNorms(PyObject* world) {
+        int32 count = $self->convergenceRates ? $self->maxIslandVelocityIterations : 0;
+        return pybox2d_float32_view($self->velocityLambdaTwoNorms, count, world);
     }
 
-    PyObject* __GetVelocityLambdaInfNorms() {
-        if ($self->convergenceRates) {
-            PyObject* list = PyList_New($self->maxIslandVelocityIterations);
-            for (int i = 0; i < $self->maxIslandVelocityIterations; i++) {
-                PyObject* o = PyFloat_FromDouble((double) $self->velocityLambdaInfNorms[i]);
-                PyList_SetItem(list, i, o);
-            }
-            return list;
-        } else
-            return PyList_New(0);
+    PyObject* __GetVelocityLambdaInfNorms(PyObject* world) {
+        int32 count = $self->convergenceRates ? $self->maxIslandVelocityIterations : 0;
+        return pybox2d_float32_view($self->velocityLambdaInfNorms, count, world);
     }
 
-    PyObject* __GetPositionLambdas() {
-        PyObject* list = PyList_New($self->maxIslandPositionIterations);
-        for (int i = 0; i < $self->maxIslandPositionIterations; i++) {
-            PyObject* o = PyFloat_FromDouble((double) $self->positionLambdas[i]);
-            PyList_SetItem(list, i, o);
-        }
-        return list;
+    PyObject* __GetPositionLambdas(PyObject* world) {
+        int32 count = $self->convergenceRates ? $self->maxIslandPositionIterations : 0;
+        return pybox2d_float32_view($self->positionLambdas, count, world);
     }
 
     %pythoncode %{
-        # Ready-only
-        velocityLambdaTwoNorms = property(__GetVelocityLambdaTwoNorms, None)
-        velocityLambdaInfNorms = property(__GetVelocityLambdaInfNorms, None)
-        positionLambdas        = property(__GetPositionLambdas, None)
+        # Read-only float32 numpy views of the world's buffers, one value per
+        # iteration of the island that iterated the most. The buffers are
+        # reused by the next step, copy the views to keep the values. The
+        # views keep the world of b2World.GetProfile alive, and read NaN once
+        # a step with more iterations has replaced the buffers.
+        def __view(getter):
+            def get(self):
+                import numpy as np
+                return np.frombuffer(getter(self, getattr(self, '_world', None)), dtype=np.float32)
+            return property(get, None)
+
+        velocityLambdaTwoNorms = __view(__GetVelocityLambdaTwoNorms)
+        velocityLambdaInfNorms = __view(__GetVelocityLambdaInfNorms)
+        positionLambdas        = __view(__GetPositionLambdas)
+        del __view
     %}
 }
 
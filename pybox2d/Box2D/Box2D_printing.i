@@ -44,7 +44,7 @@ _repr_attrs = {'b2AABB': ['center', 'extents', 'lowerBound', 'perimeter', 'upper
                'b2ContactID': ['cf', 'key', ],
                'b2ContactImpulse': ['normalImpulses', 'tangentImpulses', ],
                'b2ContactManager': ['allocator', 'broadPhase', 'contactCount', 'contactFilter', 'contactList',
-                                    'contactListener', ],
+                                    'contactListener', 'version', ],
                'b2ContactPoint': ['fixtureA', 'fixtureB', 'normal', 'position', 'state',
                                   ],
                'b2DistanceInput': ['proxyA', 'proxyB', 'transformA', 'transformB', 'useRadii',
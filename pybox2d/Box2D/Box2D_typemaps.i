@@ -330,3 +330,74 @@
     }
 }
 
+
+/* Bulk array exchange through the buffer protocol (e.g. numpy arrays, array.array).
+   (TYPE* buffer, int32 bufferSize) is a writable C-contiguous destination,
+   (const TYPE* data, int32 dataSize) a read-only C-contiguous source. The size
+   is passed as the number of TYPE elements. */
+%{
+static int pybox2d_get_buffer(PyObject* obj, Py_buffer* view, int flags, Py_ssize_t itemsize, const char* formats) {
+    if (PyObject_GetBuffer(obj, view, flags | PyBUF_FORMAT | PyBUF_C_CONTIGUOUS) < 0) {
+        return -1;
+    }
+    const char* fmt = view->format ? view->format : "B";
+    if (*fmt == '<' || *fmt == '=' || *fmt == '@') {
+        fmt++;
+    }
+    if (view->itemsize != itemsize || fmt[0] == '\0' || fmt[1] != '\0' || !strchr(formats, fmt[0])) {
+        PyErr_Format(PyExc_TypeError, "Expected a contiguous buffer of format '%s' (itemsize %d), got '%s'",
+                     formats, (int)itemsize, view->format ? view->format : "B");
+        PyBuffer_Release(view);
+        return -1;
+    }
+    return 0;
+}
+%}
+
+%define PYBOX2D_BUFFER_TYPEMAPS(TYPE, FORMATS)
+%typemap(in) (TYPE* buffer, int32 bufferSize) (Py_buffer view, int ownsView = 0) {
+    if (pybox2d_get_buffer($input, &view, PyBUF_WRITABLE, sizeof(TYPE), FORMATS) < 0) {
+        SWIG_fail;
+    }
+    ownsView = 1;
+    $1 = (TYPE*) view.buf;
+    $2 = (int32) (view.len / sizeof(TYPE));
+}
+%typemap(freearg) (TYPE* buffer, int32 bufferSize) {
+    if (ownsView$argnum) {
+        PyBuffer_Release(&view$argnum);
+    }
+}
+%typemap(in) (const TYPE* data, int32 dataSize) (Py_buffer view, int ownsView = 0) {
+    if (pybox2d_get_buffer($input, &view, PyBUF_SIMPLE, sizeof(TYPE), FORMATS) < 0) {
+        SWIG_fail;
+    }
+    ownsView = 1;
+    $1 = (TYPE*) view.buf;
+    $2 = (int32) (view.len / sizeof(TYPE));
+}
+%typemap(freearg) (const TYPE* data, int32 dataSize) {
+    if (ownsView$argnum) {
+        PyBuffer_Release(&view$argnum);
+    }
+}
+%enddef
+
+PYBOX2D_BUFFER_TYPEMAPS(float64, "d")
+PYBOX2D_BUFFER_TYPEMAPS(float32, "f")
+PYBOX2D_BUFFER_TYPEMAPS(int32, "il")
+
+/* Contact keys, see b2MakeContactKey, passed next to a data buffer */
+%typemap(in) (const uint64* keys, int32 keyCount) (Py_buffer view, int ownsView = 0) {
+    if (pybox2d_get_buffer($input, &view, PyBUF_SIMPLE, sizeof(uint64), "QL") < 0) {
+        SWIG_fail;
+    }
+    ownsView = 1;
+    $1 = (uint64*) view.buf;
+    $2 = (int32) (view.len / sizeof(uint64));
+}
+%typemap(freearg) (const uint64* keys, int32 keyCount) {
+    if (ownsView$argnum) {
+        PyBuffer_Release(&view$argnum);
+    }
+}
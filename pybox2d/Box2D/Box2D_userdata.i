@@ -28,6 +28,20 @@
 
 %extend b2World {
 public:
+    /* Release the references held by the bodies, fixtures and joints */
+    ~b2World() {
+        for (b2Body* body = $self->GetBodyList(); body; body = body->GetNext()) {
+            Py_XDECREF((PyObject*)body->GetUserData());
+            for (b2Fixture* fixture = body->GetFixtureList(); fixture; fixture = fixture->GetNext()) {
+                Py_XDECREF((PyObject*)fixture->GetUserData());
+            }
+        }
+        for (b2Joint* joint = $self->GetJointList(); joint; joint = joint->GetNext()) {
+            Py_XDECREF((PyObject*)joint->GetUserData());
+        }
+        delete $self;
+    }
+
     b2Body* __CreateBody(b2BodyDef* defn) {
         b2Body* ret;
         if (defn)
@@ -18,6 +18,22 @@
 * 3. This notice may not be removed or altered from any source distribution.
 */
 
+%{
+#include <Box2D/Dynamics/Contacts/b2ContactSolver.h>
+#include <Box2D/Dynamics/b2Island.h>
+#include <Box2D/Dynamics/b2WorldBatch.h>
+#include <vector>
+
+/* Whether stepping the world calls back into Python, through a contact
+   listener, batch contact listener or filter implemented in Python */
+static bool pybox2d_world_has_directors(const b2World* world) {
+    const b2ContactManager& contactManager = world->GetContactManager();
+    return dynamic_cast<Swig::Director*>(contactManager.m_contactListener) != NULL ||
+           dynamic_cast<Swig::Director*>(world->GetBatchContactListener()) != NULL ||
+           dynamic_cast<Swig::Director*>(contactManager.m_contactFilter) != NULL;
+}
+%}
+
 // i /really/ did not understand kwargs, apparently...
 %feature("shadow") b2World::b2World(const b2Vec2& gravity) {
     def __init__(self, gravity=(0, -10), doSleep=True, **kwargs):
@@ -41,8 +57,77 @@
                             % (self.__class__.__name__, key, ex))
 }
 
+/* The clone is owned by Python, this must come before the %extend below */
+%newobject b2World::__Clone;
+
 %extend b2World {
 public:
+    /* A copy of the contact table of the last step, as raw b2ContactRecord bytes */
+    PyObject* __GetContactRecordBytes() {
+        return PyByteArray_FromStringAndSize((const char*)$self->GetContactRecords(),
+                                             $self->GetContactRecordCount() * sizeof(b2ContactRecord));
+    }
+
+    /* Clone the world; the clone holds its own references to the userData */
+    b2World* __Clone() {
+        b2World* world = $self->Clone();
+        for (b2Body* body = world->GetBodyList(); body; body = body->GetNext()) {
+            Py_XINCREF((PyObject*)body->GetUserData());
+            for (b2Fixture* fixture = body->GetFixtureList(); fixture; fixture = fixture->GetNext()) {
+                Py_XINCREF((PyObject*)fixture->GetUserData());
+            }
+        }
+        return world;
+    }
+
+    int __GetContactRecordSize() {
+        return (int)sizeof(b2ContactRecord);
+    }
+
+    /* Copies of the island and contact convergence tables of the last step */
+    PyObject* __GetIslandRecordBytes() {
+        return PyByteArray_FromStringAndSize((const char*)$self->GetIslandRecords(),
+                                             $self->GetIslandRecordCount() * sizeof(b2IslandRecord));
+    }
+
+    /* A read-only view of the body arrays that keeps owner, the Python world,
+       alive, see pybox2d_memory_view */
+    PyObject* __GetBodyArrayMemory(PyObject* owner) {
+        if ($self->GetBodyArrayData() == NULL) {
+            Py_RETURN_NONE;
+        }
+        return pybox2d_memory_view((void*)$self->GetBodyArrayData(),
+                                   e_bodyArrayColumnCount * $self->GetBodyArrayStride() * sizeof(float32),
+                                   false, owner, $self);
+    }
+
+    PyObject* __GetContactLambdaRecordBytes() {
+        return PyByteArray_FromStringAndSize((const char*)$self->GetContactLambdaRecords(),
+                                             $self->GetContactLambdaRecordCount() * sizeof(b2ContactLambdaRecord));
+    }
+
+    /* A copy of the profile history, oldest step first, as raw b2ProfileRecord bytes */
+    PyObject* __GetProfileHistoryBytes() {
+        int32 count = $self->GetProfileHistoryCount();
+        PyObject* bytes = PyByteArray_FromStringAndSize(NULL, count * sizeof(b2ProfileRecord));
+        if (bytes && count > 0) {
+            $self->GetProfileHistory((b2ProfileRecord*)PyByteArray_AsString(bytes), count);
+        }
+        return bytes;
+    }
+
+    int __GetProfileRecordSize() {
+        return (int)sizeof(b2ProfileRecord);
+    }
+
+    int __GetIslandRecordSize() {
+        return (int)sizeof(b2IslandRecord);
+    }
+
+    int __GetContactLambdaRecordSize() {
+        return (int)sizeof(b2ContactLambdaRecord);
+    }
+
     %pythoncode %{
         def __iter__(self):
             """
@@ -134,6 +219,46 @@ public:
 
             return body
 
+        circleBodyColumns = ('px', 'py', 'radius', 'density', 'friction', 'restitution', 'id')
+
+        def CreateCircleBodies(self, positions, radii, density=0.0, friction=0.2,
+                               restitution=0.0, ids=None, allowSleep=True):
+            """
+            Create one dynamic body with a circle fixture per position, in a
+            single call, and return their userIds as an int32 numpy array.
+
+            positions is an (N, 2) array, radii, density, friction, restitution
+            and ids are N long arrays or single values, with the defaults of
+            b2FixtureDef. ids defaults to bodyCount, bodyCount + 1, ... The
+            bodies are created in order, so they are the last N of
+            b2World.bodies, and have no userData.
+
+            Raises ValueError, before any body is created, if a radius is not
+            positive or an id is not an integer in [0, 2^21 - 1), the range of
+            the contact keys, or is repeated or already used by a body.
+            """
+            import numpy as np
+            positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+            count = len(positions)
+            if ids is None:
+                ids = np.arange(self.bodyCount, self.bodyCount + count)
+            data = np.empty((count, len(self.circleBodyColumns)), dtype=np.float64)
+            data[:, 0:2] = positions
+            for column, value in enumerate((radii, density, friction, restitution, ids), 2):
+                data[:, column] = value
+
+            radii, ids = data[:, 2], data[:, 6]
+            if not np.all(radii > 0) or not np.all(np.isfinite(radii)):
+                raise ValueError('radii must be positive')
+            if not np.all(np.isfinite(ids)) or np.any(ids != np.round(ids)) or \
+                    np.any(ids < 0) or np.any(ids >= 2 ** 21 - 1):
+                raise ValueError('ids must be integers in [0, 2^21 - 1)')
+            used = self.GetBodyStates(dynamicOnly=False)[:, 0]
+            if len(np.unique(ids)) != count or np.any(np.isin(ids, used)):
+                raise ValueError('ids must be unique and not used by another body')
+            self.__CreateCircleBodies(data, allowSleep)
+            return data[:, 6].astype(np.int32)
+
         def CreateDistanceJoint(self, **kwargs):
             """
             Create a single b2DistanceJoint. Only accepts kwargs to the joint definition.
@@ -281,6 +406,351 @@ public:
 
             return self.__CreateJoint(defn)
 
+        bodyStateColumns = ('id', 'px', 'py', 'mass', 'inertia', 'vx', 'vy', 'theta', 'omega')
+
+        def GetBodyStates(self, dynamicOnly=True, out=None):
+            """
+            Get the state of all bodies as a (N, 9) float64 numpy array, in
+            the same order as b2World.bodies, in a single call. The columns are listed in
+            b2World.bodyStateColumns; 'id' is the body's userId.
+
+            If out is given it must be a C-contiguous float64 array with at
+            least N rows; the filled rows are returned as a view of it.
+            """
+            import numpy as np
+            count = self.__GetBodyStateCount(dynamicOnly)
+            columns = len(self.bodyStateColumns)
+            if out is None:
+                out = np.empty((count, columns), dtype=np.float64)
+            elif out.ndim != 2 or out.shape[1] != columns or out.shape[0] < count:
+                raise ValueError('out must have shape (>=%d, %d)' % (count, columns))
+            if self.__GetBodyStates(out, dynamicOnly) < 0:
+                raise ValueError('out is too small')
+            return out[:count]
+
+        def SetBodyStates(self, ids, px=None, py=None, theta=None, vx=None, vy=None, omega=None):
+            """
+            Set the position, angle and velocities of many bodies, selected by
+            userId, in a single call. Either pass ids with any of the columns
+            as N long arrays or single values, the columns left out keep the
+            bodies' current values, or pass an (N, 9) array as returned by
+            GetBodyStates as ids to restore that snapshot (its mass and
+            inertia columns are ignored). New contacts are found once for the
+            whole batch instead of once per body as with body.transform.
+
+            Raises ValueError, without changing any body, if an id is not an
+            integer, matches no body or several bodies, or is given twice.
+            """
+            import numpy as np
+            columns = self.bodyStateColumns
+            given = (('px', px), ('py', py), ('theta', theta), ('vx', vx), ('vy', vy), ('omega', omega))
+            given = [(name, value) for name, value in given if value is not None]
+            if not given:
+                data = np.array(ids, dtype=np.float64)
+                if data.ndim != 2 or data.shape[1] != len(columns):
+                    raise ValueError('states must have shape (N, %d), or give at least one column'
+                                     % len(columns))
+                ids = data[:, columns.index('id')]
+            else:
+                ids = np.asarray(ids, dtype=np.float64).reshape(-1)
+            if not np.all(np.isfinite(ids) & (ids == np.round(ids)) & (np.abs(ids) < 2 ** 31)):
+                raise ValueError('ids must be integers')
+
+            if given:
+                # Start from the current state of the bodies
+                states = self.GetBodyStates(dynamicOnly=False)
+                order = np.argsort(states[:, 0], kind='mergesort')
+                rows = np.searchsorted(states[order, 0], ids)
+                if np.any(rows >= len(states)) or np.any(states[order[rows], 0] != ids):
+                    raise ValueError('Every id must match exactly one body, once')
+                data = states[order[rows]]
+                for name, value in given:
+                    data[:, columns.index(name)] = value
+            if self.__SetBodyStates(data) < 0:
+                raise ValueError('Every id must match exactly one body, once')
+
+        def StateHash(self, precision=0.0, contacts=False):
+            """
+            Hash the state of all bodies (userId, type, awake, position, angle
+            and velocities) and, if contacts is set, the impulses of the
+            touching contact points into a 64-bit int, natively. Two worlds in
+            the same state hash alike, so the hash can key cached results or
+            catch runs that diverge, and it is cheap enough for every step.
+
+            With a positive precision, values are rounded to multiples of it
+            first, which hides differences much smaller than it.
+            """
+            return self.__GetStateHash(precision, contacts)
+
+        def GetProfile(self):
+            """
+            Get the profile of the last step. Its convergence rate views keep
+            this world alive, see b2Profile.velocityLambdaTwoNorms.
+            """
+            profile = self.__GetProfile()
+            profile._world = self
+            return profile
+
+        bodyArrayColumns = ('px', 'py', 'angle', 'vx', 'vy', 'omega', 'invMass', 'invI')
+
+        def GetBodyArrayView(self):
+            """
+            Get the body arrays of the world (see b2World.bodyArrays) without
+            copying, as a read-only (8, N) float32 numpy array over the world's
+            memory. The rows are the columns in b2World.bodyArrayColumns and the
+            columns the dynamic bodies, in the order of
+            GetBodyStates(dynamicOnly=True).
+
+            The arrays are a mirror that the world writes after the solver and
+            every body change, the solver does not read them. The view follows
+            the bodies through Step and all body changes, and keeps the world
+            alive. Creating or destroying dynamic bodies shifts or moves the
+            rows, and once the arrays move (or bodyArrays is disabled) the view
+            reads NaN: get a new view then.
+            """
+            import numpy as np
+            memory = self.__GetBodyArrayMemory(self)
+            if memory is None:
+                raise ValueError('The body arrays are disabled, see b2World.bodyArrays')
+            columns = len(self.bodyArrayColumns)
+            arrays = np.frombuffer(memory, dtype=np.float32).reshape(columns, self.__GetBodyArrayStride())
+            return arrays[:, :self.__GetBodyArrayCount()]
+
+        gridChannels = ('mass', 'inertia', 'vx', 'vy', 'theta', 'omega', 'nx', 'ny', 'ni', 'ti')
+
+        def RasterizeToGrid(self, p_ll, p_ur, res, support_radius, channels=gridChannels,
+                            kernel='poly6', out=None):
+            """
+            Splat fields of the dynamic bodies and of the contact points
+            recorded in the last step (see b2World.recordContacts) onto a regular
+            grid, straight from the engine, as sph_grid.Grid.splatter does with the
+            poly6 kernel. channels are names from b2World.gridChannels: the body
+            fields are splatted from the body origins, the contact fields (nx, ny
+            and the solved impulses ni, ti) from the recorded points, so they
+            raise ValueError when recordContacts is off.
+
+            The grid has the nodes p_ll + (i, j) * res up to p_ur, as in
+            sph_grid.Grid, and res is a scalar or an (x, y) pair. Returns a
+            (len(channels), nx, ny) float32 array, indexed [channel, x, y] like
+            the transposed splatter grids of the preprocessing. If out is given
+            it must be a C-contiguous float32 array of that shape.
+            """
+            import numpy as np
+            if kernel != 'poly6':
+                raise ValueError('Unsupported kernel %r, only poly6 is available' % (kernel,))
+            if isinstance(channels, str):
+                channels = [channels]
+            unknown = [c for c in channels if c not in self.gridChannels]
+            if unknown:
+                raise ValueError('Unknown channels %s, expected names from %s' % (unknown, self.gridChannels))
+            if len(set(channels)) != len(channels):
+                raise ValueError('Repeated channels in %s' % (list(channels),))
+            contacts = [c for c in channels if c in ('nx', 'ny', 'ni', 'ti')]
+            if contacts and not self.recordContacts:
+                raise ValueError('Channels %s need the contacts of the last step, see b2World.recordContacts'
+                                 % (contacts,))
+            if support_radius <= 0:
+                raise ValueError('support_radius must be positive')
+            xRes, yRes = np.broadcast_to(np.asarray(res, dtype=np.float64), (2,))
+            if xRes <= 0 or yRes <= 0:
+                raise ValueError('res must be positive')
+
+            (xlo, ylo), (xhi, yhi) = p_ll, p_ur
+            shape = (len(channels), len(np.arange(xlo, xhi + xRes, xRes)),
+                     len(np.arange(ylo, yhi + yRes, yRes)))
+            if out is None:
+                out = np.empty(shape, dtype=np.float32)
+            elif out.shape != shape or out.dtype != np.float32:
+                raise ValueError('out must be a float32 array of shape %s' % (shape,))
+            fields = np.array([self.gridChannels.index(c) for c in channels], dtype=np.int32)
+            self.__RasterizeToGrid(fields, float(xlo), float(ylo), float(xRes), float(yRes),
+                                   shape[1], shape[2], float(support_radius), out)
+            return out
+
+        contactRecordFields = (('master', 'i4'), ('slave', 'i4'),
+                               ('px', 'f4'), ('py', 'f4'), ('nx', 'f4'), ('ny', 'f4'),
+                               ('warm_ni', 'f4'), ('warm_ti', 'f4'), ('ni', 'f4'), ('ti', 'f4'),
+                               ('key', 'u8'))
+
+        def GetContactRecords(self):
+            """
+            Get the contact points solved in the last step as a numpy structured
+            array with the fields in b2World.contactRecordFields, one row per
+            manifold point. 'master' and 'slave' are the bodies' userIds,
+            warm_ni/warm_ti the impulses used to warm start and ni/ti the solved
+            impulses. 'key' identifies the manifold point across steps, see
+            b2Contact.GetKey. Requires recordContacts to be set before stepping.
+
+            The returned array is a copy and stays valid after the next step.
+            """
+            import numpy as np
+            dtype = np.dtype(list(self.contactRecordFields))
+            assert dtype.itemsize == self.__GetContactRecordSize()
+            return np.frombuffer(self.__GetContactRecordBytes(), dtype=dtype)
+
+        islandRecordFields = (('bodyCount', 'i4'), ('contactCount', 'i4'), ('jointCount', 'i4'),
+                              ('velocityIterations', 'i4'), ('positionIterations', 'i4'),
+                              ('velocityLambdaTwoNorm', 'f4'), ('velocityLambdaInfNorm', 'f4'),
+                              ('positionLambda', 'f4'), ('velocityIterationsSaved', 'i4'))
+
+        contactLambdaRecordFields = (('island', 'i4'), ('master', 'i4'), ('slave', 'i4'),
+                                     ('pointCount', 'i4'), ('lambdaTwoNorm', 'f4'),
+                                     ('lambdaInfNorm', 'f4'))
+
+        def GetIslandRecords(self):
+            """
+            Get the islands solved in the last step as a numpy structured array
+            with the fields in b2World.islandRecordFields, one row per island in
+            solve order. The iteration counts are those the island used, the
+            norms those of its last iteration. Requires recordIslands to be set
+            before stepping.
+
+            The returned array is a copy and stays valid after the next step.
+            """
+            import numpy as np
+            dtype = np.dtype(list(self.islandRecordFields))
+            assert dtype.itemsize == self.__GetIslandRecordSize()
+            return np.frombuffer(self.__GetIslandRecordBytes(), dtype=dtype)
+
+        profileRecordFields = (('step', 'f4'), ('collide', 'f4'), ('solve', 'f4'), ('solveInit', 'f4'),
+                               ('solveVelocity', 'f4'), ('solvePosition', 'f4'), ('broadphase', 'f4'),
+                               ('solveTOI', 'f4'), ('velocityIterations', 'i4'), ('positionIterations', 'i4'),
+                               ('contactsSolved', 'i4'), ('maxIslandVelocityIterations', 'i4'),
+                               ('maxIslandPositionIterations', 'i4'), ('velocityIterationsSaved', 'i4'))
+
+        def GetProfileHistory(self):
+            """
+            Get the profiles of the last steps as a numpy structured array with
+            the fields in b2World.profileRecordFields, one row per step, oldest
+            first. Times are in milliseconds. Holds at most profileHistory
+            steps; set it to the number of steps to keep before stepping.
+
+            The returned array is a copy and stays valid after the next step.
+            """
+            import numpy as np
+            dtype = np.dtype(list(self.profileRecordFields))
+            assert dtype.itemsize == self.__GetProfileRecordSize()
+            return np.frombuffer(self.__GetProfileHistoryBytes(), dtype=dtype)
+
+        def GetContactLambdaRecords(self):
+            """
+            Get the contacts solved in the last step as a numpy structured array
+            with the fields in b2World.contactLambdaRecordFields, one row per
+            contact. 'island' is the row of the contact's island in
+            GetIslandRecords, 'master' and 'slave' the bodies' userIds and the
+            norms are those of the contact's impulse increment in the last
+            velocity iteration. Requires recordIslands to be set before stepping.
+
+            The returned array is a copy and stays valid after the next step.
+            """
+            import numpy as np
+            dtype = np.dtype(list(self.contactLambdaRecordFields))
+            assert dtype.itemsize == self.__GetContactLambdaRecordSize()
+            return np.frombuffer(self.__GetContactLambdaRecordBytes(), dtype=dtype)
+
+        def Clone(self, copyUserData=False):
+            """
+            Create an exact copy of the world in a single native call. The
+            copy steps identically to the original: bodies, fixtures, the
+            broad-phase tree and the contacts (including the impulses used
+            for warm starting) are all copied. Listeners are not copied, and
+            worlds with joints can not be cloned.
+
+            The userData objects of bodies and fixtures are shared with the
+            original, unless copyUserData is set, in which case each is
+            replaced by a shallow copy.
+            """
+            clone = self.__Clone()
+            if copyUserData:
+                import copy
+                for body in clone.bodies:
+                    if body.userData is not None:
+                        body.userData = copy.copy(body.userData)
+                    for fixture in body.fixtures:
+                        if fixture.userData is not None:
+                            fixture.userData = copy.copy(fixture.userData)
+            return clone
+
+        def SetWarmStartImpulses(self, idA, idB, px, py, normalImpulses, tangentImpulses):
+            """
+            Set the impulses used to warm start the contacts in the next call
+            to Step, e.g. predictions of a model, without a contact listener.
+
+            Takes equally long sequences of the body userIds (in the contact's
+            fixture order), the world points and the impulses. Each manifold
+            point gets the impulse of its body pair that is closest to it, and
+            zero if its body pair is not given. Requires warmStarting.
+            """
+            import numpy as np
+            data = np.column_stack([np.asarray(v, dtype=np.float64).ravel()
+                                    for v in (idA, idB, px, py, normalImpulses, tangentImpulses)])
+            self.__SetWarmStartImpulses(np.ascontiguousarray(data))
+
+        def SetKeyedWarmStartImpulses(self, keys, normalImpulses, tangentImpulses):
+            """
+            Set the impulses used to warm start the contacts in the next call
+            to Step by manifold point key, as given by b2Contact.GetKey and the
+            'key' field of GetContactRecords. Each manifold point gets the
+            impulse of its key, and zero if its key is not given. Requires
+            warmStarting.
+            """
+            import numpy as np
+            keys = np.ascontiguousarray(keys, dtype=np.uint64).ravel()
+            data = np.column_stack([np.asarray(v, dtype=np.float64).ravel()
+                                    for v in (normalImpulses, tangentImpulses)])
+            if len(data) != len(keys):
+                raise ValueError('Expected %d impulses, got %d' % (len(keys), len(data)))
+            self.__SetKeyedWarmStartImpulses(keys, np.ascontiguousarray(data))
+
+        def SetWarmStartField(self, ni_grid, ti_grid, p_ll, res, interpolation='bilinear'):
+            """
+            Set grids of normal and tangent impulses used to warm start the
+            contacts in the next call to Step, e.g. the prediction of a model on
+            the grids of RasterizeToGrid. Each manifold point samples the grids
+            at its world point, with 'bilinear' or 'bicubic' (Catmull-Rom)
+            interpolation. Points outside of the grids take the value at the
+            border, and negative normal impulses are clamped to zero.
+
+            The grids are indexed [x, y], with node (i, j) at p_ll + (i, j) * res,
+            like the output of RasterizeToGrid and the grids given to
+            sph_grid.Grid.collect. res is a scalar or an (x, y) pair. Replaces
+            the impulses given to SetWarmStartImpulses or
+            SetKeyedWarmStartImpulses. Requires warmStarting.
+            """
+            import numpy as np
+            interpolations = {'bilinear': b2_bilinearInterpolation,
+                              'bicubic': b2_bicubicInterpolation}
+            if interpolation not in interpolations:
+                raise ValueError('Unknown interpolation %r, expected one of %s'
+                                 % (interpolation, sorted(interpolations)))
+            ni_grid, ti_grid = np.asarray(ni_grid), np.asarray(ti_grid)
+            if ni_grid.ndim != 2 or ni_grid.shape != ti_grid.shape or ni_grid.size == 0:
+                raise ValueError('Expected two non-empty 2D grids of the same shape, got %s and %s'
+                                 % (ni_grid.shape, ti_grid.shape))
+            xRes, yRes = np.broadcast_to(np.asarray(res, dtype=np.float64), (2,))
+            if xRes <= 0 or yRes <= 0:
+                raise ValueError('res must be positive')
+            data = np.ascontiguousarray(np.stack((ni_grid, ti_grid), axis=-1), dtype=np.float32)
+            self.__SetWarmStartField(data, ni_grid.shape[0], ni_grid.shape[1],
+                                     float(p_ll[0]), float(p_ll[1]), float(xRes), float(yRes),
+                                     interpolations[interpolation])
+
+        def __GetView(self, name, getFirst):
+            """
+            Returns a tuple of the items of one of the world's linked lists,
+            walking the list again only when the world's version has changed
+            since the tuple was made.
+            """
+            version = self.__GetVersion()
+            try:
+                views = self.__views
+            except AttributeError:
+                views = self.__views = {}
+            view = views.get(name)
+            if view is None or view[0] != version:
+                view = views[name] = (version, tuple(_list_from_linked_list(getFirst())))
+            return view[1]
+
         # The logic behind these functions is that they increase the refcount
         # of the listeners as you set them, so it is no longer necessary to keep
         # a copy on your own. Upon destruction of the object, it should be cleared
@@ -304,6 +774,8 @@ public:
                                        lambda self, fcn: self.__SetData('destruction', fcn, self.__SetDestructionListener_internal))
         contactListener= property(lambda self: self.__GetData('contact'),
                                   lambda self, fcn: self.__SetData('contact', fcn, self.__SetContactListener_internal))
+        batchContactListener= property(lambda self: self.__GetData('batchcontact'),
+                                       lambda self, fcn: self.__SetData('batchcontact', fcn, self.__SetBatchContactListener_internal))
         contactFilter= property(lambda self: self.__GetData('contactfilter'),
                                 lambda self, fcn: self.__SetData('contactfilter', fcn, self.__SetContactFilter_internal))
         renderer= property(lambda self: self.__GetData('renderer'),
@@ -313,9 +785,22 @@ public:
         warmStarting = property(__GetWarmStarting, __SetWarmStarting)
         subStepping = property(__GetSubStepping, __SetSubStepping)
         convergenceRates = property(__GetConvergenceRates, __SetConvergenceRates)
+        coloredSolver = property(__GetColoredSolver, __SetColoredSolver)
+        simdSolver = property(__GetSimdSolver, __SetSimdSolver)
+        parallelCollide = property(__GetParallelCollide, __SetParallelCollide)
+        bodyArrays = property(__GetBodyArrays, __SetBodyArrays)
+        solverType = property(__GetSolverType, __SetSolverType)
+        relaxation = property(__GetRelaxation, __SetRelaxation)
+        recordContacts = property(__GetRecordContacts, __SetRecordContacts)
+        recordIslands = property(__GetRecordIslands, __SetRecordIslands)
+        profileHistory = property(__GetProfileHistoryCapacity, __SetProfileHistoryCapacity)
+        threadCount = property(__GetThreadCount, __SetThreadCount)
+        broadPhaseType = property(__GetBroadPhaseType, __SetBroadPhaseType)
+        gridCellSize = property(__GetGridCellSize, __SetGridCellSize)
 
         velocityThreshold = property(__GetVelocityThreshold, __SetVelocityThreshold)
         positionThreshold = property(__GetPositionThreshold, __SetPositionThreshold)
+        adaptiveIterations = property(__GetAdaptiveIterations, __SetAdaptiveIterations)
 
         # Read-only
         contactManager= property(__GetContactManager, None)
@@ -323,12 +808,13 @@ public:
         bodyCount     = property(__GetBodyCount, None)
         jointCount    = property(__GetJointCount, None)
         proxyCount    = property(__GetProxyCount, None)
-        joints  = property(lambda self: _list_from_linked_list(self.__GetJointList_internal()), None,
-                            doc="""All joints in the world.  NOTE: This re-creates the list on every call. See also joints_gen.""")
-        bodies  = property(lambda self: _list_from_linked_list(self.__GetBodyList_internal()), None,
-                            doc="""All bodies in the world.  NOTE: This re-creates the list on every call. See also bodies_gen.""")
-        contacts= property(lambda self: _list_from_linked_list(self.__GetContactList_internal()), None,
-                            doc="""All contacts in the world.  NOTE: This re-creates the list on every call. See also contacts_gen.""")
+        version = property(__GetVersion, None)
+        joints  = property(lambda self: self.__GetView('joints', self.__GetJointList_internal), None,
+                            doc="""All joints in the world, as a tuple cached until the world's version changes.""")
+        bodies  = property(lambda self: self.__GetView('bodies', self.__GetBodyList_internal), None,
+                            doc="""All bodies in the world, as a tuple cached until the world's version changes.""")
+        contacts= property(lambda self: self.__GetView('contacts', self.__GetContactList_internal), None,
+                            doc="""All contacts in the world, as a tuple cached until the world's version changes.""")
         joints_gen = property(lambda self: _indexable_generator(_generator_from_linked_list(self.__GetJointList_internal())), None,
                             doc="""Indexable generator of the connected joints to this body.
                             NOTE: When not using the whole list, this may be preferable to using 'joints'.""")
@@ -352,10 +838,13 @@ public:
 %rename (__SetDestructionListener_internal) b2World::SetDestructionListener;
 %rename (__SetContactFilter_internal) b2World::SetContactFilter;
 %rename (__SetContactListener_internal) b2World::SetContactListener;
+%rename (__SetBatchContactListener_internal) b2World::SetBatchContactListener;
+%ignore b2World::GetBatchContactListener;
 %rename (__SetDebugDraw_internal) b2World::SetDebugDraw;
 %rename (__GetContactCount) b2World::GetContactCount;
 %rename (__GetProxyCount) b2World::GetProxyCount;
 %rename (__GetBodyCount) b2World::GetBodyCount;
+%rename (__GetVersion) b2World::GetVersion;
 %rename (__IsLocked) b2World::IsLocked;
 %rename (__SetContinuousPhysics_internal) b2World::SetContinuousPhysics;
 %rename (__SetWarmStarting_internal) b2World::SetWarmStarting;
@@ -372,8 +861,210 @@ public:
 %rename (__SetSubStepping) b2World::SetSubStepping;
 %rename (__GetConvergenceRates) b2World::GetConvergenceRates;
 %rename (__SetConvergenceRates) b2World::SetConvergenceRates;
+%rename (__GetColoredSolver) b2World::GetColoredSolver;
+%rename (__SetColoredSolver) b2World::SetColoredSolver;
+%rename (__GetSimdSolver) b2World::GetSimdSolver;
+%rename (__SetSimdSolver) b2World::SetSimdSolver;
+%rename (__GetParallelCollide) b2World::GetParallelCollide;
+%rename (__SetParallelCollide) b2World::SetParallelCollide;
+%rename (__GetBodyArrays) b2World::GetBodyArrays;
+%rename (__SetBodyArrays) b2World::SetBodyArrays;
+%ignore b2World::GetBodyArrayData;
+%rename (__GetBodyArrayCount) b2World::GetBodyArrayCount;
+%rename (__GetBodyArrayStride) b2World::GetBodyArrayStride;
+%rename (__GetSolverType) b2World::GetSolverType;
+%rename (__SetSolverType) b2World::SetSolverType;
+%rename (__GetRelaxation) b2World::GetRelaxation;
+%rename (__SetRelaxation) b2World::SetRelaxation;
 
+%rename (__GetRecordContacts) b2World::GetRecordContacts;
+%rename (__SetRecordContacts) b2World::SetRecordContacts;
+%rename (__GetContactRecordCount) b2World::GetContactRecordCount;
+%ignore b2World::GetContactRecords;
+%rename (__GetRecordIslands) b2World::GetRecordIslands;
+%rename (__SetRecordIslands) b2World::SetRecordIslands;
+%rename (__GetProfile) b2World::GetProfile;
+%rename (__GetProfileHistoryCapacity) b2World::GetProfileHistoryCapacity;
+%rename (__SetProfileHistoryCapacity) b2World::SetProfileHistoryCapacity;
+%rename (__GetProfileHistoryCount) b2World::GetProfileHistoryCount;
+%ignore b2World::GetProfileHistory;
+%rename (__GetIslandRecordCount) b2World::GetIslandRecordCount;
+%rename (__GetContactLambdaRecordCount) b2World::GetContactLambdaRecordCount;
+%ignore b2World::GetIslandRecords;
+%ignore b2World::GetContactLambdaRecords;
+%ignore b2World::Clone;
+%rename (__SetWarmStartImpulses) b2World::SetWarmStartImpulses;
+%rename (__SetKeyedWarmStartImpulses) b2World::SetKeyedWarmStartImpulses;
+%rename (__SetWarmStartField) b2World::SetWarmStartField;
+%rename (__GetThreadCount) b2World::GetThreadCount;
+%rename (__SetThreadCount) b2World::SetThreadCount;
+%rename (__GetBroadPhaseType) b2World::GetBroadPhaseType;
+%rename (__SetBroadPhaseType) b2World::SetBroadPhaseType;
+%rename (__GetGridCellSize) b2World::GetGridCellSize;
+%rename (__SetGridCellSize) b2World::SetGridCellSize;
+%rename (__GetBodyStateCount) b2World::GetBodyStateCount;
+%rename (__GetBodyStates) b2World::GetBodyStates;
+%rename (__SetBodyStates) b2World::SetBodyStates;
+%rename (__GetStateHash) b2World::GetStateHash;
+%rename (__RasterizeToGrid) b2World::RasterizeToGrid;
+%rename (__CreateCircleBodies) b2World::CreateCircleBodies;
 %rename (__GetVelocityThreshold) b2World::GetVelocityThreshold;
 %rename (__SetVelocityThreshold) b2World::SetVelocityThreshold;
+%rename (__GetAdaptiveIterations) b2World::GetAdaptiveIterations;
+%rename (__SetAdaptiveIterations) b2World::SetAdaptiveIterations;
 %rename (__GetPositionThreshold) b2World::GetPositionThreshold;
 %rename (__SetPositionThreshold) b2World::SetPositionThreshold;
+
+/**** Stepping many worlds at once ****/
+%{
+    /* Buffers of _b2StepWorlds, released when it returns */
+    struct pybox2d_step_buffers {
+        Py_buffer views[4];
+        int count;
+        pybox2d_step_buffers() : count(0) {}
+        ~pybox2d_step_buffers() {
+            for (int i = 0; i < count; ++i) {
+                PyBuffer_Release(views + i);
+            }
+        }
+        /* A writable contiguous buffer of at least size bytes, or NULL for None */
+        void* get(PyObject* obj, Py_ssize_t size, const char* name) {
+            if (obj == Py_None) {
+                return NULL;
+            }
+            if (PyObject_GetBuffer(obj, views + count, PyBUF_WRITABLE | PyBUF_C_CONTIGUOUS) < 0) {
+                return NULL;
+            }
+            Py_buffer* view = views + count++;
+            if (view->len < size) {
+                PyErr_Format(PyExc_ValueError, "%s is too small", name);
+                return NULL;
+            }
+            return view->buf;
+        }
+    };
+%}
+
+%inline %{
+    void _b2StepWorlds(PyObject* worlds, float32 timeStep, int32 velocityIterations,
+                       int32 positionIterations, int32 stepCount, int32 threadCount,
+                       PyObject* bodyStates, int32 bodyCapacity, PyObject* bodyCounts,
+                       PyObject* contactRecords, int32 recordCapacity, PyObject* recordCounts,
+                       bool dynamicOnly) {
+        PyObject* sequence = PySequence_Fast(worlds, "worlds must be a sequence of b2World");
+        if (!sequence) {
+            return;
+        }
+
+        Py_ssize_t worldCount = PySequence_Fast_GET_SIZE(sequence);
+        std::vector<b2World*> pointers(worldCount);
+        for (Py_ssize_t i = 0; i < worldCount; ++i) {
+            void* pointer = NULL;
+            if (!SWIG_IsOK(SWIG_ConvertPtr(PySequence_Fast_GET_ITEM(sequence, i), &pointer, SWIGTYPE_p_b2World, 0))) {
+                Py_DECREF(sequence);
+                PyErr_SetString(PyExc_TypeError, "worlds must be a sequence of b2World");
+                return;
+            }
+            pointers[i] = (b2World*)pointer;
+        }
+        Py_DECREF(sequence);
+
+        for (Py_ssize_t i = 0; i < worldCount; ++i) {
+            const b2World* world = pointers[i];
+            if (world->IsLocked()) {
+                PyErr_Format(PyExc_ValueError, "world %d is locked", (int)i);
+                return;
+            }
+            if (pybox2d_world_has_directors(world)) {
+                PyErr_Format(PyExc_ValueError, "world %d has a contact listener or filter implemented in Python", (int)i);
+                return;
+            }
+            if (contactRecords != Py_None && world->GetRecordContacts() == false) {
+                PyErr_Format(PyExc_ValueError, "world %d does not record contacts", (int)i);
+                return;
+            }
+            for (Py_ssize_t j = 0; j < i; ++j) {
+                if (pointers[j] == world) {
+                    PyErr_Format(PyExc_ValueError, "world %d is given twice", (int)i);
+                    return;
+                }
+            }
+        }
+
+        Py_ssize_t entries = worldCount * stepCount;
+        pybox2d_step_buffers buffers;
+        b2WorldBatchOutput output;
+        output.bodyStates = (float64*)buffers.get(bodyStates,
+            entries * bodyCapacity * e_bodyStateColumnCount * sizeof(float64), "bodyStates");
+        output.bodyCapacity = bodyCapacity;
+        output.dynamicOnly = dynamicOnly;
+        output.bodyCounts = (int32*)buffers.get(bodyCounts, entries * sizeof(int32), "bodyCounts");
+        output.contactRecords = (b2ContactRecord*)buffers.get(contactRecords,
+            entries * recordCapacity * sizeof(b2ContactRecord), "contactRecords");
+        output.recordCapacity = recordCapacity;
+        output.recordCounts = (int32*)buffers.get(recordCounts, entries * sizeof(int32), "recordCounts");
+        if (PyErr_Occurred()) {
+            return;
+        }
+
+        PyThreadState* state = PyEval_SaveThread();
+        try {
+            b2StepWorlds(pointers.data(), (int32)worldCount, timeStep, velocityIterations,
+                         positionIterations, stepCount, threadCount, &output);
+        } catch (...) {
+            PyEval_RestoreThread(state);
+            throw;
+        }
+        PyEval_RestoreThread(state);
+    }
+%}
+
+%pythoncode %{
+    def b2StepWorlds(worlds, timeStep, velocityIterations, positionIterations, stepCount=1,
+                     threadCount=0, bodyStates=None, bodyCounts=None, contactRecords=None,
+                     recordCounts=None, dynamicOnly=True):
+        """
+        Step each of the worlds stepCount times in a single native call, the
+        worlds in parallel on threadCount threads (by default one per CPU),
+        with the GIL released. The worlds must be distinct and must not have a
+        Python contact listener or contact filter.
+
+        The state of each world after each step can be captured into
+        preallocated arrays, indexed by [world, step]:
+        + bodyStates, float64 of shape (worlds, stepCount, maxBodies, 9), as
+          returned by b2World.GetBodyStates(dynamicOnly), and bodyCounts,
+          int32 of shape (worlds, stepCount), the number of rows of each. If
+          the rows do not fit, none are written.
+        + contactRecords, of the b2World.contactRecordFields dtype and shape
+          (worlds, stepCount, maxRecords), as returned by
+          b2World.GetContactRecords, and recordCounts, int32 of shape
+          (worlds, stepCount). Records that do not fit are dropped. Requires
+          recordContacts to be set on every world.
+        """
+        import numpy as np
+        worlds = list(worlds)
+        if threadCount <= 0:
+            import multiprocessing
+            threadCount = multiprocessing.cpu_count()
+
+        def check(array, name, dtype, ndim):
+            if array is None:
+                return 0
+            if (not isinstance(array, np.ndarray) or array.dtype != dtype or array.ndim != ndim
+                    or array.shape[:2] != (len(worlds), stepCount) or not array.flags.c_contiguous):
+                raise ValueError('%s must be a C-contiguous %s array of shape (%d, %d%s)'
+                                 % (name, dtype, len(worlds), stepCount, ', ...' if ndim > 2 else ''))
+            return array.shape[2] if ndim > 2 else 0
+
+        bodyCapacity = check(bodyStates, 'bodyStates', np.float64, 4)
+        if bodyStates is not None and bodyStates.shape[3] != len(b2World.bodyStateColumns):
+            raise ValueError('bodyStates must have %d columns' % len(b2World.bodyStateColumns))
+        check(bodyCounts, 'bodyCounts', np.int32, 2)
+        recordCapacity = check(contactRecords, 'contactRecords',
+                               np.dtype(list(b2World.contactRecordFields)), 3)
+        check(recordCounts, 'recordCounts', np.int32, 2)
+
+        _b2StepWorlds(worlds, timeStep, velocityIterations, positionIterations, stepCount,
+                      threadCount, bodyStates, bodyCapacity, bodyCounts, contactRecords,
+                      recordCapacity, recordCounts, dynamicOnly)
+%}
@@ -22,6 +22,7 @@ using namespace std;
 
 b2BroadPhase::b2BroadPhase()
 {
+	m_type = b2_dynamicTreeBroadPhase;
 	m_proxyCount = 0;
 
 	m_pairCapacity = 16;
@@ -39,9 +40,56 @@ b2BroadPhase::~b2BroadPhase()
 	b2Free(m_pairBuffer);
 }
 
+void b2BroadPhase::SetType(b2BroadPhaseType type)
+{
+	b2Assert(m_proxyCount == 0);
+	b2Assert(type == b2_dynamicTreeBroadPhase || type == b2_uniformGridBroadPhase);
+	m_type = type;
+}
+
+void b2BroadPhase::SetGridCellSize(float32 cellSize)
+{
+	b2Assert(m_proxyCount == 0);
+	m_grid.SetCellSize(cellSize);
+}
+
+void b2BroadPhase::CopyFrom(const b2BroadPhase& broadPhase)
+{
+	m_type = broadPhase.m_type;
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.CopyFrom(broadPhase.m_grid);
+	}
+	else
+	{
+		m_tree.CopyFrom(broadPhase.m_tree);
+	}
+	m_proxyCount = broadPhase.m_proxyCount;
+
+	if (m_moveCapacity < broadPhase.m_moveCount)
+	{
+		b2Free(m_moveBuffer);
+		m_moveCapacity = broadPhase.m_moveCapacity;
+		m_moveBuffer = (int32*)b2Alloc(m_moveCapacity * sizeof(int32));
+	}
+	memcpy(m_moveBuffer, broadPhase.m_moveBuffer, broadPhase.m_moveCount * sizeof(int32));
+	m_moveCount = broadPhase.m_moveCount;
+
+	// The pair buffer is scratch space for UpdatePairs.
+	m_pairCount = 0;
+}
+
 int32 b2BroadPhase::CreateProxy(const b2AABB& aabb, void* userData)
 {
-	int32 proxyId = m_tree.CreateProxy(aabb, userData);
+	int32 proxyId;
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		proxyId = m_grid.CreateProxy(aabb, userData);
+	}
+	else
+	{
+		proxyId = m_tree.CreateProxy(aabb, userData);
+	}
 	++m_proxyCount;
 	BufferMove(proxyId);
 	return proxyId;
@@ -51,12 +99,27 @@ void b2BroadPhase::DestroyProxy(int32 proxyId)
 {
 	UnBufferMove(proxyId);
 	--m_proxyCount;
-	m_tree.DestroyProxy(proxyId);
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.DestroyProxy(proxyId);
+	}
+	else
+	{
+		m_tree.DestroyProxy(proxyId);
+	}
 }
 
 void b2BroadPhase::MoveProxy(int32 proxyId, const b2AABB& aabb, const b2Vec2& displacement)
 {
-	bool buffer = m_tree.MoveProxy(proxyId, aabb, displacement);
+	bool buffer;
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		buffer = m_grid.MoveProxy(proxyId, aabb, displacement);
+	}
+	else
+	{
+		buffer = m_tree.MoveProxy(proxyId, aabb, displacement);
+	}
 	if (buffer)
 	{
 		BufferMove(proxyId);
@@ -94,7 +157,8 @@ void b2BroadPhase::UnBufferMove(int32 proxyId)
 	}
 }
 
-// This is called from b2DynamicTree::Query when we are gathering pairs.
+// This is called from b2DynamicTree::Query or b2UniformGrid::Query when we
+// are gathering pairs.
 bool b2BroadPhase::QueryCallback(int32 proxyId)
 {
 	// A proxy cannot form a pair with itself.
@@ -22,8 +22,16 @@
 #include <Box2D/Common/b2Settings.h>
 #include <Box2D/Collision/b2Collision.h>
 #include <Box2D/Collision/b2DynamicTree.h>
+#include <Box2D/Collision/b2UniformGrid.h>
 #include <algorithm>
 
+/// The structure a broad-phase keeps its proxies in.
+enum b2BroadPhaseType
+{
+	b2_dynamicTreeBroadPhase = 0,	///< b2DynamicTree, the default
+	b2_uniformGridBroadPhase		///< b2UniformGrid, for proxies of similar size
+};
+
 struct b2Pair
 {
 	int32 proxyIdA;
@@ -45,6 +53,16 @@ public:
 	b2BroadPhase();
 	~b2BroadPhase();
 
+	/// Choose the structure the proxies are kept in. This can only be done
+	/// while there are no proxies.
+	void SetType(b2BroadPhaseType type);
+	b2BroadPhaseType GetType() const;
+
+	/// Set the cell size of the uniform grid. This can only be done while
+	/// there are no proxies.
+	void SetGridCellSize(float32 cellSize);
+	float32 GetGridCellSize() const;
+
 	/// Create a proxy with an initial AABB. Pairs are not reported until
 	/// UpdatePairs is called.
 	int32 CreateProxy(const b2AABB& aabb, void* userData);
@@ -65,6 +83,14 @@ public:
 	/// Get user data from a proxy. Returns NULL if the id is invalid.
 	void* GetUserData(int32 proxyId) const;
 
+	/// Set the user data of a proxy.
+	void SetUserData(int32 proxyId, void* userData);
+
+	/// Make this broad-phase an exact copy of another one, including the
+	/// proxy ids and the buffered moves. The user data pointers are copied
+	/// as is.
+	void CopyFrom(const b2BroadPhase& broadPhase);
+
 	/// Test overlap of fat AABBs.
 	bool TestOverlap(int32 proxyIdA, int32 proxyIdB) const;
 
@@ -90,13 +116,13 @@ public:
 	template <typename T>
 	void RayCast(T* callback, const b2RayCastInput& input) const;
 
-	/// Get the height of the embedded tree.
+	/// Get the height of the embedded tree, 0 for the uniform grid.
 	int32 GetTreeHeight() const;
 
-	/// Get the balance of the embedded tree.
+	/// Get the balance of the embedded tree, 0 for the uniform grid.
 	int32 GetTreeBalance() const;
 
-	/// Get the quality metric of the embedded tree.
+	/// Get the quality metric of the embedded tree, 0 for the uniform grid.
 	float32 GetTreeQuality() const;
 
 	/// Shift the world origin. Useful for large worlds.
@@ -107,13 +133,16 @@ public:
 private:
 
 	friend class b2DynamicTree;
+	friend class b2UniformGrid;
 
 	void BufferMove(int32 proxyId);
 	void UnBufferMove(int32 proxyId);
 
 	bool QueryCallback(int32 proxyId);
 
+	b2BroadPhaseType m_type;
 	b2DynamicTree m_tree;
+	b2UniformGrid m_grid;
 
 	int32 m_proxyCount;
 
@@ -144,20 +173,50 @@ inline bool b2PairLessThan(const b2Pair& pair1, const b2Pair& pair2)
 	return false;
 }
 
+inline b2BroadPhaseType b2BroadPhase::GetType() const
+{
+	return m_type;
+}
+
+inline float32 b2BroadPhase::GetGridCellSize() const
+{
+	return m_grid.GetCellSize();
+}
+
 inline void* b2BroadPhase::GetUserData(int32 proxyId) const
 {
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		return m_grid.GetUserData(proxyId);
+	}
 	return m_tree.GetUserData(proxyId);
 }
 
+inline void b2BroadPhase::SetUserData(int32 proxyId, void* userData)
+{
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.SetUserData(proxyId, userData);
+	}
+	else
+	{
+		m_tree.SetUserData(proxyId, userData);
+	}
+}
+
 inline bool b2BroadPhase::TestOverlap(int32 proxyIdA, int32 proxyIdB) const
 {
-	const b2AABB& aabbA = m_tree.GetFatAABB(proxyIdA);
-	const b2AABB& aabbB = m_tree.GetFatAABB(proxyIdB);
+	const b2AABB& aabbA = GetFatAABB(proxyIdA);
+	const b2AABB& aabbB = GetFatAABB(proxyIdB);
 	return b2TestOverlap(aabbA, aabbB);
 }
 
 inline const b2AABB& b2BroadPhase::GetFatAABB(int32 proxyId) const
 {
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		return m_grid.GetFatAABB(proxyId);
+	}
 	return m_tree.GetFatAABB(proxyId);
 }
 
@@ -168,17 +227,17 @@ inline int32 b2BroadPhase::GetProxyCount() const
 
 inline int32 b2BroadPhase::GetTreeHeight() const
 {
-	return m_tree.GetHeight();
+	return m_type == b2_dynamicTreeBroadPhase ? m_tree.GetHeight() : 0;
 }
 
 inline int32 b2BroadPhase::GetTreeBalance() const
 {
-	return m_tree.GetMaxBalance();
+	return m_type == b2_dynamicTreeBroadPhase ? m_tree.GetMaxBalance() : 0;
 }
 
 inline float32 b2BroadPhase::GetTreeQuality() const
 {
-	return m_tree.GetAreaRatio();
+	return m_type == b2_dynamicTreeBroadPhase ? m_tree.GetAreaRatio() : 0.0f;
 }
 
 template <typename T>
@@ -198,10 +257,10 @@ void b2BroadPhase::UpdatePairs(T* callback)
 
 		// We have to query the tree with the fat AABB so that
 		// we don't fail to create a pair that may touch later.
-		const b2AABB& fatAABB = m_tree.GetFatAABB(m_queryProxyId);
+		const b2AABB& fatAABB = GetFatAABB(m_queryProxyId);
 
 		// Query tree, create pairs and add them pair buffer.
-		m_tree.Query(this, fatAABB);
+		Query(this, fatAABB);
 	}
 
 	// Reset move buffer
@@ -215,8 +274,8 @@ void b2BroadPhase::UpdatePairs(T* callback)
 	while (i < m_pairCount)
 	{
 		b2Pair* primaryPair = m_pairBuffer + i;
-		void* userDataA = m_tree.GetUserData(primaryPair->proxyIdA);
-		void* userDataB = m_tree.GetUserData(primaryPair->proxyIdB);
+		void* userDataA = GetUserData(primaryPair->proxyIdA);
+		void* userDataB = GetUserData(primaryPair->proxyIdB);
 
 		callback->AddPair(userDataA, userDataB);
 		++i;
@@ -240,18 +299,39 @@ void b2BroadPhase::UpdatePairs(T* callback)
 template <typename T>
 inline void b2BroadPhase::Query(T* callback, const b2AABB& aabb) const
 {
-	m_tree.Query(callback, aabb);
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.Query(callback, aabb);
+	}
+	else
+	{
+		m_tree.Query(callback, aabb);
+	}
 }
 
 template <typename T>
 inline void b2BroadPhase::RayCast(T* callback, const b2RayCastInput& input) const
 {
-	m_tree.RayCast(callback, input);
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.RayCast(callback, input);
+	}
+	else
+	{
+		m_tree.RayCast(callback, input);
+	}
 }
 
 inline void b2BroadPhase::ShiftOrigin(const b2Vec2& newOrigin)
 {
-	m_tree.ShiftOrigin(newOrigin);
+	if (m_type == b2_uniformGridBroadPhase)
+	{
+		m_grid.ShiftOrigin(newOrigin);
+	}
+	else
+	{
+		m_tree.ShiftOrigin(newOrigin);
+	}
 }
 
 #endif
@@ -52,6 +52,23 @@ b2DynamicTree::~b2DynamicTree()
 	b2Free(m_nodes);
 }
 
+void b2DynamicTree::CopyFrom(const b2DynamicTree& tree)
+{
+	if (m_nodeCapacity != tree.m_nodeCapacity)
+	{
+		b2Free(m_nodes);
+		m_nodeCapacity = tree.m_nodeCapacity;
+		m_nodes = (b2TreeNode*)b2Alloc(m_nodeCapacity * sizeof(b2TreeNode));
+	}
+	memcpy(m_nodes, tree.m_nodes, m_nodeCapacity * sizeof(b2TreeNode));
+
+	m_root = tree.m_root;
+	m_nodeCount = tree.m_nodeCount;
+	m_freeList = tree.m_freeList;
+	m_path = tree.m_path;
+	m_insertionCount = tree.m_insertionCount;
+}
+
 // Allocate a node from the pool. Grow the pool if necessary.
 int32 b2DynamicTree::AllocateNode()
 {
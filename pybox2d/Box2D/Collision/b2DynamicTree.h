@@ -83,6 +83,13 @@ public:
 	/// @return the proxy user data or 0 if the id is invalid.
 	void* GetUserData(int32 proxyId) const;
 
+	/// Set proxy user data.
+	void SetUserData(int32 proxyId, void* userData);
+
+	/// Make this tree an exact copy of another tree, keeping the proxy ids.
+	/// The user data pointers are copied as is.
+	void CopyFrom(const b2DynamicTree& tree);
+
 	/// Get the fat AABB for a proxy.
 	const b2AABB& GetFatAABB(int32 proxyId) const;
 
@@ -159,6 +166,12 @@ inline void* b2DynamicTree::GetUserData(int32 proxyId) const
 	return m_nodes[proxyId].userData;
 }
 
+inline void b2DynamicTree::SetUserData(int32 proxyId, void* userData)
+{
+	b2Assert(0 <= proxyId && proxyId < m_nodeCapacity);
+	m_nodes[proxyId].userData = userData;
+}
+
 inline const b2AABB& b2DynamicTree::GetFatAABB(int32 proxyId) const
 {
 	b2Assert(0 <= proxyId && proxyId < m_nodeCapacity);
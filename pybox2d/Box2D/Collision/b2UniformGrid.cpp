@@ -0,0 +1,409 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+#include <Box2D/Collision/b2UniformGrid.h>
+#include <string.h>
+
+b2UniformGrid::b2UniformGrid()
+{
+	m_cellSize = 1.0f;
+	m_inverseCellSize = 1.0f;
+
+	m_proxyCapacity = 16;
+	m_proxyCount = 0;
+	m_proxies = (b2GridProxy*)b2Alloc(m_proxyCapacity * sizeof(b2GridProxy));
+
+	// Build a linked list for the free list.
+	for (int32 i = 0; i < m_proxyCapacity - 1; ++i)
+	{
+		m_proxies[i].next = i + 1;
+		m_proxies[i].cellCount = -1;
+	}
+	m_proxies[m_proxyCapacity-1].next = b2_nullGridProxy;
+	m_proxies[m_proxyCapacity-1].cellCount = -1;
+	m_freeProxy = 0;
+
+	m_entryCapacity = 64;
+	m_entryCount = 0;
+	m_entries = (b2GridEntry*)b2Alloc(m_entryCapacity * sizeof(b2GridEntry));
+	for (int32 i = 0; i < m_entryCapacity - 1; ++i)
+	{
+		m_entries[i].next = i + 1;
+		m_entries[i].proxyId = b2_nullGridProxy;
+	}
+	m_entries[m_entryCapacity-1].next = b2_nullGridProxy;
+	m_entries[m_entryCapacity-1].proxyId = b2_nullGridProxy;
+	m_freeEntry = 0;
+
+	m_bucketCount = 64;
+	m_buckets = (int32*)b2Alloc(m_bucketCount * sizeof(int32));
+	for (int32 i = 0; i < m_bucketCount; ++i)
+	{
+		m_buckets[i] = b2_nullGridProxy;
+	}
+
+	m_oversizedCapacity = 4;
+	m_oversizedCount = 0;
+	m_oversized = (int32*)b2Alloc(m_oversizedCapacity * sizeof(int32));
+}
+
+b2UniformGrid::~b2UniformGrid()
+{
+	b2Free(m_oversized);
+	b2Free(m_buckets);
+	b2Free(m_entries);
+	b2Free(m_proxies);
+}
+
+void b2UniformGrid::SetCellSize(float32 cellSize)
+{
+	b2Assert(m_proxyCount == 0);
+	b2Assert(cellSize > 0.0f);
+	m_cellSize = cellSize;
+	m_inverseCellSize = 1.0f / cellSize;
+}
+
+void b2UniformGrid::CopyFrom(const b2UniformGrid& grid)
+{
+	m_cellSize = grid.m_cellSize;
+	m_inverseCellSize = grid.m_inverseCellSize;
+
+	if (m_proxyCapacity != grid.m_proxyCapacity)
+	{
+		b2Free(m_proxies);
+		m_proxyCapacity = grid.m_proxyCapacity;
+		m_proxies = (b2GridProxy*)b2Alloc(m_proxyCapacity * sizeof(b2GridProxy));
+	}
+	memcpy(m_proxies, grid.m_proxies, m_proxyCapacity * sizeof(b2GridProxy));
+	m_proxyCount = grid.m_proxyCount;
+	m_freeProxy = grid.m_freeProxy;
+
+	if (m_entryCapacity != grid.m_entryCapacity)
+	{
+		b2Free(m_entries);
+		m_entryCapacity = grid.m_entryCapacity;
+		m_entries = (b2GridEntry*)b2Alloc(m_entryCapacity * sizeof(b2GridEntry));
+	}
+	memcpy(m_entries, grid.m_entries, m_entryCapacity * sizeof(b2GridEntry));
+	m_entryCount = grid.m_entryCount;
+	m_freeEntry = grid.m_freeEntry;
+
+	if (m_bucketCount != grid.m_bucketCount)
+	{
+		b2Free(m_buckets);
+		m_bucketCount = grid.m_bucketCount;
+		m_buckets = (int32*)b2Alloc(m_bucketCount * sizeof(int32));
+	}
+	memcpy(m_buckets, grid.m_buckets, m_bucketCount * sizeof(int32));
+
+	if (m_oversizedCapacity != grid.m_oversizedCapacity)
+	{
+		b2Free(m_oversized);
+		m_oversizedCapacity = grid.m_oversizedCapacity;
+		m_oversized = (int32*)b2Alloc(m_oversizedCapacity * sizeof(int32));
+	}
+	memcpy(m_oversized, grid.m_oversized, grid.m_oversizedCount * sizeof(int32));
+	m_oversizedCount = grid.m_oversizedCount;
+}
+
+// Allocate a proxy from the pool. Grow the pool if necessary.
+int32 b2UniformGrid::AllocateProxy()
+{
+	if (m_freeProxy == b2_nullGridProxy)
+	{
+		b2Assert(m_proxyCount == m_proxyCapacity);
+
+		b2GridProxy* oldProxies = m_proxies;
+		m_proxyCapacity *= 2;
+		m_proxies = (b2GridProxy*)b2Alloc(m_proxyCapacity * sizeof(b2GridProxy));
+		memcpy(m_proxies, oldProxies, m_proxyCount * sizeof(b2GridProxy));
+		b2Free(oldProxies);
+
+		for (int32 i = m_proxyCount; i < m_proxyCapacity - 1; ++i)
+		{
+			m_proxies[i].next = i + 1;
+			m_proxies[i].cellCount = -1;
+		}
+		m_proxies[m_proxyCapacity-1].next = b2_nullGridProxy;
+		m_proxies[m_proxyCapacity-1].cellCount = -1;
+		m_freeProxy = m_proxyCount;
+	}
+
+	int32 proxyId = m_freeProxy;
+	m_freeProxy = m_proxies[proxyId].next;
+	m_proxies[proxyId].userData = NULL;
+	m_proxies[proxyId].cellCount = 0;
+	m_proxies[proxyId].oversized = b2_nullGridProxy;
+	++m_proxyCount;
+	return proxyId;
+}
+
+void b2UniformGrid::FreeProxy(int32 proxyId)
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	b2Assert(0 < m_proxyCount);
+	m_proxies[proxyId].next = m_freeProxy;
+	m_proxies[proxyId].cellCount = -1;
+	m_freeProxy = proxyId;
+	--m_proxyCount;
+}
+
+// Allocate an entry from the pool. Grow the pool if necessary.
+int32 b2UniformGrid::AllocateEntry()
+{
+	if (m_freeEntry == b2_nullGridProxy)
+	{
+		b2Assert(m_entryCount == m_entryCapacity);
+
+		b2GridEntry* oldEntries = m_entries;
+		m_entryCapacity *= 2;
+		m_entries = (b2GridEntry*)b2Alloc(m_entryCapacity * sizeof(b2GridEntry));
+		memcpy(m_entries, oldEntries, m_entryCount * sizeof(b2GridEntry));
+		b2Free(oldEntries);
+
+		for (int32 i = m_entryCount; i < m_entryCapacity - 1; ++i)
+		{
+			m_entries[i].next = i + 1;
+			m_entries[i].proxyId = b2_nullGridProxy;
+		}
+		m_entries[m_entryCapacity-1].next = b2_nullGridProxy;
+		m_entries[m_entryCapacity-1].proxyId = b2_nullGridProxy;
+		m_freeEntry = m_entryCount;
+	}
+
+	int32 entryId = m_freeEntry;
+	m_freeEntry = m_entries[entryId].next;
+	++m_entryCount;
+	return entryId;
+}
+
+void b2UniformGrid::FreeEntry(int32 entryId)
+{
+	m_entries[entryId].next = m_freeEntry;
+	m_entries[entryId].proxyId = b2_nullGridProxy;
+	m_freeEntry = entryId;
+	--m_entryCount;
+}
+
+// Add a proxy to the cells covered by its AABB, or to the oversized list.
+void b2UniformGrid::InsertProxy(int32 proxyId)
+{
+	b2GridProxy* proxy = m_proxies + proxyId;
+	proxy->lowerX = GetCell(proxy->aabb.lowerBound.x);
+	proxy->lowerY = GetCell(proxy->aabb.lowerBound.y);
+	proxy->upperX = GetCell(proxy->aabb.upperBound.x);
+	proxy->upperY = GetCell(proxy->aabb.upperBound.y);
+
+	float32 cellCount = float32(proxy->upperX - proxy->lowerX + 1) * float32(proxy->upperY - proxy->lowerY + 1);
+	if (cellCount > float32(b2_gridMaxProxyCells))
+	{
+		if (m_oversizedCount == m_oversizedCapacity)
+		{
+			int32* oldOversized = m_oversized;
+			m_oversizedCapacity *= 2;
+			m_oversized = (int32*)b2Alloc(m_oversizedCapacity * sizeof(int32));
+			memcpy(m_oversized, oldOversized, m_oversizedCount * sizeof(int32));
+			b2Free(oldOversized);
+		}
+
+		proxy->cellCount = b2_gridMaxProxyCells + 1;
+		proxy->oversized = m_oversizedCount;
+		m_oversized[m_oversizedCount] = proxyId;
+		++m_oversizedCount;
+		return;
+	}
+
+	proxy->cellCount = (int32)cellCount;
+	proxy->oversized = b2_nullGridProxy;
+
+	for (int32 y = proxy->lowerY; y <= proxy->upperY; ++y)
+	{
+		for (int32 x = proxy->lowerX; x <= proxy->upperX; ++x)
+		{
+			int32 entryId = AllocateEntry();
+			int32 bucket = GetBucket(x, y);
+			b2GridEntry* entry = m_entries + entryId;
+			entry->x = x;
+			entry->y = y;
+			entry->proxyId = proxyId;
+			entry->next = m_buckets[bucket];
+			m_buckets[bucket] = entryId;
+		}
+	}
+
+	// Keep the chains short.
+	if (m_entryCount > m_bucketCount)
+	{
+		Rehash(2 * m_bucketCount);
+	}
+}
+
+void b2UniformGrid::RemoveProxy(int32 proxyId)
+{
+	b2GridProxy* proxy = m_proxies + proxyId;
+	if (proxy->oversized != b2_nullGridProxy)
+	{
+		// Move the last oversized proxy into the hole.
+		int32 lastId = m_oversized[m_oversizedCount - 1];
+		m_oversized[proxy->oversized] = lastId;
+		m_proxies[lastId].oversized = proxy->oversized;
+		--m_oversizedCount;
+		proxy->oversized = b2_nullGridProxy;
+		return;
+	}
+
+	for (int32 y = proxy->lowerY; y <= proxy->upperY; ++y)
+	{
+		for (int32 x = proxy->lowerX; x <= proxy->upperX; ++x)
+		{
+			int32* link = m_buckets + GetBucket(x, y);
+			while (*link != b2_nullGridProxy)
+			{
+				b2GridEntry* entry = m_entries + *link;
+				if (entry->proxyId == proxyId && entry->x == x && entry->y == y)
+				{
+					int32 entryId = *link;
+					*link = entry->next;
+					FreeEntry(entryId);
+					break;
+				}
+				link = &entry->next;
+			}
+		}
+	}
+}
+
+void b2UniformGrid::Rehash(int32 bucketCount)
+{
+	b2Free(m_buckets);
+	m_bucketCount = bucketCount;
+	m_buckets = (int32*)b2Alloc(m_bucketCount * sizeof(int32));
+	for (int32 i = 0; i < m_bucketCount; ++i)
+	{
+		m_buckets[i] = b2_nullGridProxy;
+	}
+
+	for (int32 entryId = 0; entryId < m_entryCapacity; ++entryId)
+	{
+		b2GridEntry* entry = m_entries + entryId;
+		if (entry->proxyId == b2_nullGridProxy)
+		{
+			continue;
+		}
+
+		int32 bucket = GetBucket(entry->x, entry->y);
+		entry->next = m_buckets[bucket];
+		m_buckets[bucket] = entryId;
+	}
+}
+
+int32 b2UniformGrid::CreateProxy(const b2AABB& aabb, void* userData)
+{
+	int32 proxyId = AllocateProxy();
+
+	// Fatten the aabb.
+	b2Vec2 r(b2_aabbExtension, b2_aabbExtension);
+	m_proxies[proxyId].aabb.lowerBound = aabb.lowerBound - r;
+	m_proxies[proxyId].aabb.upperBound = aabb.upperBound + r;
+	m_proxies[proxyId].userData = userData;
+
+	InsertProxy(proxyId);
+
+	return proxyId;
+}
+
+void b2UniformGrid::DestroyProxy(int32 proxyId)
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	b2Assert(m_proxies[proxyId].cellCount >= 0);
+
+	RemoveProxy(proxyId);
+	FreeProxy(proxyId);
+}
+
+bool b2UniformGrid::MoveProxy(int32 proxyId, const b2AABB& aabb, const b2Vec2& displacement)
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	b2Assert(m_proxies[proxyId].cellCount >= 0);
+
+	b2GridProxy* proxy = m_proxies + proxyId;
+	if (proxy->aabb.Contains(aabb))
+	{
+		return false;
+	}
+
+	// Extend AABB.
+	b2AABB b = aabb;
+	b2Vec2 r(b2_aabbExtension, b2_aabbExtension);
+	b.lowerBound = b.lowerBound - r;
+	b.upperBound = b.upperBound + r;
+
+	// Predict AABB displacement.
+	b2Vec2 d = b2_aabbMultiplier * displacement;
+
+	if (d.x < 0.0f)
+	{
+		b.lowerBound.x += d.x;
+	}
+	else
+	{
+		b.upperBound.x += d.x;
+	}
+
+	if (d.y < 0.0f)
+	{
+		b.lowerBound.y += d.y;
+	}
+	else
+	{
+		b.upperBound.y += d.y;
+	}
+
+	// The entries only change if the proxy covers other cells.
+	if (proxy->oversized == b2_nullGridProxy &&
+		GetCell(b.lowerBound.x) == proxy->lowerX && GetCell(b.lowerBound.y) == proxy->lowerY &&
+		GetCell(b.upperBound.x) == proxy->upperX && GetCell(b.upperBound.y) == proxy->upperY)
+	{
+		proxy->aabb = b;
+		return true;
+	}
+
+	RemoveProxy(proxyId);
+	proxy->aabb = b;
+	InsertProxy(proxyId);
+	return true;
+}
+
+void b2UniformGrid::ShiftOrigin(const b2Vec2& newOrigin)
+{
+	for (int32 proxyId = 0; proxyId < m_proxyCapacity; ++proxyId)
+	{
+		b2GridProxy* proxy = m_proxies + proxyId;
+		if (proxy->cellCount < 0)
+		{
+			continue;
+		}
+
+		RemoveProxy(proxyId);
+		proxy->aabb.lowerBound -= newOrigin;
+		proxy->aabb.upperBound -= newOrigin;
+		InsertProxy(proxyId);
+	}
+}
@@ -0,0 +1,450 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+#ifndef B2_UNIFORM_GRID_H
+#define B2_UNIFORM_GRID_H
+
+#include <Box2D/Collision/b2Collision.h>
+
+#define b2_nullGridProxy (-1)
+
+/// Proxies that cover more cells than this are not stored in the cells, but
+/// in a list that every query tests.
+#define b2_gridMaxProxyCells 64
+
+/// Cell coordinates are clamped to [-b2_gridMaxCell, b2_gridMaxCell].
+#define b2_gridMaxCell 1048576.0f
+
+/// A proxy of the uniform grid. The client does not interact with this directly.
+struct b2GridProxy
+{
+	/// Enlarged AABB
+	b2AABB aabb;
+
+	void* userData;
+
+	/// The cells covered by the AABB, bounds included.
+	int32 lowerX, lowerY;
+	int32 upperX, upperY;
+
+	/// The number of cells covered, -1 for a free proxy.
+	int32 cellCount;
+
+	union
+	{
+		/// Index in the oversized list, or b2_nullGridProxy if the proxy is
+		/// stored in the cells.
+		int32 oversized;
+
+		/// Next proxy of the free list.
+		int32 next;
+	};
+};
+
+/// An entry of a proxy in one cell. Entries are chained per hash bucket.
+struct b2GridEntry
+{
+	int32 x, y;
+	int32 proxyId;
+	int32 next;
+};
+
+/// A uniform grid broad-phase, a spatial hash of square cells. Each proxy is
+/// stored in every cell its AABB covers, so queries only visit the cells they
+/// cover. This beats b2DynamicTree when the proxies are of similar size, e.g.
+/// particles of equal radius, with the cell size close to the fat AABB size.
+/// As with the tree the proxy AABBs are fattened, and proxies are only moved
+/// between cells when they leave their fat AABB.
+///
+/// The grid offers the proxy interface of b2DynamicTree. Proxies are pooled,
+/// so we use proxy indices rather than pointers.
+class b2UniformGrid
+{
+public:
+	/// Constructing the grid initializes the proxy pool and the hash table.
+	b2UniformGrid();
+
+	/// Destroy the grid, freeing the pools.
+	~b2UniformGrid();
+
+	/// Set the side length of the cells. The grid must be empty.
+	void SetCellSize(float32 cellSize);
+
+	/// Get the side length of the cells.
+	float32 GetCellSize() const;
+
+	/// Create a proxy. Provide a tight fitting AABB and a userData pointer.
+	int32 CreateProxy(const b2AABB& aabb, void* userData);
+
+	/// Destroy a proxy. This asserts if the id is invalid.
+	void DestroyProxy(int32 proxyId);
+
+	/// Move a proxy with a swepted AABB. If the proxy has moved outside of its
+	/// fattened AABB, then the proxy is moved to the cells of its new fattened
+	/// AABB. Otherwise the function returns immediately.
+	/// @return true if the proxy was moved.
+	bool MoveProxy(int32 proxyId, const b2AABB& aabb1, const b2Vec2& displacement);
+
+	/// Get proxy user data.
+	void* GetUserData(int32 proxyId) const;
+
+	/// Set proxy user data.
+	void SetUserData(int32 proxyId, void* userData);
+
+	/// Make this grid an exact copy of another grid, keeping the proxy ids.
+	/// The user data pointers are copied as is.
+	void CopyFrom(const b2UniformGrid& grid);
+
+	/// Get the fat AABB for a proxy.
+	const b2AABB& GetFatAABB(int32 proxyId) const;
+
+	/// Query an AABB for overlapping proxies. The callback class
+	/// is called once for each proxy that overlaps the supplied AABB.
+	template <typename T>
+	void Query(T* callback, const b2AABB& aabb) const;
+
+	/// Ray-cast against the proxies in the grid, walking the cells along the
+	/// ray. The callback is called once for each proxy whose AABB the ray
+	/// hits, as with b2DynamicTree::RayCast.
+	/// @param input the ray-cast input data. The ray extends from p1 to p1 + maxFraction * (p2 - p1).
+	/// @param callback a callback class that is called for each proxy that is hit by the ray.
+	template <typename T>
+	void RayCast(T* callback, const b2RayCastInput& input) const;
+
+	/// Shift the world origin. Useful for large worlds.
+	/// The shift formula is: position -= newOrigin
+	/// @param newOrigin the new origin with respect to the old origin
+	void ShiftOrigin(const b2Vec2& newOrigin);
+
+private:
+
+	int32 AllocateProxy();
+	void FreeProxy(int32 proxyId);
+
+	int32 AllocateEntry();
+	void FreeEntry(int32 entryId);
+
+	void InsertProxy(int32 proxyId);
+	void RemoveProxy(int32 proxyId);
+
+	void Rehash(int32 bucketCount);
+
+	int32 GetCell(float32 coordinate) const;
+	int32 GetBucket(int32 x, int32 y) const;
+
+	template <typename T>
+	bool RayCastProxy(T* callback, const b2RayCastInput& input, int32 proxyId, const b2Vec2& v,
+					  float32* maxFraction, b2AABB* segmentAABB) const;
+
+	float32 m_cellSize;
+	float32 m_inverseCellSize;
+
+	b2GridProxy* m_proxies;
+	int32 m_proxyCount;
+	int32 m_proxyCapacity;
+	int32 m_freeProxy;
+
+	b2GridEntry* m_entries;
+	int32 m_entryCount;
+	int32 m_entryCapacity;
+	int32 m_freeEntry;
+
+	// Heads of the entry chains, a power of two of them.
+	int32* m_buckets;
+	int32 m_bucketCount;
+
+	int32* m_oversized;
+	int32 m_oversizedCount;
+	int32 m_oversizedCapacity;
+};
+
+inline float32 b2UniformGrid::GetCellSize() const
+{
+	return m_cellSize;
+}
+
+inline void* b2UniformGrid::GetUserData(int32 proxyId) const
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	return m_proxies[proxyId].userData;
+}
+
+inline void b2UniformGrid::SetUserData(int32 proxyId, void* userData)
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	m_proxies[proxyId].userData = userData;
+}
+
+inline const b2AABB& b2UniformGrid::GetFatAABB(int32 proxyId) const
+{
+	b2Assert(0 <= proxyId && proxyId < m_proxyCapacity);
+	return m_proxies[proxyId].aabb;
+}
+
+inline int32 b2UniformGrid::GetCell(float32 coordinate) const
+{
+	float32 cell = b2Clamp(coordinate * m_inverseCellSize, -b2_gridMaxCell, b2_gridMaxCell);
+	return (int32)floorf(cell);
+}
+
+inline int32 b2UniformGrid::GetBucket(int32 x, int32 y) const
+{
+	uint32 hash = ((uint32)x * 73856093u) ^ ((uint32)y * 19349663u);
+	return (int32)(hash & (uint32)(m_bucketCount - 1));
+}
+
+template <typename T>
+inline void b2UniformGrid::Query(T* callback, const b2AABB& aabb) const
+{
+	for (int32 i = 0; i < m_oversizedCount; ++i)
+	{
+		int32 proxyId = m_oversized[i];
+		if (b2TestOverlap(m_proxies[proxyId].aabb, aabb))
+		{
+			if (callback->QueryCallback(proxyId) == false)
+			{
+				return;
+			}
+		}
+	}
+
+	int32 lowerX = GetCell(aabb.lowerBound.x);
+	int32 lowerY = GetCell(aabb.lowerBound.y);
+	int32 upperX = GetCell(aabb.upperBound.x);
+	int32 upperY = GetCell(aabb.upperBound.y);
+
+	// Visit the proxies instead of the cells if there are fewer of them.
+	float32 cellCount = float32(upperX - lowerX + 1) * float32(upperY - lowerY + 1);
+	if (cellCount > float32(m_proxyCount))
+	{
+		for (int32 proxyId = 0; proxyId < m_proxyCapacity; ++proxyId)
+		{
+			const b2GridProxy* proxy = m_proxies + proxyId;
+			if (proxy->cellCount < 0 || proxy->oversized != b2_nullGridProxy)
+			{
+				continue;
+			}
+
+			if (b2TestOverlap(proxy->aabb, aabb))
+			{
+				if (callback->QueryCallback(proxyId) == false)
+				{
+					return;
+				}
+			}
+		}
+		return;
+	}
+
+	for (int32 y = lowerY; y <= upperY; ++y)
+	{
+		for (int32 x = lowerX; x <= upperX; ++x)
+		{
+			int32 entryId = m_buckets[GetBucket(x, y)];
+			while (entryId != b2_nullGridProxy)
+			{
+				const b2GridEntry* entry = m_entries + entryId;
+				entryId = entry->next;
+				if (entry->x != x || entry->y != y)
+				{
+					continue;
+				}
+
+				// Report a proxy only in the lowest cell it shares with the query.
+				const b2GridProxy* proxy = m_proxies + entry->proxyId;
+				if (x != b2Max(lowerX, proxy->lowerX) || y != b2Max(lowerY, proxy->lowerY))
+				{
+					continue;
+				}
+
+				if (b2TestOverlap(proxy->aabb, aabb))
+				{
+					if (callback->QueryCallback(entry->proxyId) == false)
+					{
+						return;
+					}
+				}
+			}
+		}
+	}
+}
+
+// The proxy test of b2DynamicTree::RayCast. Returns false if the client has
+// terminated the ray cast.
+template <typename T>
+inline bool b2UniformGrid::RayCastProxy(T* callback, const b2RayCastInput& input, int32 proxyId,
+										const b2Vec2& v, float32* maxFraction, b2AABB* segmentAABB) const
+{
+	const b2AABB& aabb = m_proxies[proxyId].aabb;
+	if (b2TestOverlap(aabb, *segmentAABB) == false)
+	{
+		return true;
+	}
+
+	// Separating axis for segment (Gino, p80).
+	// |dot(v, p1 - c)| > dot(|v|, h)
+	b2Vec2 c = aabb.GetCenter();
+	b2Vec2 h = aabb.GetExtents();
+	float32 separation = b2Abs(b2Dot(v, input.p1 - c)) - b2Dot(b2Abs(v), h);
+	if (separation > 0.0f)
+	{
+		return true;
+	}
+
+	b2RayCastInput subInput;
+	subInput.p1 = input.p1;
+	subInput.p2 = input.p2;
+	subInput.maxFraction = *maxFraction;
+
+	float32 value = callback->RayCastCallback(subInput, proxyId);
+
+	if (value == 0.0f)
+	{
+		// The client has terminated the ray cast.
+		return false;
+	}
+
+	if (value > 0.0f)
+	{
+		// Update segment bounding box.
+		*maxFraction = value;
+		b2Vec2 t = input.p1 + value * (input.p2 - input.p1);
+		segmentAABB->lowerBound = b2Min(input.p1, t);
+		segmentAABB->upperBound = b2Max(input.p1, t);
+	}
+
+	return true;
+}
+
+template <typename T>
+inline void b2UniformGrid::RayCast(T* callback, const b2RayCastInput& input) const
+{
+	b2Vec2 p1 = input.p1;
+	b2Vec2 d = input.p2 - p1;
+	b2Assert(d.LengthSquared() > 0.0f);
+
+	// v is perpendicular to the segment.
+	b2Vec2 r = d;
+	r.Normalize();
+	b2Vec2 v = b2Cross(1.0f, r);
+
+	float32 maxFraction = input.maxFraction;
+
+	// Build a bounding box for the segment.
+	b2AABB segmentAABB;
+	{
+		b2Vec2 t = p1 + maxFraction * d;
+		segmentAABB.lowerBound = b2Min(p1, t);
+		segmentAABB.upperBound = b2Max(p1, t);
+	}
+
+	for (int32 i = 0; i < m_oversizedCount; ++i)
+	{
+		if (RayCastProxy(callback, input, m_oversized[i], v, &maxFraction, &segmentAABB) == false)
+		{
+			return;
+		}
+	}
+
+	int32 x = GetCell(p1.x);
+	int32 y = GetCell(p1.y);
+	b2Vec2 end = p1 + maxFraction * d;
+	int32 endX = GetCell(end.x);
+	int32 endY = GetCell(end.y);
+	int32 cellCount = b2Abs(endX - x) + b2Abs(endY - y) + 1;
+
+	// Visit the proxies instead of the cells if there are fewer of them.
+	if (cellCount > m_proxyCount)
+	{
+		for (int32 proxyId = 0; proxyId < m_proxyCapacity; ++proxyId)
+		{
+			const b2GridProxy* proxy = m_proxies + proxyId;
+			if (proxy->cellCount < 0 || proxy->oversized != b2_nullGridProxy)
+			{
+				continue;
+			}
+
+			if (RayCastProxy(callback, input, proxyId, v, &maxFraction, &segmentAABB) == false)
+			{
+				return;
+			}
+		}
+		return;
+	}
+
+	// Walk the cells along the segment (Amanatides and Woo). The walk is
+	// monotone, so it enters the cells of each proxy once.
+	int32 stepX = d.x > 0.0f ? 1 : -1;
+	int32 stepY = d.y > 0.0f ? 1 : -1;
+	float32 deltaX = d.x != 0.0f ? b2Abs(m_cellSize / d.x) : b2_maxFloat;
+	float32 deltaY = d.y != 0.0f ? b2Abs(m_cellSize / d.y) : b2_maxFloat;
+	float32 nextX = d.x != 0.0f ? ((x + (stepX > 0 ? 1 : 0)) * m_cellSize - p1.x) / d.x : b2_maxFloat;
+	float32 nextY = d.y != 0.0f ? ((y + (stepY > 0 ? 1 : 0)) * m_cellSize - p1.y) / d.y : b2_maxFloat;
+
+	int32 previousX = x;
+	int32 previousY = y;
+	for (int32 i = 0; i < cellCount; ++i)
+	{
+		int32 entryId = m_buckets[GetBucket(x, y)];
+		while (entryId != b2_nullGridProxy)
+		{
+			const b2GridEntry* entry = m_entries + entryId;
+			entryId = entry->next;
+			if (entry->x != x || entry->y != y)
+			{
+				continue;
+			}
+
+			// Report a proxy only in the first cell of the walk it covers.
+			const b2GridProxy* proxy = m_proxies + entry->proxyId;
+			if (i > 0 &&
+				proxy->lowerX <= previousX && previousX <= proxy->upperX &&
+				proxy->lowerY <= previousY && previousY <= proxy->upperY)
+			{
+				continue;
+			}
+
+			if (RayCastProxy(callback, input, entry->proxyId, v, &maxFraction, &segmentAABB) == false)
+			{
+				return;
+			}
+		}
+
+		if (b2Min(nextX, nextY) > maxFraction)
+		{
+			break;
+		}
+
+		previousX = x;
+		previousY = y;
+		if (nextX < nextY)
+		{
+			x += stepX;
+			nextX += deltaX;
+		}
+		else
+		{
+			y += stepY;
+			nextY += deltaY;
+		}
+	}
+}
+
+#endif
@@ -27,8 +27,19 @@
 
 #ifdef USE_EXCEPTIONS
 #include <Python.h>
-class b2AssertException {};
-#define b2Assert(A) if (!(A)) { PyErr_SetString(PyExc_AssertionError, #A); throw b2AssertException(); }
+/// Thrown by failed assertions, and turned into a Python AssertionError by the
+/// wrapper. It does not touch the interpreter, so it may be thrown by threads
+/// that do not hold the GIL.
+class b2AssertException
+{
+public:
+	b2AssertException(const char* message) : m_message(message) {}
+	const char* what() const { return m_message; }
+
+private:
+	const char* m_message;
+};
+#define b2Assert(A) if (!(A)) { throw b2AssertException(#A); }
 #else
 #define b2Assert(A) assert(A)
 #endif
@@ -39,6 +50,7 @@ typedef signed int int32;
 typedef unsigned char uint8;
 typedef unsigned short uint16;
 typedef unsigned int uint32;
+typedef unsigned long long uint64;
 typedef float float32;
 typedef double float64;
 
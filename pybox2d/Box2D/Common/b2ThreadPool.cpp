@@ -0,0 +1,151 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+
+#include <Box2D/Common/b2ThreadPool.h>
+
+b2ThreadPool::b2ThreadPool(int32 threadCount)
+{
+	b2Assert(threadCount > 0);
+
+	m_threadCount = threadCount;
+	m_generation = 0;
+	m_busyWorkers = 0;
+	m_stop = false;
+
+	m_callback = NULL;
+	m_context = NULL;
+	m_taskCount = 0;
+	m_nextTask = 0;
+
+	m_workers = new std::thread[m_threadCount - 1];
+	for (int32 i = 1; i < m_threadCount; ++i)
+	{
+		m_workers[i - 1] = std::thread(&b2ThreadPool::WorkerMain, this, i);
+	}
+}
+
+b2ThreadPool::~b2ThreadPool()
+{
+	{
+		std::lock_guard<std::mutex> lock(m_mutex);
+		m_stop = true;
+	}
+	m_wake.notify_all();
+
+	for (int32 i = 0; i < m_threadCount - 1; ++i)
+	{
+		m_workers[i].join();
+	}
+	delete [] m_workers;
+}
+
+void b2ThreadPool::ParallelFor(b2TaskCallback* callback, void* context, int32 count)
+{
+	if (count == 0)
+	{
+		return;
+	}
+
+	{
+		std::lock_guard<std::mutex> lock(m_mutex);
+		m_callback = callback;
+		m_context = context;
+		m_taskCount = count;
+		m_nextTask = 0;
+		m_exception = std::exception_ptr();
+		m_busyWorkers = m_threadCount - 1;
+		++m_generation;
+	}
+	m_wake.notify_all();
+
+	RunTasks(0);
+
+	std::exception_ptr exception;
+	{
+		std::unique_lock<std::mutex> lock(m_mutex);
+		while (m_busyWorkers > 0)
+		{
+			m_done.wait(lock);
+		}
+		exception = m_exception;
+		m_exception = std::exception_ptr();
+	}
+
+	if (exception)
+	{
+		std::rethrow_exception(exception);
+	}
+}
+
+void b2ThreadPool::WorkerMain(int32 threadIndex)
+{
+	uint32 generation = 0;
+	for (;;)
+	{
+		{
+			std::unique_lock<std::mutex> lock(m_mutex);
+			while (m_stop == false && m_generation == generation)
+			{
+				m_wake.wait(lock);
+			}
+
+			if (m_stop)
+			{
+				return;
+			}
+
+			generation = m_generation;
+		}
+
+		RunTasks(threadIndex);
+
+		std::lock_guard<std::mutex> lock(m_mutex);
+		if (--m_busyWorkers == 0)
+		{
+			m_done.notify_one();
+		}
+	}
+}
+
+void b2ThreadPool::RunTasks(int32 threadIndex)
+{
+	for (;;)
+	{
+		int32 index = m_nextTask++;
+		if (index >= m_taskCount)
+		{
+			return;
+		}
+
+		try
+		{
+			m_callback(m_context, index, threadIndex);
+		}
+		catch (...)
+		{
+			std::lock_guard<std::mutex> lock(m_mutex);
+			if (!m_exception)
+			{
+				m_exception = std::current_exception();
+			}
+		}
+	}
+}
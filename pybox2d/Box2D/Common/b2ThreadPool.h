@@ -0,0 +1,76 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+#ifndef B2_THREAD_POOL_H
+#define B2_THREAD_POOL_H
+
+#include <Box2D/Common/b2Settings.h>
+#include <atomic>
+#include <condition_variable>
+#include <exception>
+#include <mutex>
+#include <thread>
+
+/// A task run by the thread pool. The index is the task index, the thread
+/// index identifies the thread running it: 0 is the calling thread and
+/// 1 to threadCount - 1 are the workers.
+typedef void b2TaskCallback(void* context, int32 index, int32 threadIndex);
+
+/// A fixed-size pool of native threads, used to run independent tasks in
+/// parallel. The thread calling ParallelFor takes part in the work, so a pool
+/// of n threads owns n - 1 workers.
+class b2ThreadPool
+{
+public:
+	b2ThreadPool(int32 threadCount);
+	~b2ThreadPool();
+
+	/// Get the number of threads, including the calling thread.
+	int32 GetThreadCount() const { return m_threadCount; }
+
+	/// Run callback(context, i, threadIndex) for every i in [0, count) and
+	/// wait for all of them to finish. Tasks are handed out in index order.
+	/// If a task throws, the first exception is rethrown here once all tasks
+	/// are done.
+	void ParallelFor(b2TaskCallback* callback, void* context, int32 count);
+
+private:
+
+	void WorkerMain(int32 threadIndex);
+	void RunTasks(int32 threadIndex);
+
+	int32 m_threadCount;
+	std::thread* m_workers;
+
+	std::mutex m_mutex;
+	std::condition_variable m_wake;
+	std::condition_variable m_done;
+	uint32 m_generation;
+	int32 m_busyWorkers;
+	bool m_stop;
+
+	b2TaskCallback* m_callback;
+	void* m_context;
+	int32 m_taskCount;
+	std::atomic<int32> m_nextTask;
+	std::exception_ptr m_exception;
+};
+
+#endif
@@ -158,11 +158,26 @@ b2Contact::b2Contact(b2Fixture* fA, int32 indexA, b2Fixture* fB, int32 indexB)
     m_userData = 0.0f;
 }
 
+uint64 b2Contact::GetKey(int32 index) const
+{
+	b2Assert(0 <= index && index < m_manifold.pointCount);
+	// At most one of the fixtures is a chain, the other child index is 0.
+	return b2MakeContactKey(m_fixtureA->GetBody()->m_userId, m_fixtureB->GetBody()->m_userId,
+							m_indexA + m_indexB, m_manifold.points[index].id);
+}
+
 // Update the contact manifold and touching status.
 // Note: do not assume the fixture AABBs are overlapping or are valid.
 void b2Contact::Update(b2ContactListener* listener)
 {
-	b2Manifold oldManifold = m_manifold;
+	b2Manifold oldManifold;
+	bool wasTouching = UpdateManifold(&oldManifold);
+	ReportUpdate(listener, wasTouching, &oldManifold);
+}
+
+bool b2Contact::UpdateManifold(b2Manifold* oldManifold)
+{
+	*oldManifold = m_manifold;
 
 	// Re-enable this contact.
 	m_flags |= e_enabledFlag;
@@ -203,9 +218,9 @@ void b2Contact::Update(b2ContactListener* listener)
 			mp2->tangentImpulse = 0.0f;
 			b2ContactID id2 = mp2->id;
 
-			for (int32 j = 0; j < oldManifold.pointCount; ++j)
+			for (int32 j = 0; j < oldManifold->pointCount; ++j)
 			{
-				b2ManifoldPoint* mp1 = oldManifold.points + j;
+				b2ManifoldPoint* mp1 = oldManifold->points + j;
 
 				if (mp1->id.key == id2.key)
 				{
@@ -215,12 +230,6 @@ void b2Contact::Update(b2ContactListener* listener)
 				}
 			}
 		}
-
-		if (touching != wasTouching)
-		{
-			bodyA->SetAwake(true);
-			bodyB->SetAwake(true);
-		}
 	}
 
 	if (touching)
@@ -232,6 +241,20 @@ void b2Contact::Update(b2ContactListener* listener)
 		m_flags &= ~e_touchingFlag;
 	}
 
+	return wasTouching;
+}
+
+void b2Contact::ReportUpdate(b2ContactListener* listener, bool wasTouching, const b2Manifold* oldManifold)
+{
+	bool touching = (m_flags & e_touchingFlag) == e_touchingFlag;
+	bool sensor = m_fixtureA->IsSensor() || m_fixtureB->IsSensor();
+
+	if (sensor == false && touching != wasTouching)
+	{
+		m_fixtureA->GetBody()->SetAwake(true);
+		m_fixtureB->GetBody()->SetAwake(true);
+	}
+
 	if (wasTouching == false && touching == true && listener)
 	{
 		listener->BeginContact(this);
@@ -244,6 +267,6 @@ void b2Contact::Update(b2ContactListener* listener)
 
 	if (sensor == false && touching && listener)
 	{
-		listener->PreSolve(this, &oldManifold);
+		listener->PreSolve(this, oldManifold);
 	}
 }
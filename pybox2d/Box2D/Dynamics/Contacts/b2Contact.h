@@ -71,6 +71,31 @@ struct b2ContactEdge
 	b2ContactEdge* next;	///< the next contact edge in the body's contact list
 };
 
+/// The number of bits of the body user ids and of the child index in a
+/// contact key, see b2MakeContactKey.
+#define b2_contactKeyIdBits		21
+#define b2_contactKeyChildBits	12
+
+/// Make the key of a manifold point, which identifies it for as long as the
+/// contact persists and the point keeps its contact feature, and is the same
+/// in a clone of the world. From the high bits to the low bits it packs the
+/// user ids of body A and B (21 bits each), the child index of the chain
+/// fixture if any (12 bits) and the contact feature (1 bit per feature type
+/// and 4 bits per feature index). The keys of a world are unique as long as
+/// the user ids are in [0, 2^21 - 1), chains have at most 4096 edges and no
+/// two fixtures of a body touch the same fixture; user id -1 (unset) maps
+/// to 2^21 - 1.
+inline uint64 b2MakeContactKey(int32 idA, int32 idB, int32 childIndex, b2ContactID id)
+{
+	const uint64 idMask = (1ull << b2_contactKeyIdBits) - 1;
+	const uint64 childMask = (1ull << b2_contactKeyChildBits) - 1;
+	uint64 feature = ((uint64)(id.cf.typeA & 1) << 9) | ((uint64)(id.cf.typeB & 1) << 8) |
+		((uint64)(id.cf.indexA & 15) << 4) | (uint64)(id.cf.indexB & 15);
+	return (((uint64)idA & idMask) << (64 - b2_contactKeyIdBits)) |
+		(((uint64)idB & idMask) << (64 - 2 * b2_contactKeyIdBits)) |
+		(((uint64)childIndex & childMask) << 10) | feature;
+}
+
 /// The class manages contact between two shapes. A contact exists for each overlapping
 /// AABB in the broad-phase (except if filtered). Therefore a contact object may exist
 /// that has no contact points.
@@ -115,6 +140,10 @@ public:
 	/// Get the child primitive index for fixture B.
 	int32 GetChildIndexB() const;
 
+	/// Get the key of a manifold point, see b2MakeContactKey.
+	/// @param index the index of the point in the manifold.
+	uint64 GetKey(int32 index) const;
+
 	/// Override the default friction mixture. You can call this in b2ContactListener::PreSolve.
 	/// This value persists until set or reset.
 	void SetFriction(float32 friction);
@@ -195,6 +224,13 @@ protected:
 
 	void Update(b2ContactListener* listener);
 
+	// The two halves of Update. UpdateManifold only writes to this contact,
+	// so different contacts can be updated in parallel. It saves the previous
+	// manifold and returns whether the contact was touching, for
+	// ReportUpdate to wake the bodies and call the listener.
+	bool UpdateManifold(b2Manifold* oldManifold);
+	void ReportUpdate(b2ContactListener* listener, bool wasTouching, const b2Manifold* oldManifold);
+
 	static b2ContactRegister s_registers[b2Shape::e_typeCount][b2Shape::e_typeCount];
 	static bool s_initialized;
 
@@ -23,6 +23,14 @@
 #include <Box2D/Dynamics/b2Fixture.h>
 #include <Box2D/Dynamics/b2World.h>
 #include <Box2D/Common/b2StackAllocator.h>
+#include <Box2D/Common/b2ThreadPool.h>
+
+#if defined(__SSE2__) || defined(_M_X64) || (defined(_M_IX86_FP) && _M_IX86_FP >= 2)
+#define B2_SSE2
+#include <emmintrin.h>
+#endif
+
+#include <algorithm>
 
 #define B2_DEBUG_SOLVER 0
 
@@ -41,6 +49,121 @@ struct b2ContactPositionConstraint
 	int32 pointCount;
 };
 
+static bool b2WarmStartImpulseLessThan(const b2WarmStartImpulse& a, const b2WarmStartImpulse& b)
+{
+	if (a.idA != b.idA)
+	{
+		return a.idA < b.idA;
+	}
+	return a.idB < b.idB;
+}
+
+// Find the impulse closest to point among those given for the body pair (idA, idB).
+static const b2WarmStartImpulse* b2FindWarmStartImpulse(const b2TimeStep& step, int32 idA, int32 idB, const b2Vec2& point)
+{
+	b2WarmStartImpulse key;
+	key.idA = idA;
+	key.idB = idB;
+
+	const b2WarmStartImpulse* end = step.warmStartImpulses + step.warmStartImpulseCount;
+	const b2WarmStartImpulse* it = std::lower_bound(step.warmStartImpulses, end, key, b2WarmStartImpulseLessThan);
+
+	const b2WarmStartImpulse* best = NULL;
+	float32 bestDistanceSquared = b2_maxFloat;
+	for (; it != end && it->idA == idA && it->idB == idB; ++it)
+	{
+		b2Vec2 d(it->px - point.x, it->py - point.y);
+		float32 distanceSquared = b2Dot(d, d);
+		if (distanceSquared < bestDistanceSquared)
+		{
+			best = it;
+			bestDistanceSquared = distanceSquared;
+		}
+	}
+	return best;
+}
+
+static bool b2WarmStartImpulseKeyLessThan(const b2WarmStartImpulse& a, const b2WarmStartImpulse& b)
+{
+	return a.key < b.key;
+}
+
+// Find the impulse given for the manifold point with the given key.
+static const b2WarmStartImpulse* b2FindKeyedWarmStartImpulse(const b2TimeStep& step, uint64 key)
+{
+	b2WarmStartImpulse value;
+	value.key = key;
+
+	const b2WarmStartImpulse* end = step.warmStartImpulses + step.warmStartImpulseCount;
+	const b2WarmStartImpulse* it = std::lower_bound(step.warmStartImpulses, end, value, b2WarmStartImpulseKeyLessThan);
+	return it != end && it->key == key ? it : NULL;
+}
+
+void b2SortWarmStartImpulses(b2WarmStartImpulse* impulses, int32 count, bool byKey)
+{
+	if (byKey)
+	{
+		std::stable_sort(impulses, impulses + count, b2WarmStartImpulseKeyLessThan);
+	}
+	else
+	{
+		std::stable_sort(impulses, impulses + count, b2WarmStartImpulseLessThan);
+	}
+}
+
+// Find the first of the nodes weighted along one axis of a field and their
+// weights, for the fractional node coordinate f. The nodes past the border
+// of the grid are replaced by the border node.
+static int32 b2FieldWeights(const b2WarmStartField& field, int32 count, float32 f, int32* nodes, float32* weights)
+{
+	f = b2Clamp(f, 0.0f, (float32)(count - 1));
+	int32 i = b2Min((int32)f, b2Max(count - 2, 0));
+	float32 t = f - i;
+
+	if (field.interpolation == b2_bicubicInterpolation)
+	{
+		float32 t2 = t * t, t3 = t2 * t;
+		weights[0] = 0.5f * (-t3 + 2.0f * t2 - t);
+		weights[1] = 0.5f * (3.0f * t3 - 5.0f * t2 + 2.0f);
+		weights[2] = 0.5f * (-3.0f * t3 + 4.0f * t2 + t);
+		weights[3] = 0.5f * (t3 - t2);
+		for (int32 k = 0; k < 4; ++k)
+		{
+			nodes[k] = b2Clamp(i - 1 + k, 0, count - 1);
+		}
+		return 4;
+	}
+
+	weights[0] = 1.0f - t;
+	weights[1] = t;
+	nodes[0] = i;
+	nodes[1] = b2Min(i + 1, count - 1);
+	return 2;
+}
+
+void b2SampleWarmStartField(const b2WarmStartField& field, const b2Vec2& point,
+							float32* normalImpulse, float32* tangentImpulse)
+{
+	int32 nodesX[4], nodesY[4];
+	float32 weightsX[4], weightsY[4];
+	int32 countX = b2FieldWeights(field, field.countX, (point.x - field.lowerX) / field.resX, nodesX, weightsX);
+	int32 countY = b2FieldWeights(field, field.countY, (point.y - field.lowerY) / field.resY, nodesY, weightsY);
+
+	float32 normal = 0.0f, tangent = 0.0f;
+	for (int32 i = 0; i < countX; ++i)
+	{
+		const float32* row = field.data + 2 * nodesX[i] * field.countY;
+		for (int32 j = 0; j < countY; ++j)
+		{
+			float32 w = weightsX[i] * weightsY[j];
+			normal += w * row[2 * nodesY[j]];
+			tangent += w * row[2 * nodesY[j] + 1];
+		}
+	}
+	*normalImpulse = b2Max(normal, 0.0f);
+	*tangentImpulse = tangent;
+}
+
 b2ContactSolver::b2ContactSolver(b2ContactSolverDef* def)
 {
 	m_step = def->step;
@@ -70,24 +193,34 @@ b2ContactSolver::b2ContactSolver(b2ContactSolverDef* def)
 		int32 pointCount = manifold->pointCount;
 		b2Assert(pointCount > 0);
 
+		int32 indexA = bodyA->m_islandIndex;
+		int32 indexB = bodyB->m_islandIndex;
+		if (def->bodyIndices)
+		{
+			indexA = def->bodyIndices[2 * i];
+			indexB = def->bodyIndices[2 * i + 1];
+		}
+
 		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
 		vc->friction = contact->m_friction;
 		vc->restitution = contact->m_restitution;
 		vc->tangentSpeed = contact->m_tangentSpeed;
-		vc->indexA = bodyA->m_islandIndex;
-		vc->indexB = bodyB->m_islandIndex;
+		vc->indexA = indexA;
+		vc->indexB = indexB;
 		vc->invMassA = bodyA->m_invMass;
 		vc->invMassB = bodyB->m_invMass;
 		vc->invIA = bodyA->m_invI;
 		vc->invIB = bodyB->m_invI;
 		vc->contactIndex = i;
 		vc->pointCount = pointCount;
+		vc->lambdaTwoNorm = 0.0f;
+		vc->lambdaInfNorm = 0.0f;
 		vc->K.SetZero();
 		vc->normalMass.SetZero();
 
 		b2ContactPositionConstraint* pc = m_positionConstraints + i;
-		pc->indexA = bodyA->m_islandIndex;
-		pc->indexB = bodyB->m_islandIndex;
+		pc->indexA = indexA;
+		pc->indexB = indexB;
 		pc->invMassA = bodyA->m_invMass;
 		pc->invMassB = bodyB->m_invMass;
 		pc->localCenterA = bodyA->m_sweep.localCenter;
@@ -126,14 +259,191 @@ b2ContactSolver::b2ContactSolver(b2ContactSolverDef* def)
 			pc->localPoints[j] = cp->localPoint;
 		}
 	}
+
+	m_colorConstraints = NULL;
+	m_colorOffsets = NULL;
+	m_colorCount = 0;
+	m_groups = NULL;
+	m_colorGroupOffsets = NULL;
+	m_colorGroupedCounts = NULL;
+	m_groupsInitialized = false;
+	m_threadLambdas = NULL;
+	if (m_step.coloredSolver && m_count > 0)
+	{
+		ColorConstraints();
+	}
+
+	m_accelImpulses = NULL;
+	m_accelIteration = 0;
+	m_accelTheta = 1.0f;
+	m_accelResidual = 0.0f;
+	if ((m_step.solverType == b2_nesterovSolver || m_step.solverType == b2_nncgSolver) && m_count > 0)
+	{
+		int32 impulseCount = 2 * b2_maxManifoldPoints * m_count;
+		m_accelImpulses = (float32*)m_allocator->Allocate(3 * impulseCount * sizeof(float32));
+		memset(m_accelImpulses, 0, 3 * impulseCount * sizeof(float32));
+	}
 }
 
 b2ContactSolver::~b2ContactSolver()
 {
+	if (m_accelImpulses)
+	{
+		m_allocator->Free(m_accelImpulses);
+	}
+
+	if (m_threadLambdas)
+	{
+		m_allocator->Free(m_threadLambdas);
+	}
+
+	if (m_groups)
+	{
+		m_allocator->Free(m_groups);
+		m_allocator->Free(m_colorGroupedCounts);
+		m_allocator->Free(m_colorGroupOffsets);
+	}
+
+	if (m_colorConstraints)
+	{
+		m_allocator->Free(m_colorOffsets);
+		m_allocator->Free(m_colorConstraints);
+	}
+
 	m_allocator->Free(m_velocityConstraints);
 	m_allocator->Free(m_positionConstraints);
 }
 
+void b2ContactSolver::ColorConstraints()
+{
+	const int32 overflowColor = b2_constraintColorCount - 1;
+
+	int32 bodyCount = 0;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		bodyCount = b2Max(bodyCount, b2Max(vc->indexA, vc->indexB) + 1);
+	}
+
+	m_colorConstraints = (int32*)m_allocator->Allocate(m_count * sizeof(int32));
+	m_colorOffsets = (int32*)m_allocator->Allocate((b2_constraintColorCount + 1) * sizeof(int32));
+	memset(m_colorOffsets, 0, (b2_constraintColorCount + 1) * sizeof(int32));
+
+	// Single point constraints are grouped for the SIMD solver, except in
+	// the last color which is solved sequentially. The groups keep their
+	// impulses between sweeps, so only plain PGS uses them.
+	bool simd = m_step.simdSolver && m_step.solverType == b2_pgsSolver;
+	int32* groupOffsets = NULL;
+	int32* groupedCounts = NULL;
+	if (simd)
+	{
+		groupOffsets = (int32*)m_allocator->Allocate((b2_constraintColorCount + 1) * sizeof(int32));
+		groupedCounts = (int32*)m_allocator->Allocate(b2_constraintColorCount * sizeof(int32));
+		memset(groupedCounts, 0, b2_constraintColorCount * sizeof(int32));
+	}
+
+	// The colors used by each body, and the color of each constraint
+	uint32* bodyColors = (uint32*)m_allocator->Allocate(bodyCount * sizeof(uint32));
+	int32* colors = (int32*)m_allocator->Allocate(m_count * sizeof(int32));
+	memset(bodyColors, 0, bodyCount * sizeof(uint32));
+
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+
+		// Bodies without mass are never written, they do not take colors.
+		bool massA = vc->invMassA != 0.0f || vc->invIA != 0.0f;
+		bool massB = vc->invMassB != 0.0f || vc->invIB != 0.0f;
+
+		uint32 used = 0;
+		if (massA)
+		{
+			used |= bodyColors[vc->indexA];
+		}
+		if (massB)
+		{
+			used |= bodyColors[vc->indexB];
+		}
+
+		int32 color = 0;
+		while (color < overflowColor && (used & (1u << color)))
+		{
+			++color;
+		}
+
+		if (color < overflowColor)
+		{
+			if (massA)
+			{
+				bodyColors[vc->indexA] |= 1u << color;
+			}
+			if (massB)
+			{
+				bodyColors[vc->indexB] |= 1u << color;
+			}
+		}
+
+		colors[i] = color;
+		++m_colorOffsets[color + 1];
+		m_colorCount = b2Max(m_colorCount, color + 1);
+
+		if (simd && vc->pointCount == 1 && color < overflowColor)
+		{
+			++groupedCounts[color];
+		}
+	}
+
+	for (int32 i = 0; i < b2_constraintColorCount; ++i)
+	{
+		m_colorOffsets[i + 1] += m_colorOffsets[i];
+	}
+
+	// Sort the constraints by color, keeping their order within a color.
+	// Grouped constraints come first in their color.
+	int32* next = (int32*)m_allocator->Allocate(b2_constraintColorCount * sizeof(int32));
+	memcpy(next, m_colorOffsets, b2_constraintColorCount * sizeof(int32));
+	if (simd)
+	{
+		for (int32 i = 0; i < m_count; ++i)
+		{
+			if (m_velocityConstraints[i].pointCount == 1 && colors[i] < overflowColor)
+			{
+				m_colorConstraints[next[colors[i]]++] = i;
+			}
+		}
+	}
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		if (simd == false || m_velocityConstraints[i].pointCount != 1 || colors[i] == overflowColor)
+		{
+			m_colorConstraints[next[colors[i]]++] = i;
+		}
+	}
+
+	m_allocator->Free(next);
+	m_allocator->Free(colors);
+	m_allocator->Free(bodyColors);
+
+	if (simd)
+	{
+		groupOffsets[0] = 0;
+		for (int32 i = 0; i < b2_constraintColorCount; ++i)
+		{
+			groupOffsets[i + 1] = groupOffsets[i] + (groupedCounts[i] + 3) / 4;
+		}
+
+		int32 groupCount = groupOffsets[b2_constraintColorCount];
+		m_groups = (b2ContactConstraintGroup*)m_allocator->Allocate(groupCount * sizeof(b2ContactConstraintGroup));
+		m_colorGroupOffsets = groupOffsets;
+		m_colorGroupedCounts = groupedCounts;
+	}
+
+	if (m_step.threadPool)
+	{
+		m_threadLambdas = (float32*)m_allocator->Allocate(2 * m_step.threadPool->GetThreadCount() * sizeof(float32));
+	}
+}
+
 // Initialize position dependent portions of the velocity constraints.
 void b2ContactSolver::InitializeVelocityConstraints()
 {
@@ -179,11 +489,35 @@ void b2ContactSolver::InitializeVelocityConstraints()
 
 		vc->normal = worldManifold.normal;
 
+		// Override the warm starting impulses with the given ones, if any.
+		const b2WarmStartField* field = m_step.warmStarting ? m_step.warmStartField : NULL;
+		bool setImpulses = m_step.warmStarting && m_step.warmStartImpulses != NULL;
+		const b2Contact* contact = m_contacts[vc->contactIndex];
+		int32 idA = 0, idB = 0;
+		if (setImpulses)
+		{
+			idA = contact->m_fixtureA->GetBody()->m_userId;
+			idB = contact->m_fixtureB->GetBody()->m_userId;
+		}
+
 		int32 pointCount = vc->pointCount;
 		for (int32 j = 0; j < pointCount; ++j)
 		{
 			b2VelocityConstraintPoint* vcp = vc->points + j;
 
+			if (field)
+			{
+				b2SampleWarmStartField(*field, worldManifold.points[j], &vcp->normalImpulse, &vcp->tangentImpulse);
+			}
+			else if (setImpulses)
+			{
+				const b2WarmStartImpulse* impulse = m_step.warmStartByKey ?
+					b2FindKeyedWarmStartImpulse(m_step, contact->GetKey(j)) :
+					b2FindWarmStartImpulse(m_step, idA, idB, worldManifold.points[j]);
+				vcp->normalImpulse = impulse ? impulse->normalImpulse : 0.0f;
+				vcp->tangentImpulse = impulse ? impulse->tangentImpulse : 0.0f;
+			}
+
 			vcp->rA = worldManifold.points[j] - cA;
 			vcp->rB = worldManifold.points[j] - cB;
 
@@ -246,6 +580,72 @@ void b2ContactSolver::InitializeVelocityConstraints()
 	}
 }
 
+int32 b2ContactSolver::RecordContacts(b2ContactRecord* records) const
+{
+	int32 count = 0;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const b2ContactPositionConstraint* pc = m_positionConstraints + i;
+		const b2Contact* contact = m_contacts[vc->contactIndex];
+		int32 masterId = contact->m_fixtureA->GetBody()->m_userId;
+		int32 slaveId = contact->m_fixtureB->GetBody()->m_userId;
+		b2Vec2 cA = m_positions[vc->indexA].c;
+
+		// vc->pointCount may have been reduced for redundant constraints,
+		// so walk the manifold points instead.
+		for (int32 j = 0; j < pc->pointCount; ++j)
+		{
+			const b2VelocityConstraintPoint* vcp = vc->points + j;
+			b2ContactRecord* record = records + count++;
+			record->master = masterId;
+			record->slave = slaveId;
+			record->px = cA.x + vcp->rA.x;
+			record->py = cA.y + vcp->rA.y;
+			record->nx = vc->normal.x;
+			record->ny = vc->normal.y;
+			record->warmNormalImpulse = vcp->normalImpulse;
+			record->warmTangentImpulse = vcp->tangentImpulse;
+			record->normalImpulse = 0.0f;
+			record->tangentImpulse = 0.0f;
+			record->key = contact->GetKey(j);
+		}
+	}
+	return count;
+}
+
+void b2ContactSolver::RecordImpulses(b2ContactRecord* records) const
+{
+	int32 count = 0;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const b2ContactPositionConstraint* pc = m_positionConstraints + i;
+		for (int32 j = 0; j < vc->pointCount; ++j)
+		{
+			records[count + j].normalImpulse = vc->points[j].normalImpulse;
+			records[count + j].tangentImpulse = vc->points[j].tangentImpulse;
+		}
+		count += pc->pointCount;
+	}
+}
+
+void b2ContactSolver::RecordLambdas(b2ContactLambdaRecord* records, int32 island) const
+{
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const b2Contact* contact = m_contacts[vc->contactIndex];
+		b2ContactLambdaRecord* record = records + i;
+		record->island = island;
+		record->master = contact->m_fixtureA->GetBody()->m_userId;
+		record->slave = contact->m_fixtureB->GetBody()->m_userId;
+		record->pointCount = vc->pointCount;
+		record->lambdaTwoNorm = vc->lambdaTwoNorm;
+		record->lambdaInfNorm = vc->lambdaInfNorm;
+	}
+}
+
 void b2ContactSolver::WarmStart()
 {
 	// Warm start.
@@ -286,335 +686,973 @@ void b2ContactSolver::WarmStart()
 	}
 }
 
-void b2ContactSolver::SolveVelocityConstraints(b2SolverVelocityProfile* velocityProfile)
+// Solve the friction and normal constraints of one contact and get the
+// norms of its impulse increments. With sharedStatic set, the velocities of
+// bodies without mass are not written back, so constraints sharing them can
+// be solved in parallel.
+static inline void b2SolveVelocityConstraint(b2ContactVelocityConstraint* vc, b2Velocity* velocities,
+											 bool sharedStatic, float32* lambdaTwoNorm, float32* lambdaInfNorm)
 {
-    float32 maxLambdaTwoNorm = 0.0f;
-    float32 maxLambdaInfNorm = 0.0f;
-
-	for (int32 i = 0; i < m_count; ++i)
+	int32 indexA = vc->indexA;
+	int32 indexB = vc->indexB;
+	float32 mA = vc->invMassA;
+	float32 iA = vc->invIA;
+	float32 mB = vc->invMassB;
+	float32 iB = vc->invIB;
+	int32 pointCount = vc->pointCount;
+
+	b2Vec2 vA = velocities[indexA].v;
+	float32 wA = velocities[indexA].w;
+	b2Vec2 vB = velocities[indexB].v;
+	float32 wB = velocities[indexB].w;
+
+	b2Vec2 normal = vc->normal;
+	b2Vec2 tangent = b2Cross(normal, 1.0f);
+	float32 friction = vc->friction;
+
+	b2Assert(pointCount == 1 || pointCount == 2);
+
+	// Solve tangent constraints first because non-penetration is more important
+	// than friction.
+    float32 tangentLambda = 0.0f;
+	for (int32 j = 0; j < pointCount; ++j)
 	{
-		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		b2VelocityConstraintPoint* vcp = vc->points + j;
 
-		int32 indexA = vc->indexA;
-		int32 indexB = vc->indexB;
-		float32 mA = vc->invMassA;
-		float32 iA = vc->invIA;
-		float32 mB = vc->invMassB;
-		float32 iB = vc->invIB;
-		int32 pointCount = vc->pointCount;
+		// Relative velocity at contact
+		b2Vec2 dv = vB + b2Cross(wB, vcp->rB) - vA - b2Cross(wA, vcp->rA);
 
-		b2Vec2 vA = m_velocities[indexA].v;
-		float32 wA = m_velocities[indexA].w;
-		b2Vec2 vB = m_velocities[indexB].v;
-		float32 wB = m_velocities[indexB].w;
+		// Compute tangent force
+		float32 vt = b2Dot(dv, tangent) - vc->tangentSpeed;
+		float32 lambda = vcp->tangentMass * (-vt);
 
-		b2Vec2 normal = vc->normal;
-		b2Vec2 tangent = b2Cross(normal, 1.0f);
-		float32 friction = vc->friction;
+		// b2Clamp the accumulated force
+		float32 maxFriction = friction * vcp->normalImpulse;
+		float32 newImpulse = b2Clamp(vcp->tangentImpulse + lambda, -maxFriction, maxFriction);
+		lambda = newImpulse - vcp->tangentImpulse;
+		vcp->tangentImpulse = newImpulse;
 
-		b2Assert(pointCount == 1 || pointCount == 2);
+		// Apply contact impulse
+		b2Vec2 P = lambda * tangent;
 
-		// Solve tangent constraints first because non-penetration is more important
-		// than friction.
-        float32 tangentLambda = 0.0f;
-		for (int32 j = 0; j < pointCount; ++j)
-		{
-			b2VelocityConstraintPoint* vcp = vc->points + j;
+		vA -= mA * P;
+		wA -= iA * b2Cross(vcp->rA, P);
 
-			// Relative velocity at contact
-			b2Vec2 dv = vB + b2Cross(wB, vcp->rB) - vA - b2Cross(wA, vcp->rA);
+		vB += mB * P;
+		wB += iB * b2Cross(vcp->rB, P);
 
-			// Compute tangent force
-			float32 vt = b2Dot(dv, tangent) - vc->tangentSpeed;
-			float32 lambda = vcp->tangentMass * (-vt);
+        // Store lambda
+        tangentLambda = b2Max(tangentLambda, lambda);
+	}
 
-			// b2Clamp the accumulated force
-			float32 maxFriction = friction * vcp->normalImpulse;
-			float32 newImpulse = b2Clamp(vcp->tangentImpulse + lambda, -maxFriction, maxFriction);
-			lambda = newImpulse - vcp->tangentImpulse;
-			vcp->tangentImpulse = newImpulse;
+	// Solve normal constraints
+    float32 normalLambda = 0.0f;
+	if (vc->pointCount == 1)
+	{
+		b2VelocityConstraintPoint* vcp = vc->points + 0;
 
-			// Apply contact impulse
-			b2Vec2 P = lambda * tangent;
+		// Relative velocity at contact
+		b2Vec2 dv = vB + b2Cross(wB, vcp->rB) - vA - b2Cross(wA, vcp->rA);
 
-			vA -= mA * P;
-			wA -= iA * b2Cross(vcp->rA, P);
+		// Compute normal impulse
+		float32 vn = b2Dot(dv, normal);
+		float32 lambda = -vcp->normalMass * (vn - vcp->velocityBias);
 
-			vB += mB * P;
-			wB += iB * b2Cross(vcp->rB, P);
+		// b2Clamp the accumulated impulse
+		float32 newImpulse = b2Max(vcp->normalImpulse + lambda, 0.0f);
+		lambda = newImpulse - vcp->normalImpulse;
+		vcp->normalImpulse = newImpulse;
 
-            // Store lambda
-            tangentLambda = b2Max(tangentLambda, lambda);
-		}
+		// Apply contact impulse
+		b2Vec2 P = lambda * normal;
+		vA -= mA * P;
+		wA -= iA * b2Cross(vcp->rA, P);
 
-		// Solve normal constraints
-        float32 normalLambda = 0.0f;
-		if (vc->pointCount == 1)
+		vB += mB * P;
+		wB += iB * b2Cross(vcp->rB, P);
+
+        // Store lambda
+        normalLambda = lambda;
+	}
+	else
+	{
+		// Block solver developed in collaboration with Dirk Gregorius (back in 01/07 on Box2D_Lite).
+		// Build the mini LCP for this contact patch
+		//
+		// vn = A * x + b, vn >= 0, , vn >= 0, x >= 0 and vn_i * x_i = 0 with i = 1..2
+		//
+		// A = J * W * JT and J = ( -n, -r1 x n, n, r2 x n )
+		// b = vn0 - velocityBias
+		//
+		// The system is solved using the "Total enumeration method" (s. Murty). The complementary constraint vn_i * x_i
+		// implies that we must have in any solution either vn_i = 0 or x_i = 0. So for the 2D contact problem the cases
+		// vn1 = 0 and vn2 = 0, x1 = 0 and x2 = 0, x1 = 0 and vn2 = 0, x2 = 0 and vn1 = 0 need to be tested. The first valid
+		// solution that satisfies the problem is chosen.
+		//
+		// In order to account of the accumulated impulse 'a' (because of the iterative nature of the solver which only requires
+		// that the accumulated impulse is clamped and not the incremental impulse) we change the impulse variable (x_i).
+		//
+		// Substitute:
+		//
+		// x = a + d
+		//
+		// a := old total impulse
+		// x := new total impulse
+		// d := incremental impulse
+		//
+		// For the current iteration we extend the formula for the incremental impulse
+		// to compute the new total impulse:
+		//
+		// vn = A * d + b
+		//    = A * (x - a) + b
+		//    = A * x + b - A * a
+		//    = A * x + b'
+		// b' = b - A * a;
+
+		b2VelocityConstraintPoint* cp1 = vc->points + 0;
+		b2VelocityConstraintPoint* cp2 = vc->points + 1;
+
+		b2Vec2 a(cp1->normalImpulse, cp2->normalImpulse);
+		b2Assert(a.x >= 0.0f && a.y >= 0.0f);
+
+		// Relative velocity at contact
+		b2Vec2 dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
+		b2Vec2 dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+
+		// Compute normal velocity
+		float32 vn1 = b2Dot(dv1, normal);
+		float32 vn2 = b2Dot(dv2, normal);
+
+		b2Vec2 b;
+		b.x = vn1 - cp1->velocityBias;
+		b.y = vn2 - cp2->velocityBias;
+
+		// Compute b'
+		b -= b2Mul(vc->K, a);
+
+		const float32 k_errorTol = 1e-3f;
+		B2_NOT_USED(k_errorTol);
+
+		for (;;)
 		{
-			b2VelocityConstraintPoint* vcp = vc->points + 0;
+			//
+			// Case 1: vn = 0
+			//
+			// 0 = A * x + b'
+			//
+			// Solve for x:
+			//
+			// x = - inv(A) * b'
+			//
+			b2Vec2 x = - b2Mul(vc->normalMass, b);
 
-			// Relative velocity at contact
-			b2Vec2 dv = vB + b2Cross(wB, vcp->rB) - vA - b2Cross(wA, vcp->rA);
+			if (x.x >= 0.0f && x.y >= 0.0f)
+			{
+				// Get the incremental impulse
+				b2Vec2 d = x - a;
 
-			// Compute normal impulse
-			float32 vn = b2Dot(dv, normal);
-			float32 lambda = -vcp->normalMass * (vn - vcp->velocityBias);
+				// Apply incremental impulse
+				b2Vec2 P1 = d.x * normal;
+				b2Vec2 P2 = d.y * normal;
+				vA -= mA * (P1 + P2);
+				wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
 
-			// b2Clamp the accumulated impulse
-			float32 newImpulse = b2Max(vcp->normalImpulse + lambda, 0.0f);
-			lambda = newImpulse - vcp->normalImpulse;
-			vcp->normalImpulse = newImpulse;
+				vB += mB * (P1 + P2);
+				wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
 
-			// Apply contact impulse
-			b2Vec2 P = lambda * normal;
-			vA -= mA * P;
-			wA -= iA * b2Cross(vcp->rA, P);
+				// Accumulate
+				cp1->normalImpulse = x.x;
+				cp2->normalImpulse = x.y;
 
-			vB += mB * P;
-			wB += iB * b2Cross(vcp->rB, P);
+#if B2_DEBUG_SOLVER == 1
+				// Postconditions
+				dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
+				dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+
+				// Compute normal velocity
+				vn1 = b2Dot(dv1, normal);
+				vn2 = b2Dot(dv2, normal);
+
+				b2Assert(b2Abs(vn1 - cp1->velocityBias) < k_errorTol);
+				b2Assert(b2Abs(vn2 - cp2->velocityBias) < k_errorTol);
+#endif
+				break;
+			}
 
-            // Store lambda
-            normalLambda = lambda;
-		}
-		else
-		{
-			// Block solver developed in collaboration with Dirk Gregorius (back in 01/07 on Box2D_Lite).
-			// Build the mini LCP for this contact patch
-			//
-			// vn = A * x + b, vn >= 0, , vn >= 0, x >= 0 and vn_i * x_i = 0 with i = 1..2
 			//
-			// A = J * W * JT and J = ( -n, -r1 x n, n, r2 x n )
-			// b = vn0 - velocityBias
+			// Case 2: vn1 = 0 and x2 = 0
 			//
-			// The system is solved using the "Total enumeration method" (s. Murty). The complementary constraint vn_i * x_i
-			// implies that we must have in any solution either vn_i = 0 or x_i = 0. So for the 2D contact problem the cases
-			// vn1 = 0 and vn2 = 0, x1 = 0 and x2 = 0, x1 = 0 and vn2 = 0, x2 = 0 and vn1 = 0 need to be tested. The first valid
-			// solution that satisfies the problem is chosen.
+			//   0 = a11 * x1 + a12 * 0 + b1'
+			// vn2 = a21 * x1 + a22 * 0 + b2'
 			//
-			// In order to account of the accumulated impulse 'a' (because of the iterative nature of the solver which only requires
-			// that the accumulated impulse is clamped and not the incremental impulse) we change the impulse variable (x_i).
+			x.x = - cp1->normalMass * b.x;
+			x.y = 0.0f;
+			vn1 = 0.0f;
+			vn2 = vc->K.ex.y * x.x + b.y;
+
+			if (x.x >= 0.0f && vn2 >= 0.0f)
+			{
+				// Get the incremental impulse
+				b2Vec2 d = x - a;
+
+				// Apply incremental impulse
+				b2Vec2 P1 = d.x * normal;
+				b2Vec2 P2 = d.y * normal;
+				vA -= mA * (P1 + P2);
+				wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+
+				vB += mB * (P1 + P2);
+				wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+
+				// Accumulate
+				cp1->normalImpulse = x.x;
+				cp2->normalImpulse = x.y;
+
+#if B2_DEBUG_SOLVER == 1
+				// Postconditions
+				dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
+
+				// Compute normal velocity
+				vn1 = b2Dot(dv1, normal);
+
+				b2Assert(b2Abs(vn1 - cp1->velocityBias) < k_errorTol);
+#endif
+				break;
+			}
+
+
 			//
-			// Substitute:
+			// Case 3: vn2 = 0 and x1 = 0
 			//
-			// x = a + d
+			// vn1 = a11 * 0 + a12 * x2 + b1'
+			//   0 = a21 * 0 + a22 * x2 + b2'
 			//
-			// a := old total impulse
-			// x := new total impulse
-			// d := incremental impulse
+			x.x = 0.0f;
+			x.y = - cp2->normalMass * b.y;
+			vn1 = vc->K.ey.x * x.y + b.x;
+			vn2 = 0.0f;
+
+			if (x.y >= 0.0f && vn1 >= 0.0f)
+			{
+				// Resubstitute for the incremental impulse
+				b2Vec2 d = x - a;
+
+				// Apply incremental impulse
+				b2Vec2 P1 = d.x * normal;
+				b2Vec2 P2 = d.y * normal;
+				vA -= mA * (P1 + P2);
+				wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+
+				vB += mB * (P1 + P2);
+				wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+
+				// Accumulate
+				cp1->normalImpulse = x.x;
+				cp2->normalImpulse = x.y;
+
+#if B2_DEBUG_SOLVER == 1
+				// Postconditions
+				dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+
+				// Compute normal velocity
+				vn2 = b2Dot(dv2, normal);
+
+				b2Assert(b2Abs(vn2 - cp2->velocityBias) < k_errorTol);
+#endif
+				break;
+			}
+
 			//
-			// For the current iteration we extend the formula for the incremental impulse
-			// to compute the new total impulse:
+			// Case 4: x1 = 0 and x2 = 0
 			//
-			// vn = A * d + b
-			//    = A * (x - a) + b
-			//    = A * x + b - A * a
-			//    = A * x + b'
-			// b' = b - A * a;
+			// vn1 = b1
+			// vn2 = b2;
+			x.x = 0.0f;
+			x.y = 0.0f;
+			vn1 = b.x;
+			vn2 = b.y;
+
+			if (vn1 >= 0.0f && vn2 >= 0.0f )
+			{
+				// Resubstitute for the incremental impulse
+				b2Vec2 d = x - a;
 
-			b2VelocityConstraintPoint* cp1 = vc->points + 0;
-			b2VelocityConstraintPoint* cp2 = vc->points + 1;
+				// Apply incremental impulse
+				b2Vec2 P1 = d.x * normal;
+				b2Vec2 P2 = d.y * normal;
+				vA -= mA * (P1 + P2);
+				wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
 
-			b2Vec2 a(cp1->normalImpulse, cp2->normalImpulse);
-			b2Assert(a.x >= 0.0f && a.y >= 0.0f);
+				vB += mB * (P1 + P2);
+				wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
 
-			// Relative velocity at contact
-			b2Vec2 dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
-			b2Vec2 dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+				// Accumulate
+				cp1->normalImpulse = x.x;
+				cp2->normalImpulse = x.y;
 
-			// Compute normal velocity
-			float32 vn1 = b2Dot(dv1, normal);
-			float32 vn2 = b2Dot(dv2, normal);
+				break;
+			}
 
-			b2Vec2 b;
-			b.x = vn1 - cp1->velocityBias;
-			b.y = vn2 - cp2->velocityBias;
+			// No solution, give up. This is hit sometimes, but it doesn't seem to matter.
+			break;
+		}
+	}
+
+	// Bodies without mass keep their velocity. Shared by constraints solved
+	// at the same time, they are not written to.
+	if (sharedStatic == false || mA != 0.0f || iA != 0.0f)
+	{
+		velocities[indexA].v = vA;
+		velocities[indexA].w = wA;
+	}
+
+	if (sharedStatic == false || mB != 0.0f || iB != 0.0f)
+	{
+		velocities[indexB].v = vB;
+		velocities[indexB].w = wB;
+	}
 
-			// Compute b'
-			b -= b2Mul(vc->K, a);
+    *lambdaTwoNorm = b2Sqrt(normalLambda*normalLambda + tangentLambda*tangentLambda);
+    *lambdaInfNorm = b2Max(normalLambda, tangentLambda);
+	vc->lambdaTwoNorm = *lambdaTwoNorm;
+	vc->lambdaInfNorm = *lambdaInfNorm;
+}
 
-			const float32 k_errorTol = 1e-3f;
-			B2_NOT_USED(k_errorTol);
+// Apply the impulse change (normalImpulse, tangentImpulse) at point j of vc
+// to the velocities. Bodies without mass are left alone.
+static inline void b2ApplyImpulseChange(const b2ContactVelocityConstraint* vc, b2Velocity* velocities, int32 j,
+										float32 normalImpulse, float32 tangentImpulse)
+{
+	const b2VelocityConstraintPoint* vcp = vc->points + j;
+	b2Vec2 tangent = b2Cross(vc->normal, 1.0f);
+	b2Vec2 P = normalImpulse * vc->normal + tangentImpulse * tangent;
 
-			for (;;)
+	if (vc->invMassA != 0.0f || vc->invIA != 0.0f)
+	{
+		b2Velocity* velocity = velocities + vc->indexA;
+		velocity->v -= vc->invMassA * P;
+		velocity->w -= vc->invIA * b2Cross(vcp->rA, P);
+	}
+
+	if (vc->invMassB != 0.0f || vc->invIB != 0.0f)
+	{
+		b2Velocity* velocity = velocities + vc->indexB;
+		velocity->v += vc->invMassB * P;
+		velocity->w += vc->invIB * b2Cross(vcp->rB, P);
+	}
+}
+
+// Project the impulses of a point onto the friction cone.
+static inline void b2ProjectImpulse(const b2ContactVelocityConstraint* vc, float32* normalImpulse,
+									float32* tangentImpulse)
+{
+	*normalImpulse = b2Max(*normalImpulse, 0.0f);
+	float32 maxFriction = vc->friction * *normalImpulse;
+	*tangentImpulse = b2Clamp(*tangentImpulse, -maxFriction, maxFriction);
+}
+
+// Solve a constraint like b2SolveVelocityConstraint, then over-relax its
+// impulses: x = project(x0 + relaxation * (x - x0)). The lambda norms are
+// those of the Gauss-Seidel update.
+static inline void b2SolveRelaxedVelocityConstraint(b2ContactVelocityConstraint* vc, b2Velocity* velocities,
+													bool sharedStatic, float32 relaxation,
+													float32* lambdaTwoNorm, float32* lambdaInfNorm)
+{
+	float32 impulses[2 * b2_maxManifoldPoints];
+	for (int32 j = 0; j < vc->pointCount; ++j)
+	{
+		impulses[2 * j] = vc->points[j].normalImpulse;
+		impulses[2 * j + 1] = vc->points[j].tangentImpulse;
+	}
+
+	b2SolveVelocityConstraint(vc, velocities, sharedStatic, lambdaTwoNorm, lambdaInfNorm);
+
+	for (int32 j = 0; j < vc->pointCount; ++j)
+	{
+		b2VelocityConstraintPoint* vcp = vc->points + j;
+		float32 normalImpulse = impulses[2 * j] + relaxation * (vcp->normalImpulse - impulses[2 * j]);
+		float32 tangentImpulse = impulses[2 * j + 1] + relaxation * (vcp->tangentImpulse - impulses[2 * j + 1]);
+		b2ProjectImpulse(vc, &normalImpulse, &tangentImpulse);
+
+		b2ApplyImpulseChange(vc, velocities, j, normalImpulse - vcp->normalImpulse,
+							 tangentImpulse - vcp->tangentImpulse);
+		vcp->normalImpulse = normalImpulse;
+		vcp->tangentImpulse = tangentImpulse;
+	}
+}
+
+void b2ContactSolver::SolveVelocityConstraints(b2SolverVelocityProfile* velocityProfile)
+{
+	// The accelerated solvers extrapolate from the impulses before the sweep
+	int32 impulseCount = 2 * b2_maxManifoldPoints * m_count;
+	if (m_accelImpulses)
+	{
+		for (int32 i = 0; i < m_count; ++i)
+		{
+			const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+			float32* impulses = m_accelImpulses + 2 * b2_maxManifoldPoints * i;
+			for (int32 j = 0; j < vc->pointCount; ++j)
 			{
-				//
-				// Case 1: vn = 0
-				//
-				// 0 = A * x + b'
-				//
-				// Solve for x:
-				//
-				// x = - inv(A) * b'
-				//
-				b2Vec2 x = - b2Mul(vc->normalMass, b);
-
-				if (x.x >= 0.0f && x.y >= 0.0f)
-				{
-					// Get the incremental impulse
-					b2Vec2 d = x - a;
+				impulses[2 * j] = vc->points[j].normalImpulse;
+				impulses[2 * j + 1] = vc->points[j].tangentImpulse;
+			}
+		}
 
-					// Apply incremental impulse
-					b2Vec2 P1 = d.x * normal;
-					b2Vec2 P2 = d.y * normal;
-					vA -= mA * (P1 + P2);
-					wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+		if (m_accelIteration == 0)
+		{
+			// Start from the warm starting impulses
+			memcpy(m_accelImpulses + impulseCount, m_accelImpulses, impulseCount * sizeof(float32));
+		}
+	}
 
-					vB += mB * (P1 + P2);
-					wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+	if (m_colorCount > 0)
+	{
+		SolveColoredVelocityConstraints(velocityProfile);
+	}
+	else
+	{
+		float32 maxLambdaTwoNorm = 0.0f;
+		float32 maxLambdaInfNorm = 0.0f;
 
-					// Accumulate
-					cp1->normalImpulse = x.x;
-					cp2->normalImpulse = x.y;
+		bool relaxed = m_step.solverType == b2_sorSolver;
+		for (int32 i = 0; i < m_count; ++i)
+		{
+			b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
 
-#if B2_DEBUG_SOLVER == 1
-					// Postconditions
-					dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
-					dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+			float32 lambdaTwoNorm, lambdaInfNorm;
+			if (relaxed)
+			{
+				b2SolveRelaxedVelocityConstraint(vc, m_velocities, false, m_step.relaxation,
+												 &lambdaTwoNorm, &lambdaInfNorm);
+			}
+			else
+			{
+				b2SolveVelocityConstraint(vc, m_velocities, false, &lambdaTwoNorm, &lambdaInfNorm);
+			}
 
-					// Compute normal velocity
-					vn1 = b2Dot(dv1, normal);
-					vn2 = b2Dot(dv2, normal);
+			maxLambdaTwoNorm = b2Max(maxLambdaTwoNorm, lambdaTwoNorm);
+			maxLambdaInfNorm = b2Max(maxLambdaInfNorm, lambdaInfNorm);
+		}
 
-					b2Assert(b2Abs(vn1 - cp1->velocityBias) < k_errorTol);
-					b2Assert(b2Abs(vn2 - cp2->velocityBias) < k_errorTol);
-#endif
-					break;
-				}
+		velocityProfile->lambdaTwoNorm = maxLambdaTwoNorm;
+		velocityProfile->lambdaInfNorm = maxLambdaInfNorm;
+	}
 
-				//
-				// Case 2: vn1 = 0 and x2 = 0
-				//
-				//   0 = a11 * x1 + a12 * 0 + b1'
-				// vn2 = a21 * x1 + a22 * 0 + b2'
-				//
-				x.x = - cp1->normalMass * b.x;
-				x.y = 0.0f;
-				vn1 = 0.0f;
-				vn2 = vc->K.ex.y * x.x + b.y;
-
-				if (x.x >= 0.0f && vn2 >= 0.0f)
-				{
-					// Get the incremental impulse
-					b2Vec2 d = x - a;
+	if (m_accelImpulses)
+	{
+		if (m_step.solverType == b2_nesterovSolver)
+		{
+			AccelerateNesterov();
+		}
+		else
+		{
+			AccelerateNNCG();
+		}
+		++m_accelIteration;
+	}
+}
 
-					// Apply incremental impulse
-					b2Vec2 P1 = d.x * normal;
-					b2Vec2 P2 = d.y * normal;
-					vA -= mA * (P1 + P2);
-					wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+// Nesterov's accelerated projected Gauss-Seidel: with x the result of the
+// sweep and x0 the previous one, the next sweep starts from
+// project(x + beta * (x - x0)). The momentum is restarted when the change of
+// the sweep grows.
+void b2ContactSolver::AccelerateNesterov()
+{
+	const int32 impulseCount = 2 * b2_maxManifoldPoints * m_count;
+	const float32* start = m_accelImpulses;
+	float32* iterate = m_accelImpulses + impulseCount;
 
-					vB += mB * (P1 + P2);
-					wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+	float32 residual = 0.0f;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const float32* impulses = start + 2 * b2_maxManifoldPoints * i;
+		for (int32 j = 0; j < vc->pointCount; ++j)
+		{
+			float32 dn = vc->points[j].normalImpulse - impulses[2 * j];
+			float32 dt = vc->points[j].tangentImpulse - impulses[2 * j + 1];
+			residual += dn * dn + dt * dt;
+		}
+	}
 
-					// Accumulate
-					cp1->normalImpulse = x.x;
-					cp2->normalImpulse = x.y;
+	float32 beta = 0.0f;
+	if (m_accelIteration > 0 && residual > m_accelResidual)
+	{
+		m_accelTheta = 1.0f;
+	}
+	else
+	{
+		float32 theta = 0.5f * (1.0f + b2Sqrt(1.0f + 4.0f * m_accelTheta * m_accelTheta));
+		beta = (m_accelTheta - 1.0f) / theta;
+		m_accelTheta = theta;
+	}
+	m_accelResidual = residual;
 
-#if B2_DEBUG_SOLVER == 1
-					// Postconditions
-					dv1 = vB + b2Cross(wB, cp1->rB) - vA - b2Cross(wA, cp1->rA);
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		float32* previous = iterate + 2 * b2_maxManifoldPoints * i;
+		for (int32 j = 0; j < vc->pointCount; ++j)
+		{
+			b2VelocityConstraintPoint* vcp = vc->points + j;
+			float32 normalImpulse = vcp->normalImpulse + beta * (vcp->normalImpulse - previous[2 * j]);
+			float32 tangentImpulse = vcp->tangentImpulse + beta * (vcp->tangentImpulse - previous[2 * j + 1]);
+			previous[2 * j] = vcp->normalImpulse;
+			previous[2 * j + 1] = vcp->tangentImpulse;
+
+			if (beta == 0.0f)
+			{
+				continue;
+			}
 
-					// Compute normal velocity
-					vn1 = b2Dot(dv1, normal);
+			b2ProjectImpulse(vc, &normalImpulse, &tangentImpulse);
+			b2ApplyImpulseChange(vc, m_velocities, j, normalImpulse - vcp->normalImpulse,
+								 tangentImpulse - vcp->tangentImpulse);
+			vcp->normalImpulse = normalImpulse;
+			vcp->tangentImpulse = tangentImpulse;
+		}
+	}
+}
 
-					b2Assert(b2Abs(vn1 - cp1->velocityBias) < k_errorTol);
-#endif
-					break;
-				}
+// Nonsmooth nonlinear conjugate gradient (Silcowitz, Niebe and Erleben), with
+// the sweep as the gradient step: the gradient is g = x0 - x, where x0 are
+// the impulses before the sweep, and the search direction p is updated as
+// p = beta * p - g with beta = |g|^2 / |g0|^2. The impulses continue from
+// project(x + beta * p). The direction is reset when beta exceeds one.
+void b2ContactSolver::AccelerateNNCG()
+{
+	const int32 impulseCount = 2 * b2_maxManifoldPoints * m_count;
+	const float32* start = m_accelImpulses;
+	float32* direction = m_accelImpulses + 2 * impulseCount;
 
+	float32 residual = 0.0f;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		const b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const float32* impulses = start + 2 * b2_maxManifoldPoints * i;
+		for (int32 j = 0; j < vc->pointCount; ++j)
+		{
+			float32 dn = vc->points[j].normalImpulse - impulses[2 * j];
+			float32 dt = vc->points[j].tangentImpulse - impulses[2 * j + 1];
+			residual += dn * dn + dt * dt;
+		}
+	}
 
-				//
-				// Case 3: vn2 = 0 and x1 = 0
-				//
-				// vn1 = a11 * 0 + a12 * x2 + b1'
-				//   0 = a21 * 0 + a22 * x2 + b2'
-				//
-				x.x = 0.0f;
-				x.y = - cp2->normalMass * b.y;
-				vn1 = vc->K.ey.x * x.y + b.x;
-				vn2 = 0.0f;
+	float32 beta = 0.0f;
+	if (m_accelIteration > 0 && m_accelResidual > 0.0f)
+	{
+		beta = residual / m_accelResidual;
+		if (beta > 1.0f)
+		{
+			beta = 0.0f;
+		}
+	}
+	m_accelResidual = residual;
 
-				if (x.y >= 0.0f && vn1 >= 0.0f)
-				{
-					// Resubstitute for the incremental impulse
-					b2Vec2 d = x - a;
+	for (int32 i = 0; i < m_count; ++i)
+	{
+		b2ContactVelocityConstraint* vc = m_velocityConstraints + i;
+		const float32* impulses = start + 2 * b2_maxManifoldPoints * i;
+		float32* p = direction + 2 * b2_maxManifoldPoints * i;
+		for (int32 j = 0; j < vc->pointCount; ++j)
+		{
+			b2VelocityConstraintPoint* vcp = vc->points + j;
+			float32 normalImpulse = vcp->normalImpulse + beta * p[2 * j];
+			float32 tangentImpulse = vcp->tangentImpulse + beta * p[2 * j + 1];
+			p[2 * j] = beta * p[2 * j] + (vcp->normalImpulse - impulses[2 * j]);
+			p[2 * j + 1] = beta * p[2 * j + 1] + (vcp->tangentImpulse - impulses[2 * j + 1]);
 
-					// Apply incremental impulse
-					b2Vec2 P1 = d.x * normal;
-					b2Vec2 P2 = d.y * normal;
-					vA -= mA * (P1 + P2);
-					wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+			if (beta == 0.0f)
+			{
+				continue;
+			}
 
-					vB += mB * (P1 + P2);
-					wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+			b2ProjectImpulse(vc, &normalImpulse, &tangentImpulse);
+			b2ApplyImpulseChange(vc, m_velocities, j, normalImpulse - vcp->normalImpulse,
+								 tangentImpulse - vcp->tangentImpulse);
+			vcp->normalImpulse = normalImpulse;
+			vcp->tangentImpulse = tangentImpulse;
+		}
+	}
+}
 
-					// Accumulate
-					cp1->normalImpulse = x.x;
-					cp2->normalImpulse = x.y;
+void b2ContactSolver::InitializeConstraintGroups()
+{
+	for (int32 color = 0; color < m_colorCount; ++color)
+	{
+		const int32* constraints = m_colorConstraints + m_colorOffsets[color];
+		int32 count = m_colorGroupedCounts[color];
+		b2ContactConstraintGroup* groups = m_groups + m_colorGroupOffsets[color];
 
-#if B2_DEBUG_SOLVER == 1
-					// Postconditions
-					dv2 = vB + b2Cross(wB, cp2->rB) - vA - b2Cross(wA, cp2->rA);
+		// Unused lanes solve a constraint between massless bodies, which does
+		// nothing and is never written back.
+		int32 groupCount = (count + 3) / 4;
+		memset(groups, 0, groupCount * sizeof(b2ContactConstraintGroup));
+
+		for (int32 i = 0; i < 4 * groupCount; ++i)
+		{
+			b2ContactConstraintGroup* g = groups + i / 4;
+			int32 lane = i % 4;
+
+			if (i >= count)
+			{
+				g->constraintIndex[lane] = -1;
+				continue;
+			}
 
-					// Compute normal velocity
-					vn2 = b2Dot(dv2, normal);
+			const b2ContactVelocityConstraint* vc = m_velocityConstraints + constraints[i];
+			const b2VelocityConstraintPoint* vcp = vc->points + 0;
+			g->normalX[lane] = vc->normal.x;
+			g->normalY[lane] = vc->normal.y;
+			g->rAX[lane] = vcp->rA.x;
+			g->rAY[lane] = vcp->rA.y;
+			g->rBX[lane] = vcp->rB.x;
+			g->rBY[lane] = vcp->rB.y;
+			g->invMassA[lane] = vc->invMassA;
+			g->invIA[lane] = vc->invIA;
+			g->invMassB[lane] = vc->invMassB;
+			g->invIB[lane] = vc->invIB;
+			g->normalMass[lane] = vcp->normalMass;
+			g->tangentMass[lane] = vcp->tangentMass;
+			g->velocityBias[lane] = vcp->velocityBias;
+			g->friction[lane] = vc->friction;
+			g->tangentSpeed[lane] = vc->tangentSpeed;
+			g->normalImpulse[lane] = vcp->normalImpulse;
+			g->tangentImpulse[lane] = vcp->tangentImpulse;
+			g->indexA[lane] = vc->indexA;
+			g->indexB[lane] = vc->indexB;
+			g->constraintIndex[lane] = constraints[i];
+		}
+	}
 
-					b2Assert(b2Abs(vn2 - cp2->velocityBias) < k_errorTol);
+	m_groupsInitialized = true;
+}
+
+// Solve a group of four independent single point constraints, doing the
+// same operations as b2SolveVelocityConstraint, so the results are
+// identical. The lambda norms of the used lanes are merged into lambdas.
+static inline void b2SolveConstraintGroup(b2ContactConstraintGroup* g, b2Velocity* velocities,
+										  b2ContactVelocityConstraint* constraints, float32* lambdas)
+{
+	float32 lambdaTwoNorms[4], lambdaInfNorms[4];
+	b2Vec2 vA[4], vB[4];
+	float32 wA[4], wB[4];
+
+#if defined(B2_SSE2)
+	const b2Velocity* a0 = velocities + g->indexA[0];
+	const b2Velocity* a1 = velocities + g->indexA[1];
+	const b2Velocity* a2 = velocities + g->indexA[2];
+	const b2Velocity* a3 = velocities + g->indexA[3];
+	const b2Velocity* b0 = velocities + g->indexB[0];
+	const b2Velocity* b1 = velocities + g->indexB[1];
+	const b2Velocity* b2 = velocities + g->indexB[2];
+	const b2Velocity* b3 = velocities + g->indexB[3];
+
+	__m128 vAx = _mm_setr_ps(a0->v.x, a1->v.x, a2->v.x, a3->v.x);
+	__m128 vAy = _mm_setr_ps(a0->v.y, a1->v.y, a2->v.y, a3->v.y);
+	__m128 wAv = _mm_setr_ps(a0->w, a1->w, a2->w, a3->w);
+	__m128 vBx = _mm_setr_ps(b0->v.x, b1->v.x, b2->v.x, b3->v.x);
+	__m128 vBy = _mm_setr_ps(b0->v.y, b1->v.y, b2->v.y, b3->v.y);
+	__m128 wBv = _mm_setr_ps(b0->w, b1->w, b2->w, b3->w);
+
+	const __m128 zero = _mm_setzero_ps();
+	const __m128 sign = _mm_set1_ps(-0.0f);
+
+	__m128 nx = _mm_loadu_ps(g->normalX);
+	__m128 ny = _mm_loadu_ps(g->normalY);
+	__m128 rAx = _mm_loadu_ps(g->rAX);
+	__m128 rAy = _mm_loadu_ps(g->rAY);
+	__m128 rBx = _mm_loadu_ps(g->rBX);
+	__m128 rBy = _mm_loadu_ps(g->rBY);
+	__m128 mA = _mm_loadu_ps(g->invMassA);
+	__m128 iA = _mm_loadu_ps(g->invIA);
+	__m128 mB = _mm_loadu_ps(g->invMassB);
+	__m128 iB = _mm_loadu_ps(g->invIB);
+	__m128 normalImpulse = _mm_loadu_ps(g->normalImpulse);
+	__m128 tangentImpulse = _mm_loadu_ps(g->tangentImpulse);
+
+	// tangent = b2Cross(normal, 1.0f)
+	__m128 tx = ny;
+	__m128 ty = _mm_xor_ps(nx, sign);
+
+	// Relative velocity at contact
+	__m128 dvx = _mm_sub_ps(_mm_sub_ps(_mm_add_ps(vBx, _mm_mul_ps(_mm_xor_ps(wBv, sign), rBy)), vAx),
+							_mm_mul_ps(_mm_xor_ps(wAv, sign), rAy));
+	__m128 dvy = _mm_sub_ps(_mm_sub_ps(_mm_add_ps(vBy, _mm_mul_ps(wBv, rBx)), vAy), _mm_mul_ps(wAv, rAx));
+
+	// Tangent constraint
+	__m128 vt = _mm_sub_ps(_mm_add_ps(_mm_mul_ps(dvx, tx), _mm_mul_ps(dvy, ty)), _mm_loadu_ps(g->tangentSpeed));
+	__m128 lambda = _mm_mul_ps(_mm_loadu_ps(g->tangentMass), _mm_xor_ps(vt, sign));
+
+	__m128 maxFriction = _mm_mul_ps(_mm_loadu_ps(g->friction), normalImpulse);
+	__m128 newImpulse = _mm_max_ps(_mm_xor_ps(maxFriction, sign),
+								   _mm_min_ps(_mm_add_ps(tangentImpulse, lambda), maxFriction));
+	lambda = _mm_sub_ps(newImpulse, tangentImpulse);
+	tangentImpulse = newImpulse;
+
+	__m128 Px = _mm_mul_ps(lambda, tx);
+	__m128 Py = _mm_mul_ps(lambda, ty);
+	vAx = _mm_sub_ps(vAx, _mm_mul_ps(mA, Px));
+	vAy = _mm_sub_ps(vAy, _mm_mul_ps(mA, Py));
+	wAv = _mm_sub_ps(wAv, _mm_mul_ps(iA, _mm_sub_ps(_mm_mul_ps(rAx, Py), _mm_mul_ps(rAy, Px))));
+	vBx = _mm_add_ps(vBx, _mm_mul_ps(mB, Px));
+	vBy = _mm_add_ps(vBy, _mm_mul_ps(mB, Py));
+	wBv = _mm_add_ps(wBv, _mm_mul_ps(iB, _mm_sub_ps(_mm_mul_ps(rBx, Py), _mm_mul_ps(rBy, Px))));
+	__m128 tangentLambda = _mm_max_ps(zero, lambda);
+
+	// Normal constraint
+	dvx = _mm_sub_ps(_mm_sub_ps(_mm_add_ps(vBx, _mm_mul_ps(_mm_xor_ps(wBv, sign), rBy)), vAx),
+					 _mm_mul_ps(_mm_xor_ps(wAv, sign), rAy));
+	dvy = _mm_sub_ps(_mm_sub_ps(_mm_add_ps(vBy, _mm_mul_ps(wBv, rBx)), vAy), _mm_mul_ps(wAv, rAx));
+
+	__m128 vn = _mm_add_ps(_mm_mul_ps(dvx, nx), _mm_mul_ps(dvy, ny));
+	lambda = _mm_mul_ps(_mm_xor_ps(_mm_loadu_ps(g->normalMass), sign),
+						_mm_sub_ps(vn, _mm_loadu_ps(g->velocityBias)));
+
+	newImpulse = _mm_max_ps(_mm_add_ps(normalImpulse, lambda), zero);
+	lambda = _mm_sub_ps(newImpulse, normalImpulse);
+	normalImpulse = newImpulse;
+
+	Px = _mm_mul_ps(lambda, nx);
+	Py = _mm_mul_ps(lambda, ny);
+	vAx = _mm_sub_ps(vAx, _mm_mul_ps(mA, Px));
+	vAy = _mm_sub_ps(vAy, _mm_mul_ps(mA, Py));
+	wAv = _mm_sub_ps(wAv, _mm_mul_ps(iA, _mm_sub_ps(_mm_mul_ps(rAx, Py), _mm_mul_ps(rAy, Px))));
+	vBx = _mm_add_ps(vBx, _mm_mul_ps(mB, Px));
+	vBy = _mm_add_ps(vBy, _mm_mul_ps(mB, Py));
+	wBv = _mm_add_ps(wBv, _mm_mul_ps(iB, _mm_sub_ps(_mm_mul_ps(rBx, Py), _mm_mul_ps(rBy, Px))));
+	__m128 normalLambda = lambda;
+
+	_mm_storeu_ps(g->normalImpulse, normalImpulse);
+	_mm_storeu_ps(g->tangentImpulse, tangentImpulse);
+	_mm_storeu_ps(lambdaTwoNorms, _mm_sqrt_ps(_mm_add_ps(_mm_mul_ps(normalLambda, normalLambda),
+														 _mm_mul_ps(tangentLambda, tangentLambda))));
+	_mm_storeu_ps(lambdaInfNorms, _mm_max_ps(normalLambda, tangentLambda));
+
+	float32 values[6][4];
+	_mm_storeu_ps(values[0], vAx);
+	_mm_storeu_ps(values[1], vAy);
+	_mm_storeu_ps(values[2], wAv);
+	_mm_storeu_ps(values[3], vBx);
+	_mm_storeu_ps(values[4], vBy);
+	_mm_storeu_ps(values[5], wBv);
+	for (int32 lane = 0; lane < 4; ++lane)
+	{
+		vA[lane].Set(values[0][lane], values[1][lane]);
+		wA[lane] = values[2][lane];
+		vB[lane].Set(values[3][lane], values[4][lane]);
+		wB[lane] = values[5][lane];
+	}
+#else
+	// Scalar fallback, lane by lane.
+	for (int32 lane = 0; lane < 4; ++lane)
+	{
+		vA[lane] = velocities[g->indexA[lane]].v;
+		wA[lane] = velocities[g->indexA[lane]].w;
+		vB[lane] = velocities[g->indexB[lane]].v;
+		wB[lane] = velocities[g->indexB[lane]].w;
+
+		b2Vec2 normal(g->normalX[lane], g->normalY[lane]);
+		b2Vec2 tangent = b2Cross(normal, 1.0f);
+		b2Vec2 rA(g->rAX[lane], g->rAY[lane]);
+		b2Vec2 rB(g->rBX[lane], g->rBY[lane]);
+		float32 mA = g->invMassA[lane], iA = g->invIA[lane];
+		float32 mB = g->invMassB[lane], iB = g->invIB[lane];
+
+		b2Vec2 dv = vB[lane] + b2Cross(wB[lane], rB) - vA[lane] - b2Cross(wA[lane], rA);
+		float32 vt = b2Dot(dv, tangent) - g->tangentSpeed[lane];
+		float32 lambda = g->tangentMass[lane] * (-vt);
+
+		float32 maxFriction = g->friction[lane] * g->normalImpulse[lane];
+		float32 newImpulse = b2Clamp(g->tangentImpulse[lane] + lambda, -maxFriction, maxFriction);
+		lambda = newImpulse - g->tangentImpulse[lane];
+		g->tangentImpulse[lane] = newImpulse;
+
+		b2Vec2 P = lambda * tangent;
+		vA[lane] -= mA * P;
+		wA[lane] -= iA * b2Cross(rA, P);
+		vB[lane] += mB * P;
+		wB[lane] += iB * b2Cross(rB, P);
+		float32 tangentLambda = b2Max(0.0f, lambda);
+
+		dv = vB[lane] + b2Cross(wB[lane], rB) - vA[lane] - b2Cross(wA[lane], rA);
+		float32 vn = b2Dot(dv, normal);
+		lambda = -g->normalMass[lane] * (vn - g->velocityBias[lane]);
+
+		newImpulse = b2Max(g->normalImpulse[lane] + lambda, 0.0f);
+		lambda = newImpulse - g->normalImpulse[lane];
+		g->normalImpulse[lane] = newImpulse;
+
+		P = lambda * normal;
+		vA[lane] -= mA * P;
+		wA[lane] -= iA * b2Cross(rA, P);
+		vB[lane] += mB * P;
+		wB[lane] += iB * b2Cross(rB, P);
+		float32 normalLambda = lambda;
+
+		lambdaTwoNorms[lane] = b2Sqrt(normalLambda*normalLambda + tangentLambda*tangentLambda);
+		lambdaInfNorms[lane] = b2Max(normalLambda, tangentLambda);
+	}
 #endif
-					break;
-				}
 
-				//
-				// Case 4: x1 = 0 and x2 = 0
-				//
-				// vn1 = b1
-				// vn2 = b2;
-				x.x = 0.0f;
-				x.y = 0.0f;
-				vn1 = b.x;
-				vn2 = b.y;
-
-				if (vn1 >= 0.0f && vn2 >= 0.0f )
-				{
-					// Resubstitute for the incremental impulse
-					b2Vec2 d = x - a;
+	// Bodies without mass, and unused lanes, are not written back.
+	for (int32 lane = 0; lane < 4; ++lane)
+	{
+		if (g->constraintIndex[lane] < 0)
+		{
+			continue;
+		}
 
-					// Apply incremental impulse
-					b2Vec2 P1 = d.x * normal;
-					b2Vec2 P2 = d.y * normal;
-					vA -= mA * (P1 + P2);
-					wA -= iA * (b2Cross(cp1->rA, P1) + b2Cross(cp2->rA, P2));
+		if (g->invMassA[lane] != 0.0f || g->invIA[lane] != 0.0f)
+		{
+			velocities[g->indexA[lane]].v = vA[lane];
+			velocities[g->indexA[lane]].w = wA[lane];
+		}
 
-					vB += mB * (P1 + P2);
-					wB += iB * (b2Cross(cp1->rB, P1) + b2Cross(cp2->rB, P2));
+		if (g->invMassB[lane] != 0.0f || g->invIB[lane] != 0.0f)
+		{
+			velocities[g->indexB[lane]].v = vB[lane];
+			velocities[g->indexB[lane]].w = wB[lane];
+		}
 
-					// Accumulate
-					cp1->normalImpulse = x.x;
-					cp2->normalImpulse = x.y;
+		b2ContactVelocityConstraint* vc = constraints + g->constraintIndex[lane];
+		vc->lambdaTwoNorm = lambdaTwoNorms[lane];
+		vc->lambdaInfNorm = lambdaInfNorms[lane];
 
-					break;
-				}
+		lambdas[0] = b2Max(lambdas[0], lambdaTwoNorms[lane]);
+		lambdas[1] = b2Max(lambdas[1], lambdaInfNorms[lane]);
+	}
+}
 
-				// No solution, give up. This is hit sometimes, but it doesn't seem to matter.
-				break;
-			}
+// Part of a color: groups of single point constraints and single constraints.
+struct b2ColorSolveContext
+{
+	b2ContactSolver* solver;
+	b2ContactConstraintGroup* groups;
+	int32 groupCount;
+	const int32* constraints;
+	int32 count;
+};
+
+static void b2SolveColor(const b2ColorSolveContext* context, int32 groupBegin, int32 groupEnd,
+						 int32 begin, int32 end, float32* lambdas)
+{
+	b2ContactSolver* solver = context->solver;
+
+	for (int32 i = groupBegin; i < groupEnd; ++i)
+	{
+		b2SolveConstraintGroup(context->groups + i, solver->m_velocities, solver->m_velocityConstraints, lambdas);
+	}
+
+	for (int32 i = begin; i < end; ++i)
+	{
+		b2ContactVelocityConstraint* vc = solver->m_velocityConstraints + context->constraints[i];
+
+		float32 lambdaTwoNorm, lambdaInfNorm;
+		if (solver->m_step.solverType == b2_sorSolver)
+		{
+			b2SolveRelaxedVelocityConstraint(vc, solver->m_velocities, true, solver->m_step.relaxation,
+											 &lambdaTwoNorm, &lambdaInfNorm);
+		}
+		else
+		{
+			b2SolveVelocityConstraint(vc, solver->m_velocities, true, &lambdaTwoNorm, &lambdaInfNorm);
 		}
 
-		m_velocities[indexA].v = vA;
-		m_velocities[indexA].w = wA;
+		lambdas[0] = b2Max(lambdas[0], lambdaTwoNorm);
+		lambdas[1] = b2Max(lambdas[1], lambdaInfNorm);
+	}
+}
 
-        m_velocities[indexB].v = vB;
-		m_velocities[indexB].w = wB;
+// Solve a batch of b2_colorBatchSize constraints of a color, the group
+// batches come first.
+static void b2SolveColorBatchTask(void* userData, int32 index, int32 threadIndex)
+{
+	const b2ColorSolveContext* context = (const b2ColorSolveContext*)userData;
+	float32* lambdas = context->solver->m_threadLambdas + 2 * threadIndex;
 
-        float32 lambdaTwoNorm = b2Sqrt(normalLambda*normalLambda + tangentLambda*tangentLambda);
-        float32 lambdaInfNorm = b2Max(normalLambda, tangentLambda);
+	const int32 groupBatchSize = b2_colorBatchSize / 4;
+	int32 groupBatchCount = (context->groupCount + groupBatchSize - 1) / groupBatchSize;
+	if (index < groupBatchCount)
+	{
+		int32 begin = index * groupBatchSize;
+		int32 end = b2Min(begin + groupBatchSize, context->groupCount);
+		b2SolveColor(context, begin, end, 0, 0, lambdas);
+	}
+	else
+	{
+		int32 begin = (index - groupBatchCount) * b2_colorBatchSize;
+		int32 end = b2Min(begin + b2_colorBatchSize, context->count);
+		b2SolveColor(context, 0, 0, begin, end, lambdas);
+	}
+}
+
+void b2ContactSolver::SolveColoredVelocityConstraints(b2SolverVelocityProfile* velocityProfile)
+{
+	if (m_groups && m_groupsInitialized == false)
+	{
+		InitializeConstraintGroups();
+	}
+
+	float32 lambdas[2] = {0.0f, 0.0f};
+
+	b2ThreadPool* threadPool = m_step.threadPool;
+	for (int32 color = 0; color < m_colorCount; ++color)
+	{
+		int32 grouped = m_groups ? m_colorGroupedCounts[color] : 0;
+
+		b2ColorSolveContext context;
+		context.solver = this;
+		context.groups = m_groups ? m_groups + m_colorGroupOffsets[color] : NULL;
+		context.groupCount = (grouped + 3) / 4;
+		context.constraints = m_colorConstraints + m_colorOffsets[color] + grouped;
+		context.count = m_colorOffsets[color + 1] - m_colorOffsets[color] - grouped;
+
+		// The last color is not independent.
+		bool parallel = threadPool != NULL && grouped + context.count > b2_colorBatchSize &&
+						color != b2_constraintColorCount - 1;
+		if (parallel == false)
+		{
+			b2SolveColor(&context, 0, context.groupCount, 0, context.count, lambdas);
+			continue;
+		}
 
-        maxLambdaTwoNorm = b2Max(maxLambdaTwoNorm, lambdaTwoNorm);
-        maxLambdaInfNorm = b2Max(maxLambdaInfNorm, lambdaInfNorm);
+		int32 threadCount = threadPool->GetThreadCount();
+		memset(m_threadLambdas, 0, 2 * threadCount * sizeof(float32));
+
+		const int32 groupBatchSize = b2_colorBatchSize / 4;
+		int32 batchCount = (context.groupCount + groupBatchSize - 1) / groupBatchSize +
+						   (context.count + b2_colorBatchSize - 1) / b2_colorBatchSize;
+		threadPool->ParallelFor(b2SolveColorBatchTask, &context, batchCount);
+
+		for (int32 i = 0; i < threadCount; ++i)
+		{
+			lambdas[0] = b2Max(lambdas[0], m_threadLambdas[2 * i]);
+			lambdas[1] = b2Max(lambdas[1], m_threadLambdas[2 * i + 1]);
+		}
+	}
+
+	// The groups hold the impulses of their constraints while solving.
+	if (m_groups)
+	{
+		int32 groupCount = m_colorGroupOffsets[b2_constraintColorCount];
+		for (int32 i = 0; i < groupCount; ++i)
+		{
+			const b2ContactConstraintGroup* g = m_groups + i;
+			for (int32 lane = 0; lane < 4; ++lane)
+			{
+				if (g->constraintIndex[lane] >= 0)
+				{
+					b2VelocityConstraintPoint* vcp = m_velocityConstraints[g->constraintIndex[lane]].points + 0;
+					vcp->normalImpulse = g->normalImpulse[lane];
+					vcp->tangentImpulse = g->tangentImpulse[lane];
+				}
+			}
+		}
 	}
 
-    velocityProfile->lambdaTwoNorm = maxLambdaTwoNorm;
-    velocityProfile->lambdaInfNorm = maxLambdaInfNorm;
+	velocityProfile->lambdaTwoNorm = lambdas[0];
+	velocityProfile->lambdaInfNorm = lambdas[1];
 }
 
 void b2ContactSolver::StoreImpulses()
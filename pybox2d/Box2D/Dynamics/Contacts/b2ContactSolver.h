@@ -54,6 +54,95 @@ struct b2ContactVelocityConstraint
 	float32 tangentSpeed;
 	int32 pointCount;
 	int32 contactIndex;
+	float32 lambdaTwoNorm, lambdaInfNorm;	// of the last velocity iteration
+};
+
+/// One solved manifold point, written by b2ContactSolver when the world
+/// records contacts (see b2World::SetRecordContacts).
+struct b2ContactRecord
+{
+	int32 master;				///< user id of body A
+	int32 slave;				///< user id of body B
+	float32 px, py;				///< world point
+	float32 nx, ny;				///< world normal, from A to B
+	float32 warmNormalImpulse;	///< normal impulse used to warm start
+	float32 warmTangentImpulse;	///< tangent impulse used to warm start
+	float32 normalImpulse;		///< solved normal impulse
+	float32 tangentImpulse;		///< solved tangent impulse
+	uint64 key;					///< key of the manifold point, see b2MakeContactKey
+};
+
+/// The convergence of one solved contact, written by b2ContactSolver when the
+/// world records islands (see b2World::SetRecordIslands).
+struct b2ContactLambdaRecord
+{
+	int32 island;				///< index of the island record
+	int32 master;				///< user id of body A
+	int32 slave;				///< user id of body B
+	int32 pointCount;			///< number of solved points
+	float32 lambdaTwoNorm;		///< 2-norm of the impulse increment of the last iteration
+	float32 lambdaInfNorm;		///< inf-norm of the impulse increment of the last iteration
+};
+
+/// A warm starting impulse for the manifold point of a contact between the
+/// bodies with user ids idA and idB that is closest to (px, py), or for the
+/// manifold point with the given key. See b2World::SetWarmStartImpulses and
+/// b2World::SetKeyedWarmStartImpulses.
+struct b2WarmStartImpulse
+{
+	int32 idA;
+	int32 idB;
+	float32 px, py;
+	float32 normalImpulse;
+	float32 tangentImpulse;
+	uint64 key;
+};
+
+/// Sort impulses by body ids, or by key, as expected by
+/// b2TimeStep::warmStartImpulses.
+void b2SortWarmStartImpulses(b2WarmStartImpulse* impulses, int32 count, bool byKey);
+
+/// A regular grid of warm starting impulses, sampled at the manifold points.
+/// Node (i, j) is at lower + (i * resX, j * resY) and holds the normal and
+/// tangent impulses data[2 * (i * countY + j)] and data[2 * (i * countY + j) + 1].
+/// See b2World::SetWarmStartField.
+struct b2WarmStartField
+{
+	const float32* data;
+	int32 countX, countY;
+	float32 lowerX, lowerY;
+	float32 resX, resY;
+	b2FieldInterpolation interpolation;
+};
+
+/// Sample the impulses of a field at a world point. Points outside of the
+/// grid take the value at the closest point of the grid, and the normal
+/// impulse is clamped to be non-negative.
+void b2SampleWarmStartField(const b2WarmStartField& field, const b2Vec2& point,
+							float32* normalImpulse, float32* tangentImpulse);
+
+/// The number of colors of the colored velocity solver. Constraints that do
+/// not fit in the first colors go to the last one, which is solved sequentially.
+const int32 b2_constraintColorCount = 32;
+
+/// Colors with more constraints than this are solved in parallel batches.
+const int32 b2_colorBatchSize = 64;
+
+/// Four single point velocity constraints of the colored solver, stored by
+/// field so that they are solved together with SIMD instructions.
+struct b2ContactConstraintGroup
+{
+	float32 normalX[4], normalY[4];
+	float32 rAX[4], rAY[4];
+	float32 rBX[4], rBY[4];
+	float32 invMassA[4], invIA[4];
+	float32 invMassB[4], invIB[4];
+	float32 normalMass[4], tangentMass[4];
+	float32 velocityBias[4];
+	float32 friction[4], tangentSpeed[4];
+	float32 normalImpulse[4], tangentImpulse[4];
+	int32 indexA[4], indexB[4];
+	int32 constraintIndex[4];	///< -1 for unused lanes
 };
 
 struct b2ContactSolverDef
@@ -64,6 +153,10 @@ struct b2ContactSolverDef
 	b2Position* positions;
 	b2Velocity* velocities;
 	b2StackAllocator* allocator;
+
+	// Island indices of the two bodies of each contact, or NULL to read
+	// them from the bodies.
+	const int32* bodyIndices;
 };
 
 class b2ContactSolver
@@ -78,9 +171,37 @@ public:
 	void SolveVelocityConstraints(b2SolverVelocityProfile* velocityProfile);
 	void StoreImpulses();
 
+	/// Write the geometry and the warm starting impulses of all manifold points.
+	/// Call after InitializeVelocityConstraints. Returns the number of records.
+	int32 RecordContacts(b2ContactRecord* records) const;
+
+	/// Fill in the solved impulses of records written by RecordContacts.
+	void RecordImpulses(b2ContactRecord* records) const;
+
+	/// Write one record per contact with the lambda norms of the last
+	/// velocity iteration.
+	void RecordLambdas(b2ContactLambdaRecord* records, int32 island) const;
+
 	void SolvePositionConstraints(b2SolverPositionProfile* positionProfile);
 	bool SolveTOIPositionConstraints(int32 toiIndexA, int32 toiIndexB);
 
+	/// Greedily color the constraints, so no two constraints of a color share
+	/// a body with mass. Used by the colored velocity solver.
+	void ColorConstraints();
+
+	/// Gauss-Seidel sweep over the colors, the constraints of a color are
+	/// independent and solved in parallel on the step's thread pool.
+	void SolveColoredVelocityConstraints(b2SolverVelocityProfile* velocityProfile);
+
+	/// Copy the single point constraints of each color into groups of four,
+	/// for the SIMD solver. Call after InitializeVelocityConstraints.
+	void InitializeConstraintGroups();
+
+	/// Extrapolate the impulses after a sweep of b2_nesterovSolver or
+	/// b2_nncgSolver, and update the velocities to match.
+	void AccelerateNesterov();
+	void AccelerateNNCG();
+
 	b2TimeStep m_step;
 	b2Position* m_positions;
 	b2Velocity* m_velocities;
@@ -89,6 +210,28 @@ public:
 	b2ContactVelocityConstraint* m_velocityConstraints;
 	b2Contact** m_contacts;
 	int m_count;
+
+	// Constraint indices sorted by color, and the start of each color
+	int32* m_colorConstraints;
+	int32* m_colorOffsets;
+	int32 m_colorCount;
+
+	// With the SIMD solver, the first constraints of each color have a
+	// single point and are solved in groups, the rest are solved one by one.
+	b2ContactConstraintGroup* m_groups;
+	int32* m_colorGroupOffsets;
+	int32* m_colorGroupedCounts;
+	bool m_groupsInitialized;
+
+	// Lambda norm maxima of each thread of the pool
+	float32* m_threadLambdas;
+
+	// Impulses of the accelerated solvers, two per manifold point: the
+	// impulses before the sweep, the previous iterate and the search direction
+	float32* m_accelImpulses;
+	int32 m_accelIteration;
+	float32 m_accelTheta;
+	float32 m_accelResidual;
 };
 
 #endif
@@ -100,6 +100,8 @@ b2Body::b2Body(const b2BodyDef* bd, b2World* world)
 	m_invI = 0.0f;
 
 	m_userData = bd->userData;
+	m_userId = bd->userId;
+	m_stateIndex = -1;
 
 	m_fixtureList = NULL;
 	m_fixtureCount = 0;
@@ -123,6 +125,7 @@ void b2Body::SetType(b2BodyType type)
 		return;
 	}
 
+	bool wasDynamic = m_type == b2_dynamicBody;
 	m_type = type;
 
 	ResetMassData();
@@ -161,6 +164,12 @@ void b2Body::SetType(b2BodyType type)
 			broadPhase->TouchProxy(f->m_proxies[i].proxyId);
 		}
 	}
+
+	// The body gains or loses its row in the body arrays.
+	if (m_world->m_bodyArrays && wasDynamic != (m_type == b2_dynamicBody))
+	{
+		m_world->RebuildBodyArrays();
+	}
 }
 
 b2Fixture* b2Body::CreateFixture(const b2FixtureDef* def)
@@ -348,6 +357,7 @@ void b2Body::ResetMassData()
 
 	// Update center of mass velocity.
 	m_linearVelocity += b2Cross(m_angularVelocity, m_sweep.c - oldCenter);
+	SyncState();
 }
 
 void b2Body::SetMassData(const b2MassData* massData)
@@ -389,6 +399,12 @@ void b2Body::SetMassData(const b2MassData* massData)
 
 	// Update center of mass velocity.
 	m_linearVelocity += b2Cross(m_angularVelocity, m_sweep.c - oldCenter);
+	SyncState();
+}
+
+void b2Body::WriteState() const
+{
+	m_world->WriteBodyArrays(this);
 }
 
 bool b2Body::ShouldCollide(const b2Body* other) const
@@ -438,6 +454,7 @@ void b2Body::SetTransform(const b2Vec2& position, float32 angle)
 	}
 
 	m_world->m_contactManager.FindNewContacts();
+	SyncState();
 }
 
 void b2Body::SynchronizeFixtures()
@@ -67,6 +67,7 @@ struct b2BodyDef
 		type = b2_staticBody;
 		active = true;
 		gravityScale = 1.0f;
+		userId = -1;
 	}
 
 	/// The body type: static, kinematic, or dynamic.
@@ -120,6 +121,10 @@ struct b2BodyDef
 
 	/// Scale the gravity applied to this body.
 	float32 gravityScale;
+
+	/// An application specific integer id, readable from native code
+	/// (e.g. b2World::GetBodyStates). -1 means unset.
+	int32 userId;
 };
 
 /// A rigid body. These are created via b2World::CreateBody.
@@ -376,6 +381,12 @@ public:
 	/// Set the user data. Use this to store your application specific data.
 	void SetUserData(void* data);
 
+	/// Get the application specific id that was provided in the body definition.
+	int32 GetUserId() const;
+
+	/// Set the application specific id.
+	void SetUserId(int32 id);
+
 	/// Get the parent world of this body.
 	b2World* GetWorld();
 	const b2World* GetWorld() const;
@@ -421,6 +432,12 @@ private:
 	void SynchronizeFixtures();
 	void SynchronizeTransform();
 
+	// Write the state to the world's body arrays, if the body has a row there.
+	// Called after every change of the state outside of the solver, see
+	// b2World::SetBodyArrays.
+	void SyncState();
+	void WriteState() const;
+
 	// This is used to prevent connected bodies from colliding.
 	// It may lie, depending on the collideConnected flag.
 	bool ShouldCollide(const b2Body* other) const;
@@ -433,6 +450,9 @@ private:
 
 	int32 m_islandIndex;
 
+	// Row in the world's body arrays, -1 if none
+	int32 m_stateIndex;
+
 	b2Transform m_xf;		// the body origin transform
 	b2Sweep m_sweep;		// the swept motion for CCD
 
@@ -464,6 +484,7 @@ private:
 	float32 m_sleepTime;
 
 	void* m_userData;
+	int32 m_userId;
 };
 
 inline b2BodyType b2Body::GetType() const
@@ -509,6 +530,7 @@ inline void b2Body::SetLinearVelocity(const b2Vec2& v)
 	}
 
 	m_linearVelocity = v;
+	SyncState();
 }
 
 inline const b2Vec2& b2Body::GetLinearVelocity() const
@@ -529,6 +551,7 @@ inline void b2Body::SetAngularVelocity(float32 w)
 	}
 
 	m_angularVelocity = w;
+	SyncState();
 }
 
 inline float32 b2Body::GetAngularVelocity() const
@@ -648,6 +671,7 @@ inline void b2Body::SetAwake(bool flag)
 		m_angularVelocity = 0.0f;
 		m_force.SetZero();
 		m_torque = 0.0f;
+		SyncState();
 	}
 }
 
@@ -809,6 +833,7 @@ inline void b2Body::ApplyLinearImpulse(const b2Vec2& impulse, const b2Vec2& poin
 	{
 		m_linearVelocity += m_invMass * impulse;
 		m_angularVelocity += m_invI * b2Cross(point - m_sweep.c, impulse);
+		SyncState();
 	}
 }
 
@@ -828,6 +853,7 @@ inline void b2Body::ApplyAngularImpulse(float32 impulse, bool wake)
 	if (m_flags & e_awakeFlag)
 	{
 		m_angularVelocity += m_invI * impulse;
+		SyncState();
 	}
 }
 
@@ -837,6 +863,14 @@ inline void b2Body::SynchronizeTransform()
 	m_xf.p = m_sweep.c - b2Mul(m_xf.q, m_sweep.localCenter);
 }
 
+inline void b2Body::SyncState()
+{
+	if (m_stateIndex >= 0)
+	{
+		WriteState();
+	}
+}
+
 inline void b2Body::Advance(float32 alpha)
 {
 	// Advance to the new safe time. This doesn't sync the broad-phase.
@@ -847,6 +881,16 @@ inline void b2Body::Advance(float32 alpha)
 	m_xf.p = m_sweep.c - b2Mul(m_xf.q, m_sweep.localCenter);
 }
 
+inline int32 b2Body::GetUserId() const
+{
+	return m_userId;
+}
+
+inline void b2Body::SetUserId(int32 id)
+{
+	m_userId = id;
+}
+
 inline b2World* b2Body::GetWorld()
 {
 	return m_world;
@@ -21,6 +21,8 @@
 #include <Box2D/Dynamics/b2Fixture.h>
 #include <Box2D/Dynamics/b2WorldCallbacks.h>
 #include <Box2D/Dynamics/Contacts/b2Contact.h>
+#include <Box2D/Common/b2StackAllocator.h>
+#include <Box2D/Common/b2ThreadPool.h>
 
 b2ContactFilter b2_defaultFilter;
 b2ContactListener b2_defaultListener;
@@ -29,6 +31,7 @@ b2ContactManager::b2ContactManager()
 {
 	m_contactList = NULL;
 	m_contactCount = 0;
+	m_version = 0;
 	m_contactFilter = &b2_defaultFilter;
 	m_contactListener = &b2_defaultListener;
 	m_allocator = NULL;
@@ -97,6 +100,7 @@ void b2ContactManager::Destroy(b2Contact* c)
 	// Call the factory.
 	b2Contact::Destroy(c, m_allocator);
 	--m_contactCount;
+	++m_version;
 }
 
 // This is the top level collision call for the time step. Here
@@ -169,6 +173,137 @@ void b2ContactManager::Collide()
 	}
 }
 
+// The number of contacts updated by a task of the parallel narrow-phase.
+const int32 b2_collideTaskSize = 128;
+
+// What the parallel narrow-phase does with a contact, decided in list order
+// before the manifolds are updated.
+enum b2CollideAction
+{
+	e_collideUpdate,
+	e_collideDestroy,
+	e_collideInactive
+};
+
+struct b2CollideEntry
+{
+	b2Contact* contact;
+	int32 action;
+	bool wasTouching;
+	b2Manifold oldManifold;
+};
+
+struct b2CollideContext
+{
+	b2CollideEntry* entries;
+	int32 count;
+};
+
+void b2ContactManager::CollideTask(void* context, int32 index, int32 threadIndex)
+{
+	B2_NOT_USED(threadIndex);
+
+	b2CollideContext* collide = (b2CollideContext*)context;
+	int32 begin = index * b2_collideTaskSize;
+	int32 end = b2Min(begin + b2_collideTaskSize, collide->count);
+	for (int32 i = begin; i < end; ++i)
+	{
+		b2CollideEntry* entry = collide->entries + i;
+		if (entry->action == e_collideUpdate)
+		{
+			entry->wasTouching = entry->contact->UpdateManifold(&entry->oldManifold);
+		}
+	}
+}
+
+void b2ContactManager::Collide(b2ThreadPool* threadPool, b2StackAllocator* allocator)
+{
+	b2CollideEntry* entries = (b2CollideEntry*)allocator->Allocate(m_contactCount * sizeof(b2CollideEntry));
+	int32 count = 0;
+
+	// Filter the contacts and find those to update, as Collide does.
+	for (b2Contact* c = m_contactList; c; c = c->GetNext())
+	{
+		b2CollideEntry* entry = entries + count++;
+		entry->contact = c;
+
+		b2Fixture* fixtureA = c->GetFixtureA();
+		b2Fixture* fixtureB = c->GetFixtureB();
+		b2Body* bodyA = fixtureA->GetBody();
+		b2Body* bodyB = fixtureB->GetBody();
+
+		if (c->m_flags & b2Contact::e_filterFlag)
+		{
+			if (bodyB->ShouldCollide(bodyA) == false ||
+				(m_contactFilter && m_contactFilter->ShouldCollide(fixtureA, fixtureB) == false))
+			{
+				entry->action = e_collideDestroy;
+				continue;
+			}
+
+			c->m_flags &= ~b2Contact::e_filterFlag;
+		}
+
+		bool activeA = bodyA->IsAwake() && bodyA->m_type != b2_staticBody;
+		bool activeB = bodyB->IsAwake() && bodyB->m_type != b2_staticBody;
+
+		// The bodies may still be woken by a contact before this one.
+		if (activeA == false && activeB == false)
+		{
+			entry->action = e_collideInactive;
+			continue;
+		}
+
+		int32 proxyIdA = fixtureA->m_proxies[c->GetChildIndexA()].proxyId;
+		int32 proxyIdB = fixtureB->m_proxies[c->GetChildIndexB()].proxyId;
+		entry->action = m_broadPhase.TestOverlap(proxyIdA, proxyIdB) ? e_collideUpdate : e_collideDestroy;
+	}
+
+	b2CollideContext context;
+	context.entries = entries;
+	context.count = count;
+	threadPool->ParallelFor(CollideTask, &context, (count + b2_collideTaskSize - 1) / b2_collideTaskSize);
+
+	// Destroy the contacts, wake the bodies and call the listener in list order.
+	for (int32 i = 0; i < count; ++i)
+	{
+		b2CollideEntry* entry = entries + i;
+		b2Contact* c = entry->contact;
+
+		if (entry->action == e_collideUpdate)
+		{
+			c->ReportUpdate(m_contactListener, entry->wasTouching, &entry->oldManifold);
+		}
+		else if (entry->action == e_collideDestroy)
+		{
+			Destroy(c);
+		}
+		else
+		{
+			b2Body* bodyA = c->GetFixtureA()->GetBody();
+			b2Body* bodyB = c->GetFixtureB()->GetBody();
+			bool activeA = bodyA->IsAwake() && bodyA->m_type != b2_staticBody;
+			bool activeB = bodyB->IsAwake() && bodyB->m_type != b2_staticBody;
+			if (activeA == false && activeB == false)
+			{
+				continue;
+			}
+
+			int32 proxyIdA = c->GetFixtureA()->m_proxies[c->GetChildIndexA()].proxyId;
+			int32 proxyIdB = c->GetFixtureB()->m_proxies[c->GetChildIndexB()].proxyId;
+			if (m_broadPhase.TestOverlap(proxyIdA, proxyIdB) == false)
+			{
+				Destroy(c);
+				continue;
+			}
+
+			c->Update(m_contactListener);
+		}
+	}
+
+	allocator->Free(entries);
+}
+
 void b2ContactManager::FindNewContacts()
 {
 	m_broadPhase.UpdatePairs(this);
@@ -293,4 +428,5 @@ void b2ContactManager::AddPair(void* proxyUserDataA, void* proxyUserDataB)
 	}
 
 	++m_contactCount;
+	++m_version;
 }
@@ -25,6 +25,8 @@ class b2Contact;
 class b2ContactFilter;
 class b2ContactListener;
 class b2BlockAllocator;
+class b2StackAllocator;
+class b2ThreadPool;
 
 // Delegate of b2World.
 class b2ContactManager
@@ -40,13 +42,24 @@ public:
 	void Destroy(b2Contact* c);
 
 	void Collide();
+
+	// Collide with the manifolds updated on the thread pool. Contacts are
+	// destroyed and the listener is called afterwards, on the calling thread
+	// and in the contact list order, with the same results as Collide.
+	void Collide(b2ThreadPool* threadPool, b2StackAllocator* allocator);
             
 	b2BroadPhase m_broadPhase;
 	b2Contact* m_contactList;
 	int32 m_contactCount;
+	// Incremented whenever a contact is created or destroyed.
+	uint32 m_version;
 	b2ContactFilter* m_contactFilter;
 	b2ContactListener* m_contactListener;
 	b2BlockAllocator* m_allocator;
+
+private:
+
+	static void CollideTask(void* context, int32 index, int32 threadIndex);
 };
 
 #endif
@@ -145,6 +145,20 @@ This might be faster than computing sin+cos.
 However, we can compute sin+cos of the same angle fast.
 */
 
+// Project the iterations still needed for the lambda norm to fall from norm
+// to threshold, assuming it keeps the mean contraction rate it had since it
+// was oldNorm, iterations ago.
+static float32 b2ProjectIterations(float32 oldNorm, float32 norm, int32 iterations, float32 threshold)
+{
+	if (norm >= oldNorm)
+	{
+		return b2_maxFloat;
+	}
+
+	float32 logRate = logf(norm / oldNorm) / iterations;
+	return logf(threshold / norm) / logRate;
+}
+
 b2Island::b2Island(
 	int32 bodyCapacity,
 	int32 contactCapacity,
@@ -162,6 +176,13 @@ b2Island::b2Island(
 	m_allocator = allocator;
 	m_listener = listener;
 
+	m_contactBodyIndices = NULL;
+	m_sharedStaticBodies = false;
+
+	m_islandRecord = NULL;
+	m_lambdaRecords = NULL;
+	m_recordIndex = 0;
+
 	m_bodies = (b2Body**)m_allocator->Allocate(bodyCapacity * sizeof(b2Body*));
 	m_contacts = (b2Contact**)m_allocator->Allocate(contactCapacity	 * sizeof(b2Contact*));
 	m_joints = (b2Joint**)m_allocator->Allocate(jointCapacity * sizeof(b2Joint*));
@@ -180,7 +201,8 @@ b2Island::~b2Island()
 	m_allocator->Free(m_bodies);
 }
 
-void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& gravity, bool allowSleep)
+int32 b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& gravity, bool allowSleep,
+					   b2ContactRecord* records)
 {
 	b2Timer timer;
 
@@ -197,8 +219,11 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
 		float32 w = b->m_angularVelocity;
 
 		// Store positions for continuous collision.
-		b->m_sweep.c0 = b->m_sweep.c;
-		b->m_sweep.a0 = b->m_sweep.a;
+		if (b->m_type != b2_staticBody || m_sharedStaticBodies == false)
+		{
+			b->m_sweep.c0 = b->m_sweep.c;
+			b->m_sweep.a0 = b->m_sweep.a;
+		}
 
 		if (b->m_type == b2_dynamicBody)
 		{
@@ -228,6 +253,9 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
     // Solver profiles - stores solver results
     b2SolverVelocityProfile solverVelocityProfile;
     b2SolverPositionProfile solverPositionProfile;
+    solverVelocityProfile.lambdaTwoNorm = 0.0f;
+    solverVelocityProfile.lambdaInfNorm = 0.0f;
+    solverPositionProfile.lambda = 0.0f;
 
 	// Solver data - used only for joints
 	b2SolverData solverData;
@@ -243,10 +271,17 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
 	contactSolverDef.positions = m_positions;
 	contactSolverDef.velocities = m_velocities;
 	contactSolverDef.allocator = m_allocator;
+	contactSolverDef.bodyIndices = m_contactBodyIndices;
 
 	b2ContactSolver contactSolver(&contactSolverDef);
 	contactSolver.InitializeVelocityConstraints();
 
+	int32 recordCount = 0;
+	if (records)
+	{
+		recordCount = contactSolver.RecordContacts(records);
+	}
+
 	if (step.warmStarting)
 	{
 		contactSolver.WarmStart();
@@ -261,6 +296,12 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
 
 	// Solve velocity constraints
 	timer.Reset();
+	int32 velocityIterationsSaved = 0;
+	float32* lambdaHistory = NULL;
+	if (step.adaptiveIterations > 0 && step.velocityThreshold > 0.0f)
+	{
+		lambdaHistory = (float32*)m_allocator->Allocate(step.adaptiveIterations * sizeof(float32));
+	}
     int32 i;
 	for (i = 0; i < step.velocityIterations; ++i)
 	{
@@ -282,13 +323,47 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
         {
             break;
         }
+
+		// Adaptive budget: project the iterations still needed to reach the
+		// threshold from the current norm and its contraction over the last
+		// adaptiveIterations iterations. Stop if they do not fit the budget.
+		if (lambdaHistory)
+		{
+			int32 window = step.adaptiveIterations;
+			if (i + 1 >= window && i + 1 < step.velocityIterations)
+			{
+				// The norm of iteration i + 1 - window
+				float32 oldNorm = lambdaHistory[(i + 1) % window];
+				float32 needed = b2ProjectIterations(oldNorm, solverVelocityProfile.lambdaTwoNorm,
+													 window - 1, step.velocityThreshold);
+				if (needed > (float32)(step.velocityIterations - (i + 1)))
+				{
+					velocityIterationsSaved = step.velocityIterations - (i + 1);
+					break;
+				}
+			}
+			lambdaHistory[i % window] = solverVelocityProfile.lambdaTwoNorm;
+		}
+	}
+	if (lambdaHistory)
+	{
+		m_allocator->Free(lambdaHistory);
 	}
     int32 velocityIterations = b2Min(i+1, step.velocityIterations);
     profile->velocityIterations += velocityIterations;
+    profile->velocityIterationsSaved += velocityIterationsSaved;
     profile->maxIslandVelocityIterations = b2Max(profile->maxIslandVelocityIterations, velocityIterations);
 
 	// Store impulses for warm starting
 	contactSolver.StoreImpulses();
+	if (records)
+	{
+		contactSolver.RecordImpulses(records);
+	}
+	if (m_lambdaRecords)
+	{
+		contactSolver.RecordLambdas(m_lambdaRecords, m_recordIndex);
+	}
 	profile->solveVelocity += timer.GetMilliseconds();
 
 	// Integrate positions
@@ -358,15 +433,34 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
     profile->positionIterations += positionIterations;
     profile->maxIslandPositionIterations = b2Max(profile->maxIslandPositionIterations, positionIterations);
 
+	if (m_islandRecord)
+	{
+		m_islandRecord->bodyCount = m_bodyCount;
+		m_islandRecord->contactCount = m_contactCount;
+		m_islandRecord->jointCount = m_jointCount;
+		m_islandRecord->velocityIterations = velocityIterations;
+		m_islandRecord->positionIterations = positionIterations;
+		m_islandRecord->velocityLambdaTwoNorm = solverVelocityProfile.lambdaTwoNorm;
+		m_islandRecord->velocityLambdaInfNorm = solverVelocityProfile.lambdaInfNorm;
+		m_islandRecord->positionLambda = solverPositionProfile.lambda;
+		m_islandRecord->velocityIterationsSaved = velocityIterationsSaved;
+	}
+
 	// Copy state buffers back to the bodies
 	for (int32 i = 0; i < m_bodyCount; ++i)
 	{
 		b2Body* body = m_bodies[i];
+		if (body->m_type == b2_staticBody && m_sharedStaticBodies)
+		{
+			continue;
+		}
+
 		body->m_sweep.c = m_positions[i].c;
 		body->m_sweep.a = m_positions[i].a;
 		body->m_linearVelocity = m_velocities[i].v;
 		body->m_angularVelocity = m_velocities[i].w;
 		body->SynchronizeTransform();
+		body->SyncState();
 	}
 
 	profile->solvePosition += timer.GetMilliseconds();
@@ -407,10 +501,17 @@ void b2Island::Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& g
 			for (int32 i = 0; i < m_bodyCount; ++i)
 			{
 				b2Body* b = m_bodies[i];
+				if (b->m_type == b2_staticBody && m_sharedStaticBodies)
+				{
+					continue;
+				}
+
 				b->SetAwake(false);
 			}
 		}
 	}
+
+	return recordCount;
 }
 
 void b2Island::SolveTOI(const b2TimeStep& subStep, int32 toiIndexA, int32 toiIndexB)
@@ -437,6 +538,7 @@ void b2Island::SolveTOI(const b2TimeStep& subStep, int32 toiIndexA, int32 toiInd
 	contactSolverDef.step = subStep;
 	contactSolverDef.positions = m_positions;
 	contactSolverDef.velocities = m_velocities;
+	contactSolverDef.bodyIndices = NULL;
 	b2ContactSolver contactSolver(&contactSolverDef);
 
 	// Solve position constraints.
@@ -542,6 +644,7 @@ void b2Island::SolveTOI(const b2TimeStep& subStep, int32 toiIndexA, int32 toiInd
 		body->m_linearVelocity = v;
 		body->m_angularVelocity = w;
 		body->SynchronizeTransform();
+		body->SyncState();
 	}
 
 	Report(contactSolver.m_velocityConstraints);
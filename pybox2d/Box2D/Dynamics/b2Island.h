@@ -28,8 +28,25 @@ class b2Joint;
 class b2StackAllocator;
 class b2ContactListener;
 struct b2ContactVelocityConstraint;
+struct b2ContactRecord;
+struct b2ContactLambdaRecord;
 struct b2Profile;
 
+/// One solved island, written when the world records islands
+/// (see b2World::SetRecordIslands).
+struct b2IslandRecord
+{
+	int32 bodyCount;				///< bodies, including static bodies
+	int32 contactCount;				///< solved contacts
+	int32 jointCount;
+	int32 velocityIterations;		///< velocity iterations used
+	int32 positionIterations;		///< position iterations used
+	float32 velocityLambdaTwoNorm;	///< largest 2-norm of the last velocity iteration
+	float32 velocityLambdaInfNorm;	///< largest inf-norm of the last velocity iteration
+	float32 positionLambda;			///< position lambda of the last position iteration
+	int32 velocityIterationsSaved;	///< velocity iterations cut by the adaptive budget
+};
+
 /// This is an internal class.
 class b2Island
 {
@@ -45,7 +62,10 @@ public:
 		m_jointCount = 0;
 	}
 
-	void Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& gravity, bool allowSleep);
+	/// @param records if not NULL, receives one record per solved manifold point.
+	/// @return the number of records written.
+	int32 Solve(b2Profile* profile, const b2TimeStep& step, const b2Vec2& gravity, bool allowSleep,
+				b2ContactRecord* records);
 
 	void SolveTOI(const b2TimeStep& subStep, int32 toiIndexA, int32 toiIndexB);
 
@@ -81,6 +101,19 @@ public:
 	b2Position* m_positions;
 	b2Velocity* m_velocities;
 
+	// Island indices of the bodies of each contact, see b2ContactSolverDef.
+	const int32* m_contactBodyIndices;
+
+	// Set when static bodies are shared with islands solved at the same time.
+	// The island then leaves their state alone, the caller updates it.
+	bool m_sharedStaticBodies;
+
+	// If not NULL, Solve writes the island's record and one lambda record
+	// per contact. m_recordIndex is the index of the island record.
+	b2IslandRecord* m_islandRecord;
+	b2ContactLambdaRecord* m_lambdaRecords;
+	int32 m_recordIndex;
+
 	int32 m_bodyCount;
 	int32 m_jointCount;
 	int32 m_contactCount;
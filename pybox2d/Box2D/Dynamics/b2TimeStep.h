@@ -21,6 +21,26 @@
 
 #include <Box2D/Common/b2Math.h>
 
+struct b2WarmStartImpulse;
+struct b2WarmStartField;
+class b2ThreadPool;
+
+/// Iterative methods of the contact velocity solver, see b2World::SetSolverType.
+enum b2SolverType
+{
+	b2_pgsSolver = 0,	///< projected Gauss-Seidel, the default
+	b2_sorSolver,		///< projected Gauss-Seidel with over-relaxation
+	b2_nesterovSolver,	///< projected Gauss-Seidel with Nesterov momentum and restarts
+	b2_nncgSolver		///< nonsmooth nonlinear conjugate gradient
+};
+
+/// Interpolation of a warm starting field, see b2World::SetWarmStartField.
+enum b2FieldInterpolation
+{
+	b2_bilinearInterpolation = 0,	///< linear between the 2x2 nearest nodes
+	b2_bicubicInterpolation			///< Catmull-Rom cubic over the 4x4 nearest nodes
+};
+
 /// Profiling data. Times are in milliseconds.
 struct b2Profile
 {
@@ -41,6 +61,9 @@ struct b2Profile
     int32 maxIslandVelocityIterations;
     int32 maxIslandPositionIterations;
 
+    // Velocity iterations left unused by islands stopped by the adaptive budget
+    int32 velocityIterationsSaved;
+
     // Convergence rates - optional
     bool convergenceRates;
     float32* velocityLambdaTwoNorms;
@@ -48,6 +71,26 @@ struct b2Profile
     float32* positionLambdas;
 };
 
+/// The timings and counters of one step in the profile history, see
+/// b2World::SetProfileHistoryCapacity. Times are in milliseconds.
+struct b2ProfileRecord
+{
+	float32 step;
+	float32 collide;
+	float32 solve;
+	float32 solveInit;
+	float32 solveVelocity;
+	float32 solvePosition;
+	float32 broadphase;
+	float32 solveTOI;
+	int32 velocityIterations;
+	int32 positionIterations;
+	int32 contactsSolved;
+	int32 maxIslandVelocityIterations;
+	int32 maxIslandPositionIterations;
+	int32 velocityIterationsSaved;
+};
+
 /// This is an internal structure.
 struct b2TimeStep
 {
@@ -61,8 +104,30 @@ struct b2TimeStep
     float32 velocityThreshold;
     float32 positionThreshold;
 
+    // Iterations observed before projecting the convergence of an island,
+    // 0 to always run to the threshold or velocityIterations.
+    int32 adaptiveIterations;
+
     bool warmStarting;
     bool convergenceRates;
+    bool coloredSolver;
+    bool simdSolver;
+
+    // Contact velocity solver and the over-relaxation of b2_sorSolver
+    b2SolverType solverType;
+    float32 relaxation;
+
+    // Threads for the colored solver, NULL to solve on the calling thread.
+    b2ThreadPool* threadPool;
+
+    // Impulses set through b2World::SetWarmStartImpulses, sorted by body ids,
+    // or through b2World::SetKeyedWarmStartImpulses, sorted by key.
+    const b2WarmStartImpulse* warmStartImpulses;
+    int32 warmStartImpulseCount;
+    bool warmStartByKey;
+
+    // Impulses set through b2World::SetWarmStartField, NULL if none.
+    const b2WarmStartField* warmStartField;
 };
 
 /// This is an internal structure.
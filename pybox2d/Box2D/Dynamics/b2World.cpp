@@ -32,11 +32,14 @@
 #include <Box2D/Collision/b2TimeOfImpact.h>
 #include <Box2D/Common/b2Draw.h>
 #include <Box2D/Common/b2Timer.h>
+#include <Box2D/Common/b2ThreadPool.h>
 #include <new>
+#include <algorithm>
 
 b2World::b2World(const b2Vec2& gravity)
 {
 	m_destructionListener = NULL;
+	m_batchContactListener = NULL;
 	m_debugDraw = NULL;
 
 	m_bodyList = NULL;
@@ -44,13 +47,67 @@ b2World::b2World(const b2Vec2& gravity)
 
 	m_bodyCount = 0;
 	m_jointCount = 0;
+	m_version = 0;
 
 	m_warmStarting = true;
 	m_continuousPhysics = true;
 	m_subStepping = false;
     m_convergenceRates = false;
+	m_recordContacts = false;
+	m_recordIslands = false;
+	m_coloredSolver = false;
+	m_simdSolver = false;
+	m_parallelCollide = false;
+	m_solverType = b2_pgsSolver;
+	m_relaxation = 1.0f;
+
+	m_velocityLambdaCapacity = 0;
+	m_positionLambdaCapacity = 0;
+
+	m_contactRecords = NULL;
+	m_contactRecordCount = 0;
+	m_contactRecordCapacity = 0;
+
+	m_islandRecords = NULL;
+	m_islandRecordCount = 0;
+	m_islandRecordCapacity = 0;
+	m_lambdaRecords = NULL;
+	m_lambdaRecordCount = 0;
+	m_lambdaRecordCapacity = 0;
+
+	m_profileHistory = NULL;
+	m_profileHistoryCount = 0;
+	m_profileHistoryCapacity = 0;
+	m_profileHistoryIndex = 0;
+
+	memset(&m_contactBatch, 0, sizeof(m_contactBatch));
+	m_batchContacts = NULL;
+	m_contactBatchCapacity = 0;
+
+	m_warmStartImpulses = NULL;
+	m_warmStartImpulseCount = 0;
+	m_warmStartImpulseCapacity = 0;
+	m_hasWarmStartImpulses = false;
+	m_warmStartByKey = false;
+	m_warmStartField = NULL;
+	m_warmStartFieldCapacity = 0;
+	m_hasWarmStartField = false;
+
+	m_bodyArrays = NULL;
+	m_bodyArrayBodies = NULL;
+	m_bodyArrayCount = 0;
+	m_bodyArrayCapacity = 0;
+
+	m_retiredBuffers = NULL;
+	m_retiredBufferCount = 0;
+	m_retiredBufferCapacity = 0;
+	m_bufferLockCount = 0;
+
+	m_threadPool = NULL;
+	m_threadAllocators = NULL;
 
     m_velocityThreshold = 0.0;
+	m_adaptiveIterations = 0;
     m_positionThreshold = FLT_MAX;
 
 	m_stepComplete = true;
@@ -86,6 +143,28 @@ b2World::~b2World()
 
 		b = bNext;
 	}
+
+	b2Free(m_profile.velocityLambdaTwoNorms);
+	b2Free(m_profile.velocityLambdaInfNorms);
+	b2Free(m_profile.positionLambdas);
+	b2Free(m_contactRecords);
+	b2Free(m_islandRecords);
+	b2Free(m_lambdaRecords);
+	b2Free(m_profileHistory);
+	b2Free(m_contactBatch.keys);
+	b2Free(m_batchContacts);
+	b2Free(m_warmStartImpulses);
+	b2Free(m_warmStartField);
+	b2Free(m_bodyArrays);
+	b2Free(m_bodyArrayBodies);
+	for (int32 i = 0; i < m_retiredBufferCount; ++i)
+	{
+		b2Free(m_retiredBuffers[i]);
+	}
+	b2Free(m_retiredBuffers);
+
+	delete m_threadPool;
+	delete [] m_threadAllocators;
 }
 
 void b2World::SetDestructionListener(b2DestructionListener* listener)
@@ -103,6 +182,11 @@ void b2World::SetContactListener(b2ContactListener* listener)
 	m_contactManager.m_contactListener = listener;
 }
 
+void b2World::SetBatchContactListener(b2BatchContactListener* listener)
+{
+	m_batchContactListener = listener;
+}
+
 void b2World::SetDebugDraw(b2Draw* debugDraw)
 {
 	m_debugDraw = debugDraw;
@@ -129,9 +213,48 @@ b2Body* b2World::CreateBody(const b2BodyDef* def)
 	m_bodyList = b;
 	++m_bodyCount;
 
+	if (m_bodyArrays && b->m_type == b2_dynamicBody)
+	{
+		AppendBodyArrays(b);
+	}
+	++m_version;
+
 	return b;
 }
 
+void b2World::CreateCircleBodies(const float64* data, int32 dataSize, bool allowSleep)
+{
+	b2Assert(IsLocked() == false);
+	b2Assert(dataSize % e_circleBodyColumnCount == 0);
+	if (IsLocked())
+	{
+		return;
+	}
+
+	b2BodyDef bd;
+	bd.type = b2_dynamicBody;
+	bd.allowSleep = allowSleep;
+
+	b2CircleShape shape;
+	b2FixtureDef fd;
+	fd.shape = &shape;
+
+	int32 count = dataSize / e_circleBodyColumnCount;
+	for (int32 i = 0; i < count; ++i)
+	{
+		const float64* row = data + i * e_circleBodyColumnCount;
+		bd.position.Set((float32)row[e_circleBodyPx], (float32)row[e_circleBodyPy]);
+		bd.userId = (int32)row[e_circleBodyId];
+		shape.m_radius = (float32)row[e_circleBodyRadius];
+		fd.density = (float32)row[e_circleBodyDensity];
+		fd.friction = (float32)row[e_circleBodyFriction];
+		fd.restitution = (float32)row[e_circleBodyRestitution];
+
+		b2Body* body = CreateBody(&bd);
+		body->CreateFixture(&fd);
+	}
+}
+
 void b2World::DestroyBody(b2Body* b)
 {
 	b2Assert(m_bodyCount > 0);
@@ -209,6 +332,26 @@ void b2World::DestroyBody(b2Body* b)
 	}
 
 	--m_bodyCount;
+	++m_version;
+
+	// Close the gap in the body arrays, keeping the creation order.
+	if (b->m_stateIndex >= 0)
+	{
+		int32 index = b->m_stateIndex;
+		int32 tail = m_bodyArrayCount - index - 1;
+		for (int32 k = 0; k < e_bodyArrayColumnCount; ++k)
+		{
+			float32* column = m_bodyArrays + k * m_bodyArrayCapacity;
+			memmove(column + index, column + index + 1, tail * sizeof(float32));
+		}
+		memmove(m_bodyArrayBodies + index, m_bodyArrayBodies + index + 1, tail * sizeof(b2Body*));
+		--m_bodyArrayCount;
+		for (int32 i = index; i < m_bodyArrayCount; ++i)
+		{
+			m_bodyArrayBodies[i]->m_stateIndex = i;
+		}
+	}
+
 	b->~b2Body();
 	m_blockAllocator.Free(b, sizeof(b2Body));
 }
@@ -232,6 +375,7 @@ b2Joint* b2World::CreateJoint(const b2JointDef* def)
 	}
 	m_jointList = j;
 	++m_jointCount;
+	++m_version;
 
 	// Connect to the bodies' doubly linked lists.
 	j->m_edgeA.joint = j;
@@ -349,6 +493,7 @@ void b2World::DestroyJoint(b2Joint* j)
 
 	b2Assert(m_jointCount > 0);
 	--m_jointCount;
+	++m_version;
 
 	// If the joint prevents collisions, then flag any contacts for filtering.
 	if (collideConnected == false)
@@ -386,6 +531,79 @@ void b2World::SetAllowSleeping(bool flag)
 	}
 }
 
+// Defined in b2ContactManager.cpp, does nothing.
+extern b2ContactListener b2_defaultListener;
+
+// An island collected for the thread pool, as ranges of the shared arrays.
+struct b2IslandRange
+{
+	int32 bodyStart;
+	int32 bodyCount;
+	int32 contactStart;
+	int32 contactCount;
+	int32 recordStart;
+	int32 islandRecord;
+	int32 lambdaStart;
+};
+
+// Everything the threads need to solve the collected islands.
+struct b2IslandSolveContext
+{
+	b2TimeStep step;
+	b2Vec2 gravity;
+	bool allowSleep;
+
+	b2StackAllocator* allocator;
+	b2StackAllocator* threadAllocators;
+	b2Profile* profile;
+	b2Profile* threadProfiles;
+
+	b2IslandRange* islands;
+	int32* tasks;
+	b2Body** bodies;
+	b2Contact** contacts;
+	int32* bodyIndices;
+	b2ContactRecord* records;
+	b2IslandRecord* islandRecords;
+	b2ContactLambdaRecord* lambdaRecords;
+};
+
+// Solve the island of a task. Thread 0 is the calling thread and uses the
+// world's own stack allocator and profile.
+static void b2SolveIslandTask(void* userData, int32 index, int32 threadIndex)
+{
+	b2IslandSolveContext* context = (b2IslandSolveContext*)userData;
+	const b2IslandRange* range = context->islands + context->tasks[index];
+
+	b2StackAllocator* allocator = context->allocator;
+	b2Profile* profile = context->profile;
+	if (threadIndex > 0)
+	{
+		allocator = context->threadAllocators + threadIndex - 1;
+		profile = context->threadProfiles + threadIndex - 1;
+	}
+
+	// Static bodies may be shared with other islands, so the bodies are not
+	// added one by one, which would overwrite their island index.
+	b2Island island(range->bodyCount, range->contactCount, 0, allocator, NULL);
+	memcpy(island.m_bodies, context->bodies + range->bodyStart, range->bodyCount * sizeof(b2Body*));
+	memcpy(island.m_contacts, context->contacts + range->contactStart, range->contactCount * sizeof(b2Contact*));
+	island.m_bodyCount = range->bodyCount;
+	island.m_contactCount = range->contactCount;
+	island.m_contactBodyIndices = context->bodyIndices + 2 * range->contactStart;
+	island.m_sharedStaticBodies = true;
+
+	if (context->islandRecords)
+	{
+		island.m_islandRecord = context->islandRecords + range->islandRecord;
+		island.m_lambdaRecords = context->lambdaRecords + range->lambdaStart;
+		island.m_recordIndex = range->islandRecord;
+	}
+
+	b2ContactRecord* records = context->records ? context->records + range->recordStart : NULL;
+	island.Solve(profile, context->step, context->gravity, context->allowSleep, records);
+}
+
 // Find islands, integrate and solve constraints, solve position constraints
 void b2World::Solve(const b2TimeStep& step)
 {
@@ -399,6 +617,7 @@ void b2World::Solve(const b2TimeStep& step)
 
     m_profile.maxIslandVelocityIterations = 0;
     m_profile.maxIslandPositionIterations = 0;
+    m_profile.velocityIterationsSaved = 0;
 
     m_profile.convergenceRates = step.convergenceRates;
 
@@ -423,23 +642,95 @@ void b2World::Solve(const b2TimeStep& step)
 		j->m_islandFlag = false;
 	}
 
-    // If set, allocate memory for convergence rates
+    // If set, make room for the convergence rates. The buffers are kept
+    // between steps and only grown when the iteration limits grow.
     if (m_convergenceRates)
     {
-        // Free arrays from last iteration if any
-        b2Free(m_profile.velocityLambdaTwoNorms);
-        b2Free(m_profile.velocityLambdaInfNorms);
-        b2Free(m_profile.positionLambdas);
+        if (step.velocityIterations > m_velocityLambdaCapacity)
+        {
+            FreeBuffer(m_profile.velocityLambdaTwoNorms, m_velocityLambdaCapacity * sizeof(float32));
+            FreeBuffer(m_profile.velocityLambdaInfNorms, m_velocityLambdaCapacity * sizeof(float32));
+
+            m_velocityLambdaCapacity = step.velocityIterations;
+            m_profile.velocityLambdaTwoNorms = (float32*)b2Alloc(m_velocityLambdaCapacity * sizeof(float32));
+            m_profile.velocityLambdaInfNorms = (float32*)b2Alloc(m_velocityLambdaCapacity * sizeof(float32));
+        }
 
-        m_profile.velocityLambdaTwoNorms = (float32*)b2Alloc(step.velocityIterations * sizeof(float32));
-        m_profile.velocityLambdaInfNorms = (float32*)b2Alloc(step.velocityIterations * sizeof(float32));
-        m_profile.positionLambdas        = (float32*)b2Alloc(step.positionIterations * sizeof(float32));
+        if (step.positionIterations > m_positionLambdaCapacity)
+        {
+            FreeBuffer(m_profile.positionLambdas, m_positionLambdaCapacity * sizeof(float32));
+
+            m_positionLambdaCapacity = step.positionIterations;
+            m_profile.positionLambdas = (float32*)b2Alloc(m_positionLambdaCapacity * sizeof(float32));
+        }
 
         memset(m_profile.velocityLambdaTwoNorms, 0, step.velocityIterations * sizeof(float32));
         memset(m_profile.velocityLambdaInfNorms, 0, step.velocityIterations * sizeof(float32));
         memset(m_profile.positionLambdas, 0, step.positionIterations * sizeof(float32));
     }
 
+	// Make room for every manifold point if contacts are recorded
+	b2ContactRecord* records = NULL;
+	if (m_recordContacts)
+	{
+		int32 capacity = b2_maxManifoldPoints * m_contactManager.m_contactCount;
+		if (capacity > m_contactRecordCapacity)
+		{
+			b2Free(m_contactRecords);
+			m_contactRecordCapacity = b2Max(capacity, 2 * m_contactRecordCapacity);
+			m_contactRecords = (b2ContactRecord*)b2Alloc(m_contactRecordCapacity * sizeof(b2ContactRecord));
+		}
+		records = m_contactRecords;
+	}
+
+	// Make room for every island and contact if islands are recorded
+	b2IslandRecord* islandRecords = NULL;
+	b2ContactLambdaRecord* lambdaRecords = NULL;
+	if (m_recordIslands)
+	{
+		if (m_bodyCount > m_islandRecordCapacity)
+		{
+			b2Free(m_islandRecords);
+			m_islandRecordCapacity = b2Max(m_bodyCount, 2 * m_islandRecordCapacity);
+			m_islandRecords = (b2IslandRecord*)b2Alloc(m_islandRecordCapacity * sizeof(b2IslandRecord));
+		}
+
+		int32 capacity = m_contactManager.m_contactCount;
+		if (capacity > m_lambdaRecordCapacity)
+		{
+			b2Free(m_lambdaRecords);
+			m_lambdaRecordCapacity = b2Max(capacity, 2 * m_lambdaRecordCapacity);
+			m_lambdaRecords = (b2ContactLambdaRecord*)b2Alloc(m_lambdaRecordCapacity * sizeof(b2ContactLambdaRecord));
+		}
+
+		islandRecords = m_islandRecords;
+		lambdaRecords = m_lambdaRecords;
+	}
+
+	// With a thread pool, islands without joints are collected and solved
+	// after the search. The listener callbacks are not thread safe.
+	b2ContactListener* listener = m_contactManager.m_contactListener;
+	bool threaded = m_threadPool != NULL && (listener == NULL || listener == &b2_defaultListener);
+
+	b2IslandSolveContext context;
+	int32 islandCount = 0;
+	int32 taskCount = 0;
+	int32 collectedBodyCount = 0;
+	int32 collectedContactCount = 0;
+	if (threaded)
+	{
+		// Static bodies are added to every island they touch.
+		int32 bodyCapacity = m_bodyCount + m_contactManager.m_contactCount + m_jointCount;
+		int32 contactCapacity = m_contactManager.m_contactCount;
+		context.islands = (b2IslandRange*)m_stackAllocator.Allocate(m_bodyCount * sizeof(b2IslandRange));
+		context.tasks = (int32*)m_stackAllocator.Allocate(m_bodyCount * sizeof(int32));
+		context.bodies = (b2Body**)m_stackAllocator.Allocate(bodyCapacity * sizeof(b2Body*));
+		context.contacts = (b2Contact**)m_stackAllocator.Allocate(contactCapacity * sizeof(b2Contact*));
+		context.bodyIndices = (int32*)m_stackAllocator.Allocate(2 * contactCapacity * sizeof(int32));
+		context.islandRecords = islandRecords;
+		context.lambdaRecords = lambdaRecords;
+	}
+
 	// Build and simulate all awake islands.
 	int32 stackSize = m_bodyCount;
 	b2Body** stack = (b2Body**)m_stackAllocator.Allocate(stackSize * sizeof(b2Body*));
@@ -557,7 +848,66 @@ void b2World::Solve(const b2TimeStep& step)
 			}
 		}
 
-		island.Solve(&m_profile, step, m_gravity, m_allowSleep);
+		if (threaded)
+		{
+			// Keep the island, with the island indices of its contacts
+			b2IslandRange* range = context.islands + islandCount;
+			range->bodyStart = collectedBodyCount;
+			range->bodyCount = island.m_bodyCount;
+			range->contactStart = collectedContactCount;
+			range->contactCount = island.m_contactCount;
+			range->recordStart = m_contactRecordCount;
+			range->islandRecord = m_islandRecordCount;
+			range->lambdaStart = m_lambdaRecordCount;
+
+			for (int32 i = 0; i < island.m_bodyCount; ++i)
+			{
+				context.bodies[collectedBodyCount++] = island.m_bodies[i];
+			}
+
+			for (int32 i = 0; i < island.m_contactCount; ++i)
+			{
+				b2Contact* contact = island.m_contacts[i];
+				context.contacts[collectedContactCount] = contact;
+				context.bodyIndices[2 * collectedContactCount] = contact->m_fixtureA->m_body->m_islandIndex;
+				context.bodyIndices[2 * collectedContactCount + 1] = contact->m_fixtureB->m_body->m_islandIndex;
+				++collectedContactCount;
+			}
+
+			++islandCount;
+		}
+
+		// Reserve the island's records
+		if (islandRecords)
+		{
+			island.m_islandRecord = islandRecords + m_islandRecordCount;
+			island.m_lambdaRecords = lambdaRecords + m_lambdaRecordCount;
+			island.m_recordIndex = m_islandRecordCount;
+			++m_islandRecordCount;
+			m_lambdaRecordCount += island.m_contactCount;
+		}
+
+		// Islands large enough for the colored solver to use the threads are
+		// solved right away, like islands with joints.
+		bool parallelColors = step.coloredSolver && island.m_contactCount > 2 * b2_colorBatchSize;
+		if (threaded && island.m_jointCount == 0 && parallelColors == false)
+		{
+			// Left for the thread pool, reserve its contact records
+			context.tasks[taskCount++] = islandCount - 1;
+			if (records)
+			{
+				for (int32 i = 0; i < island.m_contactCount; ++i)
+				{
+					m_contactRecordCount += island.m_contacts[i]->m_manifold.pointCount;
+				}
+			}
+		}
+		else
+		{
+			int32 recordCount = island.Solve(&m_profile, step, m_gravity, m_allowSleep,
+											 records ? records + m_contactRecordCount : NULL);
+			m_contactRecordCount += recordCount;
+		}
         m_profile.contactsSolved += island.m_contactCount;
 
 		// Post solve cleanup.
@@ -574,6 +924,17 @@ void b2World::Solve(const b2TimeStep& step)
 
 	m_stackAllocator.Free(stack);
 
+	if (threaded)
+	{
+		SolveIslandTasks(step, records, &context, islandCount, taskCount);
+
+		m_stackAllocator.Free(context.bodyIndices);
+		m_stackAllocator.Free(context.contacts);
+		m_stackAllocator.Free(context.bodies);
+		m_stackAllocator.Free(context.tasks);
+		m_stackAllocator.Free(context.islands);
+	}
+
 	{
 		b2Timer timer;
 		// Synchronize fixtures, check for out of range bodies.
@@ -600,6 +961,107 @@ void b2World::Solve(const b2TimeStep& step)
 	}
 }
 
+// Solve the islands collected by Solve on the thread pool, then update the
+// static bodies they share in island order, as the serial solve does.
+void b2World::SolveIslandTasks(const b2TimeStep& step, b2ContactRecord* records,
+							   b2IslandSolveContext* context, int32 islandCount, int32 taskCount)
+{
+	int32 workerCount = m_threadPool->GetThreadCount() - 1;
+
+	// Each worker thread accumulates the profiles of its islands.
+	b2Profile* threadProfiles = (b2Profile*)m_stackAllocator.Allocate(workerCount * sizeof(b2Profile));
+	int32 lambdaCount = 2 * step.velocityIterations + step.positionIterations;
+	float32* lambdas = NULL;
+	if (step.convergenceRates)
+	{
+		lambdas = (float32*)m_stackAllocator.Allocate(workerCount * lambdaCount * sizeof(float32));
+		memset(lambdas, 0, workerCount * lambdaCount * sizeof(float32));
+	}
+
+	for (int32 i = 0; i < workerCount; ++i)
+	{
+		b2Profile* profile = threadProfiles + i;
+		memset(profile, 0, sizeof(b2Profile));
+		profile->convergenceRates = step.convergenceRates;
+		if (lambdas)
+		{
+			profile->velocityLambdaTwoNorms = lambdas + i * lambdaCount;
+			profile->velocityLambdaInfNorms = profile->velocityLambdaTwoNorms + step.velocityIterations;
+			profile->positionLambdas = profile->velocityLambdaInfNorms + step.velocityIterations;
+		}
+	}
+
+	// The pool is busy with the islands, they solve their colors serially.
+	context->step = step;
+	context->step.threadPool = NULL;
+	context->gravity = m_gravity;
+	context->allowSleep = m_allowSleep;
+	context->allocator = &m_stackAllocator;
+	context->threadAllocators = m_threadAllocators;
+	context->profile = &m_profile;
+	context->threadProfiles = threadProfiles;
+	context->records = records;
+
+	m_threadPool->ParallelFor(b2SolveIslandTask, context, taskCount);
+
+	// Merge the profiles, iteration counts and lambdas are a max over islands.
+	for (int32 i = 0; i < workerCount; ++i)
+	{
+		const b2Profile* profile = threadProfiles + i;
+		m_profile.solveInit += profile->solveInit;
+		m_profile.solveVelocity += profile->solveVelocity;
+		m_profile.solvePosition += profile->solvePosition;
+		m_profile.velocityIterations += profile->velocityIterations;
+		m_profile.positionIterations += profile->positionIterations;
+		m_profile.velocityIterationsSaved += profile->velocityIterationsSaved;
+		m_profile.maxIslandVelocityIterations = b2Max(m_profile.maxIslandVelocityIterations, profile->maxIslandVelocityIterations);
+		m_profile.maxIslandPositionIterations = b2Max(m_profile.maxIslandPositionIterations, profile->maxIslandPositionIterations);
+
+		if (lambdas)
+		{
+			for (int32 j = 0; j < step.velocityIterations; ++j)
+			{
+				m_profile.velocityLambdaTwoNorms[j] = b2Max(m_profile.velocityLambdaTwoNorms[j], profile->velocityLambdaTwoNorms[j]);
+				m_profile.velocityLambdaInfNorms[j] = b2Max(m_profile.velocityLambdaInfNorms[j], profile->velocityLambdaInfNorms[j]);
+			}
+			for (int32 j = 0; j < step.positionIterations; ++j)
+			{
+				m_profile.positionLambdas[j] = b2Max(m_profile.positionLambdas[j], profile->positionLambdas[j]);
+			}
+		}
+	}
+
+	if (lambdas)
+	{
+		m_stackAllocator.Free(lambdas);
+	}
+	m_stackAllocator.Free(threadProfiles);
+
+	// The islands left the shared static bodies alone. Each island wakes its
+	// static bodies during the search and puts them to sleep with the island,
+	// so the last island of a static body decides whether it is awake.
+	for (int32 i = 0; i < islandCount; ++i)
+	{
+		const b2IslandRange* range = context->islands + i;
+
+		// The first body of an island is its seed, which is not static.
+		bool sleeping = context->bodies[range->bodyStart]->IsAwake() == false;
+		for (int32 j = 0; j < range->bodyCount; ++j)
+		{
+			b2Body* b = context->bodies[range->bodyStart + j];
+			if (b->GetType() != b2_staticBody)
+			{
+				continue;
+			}
+
+			b->m_sweep.c0 = b->m_sweep.c;
+			b->m_sweep.a0 = b->m_sweep.a;
+			b->SynchronizeTransform();
+			b->SetAwake(sleeping == false);
+		}
+	}
+}
+
 // Find TOI contacts and solve them.
 void b2World::SolveTOI(const b2TimeStep& step)
 {
@@ -887,6 +1349,15 @@ void b2World::SolveTOI(const b2TimeStep& step)
 		subStep.positionIterations = 20;
 		subStep.velocityIterations = step.velocityIterations;
 		subStep.warmStarting = false;
+		subStep.warmStartImpulses = NULL;
+		subStep.warmStartImpulseCount = 0;
+		subStep.warmStartByKey = false;
+		subStep.warmStartField = NULL;
+		subStep.coloredSolver = false;
+		subStep.simdSolver = false;
+		subStep.solverType = b2_pgsSolver;
+		subStep.relaxation = 1.0f;
+		subStep.threadPool = NULL;
 		island.SolveTOI(subStep, bA->m_islandIndex, bB->m_islandIndex);
 
 		// Reset island flags and synchronize broad-phase proxies.
@@ -932,14 +1403,22 @@ void b2World::Step(float32 dt, int32 velocityIterations, int32 positionIteration
 		m_flags &= ~e_newFixture;
 	}
 
+	// The contacts are updated and the bodies move.
+	++m_version;
+
 	m_flags |= e_locked;
 
+	m_contactRecordCount = 0;
+	m_islandRecordCount = 0;
+	m_lambdaRecordCount = 0;
+
 	b2TimeStep step;
 	step.dt = dt;
 	step.velocityIterations	= velocityIterations;
 	step.positionIterations = positionIterations;
     step.velocityThreshold = m_velocityThreshold;
     step.positionThreshold = m_positionThreshold;
+	step.adaptiveIterations = m_adaptiveIterations;
 	if (dt > 0.0f)
 	{
 		step.inv_dt = 1.0f / dt;
@@ -953,14 +1432,35 @@ void b2World::Step(float32 dt, int32 velocityIterations, int32 positionIteration
 
 	step.warmStarting = m_warmStarting;
     step.convergenceRates = m_convergenceRates;
+	step.coloredSolver = m_coloredSolver;
+	step.simdSolver = m_simdSolver;
+	step.solverType = m_solverType;
+	step.relaxation = m_relaxation;
+	step.threadPool = m_threadPool;
+	step.warmStartImpulses = m_hasWarmStartImpulses ? m_warmStartImpulses : NULL;
+	step.warmStartImpulseCount = m_warmStartImpulseCount;
+	step.warmStartByKey = m_warmStartByKey;
+	step.warmStartField = m_hasWarmStartField ? m_warmStartField : NULL;
 
 	// Update contacts. This is where some contacts are destroyed.
 	{
 		b2Timer timer;
-		m_contactManager.Collide();
+		if (m_parallelCollide && m_threadPool)
+		{
+			m_contactManager.Collide(m_threadPool, &m_stackAllocator);
+		}
+		else
+		{
+			m_contactManager.Collide();
+		}
 		m_profile.collide = timer.GetMilliseconds();
 	}
 
+	if (m_batchContactListener)
+	{
+		PreSolveContactBatch();
+	}
+
 	// Integrate velocities, solve velocity constraints, and integrate positions.
 	if (m_stepComplete && step.dt > 0.0f)
 	{
@@ -969,6 +1469,11 @@ void b2World::Step(float32 dt, int32 velocityIterations, int32 positionIteration
 		m_profile.solve = timer.GetMilliseconds();
 	}
 
+	if (m_batchContactListener)
+	{
+		PostSolveContactBatch();
+	}
+
 	// Handle TOI events.
 	if (m_continuousPhysics && step.dt > 0.0f)
 	{
@@ -982,6 +1487,11 @@ void b2World::Step(float32 dt, int32 velocityIterations, int32 positionIteration
 		m_inv_dt0 = step.inv_dt;
 	}
 
+	// The warm starting impulses only apply to one step.
+	m_hasWarmStartImpulses = false;
+	m_warmStartImpulseCount = 0;
+	m_hasWarmStartField = false;
+
 	if (m_flags & e_clearForces)
 	{
 		ClearForces();
@@ -990,6 +1500,28 @@ void b2World::Step(float32 dt, int32 velocityIterations, int32 positionIteration
 	m_flags &= ~e_locked;
 
 	m_profile.step = stepTimer.GetMilliseconds();
+
+	if (m_profileHistory)
+	{
+		b2ProfileRecord* record = m_profileHistory + m_profileHistoryIndex;
+		record->step = m_profile.step;
+		record->collide = m_profile.collide;
+		record->solve = m_profile.solve;
+		record->solveInit = m_profile.solveInit;
+		record->solveVelocity = m_profile.solveVelocity;
+		record->solvePosition = m_profile.solvePosition;
+		record->broadphase = m_profile.broadphase;
+		record->solveTOI = m_profile.solveTOI;
+		record->velocityIterations = m_profile.velocityIterations;
+		record->positionIterations = m_profile.positionIterations;
+		record->contactsSolved = m_profile.contactsSolved;
+		record->maxIslandVelocityIterations = m_profile.maxIslandVelocityIterations;
+		record->maxIslandPositionIterations = m_profile.maxIslandPositionIterations;
+		record->velocityIterationsSaved = m_profile.velocityIterationsSaved;
+
+		m_profileHistoryIndex = (m_profileHistoryIndex + 1) % m_profileHistoryCapacity;
+		m_profileHistoryCount = b2Min(m_profileHistoryCount + 1, m_profileHistoryCapacity);
+	}
 }
 
 void b2World::ClearForces()
@@ -1271,6 +1803,26 @@ int32 b2World::GetProxyCount() const
 	return m_contactManager.m_broadPhase.GetProxyCount();
 }
 
+void b2World::SetBroadPhaseType(b2BroadPhaseType type)
+{
+	m_contactManager.m_broadPhase.SetType(type);
+}
+
+b2BroadPhaseType b2World::GetBroadPhaseType() const
+{
+	return m_contactManager.m_broadPhase.GetType();
+}
+
+void b2World::SetGridCellSize(float32 cellSize)
+{
+	m_contactManager.m_broadPhase.SetGridCellSize(cellSize);
+}
+
+float32 b2World::GetGridCellSize() const
+{
+	return m_contactManager.m_broadPhase.GetGridCellSize();
+}
+
 int32 b2World::GetTreeHeight() const
 {
 	return m_contactManager.m_broadPhase.GetTreeHeight();
@@ -1299,6 +1851,7 @@ void b2World::ShiftOrigin(const b2Vec2& newOrigin)
 		b->m_xf.p -= newOrigin;
 		b->m_sweep.c0 -= newOrigin;
 		b->m_sweep.c -= newOrigin;
+		b->SyncState();
 	}
 
 	for (b2Joint* j = m_jointList; j; j = j->m_next)
@@ -1309,6 +1862,986 @@ void b2World::ShiftOrigin(const b2Vec2& newOrigin)
 	m_contactManager.m_broadPhase.ShiftOrigin(newOrigin);
 }
 
+void b2World::PreSolveContactBatch()
+{
+	int32 pointCount = 0;
+	for (b2Contact* c = m_contactManager.m_contactList; c; c = c->GetNext())
+	{
+		pointCount += c->m_manifold.pointCount;
+	}
+
+	if (pointCount > m_contactBatchCapacity)
+	{
+		// One block for all the columns, the 8 byte wide keys first and then
+		// the others, which are all 4 bytes wide.
+		b2Free(m_contactBatch.keys);
+		b2Free(m_batchContacts);
+		m_contactBatchCapacity = b2Max(pointCount, 2 * m_contactBatchCapacity);
+		m_contactBatch.keys = (uint64*)b2Alloc(m_contactBatchCapacity * (sizeof(uint64) + 9 * sizeof(int32)));
+		int32* block = (int32*)(m_contactBatch.keys + m_contactBatchCapacity);
+		m_contactBatch.contactIds = block;
+		m_contactBatch.master = block + m_contactBatchCapacity;
+		m_contactBatch.slave = block + 2 * m_contactBatchCapacity;
+		float32* columns = (float32*)(block + 3 * m_contactBatchCapacity);
+		m_contactBatch.px = columns;
+		m_contactBatch.py = columns + m_contactBatchCapacity;
+		m_contactBatch.nx = columns + 2 * m_contactBatchCapacity;
+		m_contactBatch.ny = columns + 3 * m_contactBatchCapacity;
+		m_contactBatch.normalImpulses = columns + 4 * m_contactBatchCapacity;
+		m_contactBatch.tangentImpulses = columns + 5 * m_contactBatchCapacity;
+		m_batchContacts = (b2Contact**)b2Alloc(m_contactBatchCapacity * sizeof(b2Contact*));
+	}
+
+	b2ContactBatch* batch = &m_contactBatch;
+	batch->count = 0;
+	batch->contactCount = 0;
+	for (b2Contact* c = m_contactManager.m_contactList; c; c = c->GetNext())
+	{
+		b2Fixture* fixtureA = c->GetFixtureA();
+		b2Fixture* fixtureB = c->GetFixtureB();
+		if (c->IsTouching() == false || c->IsEnabled() == false ||
+			fixtureA->IsSensor() || fixtureB->IsSensor() || c->m_manifold.pointCount == 0)
+		{
+			continue;
+		}
+
+		// The same bodies as those updated by b2ContactManager::Collide.
+		b2Body* bodyA = fixtureA->GetBody();
+		b2Body* bodyB = fixtureB->GetBody();
+		bool activeA = bodyA->IsAwake() && bodyA->m_type != b2_staticBody;
+		bool activeB = bodyB->IsAwake() && bodyB->m_type != b2_staticBody;
+		if (activeA == false && activeB == false)
+		{
+			continue;
+		}
+
+		b2WorldManifold worldManifold;
+		c->GetWorldManifold(&worldManifold);
+
+		int32 id = batch->contactCount;
+		for (int32 j = 0; j < c->m_manifold.pointCount; ++j)
+		{
+			int32 i = batch->count + j;
+			batch->contactIds[i] = id;
+			batch->master[i] = bodyA->m_userId;
+			batch->slave[i] = bodyB->m_userId;
+			batch->px[i] = worldManifold.points[j].x;
+			batch->py[i] = worldManifold.points[j].y;
+			batch->nx[i] = worldManifold.normal.x;
+			batch->ny[i] = worldManifold.normal.y;
+			batch->normalImpulses[i] = c->m_manifold.points[j].normalImpulse;
+			batch->tangentImpulses[i] = c->m_manifold.points[j].tangentImpulse;
+			batch->keys[i] = c->GetKey(j);
+		}
+
+		m_batchContacts[id] = c;
+		batch->count += c->m_manifold.pointCount;
+		++batch->contactCount;
+	}
+
+	m_batchContactListener->PreSolve(batch);
+
+	// Hand the impulses back to the manifolds, to warm start the solver.
+	for (int32 id = 0, i = 0; id < batch->contactCount; ++id)
+	{
+		b2Manifold* manifold = &m_batchContacts[id]->m_manifold;
+		for (int32 j = 0; j < manifold->pointCount; ++j, ++i)
+		{
+			manifold->points[j].normalImpulse = batch->normalImpulses[i];
+			manifold->points[j].tangentImpulse = batch->tangentImpulses[i];
+		}
+	}
+}
+
+void b2World::PostSolveContactBatch()
+{
+	b2ContactBatch* batch = &m_contactBatch;
+	for (int32 id = 0, i = 0; id < batch->contactCount; ++id)
+	{
+		const b2Manifold* manifold = &m_batchContacts[id]->m_manifold;
+		for (int32 j = 0; j < manifold->pointCount; ++j, ++i)
+		{
+			batch->normalImpulses[i] = manifold->points[j].normalImpulse;
+			batch->tangentImpulses[i] = manifold->points[j].tangentImpulse;
+		}
+	}
+
+	m_batchContactListener->PostSolve(batch);
+}
+
+// Maps the contacts of a world to those of its clone.
+struct b2ContactPair
+{
+	const b2Contact* original;
+	b2Contact* clone;
+
+	bool operator<(const b2ContactPair& other) const
+	{
+		return original < other.original;
+	}
+};
+
+b2World* b2World::Clone() const
+{
+	b2Assert(IsLocked() == false);
+	b2Assert(m_jointCount == 0);
+
+	b2World* world = new b2World(m_gravity);
+	world->m_flags = m_flags;
+	world->m_allowSleep = m_allowSleep;
+	world->m_warmStarting = m_warmStarting;
+	world->m_continuousPhysics = m_continuousPhysics;
+	world->m_subStepping = m_subStepping;
+	world->m_convergenceRates = m_convergenceRates;
+	world->m_recordContacts = m_recordContacts;
+	world->m_recordIslands = m_recordIslands;
+	world->m_coloredSolver = m_coloredSolver;
+	world->m_simdSolver = m_simdSolver;
+	world->m_parallelCollide = m_parallelCollide;
+	world->m_solverType = m_solverType;
+	world->m_relaxation = m_relaxation;
+	world->m_velocityThreshold = m_velocityThreshold;
+	world->m_positionThreshold = m_positionThreshold;
+	world->m_adaptiveIterations = m_adaptiveIterations;
+	world->m_stepComplete = m_stepComplete;
+	world->m_inv_dt0 = m_inv_dt0;
+	world->SetThreadCount(GetThreadCount());
+
+	if (m_hasWarmStartImpulses)
+	{
+		world->m_warmStartImpulseCapacity = b2Max(m_warmStartImpulseCount, 1);
+		world->m_warmStartImpulses = (b2WarmStartImpulse*)b2Alloc(world->m_warmStartImpulseCapacity * sizeof(b2WarmStartImpulse));
+		memcpy(world->m_warmStartImpulses, m_warmStartImpulses, m_warmStartImpulseCount * sizeof(b2WarmStartImpulse));
+		world->m_warmStartImpulseCount = m_warmStartImpulseCount;
+		world->m_hasWarmStartImpulses = true;
+		world->m_warmStartByKey = m_warmStartByKey;
+	}
+
+	if (m_hasWarmStartField)
+	{
+		const b2WarmStartField* field = m_warmStartField;
+		world->SetWarmStartField(field->data, 2 * field->countX * field->countY, field->countX, field->countY,
+								 field->lowerX, field->lowerY, field->resX, field->resY, field->interpolation);
+	}
+
+	// The broad-phase keeps its proxy ids, only the user data must be redirected
+	// to the new fixture proxies.
+	b2BroadPhase* broadPhase = &world->m_contactManager.m_broadPhase;
+	broadPhase->CopyFrom(m_contactManager.m_broadPhase);
+
+	// Bodies and fixtures, appended to keep the list order.
+	b2Body* prevBody = NULL;
+	for (const b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		void* mem = world->m_blockAllocator.Allocate(sizeof(b2Body));
+		b2Body* body = new (mem) b2Body(*b);
+		body->m_world = world;
+		body->m_stateIndex = -1;
+		body->m_prev = prevBody;
+		body->m_next = NULL;
+		body->m_fixtureList = NULL;
+		body->m_jointList = NULL;
+		body->m_contactList = NULL;
+
+		if (prevBody)
+		{
+			prevBody->m_next = body;
+		}
+		else
+		{
+			world->m_bodyList = body;
+		}
+		prevBody = body;
+
+		b2Fixture* prevFixture = NULL;
+		for (const b2Fixture* f = b->m_fixtureList; f; f = f->m_next)
+		{
+			void* fixtureMem = world->m_blockAllocator.Allocate(sizeof(b2Fixture));
+			b2Fixture* fixture = new (fixtureMem) b2Fixture(*f);
+			fixture->m_body = body;
+			fixture->m_next = NULL;
+			fixture->m_shape = f->m_shape->Clone(&world->m_blockAllocator);
+
+			int32 childCount = fixture->m_shape->GetChildCount();
+			fixture->m_proxies = (b2FixtureProxy*)world->m_blockAllocator.Allocate(childCount * sizeof(b2FixtureProxy));
+			for (int32 i = 0; i < childCount; ++i)
+			{
+				fixture->m_proxies[i] = f->m_proxies[i];
+				fixture->m_proxies[i].fixture = i < f->m_proxyCount ? fixture : NULL;
+			}
+			for (int32 i = 0; i < f->m_proxyCount; ++i)
+			{
+				broadPhase->SetUserData(fixture->m_proxies[i].proxyId, fixture->m_proxies + i);
+			}
+
+			if (prevFixture)
+			{
+				prevFixture->m_next = fixture;
+			}
+			else
+			{
+				body->m_fixtureList = fixture;
+			}
+			prevFixture = fixture;
+		}
+	}
+	world->m_bodyCount = m_bodyCount;
+
+	// Contacts, in list order. The fixtures are found through the proxy ids.
+	int32 contactCount = m_contactManager.m_contactCount;
+	b2ContactPair* pairs = (b2ContactPair*)b2Alloc(b2Max(contactCount, 1) * sizeof(b2ContactPair));
+	b2Contact* prevContact = NULL;
+	int32 pairCount = 0;
+	for (const b2Contact* c = m_contactManager.m_contactList; c; c = c->m_next)
+	{
+		int32 proxyIdA = c->m_fixtureA->m_proxies[c->m_indexA].proxyId;
+		int32 proxyIdB = c->m_fixtureB->m_proxies[c->m_indexB].proxyId;
+		b2Fixture* fixtureA = ((b2FixtureProxy*)broadPhase->GetUserData(proxyIdA))->fixture;
+		b2Fixture* fixtureB = ((b2FixtureProxy*)broadPhase->GetUserData(proxyIdB))->fixture;
+
+		b2Contact* contact = b2Contact::Create(fixtureA, c->m_indexA, fixtureB, c->m_indexB, &world->m_blockAllocator);
+		b2Assert(contact->m_fixtureA == fixtureA);
+		contact->m_flags = c->m_flags;
+		contact->m_manifold = c->m_manifold;
+		contact->m_toiCount = c->m_toiCount;
+		contact->m_toi = c->m_toi;
+		contact->m_friction = c->m_friction;
+		contact->m_restitution = c->m_restitution;
+		contact->m_tangentSpeed = c->m_tangentSpeed;
+		contact->m_userData = c->m_userData;
+
+		contact->m_nodeA.contact = contact;
+		contact->m_nodeA.other = fixtureB->m_body;
+		contact->m_nodeB.contact = contact;
+		contact->m_nodeB.other = fixtureA->m_body;
+
+		contact->m_prev = prevContact;
+		contact->m_next = NULL;
+		if (prevContact)
+		{
+			prevContact->m_next = contact;
+		}
+		else
+		{
+			world->m_contactManager.m_contactList = contact;
+		}
+		prevContact = contact;
+
+		pairs[pairCount].original = c;
+		pairs[pairCount].clone = contact;
+		++pairCount;
+	}
+	world->m_contactManager.m_contactCount = pairCount;
+	std::sort(pairs, pairs + pairCount);
+
+	// Rebuild the contact edges of every body in the same order.
+	b2Body* body = world->m_bodyList;
+	for (const b2Body* b = m_bodyList; b; b = b->m_next, body = body->m_next)
+	{
+		b2ContactEdge* prevEdge = NULL;
+		for (const b2ContactEdge* ce = b->m_contactList; ce; ce = ce->next)
+		{
+			b2ContactPair key;
+			key.original = ce->contact;
+			b2ContactPair* pair = std::lower_bound(pairs, pairs + pairCount, key);
+			b2Assert(pair != pairs + pairCount && pair->original == ce->contact);
+
+			b2Contact* contact = pair->clone;
+			b2ContactEdge* edge = ce == &ce->contact->m_nodeA ? &contact->m_nodeA : &contact->m_nodeB;
+			edge->prev = prevEdge;
+			edge->next = NULL;
+			if (prevEdge)
+			{
+				prevEdge->next = edge;
+			}
+			else
+			{
+				body->m_contactList = edge;
+			}
+			prevEdge = edge;
+		}
+	}
+
+	b2Free(pairs);
+
+	if (m_bodyArrays)
+	{
+		world->SetBodyArrays(true);
+	}
+	return world;
+}
+
+void b2World::SetWarmStartImpulses(const float64* data, int32 dataSize)
+{
+	const int32 columns = 6;
+	b2Assert(dataSize % columns == 0);
+
+	int32 count = dataSize / columns;
+	if (count > m_warmStartImpulseCapacity || m_warmStartImpulses == NULL)
+	{
+		b2Free(m_warmStartImpulses);
+		m_warmStartImpulseCapacity = b2Max(count, 1);
+		m_warmStartImpulses = (b2WarmStartImpulse*)b2Alloc(m_warmStartImpulseCapacity * sizeof(b2WarmStartImpulse));
+	}
+
+	for (int32 i = 0; i < count; ++i)
+	{
+		const float64* row = data + i * columns;
+		b2WarmStartImpulse* impulse = m_warmStartImpulses + i;
+		impulse->idA = (int32)row[0];
+		impulse->idB = (int32)row[1];
+		impulse->px = (float32)row[2];
+		impulse->py = (float32)row[3];
+		impulse->normalImpulse = (float32)row[4];
+		impulse->tangentImpulse = (float32)row[5];
+	}
+	m_warmStartImpulseCount = count;
+	m_hasWarmStartImpulses = true;
+	m_warmStartByKey = false;
+	m_hasWarmStartField = false;
+
+	b2SortWarmStartImpulses(m_warmStartImpulses, m_warmStartImpulseCount, false);
+}
+
+void b2World::SetKeyedWarmStartImpulses(const uint64* keys, int32 keyCount, const float64* data, int32 dataSize)
+{
+	b2Assert(dataSize == 2 * keyCount);
+
+	int32 count = keyCount;
+	if (count > m_warmStartImpulseCapacity || m_warmStartImpulses == NULL)
+	{
+		b2Free(m_warmStartImpulses);
+		m_warmStartImpulseCapacity = b2Max(count, 1);
+		m_warmStartImpulses = (b2WarmStartImpulse*)b2Alloc(m_warmStartImpulseCapacity * sizeof(b2WarmStartImpulse));
+	}
+
+	for (int32 i = 0; i < count; ++i)
+	{
+		b2WarmStartImpulse* impulse = m_warmStartImpulses + i;
+		impulse->idA = 0;
+		impulse->idB = 0;
+		impulse->px = 0.0f;
+		impulse->py = 0.0f;
+		impulse->normalImpulse = (float32)data[2 * i];
+		impulse->tangentImpulse = (float32)data[2 * i + 1];
+		impulse->key = keys[i];
+	}
+	m_warmStartImpulseCount = count;
+	m_hasWarmStartImpulses = true;
+	m_warmStartByKey = true;
+	m_hasWarmStartField = false;
+
+	b2SortWarmStartImpulses(m_warmStartImpulses, m_warmStartImpulseCount, true);
+}
+
+void b2World::SetWarmStartField(const float32* data, int32 dataSize, int32 countX, int32 countY,
+								float64 lowerX, float64 lowerY, float64 resX, float64 resY,
+								b2FieldInterpolation interpolation)
+{
+	b2Assert(countX > 0 && countY > 0);
+	b2Assert(dataSize == 2 * countX * countY);
+	b2Assert(resX > 0.0 && resY > 0.0);
+
+	int32 count = countX * countY;
+	if (count > m_warmStartFieldCapacity || m_warmStartField == NULL)
+	{
+		b2Free(m_warmStartField);
+		m_warmStartFieldCapacity = b2Max(count, 1);
+		m_warmStartField = (b2WarmStartField*)b2Alloc(sizeof(b2WarmStartField) + 2 * m_warmStartFieldCapacity * sizeof(float32));
+	}
+
+	// The data follows the field in the same allocation.
+	float32* fieldData = (float32*)(m_warmStartField + 1);
+	memcpy(fieldData, data, 2 * count * sizeof(float32));
+	m_warmStartField->data = fieldData;
+	m_warmStartField->countX = countX;
+	m_warmStartField->countY = countY;
+	m_warmStartField->lowerX = (float32)lowerX;
+	m_warmStartField->lowerY = (float32)lowerY;
+	m_warmStartField->resX = (float32)resX;
+	m_warmStartField->resY = (float32)resY;
+	m_warmStartField->interpolation = interpolation;
+	m_hasWarmStartField = true;
+	m_hasWarmStartImpulses = false;
+	m_warmStartImpulseCount = 0;
+}
+
+void b2World::SetThreadCount(int32 count)
+{
+	b2Assert(IsLocked() == false);
+	b2Assert(count > 0);
+
+	if (count == GetThreadCount())
+	{
+		return;
+	}
+
+	delete m_threadPool;
+	delete [] m_threadAllocators;
+	m_threadPool = NULL;
+	m_threadAllocators = NULL;
+
+	if (count > 1)
+	{
+		m_threadPool = new b2ThreadPool(count);
+		m_threadAllocators = new b2StackAllocator[count - 1];
+	}
+}
+
+int32 b2World::GetThreadCount() const
+{
+	return m_threadPool ? m_threadPool->GetThreadCount() : 1;
+}
+
+void b2World::SetRelaxation(float32 relaxation)
+{
+	b2Assert(0.0f < relaxation && relaxation < 2.0f);
+	m_relaxation = relaxation;
+}
+
+void b2World::SetProfileHistoryCapacity(int32 capacity)
+{
+	b2Assert(capacity >= 0);
+	b2Free(m_profileHistory);
+	m_profileHistory = capacity > 0 ? (b2ProfileRecord*)b2Alloc(capacity * sizeof(b2ProfileRecord)) : NULL;
+	m_profileHistoryCapacity = b2Max(capacity, 0);
+	m_profileHistoryCount = 0;
+	m_profileHistoryIndex = 0;
+}
+
+int32 b2World::GetProfileHistory(b2ProfileRecord* records, int32 recordCount) const
+{
+	if (recordCount < m_profileHistoryCount)
+	{
+		return -1;
+	}
+
+	// Before the ring wraps the oldest step is at 0, after it at the index.
+	int32 oldest = m_profileHistoryCount < m_profileHistoryCapacity ? 0 : m_profileHistoryIndex;
+	int32 tail = b2Min(m_profileHistoryCount, m_profileHistoryCapacity - oldest);
+	memcpy(records, m_profileHistory + oldest, tail * sizeof(b2ProfileRecord));
+	memcpy(records + tail, m_profileHistory, (m_profileHistoryCount - tail) * sizeof(b2ProfileRecord));
+	return m_profileHistoryCount;
+}
+
+// Mix one more value into a hash, with the splitmix64 finalizer.
+static inline uint64 b2HashMix(uint64 hash, uint64 value)
+{
+	hash ^= value + 0x9e3779b97f4a7c15ull;
+	hash = (hash ^ (hash >> 30)) * 0xbf58476d1ce4e5b9ull;
+	hash = (hash ^ (hash >> 27)) * 0x94d049bb133111ebull;
+	return hash ^ (hash >> 31);
+}
+
+// The bits of a value hashed by b2World::GetStateHash.
+static inline uint64 b2HashValue(float32 value, float32 precision)
+{
+	if (precision > 0.0f)
+	{
+		// Values too large to round, like infinities, are hashed exactly.
+		float64 rounded = floor((float64)value / precision + 0.5);
+		if (-9.0e18 < rounded && rounded < 9.0e18)
+		{
+			return (uint64)(long long)rounded;
+		}
+	}
+
+	uint32 bits;
+	memcpy(&bits, &value, sizeof(bits));
+	return bits;
+}
+
+uint64 b2World::GetStateHash(float32 precision, bool contacts) const
+{
+	b2Assert(precision >= 0.0f);
+
+	uint64 hash = b2HashMix(0, (uint64)m_bodyCount);
+	for (const b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		hash = b2HashMix(hash, (uint64)(uint32)b->m_userId);
+		hash = b2HashMix(hash, ((uint64)b->m_type << 1) | (b->IsAwake() ? 1 : 0));
+		hash = b2HashMix(hash, b2HashValue(b->m_xf.p.x, precision));
+		hash = b2HashMix(hash, b2HashValue(b->m_xf.p.y, precision));
+		hash = b2HashMix(hash, b2HashValue(b->m_sweep.a, precision));
+		hash = b2HashMix(hash, b2HashValue(b->m_linearVelocity.x, precision));
+		hash = b2HashMix(hash, b2HashValue(b->m_linearVelocity.y, precision));
+		hash = b2HashMix(hash, b2HashValue(b->m_angularVelocity, precision));
+	}
+
+	if (contacts)
+	{
+		// Sum the point hashes, so that the order of the contacts does not matter.
+		uint64 pointHashes = 0;
+		for (const b2Contact* c = m_contactManager.m_contactList; c; c = c->m_next)
+		{
+			if (c->IsTouching() == false)
+			{
+				continue;
+			}
+
+			for (int32 i = 0; i < c->m_manifold.pointCount; ++i)
+			{
+				const b2ManifoldPoint* point = c->m_manifold.points + i;
+				uint64 pointHash = b2HashMix(0, c->GetKey(i));
+				pointHash = b2HashMix(pointHash, b2HashValue(point->normalImpulse, precision));
+				pointHash = b2HashMix(pointHash, b2HashValue(point->tangentImpulse, precision));
+				pointHashes += pointHash;
+			}
+		}
+		hash = b2HashMix(hash, pointHashes);
+	}
+	return hash;
+}
+
+void b2World::SetAdaptiveIterations(int32 iterations)
+{
+	b2Assert(iterations == 0 || iterations >= 2);
+	m_adaptiveIterations = iterations;
+}
+
+int32 b2World::GetBodyStateCount(bool dynamicOnly) const
+{
+	if (dynamicOnly == false)
+	{
+		return m_bodyCount;
+	}
+
+	int32 count = 0;
+	for (b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		if (b->m_type == b2_dynamicBody)
+		{
+			++count;
+		}
+	}
+	return count;
+}
+
+int32 b2World::GetBodyStates(float64* buffer, int32 bufferSize, bool dynamicOnly) const
+{
+	int32 count = GetBodyStateCount(dynamicOnly);
+	if (bufferSize < count * e_bodyStateColumnCount)
+	{
+		return -1;
+	}
+
+	// The body list is in reverse creation order, fill the rows from the back.
+	int32 row = count;
+	for (b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		if (dynamicOnly && b->m_type != b2_dynamicBody)
+		{
+			continue;
+		}
+
+		float64* state = buffer + (--row) * e_bodyStateColumnCount;
+		state[e_bodyStateId] = b->m_userId;
+		state[e_bodyStatePx] = b->m_xf.p.x;
+		state[e_bodyStatePy] = b->m_xf.p.y;
+		state[e_bodyStateMass] = b->GetMass();
+		state[e_bodyStateInertia] = b->GetInertia();
+		state[e_bodyStateVx] = b->m_linearVelocity.x;
+		state[e_bodyStateVy] = b->m_linearVelocity.y;
+		state[e_bodyStateTheta] = b->m_sweep.a;
+		state[e_bodyStateOmega] = b->m_angularVelocity;
+	}
+	return count;
+}
+
+struct b2BodyStateRow
+{
+	int32 id;
+	int32 row;
+	b2Body* body;
+
+	bool operator<(const b2BodyStateRow& other) const
+	{
+		return id < other.id;
+	}
+};
+
+int32 b2World::SetBodyStates(const float64* data, int32 dataSize)
+{
+	b2Assert(IsLocked() == false);
+	b2Assert(dataSize % e_bodyStateColumnCount == 0);
+	if (IsLocked())
+	{
+		return -1;
+	}
+
+	int32 count = dataSize / e_bodyStateColumnCount;
+	if (count == 0)
+	{
+		return 0;
+	}
+
+	// Match the rows to the bodies by sorted id before changing anything.
+	b2BodyStateRow* rows = (b2BodyStateRow*)b2Alloc(count * sizeof(b2BodyStateRow));
+	for (int32 i = 0; i < count; ++i)
+	{
+		rows[i].id = (int32)data[i * e_bodyStateColumnCount + e_bodyStateId];
+		rows[i].row = i;
+		rows[i].body = NULL;
+	}
+	std::sort(rows, rows + count);
+
+	bool valid = true;
+	for (int32 i = 1; i < count; ++i)
+	{
+		if (rows[i].id == rows[i - 1].id)
+		{
+			valid = false;
+		}
+	}
+
+	int32 matched = 0;
+	for (b2Body* b = m_bodyList; b && valid; b = b->m_next)
+	{
+		b2BodyStateRow key;
+		key.id = b->m_userId;
+		b2BodyStateRow* row = std::lower_bound(rows, rows + count, key);
+		if (row == rows + count || row->id != b->m_userId)
+		{
+			continue;
+		}
+
+		if (row->body)
+		{
+			valid = false;
+		}
+		row->body = b;
+		++matched;
+	}
+
+	if (valid == false || matched != count)
+	{
+		b2Free(rows);
+		return -1;
+	}
+
+	b2BroadPhase* broadPhase = &m_contactManager.m_broadPhase;
+	for (int32 i = 0; i < count; ++i)
+	{
+		b2Body* b = rows[i].body;
+		const float64* state = data + rows[i].row * e_bodyStateColumnCount;
+		float32 angle = (float32)state[e_bodyStateTheta];
+
+		b->m_xf.q.Set(angle);
+		b->m_xf.p.Set((float32)state[e_bodyStatePx], (float32)state[e_bodyStatePy]);
+		b->m_sweep.c = b2Mul(b->m_xf, b->m_sweep.localCenter);
+		b->m_sweep.a = angle;
+		b->m_sweep.c0 = b->m_sweep.c;
+		b->m_sweep.a0 = angle;
+
+		if (b->m_type != b2_staticBody)
+		{
+			b2Vec2 v((float32)state[e_bodyStateVx], (float32)state[e_bodyStateVy]);
+			float32 w = (float32)state[e_bodyStateOmega];
+			if (b2Dot(v, v) > 0.0f || w * w > 0.0f)
+			{
+				b->SetAwake(true);
+			}
+			b->m_linearVelocity = v;
+			b->m_angularVelocity = w;
+		}
+
+		for (b2Fixture* f = b->m_fixtureList; f; f = f->m_next)
+		{
+			f->Synchronize(broadPhase, b->m_xf, b->m_xf);
+		}
+		b->SyncState();
+	}
+	b2Free(rows);
+
+	m_contactManager.FindNewContacts();
+	return count;
+}
+
+void b2World::SetBodyArrays(bool flag)
+{
+	if (flag == GetBodyArrays())
+	{
+		return;
+	}
+
+	if (flag)
+	{
+		RebuildBodyArrays();
+		return;
+	}
+
+	for (b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		b->m_stateIndex = -1;
+	}
+	FreeBuffer(m_bodyArrays, e_bodyArrayColumnCount * m_bodyArrayCapacity * sizeof(float32));
+	b2Free(m_bodyArrayBodies);
+	m_bodyArrays = NULL;
+	m_bodyArrayBodies = NULL;
+	m_bodyArrayCount = 0;
+	m_bodyArrayCapacity = 0;
+}
+
+void b2World::UnlockBuffers()
+{
+	b2Assert(m_bufferLockCount > 0);
+	if (--m_bufferLockCount > 0)
+	{
+		return;
+	}
+
+	for (int32 i = 0; i < m_retiredBufferCount; ++i)
+	{
+		b2Free(m_retiredBuffers[i]);
+	}
+	m_retiredBufferCount = 0;
+}
+
+void b2World::FreeBuffer(void* buffer, int32 size)
+{
+	if (buffer == NULL || m_bufferLockCount == 0)
+	{
+		b2Free(buffer);
+		return;
+	}
+
+	// Views may still read the buffer, make them read NaN until unlocked.
+	memset(buffer, 0xFF, size);
+	if (m_retiredBufferCount == m_retiredBufferCapacity)
+	{
+		m_retiredBufferCapacity = b2Max(2 * m_retiredBufferCapacity, 4);
+		void** buffers = (void**)b2Alloc(m_retiredBufferCapacity * sizeof(void*));
+		memcpy(buffers, m_retiredBuffers, m_retiredBufferCount * sizeof(void*));
+		b2Free(m_retiredBuffers);
+		m_retiredBuffers = buffers;
+	}
+	m_retiredBuffers[m_retiredBufferCount++] = buffer;
+}
+
+void b2World::AppendBodyArrays(b2Body* b)
+{
+	if (m_bodyArrayCount == m_bodyArrayCapacity)
+	{
+		// Grow each column in place of the old ones.
+		int32 capacity = b2Max(2 * m_bodyArrayCapacity, 16);
+		float32* arrays = (float32*)b2Alloc(e_bodyArrayColumnCount * capacity * sizeof(float32));
+		b2Body** bodies = (b2Body**)b2Alloc(capacity * sizeof(b2Body*));
+		for (int32 k = 0; k < e_bodyArrayColumnCount; ++k)
+		{
+			memcpy(arrays + k * capacity, m_bodyArrays + k * m_bodyArrayCapacity, m_bodyArrayCount * sizeof(float32));
+		}
+		memcpy(bodies, m_bodyArrayBodies, m_bodyArrayCount * sizeof(b2Body*));
+		FreeBuffer(m_bodyArrays, e_bodyArrayColumnCount * m_bodyArrayCapacity * sizeof(float32));
+		b2Free(m_bodyArrayBodies);
+		m_bodyArrays = arrays;
+		m_bodyArrayBodies = bodies;
+		m_bodyArrayCapacity = capacity;
+	}
+
+	b->m_stateIndex = m_bodyArrayCount;
+	m_bodyArrayBodies[m_bodyArrayCount++] = b;
+	WriteBodyArrays(b);
+}
+
+void b2World::RebuildBodyArrays()
+{
+	int32 count = GetBodyStateCount(true);
+	if (m_bodyArrays == NULL || count > m_bodyArrayCapacity)
+	{
+		FreeBuffer(m_bodyArrays, e_bodyArrayColumnCount * m_bodyArrayCapacity * sizeof(float32));
+		b2Free(m_bodyArrayBodies);
+		m_bodyArrayCapacity = b2Max(count, 16);
+		m_bodyArrays = (float32*)b2Alloc(e_bodyArrayColumnCount * m_bodyArrayCapacity * sizeof(float32));
+		m_bodyArrayBodies = (b2Body**)b2Alloc(m_bodyArrayCapacity * sizeof(b2Body*));
+	}
+
+	// The body list is in reverse creation order, fill the rows from the back.
+	m_bodyArrayCount = count;
+	int32 row = count;
+	for (b2Body* b = m_bodyList; b; b = b->m_next)
+	{
+		if (b->m_type != b2_dynamicBody)
+		{
+			b->m_stateIndex = -1;
+			continue;
+		}
+
+		b->m_stateIndex = --row;
+		m_bodyArrayBodies[row] = b;
+		WriteBodyArrays(b);
+	}
+}
+
+void b2World::WriteBodyArrays(const b2Body* b)
+{
+	int32 stride = m_bodyArrayCapacity;
+	float32* row = m_bodyArrays + b->m_stateIndex;
+	row[e_bodyArrayPx * stride] = b->m_xf.p.x;
+	row[e_bodyArrayPy * stride] = b->m_xf.p.y;
+	row[e_bodyArrayAngle * stride] = b->m_sweep.a;
+	row[e_bodyArrayVx * stride] = b->m_linearVelocity.x;
+	row[e_bodyArrayVy * stride] = b->m_linearVelocity.y;
+	row[e_bodyArrayOmega * stride] = b->m_angularVelocity;
+	row[e_bodyArrayInvMass * stride] = b->m_invMass;
+	row[e_bodyArrayInvI * stride] = b->m_invI;
+}
+
+// A regular grid being splatted onto, see b2World::RasterizeToGrid.
+struct b2Raster
+{
+	float64 lowerX, lowerY;
+	float64 resX, resY;
+	int32 countX, countY;
+	float64 radius;
+	float64* weights;
+	float32* buffer;
+};
+
+// Splat fields[k] of values into the output channel outputs[k] of the
+// raster, for k < count. The weights are computed once for all channels.
+static int32 b2SplatPoint(const b2Raster& raster, float64 px, float64 py, const float64* values,
+						  const int32* fields, const int32* outputs, int32 count)
+{
+	// The nodes of the support, with a one node margin against rounding
+	int32 x0 = b2Max(0, (int32)floor((px - raster.radius - raster.lowerX) / raster.resX));
+	int32 x1 = b2Min(raster.countX - 1, (int32)ceil((px + raster.radius - raster.lowerX) / raster.resX));
+	int32 y0 = b2Max(0, (int32)floor((py - raster.radius - raster.lowerY) / raster.resY));
+	int32 y1 = b2Min(raster.countY - 1, (int32)ceil((py + raster.radius - raster.lowerY) / raster.resY));
+	if (x0 > x1 || y0 > y1)
+	{
+		return 0;
+	}
+
+	float64 h2 = raster.radius * raster.radius;
+	float64 sum = 0.0;
+	float64* w = raster.weights;
+	for (int32 i = x0; i <= x1; ++i)
+	{
+		float64 dx = raster.lowerX + i * raster.resX - px;
+		for (int32 j = y0; j <= y1; ++j)
+		{
+			float64 dy = raster.lowerY + j * raster.resY - py;
+			float64 d = h2 - (dx * dx + dy * dy);
+			*w = d > 0.0 ? d * d * d : 0.0;
+			sum += *w++;
+		}
+	}
+	if (sum <= 0.0)
+	{
+		return 0;
+	}
+
+	int32 nodeCount = raster.countX * raster.countY;
+	for (int32 k = 0; k < count; ++k)
+	{
+		float64 scale = values[fields[k]] / sum;
+		float32* channel = raster.buffer + outputs[k] * nodeCount;
+		w = raster.weights;
+		for (int32 i = x0; i <= x1; ++i)
+		{
+			float32* row = channel + i * raster.countY;
+			for (int32 j = y0; j <= y1; ++j)
+			{
+				row[j] += (float32)(*w++ * scale);
+			}
+		}
+	}
+	return 1;
+}
+
+int32 b2World::RasterizeToGrid(const int32* data, int32 dataSize,
+							   float64 lowerX, float64 lowerY, float64 resX, float64 resY,
+							   int32 countX, int32 countY, float64 supportRadius,
+							   float32* buffer, int32 bufferSize) const
+{
+	b2Assert(resX > 0.0 && resY > 0.0 && supportRadius > 0.0);
+	b2Assert(0 <= dataSize && dataSize <= e_gridChannelCount);
+	int32 size = dataSize * countX * countY;
+	if (bufferSize < size)
+	{
+		return -1;
+	}
+	memset(buffer, 0, size * sizeof(float32));
+
+	// Split the requested fields into body and contact fields, each with the
+	// output channel it goes to.
+	int32 bodyFields[e_gridChannelCount], bodyOutputs[e_gridChannelCount];
+	int32 contactFields[e_gridChannelCount], contactOutputs[e_gridChannelCount];
+	int32 bodyFieldCount = 0, contactFieldCount = 0;
+	for (int32 k = 0; k < dataSize; ++k)
+	{
+		b2Assert(0 <= data[k] && data[k] < e_gridChannelCount);
+		if (0 <= data[k] && data[k] < e_gridNx)
+		{
+			bodyFields[bodyFieldCount] = data[k];
+			bodyOutputs[bodyFieldCount++] = k;
+		}
+		else if (e_gridNx <= data[k] && data[k] < e_gridChannelCount)
+		{
+			contactFields[contactFieldCount] = data[k];
+			contactOutputs[contactFieldCount++] = k;
+		}
+	}
+
+	if (countX <= 0 || countY <= 0)
+	{
+		return 0;
+	}
+
+	b2Raster raster;
+	raster.lowerX = lowerX;
+	raster.lowerY = lowerY;
+	raster.resX = resX;
+	raster.resY = resY;
+	raster.countX = countX;
+	raster.countY = countY;
+	raster.radius = supportRadius;
+	raster.buffer = buffer;
+
+	int32 supportX = b2Min(countX, (int32)(2.0 * supportRadius / resX) + 3);
+	int32 supportY = b2Min(countY, (int32)(2.0 * supportRadius / resY) + 3);
+	raster.weights = (float64*)b2Alloc(supportX * supportY * sizeof(float64));
+
+	int32 count = 0;
+	float64 values[e_gridChannelCount];
+	if (bodyFieldCount > 0)
+	{
+		for (b2Body* b = m_bodyList; b; b = b->m_next)
+		{
+			if (b->m_type != b2_dynamicBody)
+			{
+				continue;
+			}
+
+			values[e_gridMass] = b->GetMass();
+			values[e_gridInertia] = b->GetInertia();
+			values[e_gridVx] = b->m_linearVelocity.x;
+			values[e_gridVy] = b->m_linearVelocity.y;
+			values[e_gridTheta] = b->m_sweep.a;
+			values[e_gridOmega] = b->m_angularVelocity;
+			count += b2SplatPoint(raster, b->m_xf.p.x, b->m_xf.p.y, values,
+								  bodyFields, bodyOutputs, bodyFieldCount);
+		}
+	}
+
+	if (contactFieldCount > 0)
+	{
+		for (int32 i = 0; i < m_contactRecordCount; ++i)
+		{
+			const b2ContactRecord& record = m_contactRecords[i];
+			values[e_gridNx] = record.nx;
+			values[e_gridNy] = record.ny;
+			values[e_gridNi] = record.normalImpulse;
+			values[e_gridTi] = record.tangentImpulse;
+			count += b2SplatPoint(raster, record.px, record.py, values,
+								  contactFields, contactOutputs, contactFieldCount);
+		}
+	}
+
+	b2Free(raster.weights);
+	return count;
+}
+
 void b2World::Dump()
 {
 	if ((m_flags & e_locked) == e_locked)
@@ -34,6 +34,73 @@ class b2Body;
 class b2Draw;
 class b2Fixture;
 class b2Joint;
+struct b2ContactRecord;
+struct b2ContactLambdaRecord;
+struct b2IslandRecord;
+struct b2WarmStartImpulse;
+struct b2WarmStartField;
+class b2ThreadPool;
+struct b2IslandSolveContext;
+
+/// Columns of a row written by b2World::GetBodyStates.
+enum b2BodyStateColumn
+{
+	e_bodyStateId = 0,
+	e_bodyStatePx,
+	e_bodyStatePy,
+	e_bodyStateMass,
+	e_bodyStateInertia,
+	e_bodyStateVx,
+	e_bodyStateVy,
+	e_bodyStateTheta,
+	e_bodyStateOmega,
+	e_bodyStateColumnCount
+};
+
+/// Columns of a row read by b2World::CreateCircleBodies.
+enum b2CircleBodyColumn
+{
+	e_circleBodyPx = 0,
+	e_circleBodyPy,
+	e_circleBodyRadius,
+	e_circleBodyDensity,
+	e_circleBodyFriction,
+	e_circleBodyRestitution,
+	e_circleBodyId,
+	e_circleBodyColumnCount
+};
+
+/// Columns of the body arrays, see b2World::SetBodyArrays.
+enum b2BodyArrayColumn
+{
+	e_bodyArrayPx = 0,
+	e_bodyArrayPy,
+	e_bodyArrayAngle,
+	e_bodyArrayVx,
+	e_bodyArrayVy,
+	e_bodyArrayOmega,
+	e_bodyArrayInvMass,
+	e_bodyArrayInvI,
+	e_bodyArrayColumnCount
+};
+
+/// Fields splatted by b2World::RasterizeToGrid. The body fields are those of
+/// the b2BodyStateColumn columns, the contact fields those of the contact
+/// records (the solved impulses).
+enum b2GridChannel
+{
+	e_gridMass = 0,
+	e_gridInertia,
+	e_gridVx,
+	e_gridVy,
+	e_gridTheta,
+	e_gridOmega,
+	e_gridNx,
+	e_gridNy,
+	e_gridNi,
+	e_gridTi,
+	e_gridChannelCount
+};
 
 /// The world class manages all physics entities, dynamic simulation,
 /// and asynchronous queries. The world also contains efficient memory
@@ -61,6 +128,12 @@ public:
 	/// remain in scope.
 	void SetContactListener(b2ContactListener* listener);
 
+	/// Register a listener that gets the contacts of each time step in bulk.
+	/// It can be used alongside a contact listener. The listener is owned by
+	/// you and must remain in scope.
+	void SetBatchContactListener(b2BatchContactListener* listener);
+	b2BatchContactListener* GetBatchContactListener() const { return m_batchContactListener; }
+
 	/// Register a routine for debug drawing. The debug draw functions are called
 	/// inside with b2World::DrawDebugData method. The debug draw object is owned
 	/// by you and must remain in scope.
@@ -71,6 +144,16 @@ public:
 	/// @warning This function is locked during callbacks.
 	b2Body* CreateBody(const b2BodyDef* def);
 
+	/// Create dynamic bodies with a single circle fixture centered on the body,
+	/// one per row of data with the columns in b2CircleBodyColumn. The bodies
+	/// are created in row order, as by CreateBody and b2Body::CreateFixture with
+	/// otherwise default definitions.
+	/// @param data rows of (px, py, radius, density, friction, restitution, userId).
+	/// @param dataSize the number of float64 values in data, a multiple of 7.
+	/// @param allowSleep the b2BodyDef::allowSleep of the bodies.
+	/// @warning This function is locked during callbacks.
+	void CreateCircleBodies(const float64* data, int32 dataSize, bool allowSleep);
+
 	/// Destroy a rigid body given a definition. No reference to the definition
 	/// is retained. This function is locked during callbacks.
 	/// @warning This automatically deletes all associated shapes and joints.
@@ -163,6 +246,168 @@ public:
 	void SetConvergenceRates(bool flag) { m_convergenceRates = flag; }
 	bool GetConvergenceRates() const { return m_convergenceRates; }
 
+	/// Enable/disable the colored velocity solver. It colors the contact graph
+	/// of each island so that the constraints of a color share no body with
+	/// mass, and sweeps over the colors instead of the contacts. Large colors
+	/// are solved in parallel when the world has more than one thread.
+	/// The results do not depend on the number of threads.
+	void SetColoredSolver(bool flag) { m_coloredSolver = flag; }
+	bool GetColoredSolver() const { return m_coloredSolver; }
+
+	/// Enable/disable solving the single point contacts of the colored solver
+	/// four at a time with SSE2, where available. Has no effect unless the
+	/// colored solver is enabled. The results are the same as without it.
+	void SetSimdSolver(bool flag) { m_simdSolver = flag; }
+	bool GetSimdSolver() const { return m_simdSolver; }
+
+	/// Enable/disable updating the contact manifolds on the thread pool when
+	/// the world has more than one thread. The contacts are still destroyed
+	/// and reported to the contact listener on the calling thread, in the
+	/// same order as the serial narrow-phase, so the results are the same.
+	/// Unlike the serial narrow-phase, all the ShouldCollide calls of the
+	/// step (body and contact filter) come before any BeginContact or
+	/// EndContact call.
+	void SetParallelCollide(bool flag) { m_parallelCollide = flag; }
+	bool GetParallelCollide() const { return m_parallelCollide; }
+
+	/// Enable/disable keeping a read-only mirror of the state of the dynamic
+	/// bodies in contiguous arrays owned by the world, one float32 array per
+	/// b2BodyArrayColumn, with a row per dynamic body in creation order (the
+	/// rows of GetBodyStates with dynamicOnly). The position is the body
+	/// origin. The arrays are written by the island solver as it copies the
+	/// solved state back, and by every b2Body function that changes the
+	/// state, so they are up to date outside of Step. The solver does not
+	/// read them: islands still gather the state from the bodies.
+	void SetBodyArrays(bool flag);
+	bool GetBodyArrays() const { return m_bodyArrays != NULL; }
+
+	/// Get the body arrays: column k starts at GetBodyArrayData() + k *
+	/// GetBodyArrayStride(). NULL if the body arrays are disabled. The memory
+	/// moves when dynamic bodies are created or destroyed.
+	const float32* GetBodyArrayData() const { return m_bodyArrays; }
+	int32 GetBodyArrayCount() const { return m_bodyArrayCount; }
+	int32 GetBodyArrayStride() const { return m_bodyArrayCapacity; }
+
+	/// Keep the memory of GetBodyArrayData and of the profile convergence
+	/// buffers readable by outside views. While locked, a buffer the world
+	/// frees or replaces is filled with 0xFF bytes (NaN floats) instead and
+	/// kept until the last UnlockBuffers. Calls nest.
+	void LockBuffers() { ++m_bufferLockCount; }
+	void UnlockBuffers();
+
+	/// Set the iterative method of the contact velocity solver, see
+	/// b2SolverType. All methods report the lambda norms of their Gauss-Seidel
+	/// sweeps, which the velocity threshold is compared against. Joints are
+	/// always solved with plain projected Gauss-Seidel.
+	void SetSolverType(b2SolverType type) { m_solverType = type; }
+	b2SolverType GetSolverType() const { return m_solverType; }
+
+	/// Set the over-relaxation factor of b2_sorSolver, in (0, 2). 1 is plain
+	/// projected Gauss-Seidel, the default.
+	void SetRelaxation(float32 relaxation);
+	float32 GetRelaxation() const { return m_relaxation; }
+
+	/// Enable/disable recording the solved contact points of each step into a
+	/// native table, see GetContactRecords. Only the regular (non-TOI) solve
+	/// is recorded.
+	void SetRecordContacts(bool flag) { m_recordContacts = flag; }
+	bool GetRecordContacts() const { return m_recordContacts; }
+
+	/// Get the contacts recorded during the last time step, in island order.
+	/// The table is overwritten by the next call to Step.
+	const b2ContactRecord* GetContactRecords() const { return m_contactRecords; }
+	int32 GetContactRecordCount() const { return m_contactRecordCount; }
+
+	/// Enable/disable recording one row per solved island, with the iterations
+	/// it used and its final lambda norms, and one row per solved contact, with
+	/// the lambda norms of its last velocity iteration. See GetIslandRecords
+	/// and GetContactLambdaRecords. Only the regular (non-TOI) solve is recorded.
+	void SetRecordIslands(bool flag) { m_recordIslands = flag; }
+	bool GetRecordIslands() const { return m_recordIslands; }
+
+	/// Get the islands recorded during the last time step, in solve order.
+	/// The table is overwritten by the next call to Step.
+	const b2IslandRecord* GetIslandRecords() const { return m_islandRecords; }
+	int32 GetIslandRecordCount() const { return m_islandRecordCount; }
+
+	/// Get the contacts recorded during the last time step, in island order.
+	/// The table is overwritten by the next call to Step.
+	const b2ContactLambdaRecord* GetContactLambdaRecords() const { return m_lambdaRecords; }
+	int32 GetContactLambdaRecordCount() const { return m_lambdaRecordCount; }
+
+	/// Keep the profiles of the last capacity steps in a ring buffer, see
+	/// GetProfileHistory. Setting the capacity clears the history, 0 disables
+	/// it, the default.
+	void SetProfileHistoryCapacity(int32 capacity);
+	int32 GetProfileHistoryCapacity() const { return m_profileHistoryCapacity; }
+
+	/// Get the number of steps in the profile history, at most its capacity.
+	int32 GetProfileHistoryCount() const { return m_profileHistoryCount; }
+
+	/// Copy the profile history, oldest step first.
+	/// @param records destination, at least recordCount records.
+	/// @param recordCount the number of records available in records.
+	/// @return the number of records written, or -1 if records is too small.
+	int32 GetProfileHistory(b2ProfileRecord* records, int32 recordCount) const;
+
+	/// Create an exact copy of this world, which steps identically to it: the
+	/// bodies, fixtures, broad-phase tree and contacts (with their manifolds and
+	/// warm starting impulses) are copied, keeping all list orders. User data
+	/// pointers are copied as is. Listeners, the debug draw, the profile and
+	/// the profile history are not copied, the clone keeps no history.
+	/// Worlds with joints can not be cloned.
+	/// The caller owns the returned world.
+	/// @warning This function is locked during callbacks.
+	b2World* Clone() const;
+
+	/// Set the impulses used to warm start the contacts of the next time step,
+	/// replacing the impulses stored in the contact manifolds. Each manifold
+	/// point takes the impulse given for its body pair (by user id, in the
+	/// contact's fixture order) closest to the point, or zero if there is none.
+	/// Only used if warm starting is enabled. The impulses are consumed by the
+	/// next call to Step.
+	/// @param data rows of (idA, idB, px, py, normalImpulse, tangentImpulse).
+	/// @param dataSize the number of float64 values in data, a multiple of 6.
+	void SetWarmStartImpulses(const float64* data, int32 dataSize);
+
+	/// Set the impulses used to warm start the contacts of the next time step
+	/// by manifold point key, see b2MakeContactKey. Each manifold point takes
+	/// the impulse given for its key, or zero if there is none. Like
+	/// SetWarmStartImpulses, this replaces the stored impulses, needs warm
+	/// starting and only applies to the next call to Step.
+	/// @param keys the keys of the manifold points.
+	/// @param keyCount the number of keys.
+	/// @param data rows of (normalImpulse, tangentImpulse), one per key.
+	/// @param dataSize the number of float64 values in data, 2 * keyCount.
+	void SetKeyedWarmStartImpulses(const uint64* keys, int32 keyCount, const float64* data, int32 dataSize);
+
+	/// Set a grid of impulses used to warm start the contacts of the next time
+	/// step. Each manifold point samples the grid at its world point, see
+	/// b2WarmStartField and b2SampleWarmStartField. Replaces the impulses
+	/// given to SetWarmStartImpulses or SetKeyedWarmStartImpulses, needs warm
+	/// starting and only applies to the next call to Step.
+	/// @param data (normalImpulse, tangentImpulse) pairs of the nodes, with
+	/// the x index before the y index.
+	/// @param dataSize the number of float32 values in data, 2 * countX * countY.
+	/// @param countX the number of nodes along x, at least 1.
+	/// @param countY the number of nodes along y, at least 1.
+	/// @param lowerX the x coordinate of node (0, 0).
+	/// @param lowerY the y coordinate of node (0, 0).
+	/// @param resX the distance between nodes along x.
+	/// @param resY the distance between nodes along y.
+	void SetWarmStartField(const float32* data, int32 dataSize, int32 countX, int32 countY,
+						   float64 lowerX, float64 lowerY, float64 resX, float64 resY,
+						   b2FieldInterpolation interpolation);
+
+	/// Set the number of threads used to solve the islands of a time step.
+	/// With more than one thread the islands are collected first and then
+	/// solved on a pool of native threads, with results identical to the
+	/// serial solve. Islands with joints are still solved on the calling
+	/// thread, and the serial solve is used while a contact listener is set.
+	/// @param count the number of threads, including the calling thread.
+	void SetThreadCount(int32 count);
+	int32 GetThreadCount() const;
+
 	/// Get the number of broad-phase proxies.
 	int32 GetProxyCount() const;
 
@@ -175,6 +420,24 @@ public:
 	/// Get the number of contacts (each may have 0 or more contact points).
 	int32 GetContactCount() const;
 
+	/// Get a counter that changes whenever a body, joint or contact is
+	/// created or destroyed, and on every time step. Views of the world's
+	/// lists can be cached while it stays the same.
+	uint32 GetVersion() const;
+
+	/// Choose the structure of the broad-phase, b2_dynamicTreeBroadPhase by
+	/// default. b2_uniformGridBroadPhase suits worlds of similar sized shapes,
+	/// e.g. circles of equal radius. Both find the same pairs, but in a
+	/// different order. This can only be done while the world has no fixtures.
+	void SetBroadPhaseType(b2BroadPhaseType type);
+	b2BroadPhaseType GetBroadPhaseType() const;
+
+	/// Set the cell size of the uniform grid broad-phase, 1 by default. The
+	/// fat AABB size of the shapes, i.e. their diameter + 2 * b2_aabbExtension,
+	/// is a good choice. This can only be done while the world has no fixtures.
+	void SetGridCellSize(float32 cellSize);
+	float32 GetGridCellSize() const;
+
 	/// Get the height of the dynamic tree.
 	int32 GetTreeHeight() const;
 
@@ -199,6 +462,17 @@ public:
 	void SetPositionThreshold(float32 positionThreshold){ m_positionThreshold = positionThreshold; };
     float32 GetPositionThreshold() const { return m_positionThreshold; }
 
+	/// Enable the adaptive iteration budget of the velocity solver. An island
+	/// that has not reached the velocity threshold projects the iterations it
+	/// still needs from its current lambda norm and the contraction of the
+	/// norm over the last given number of iterations (at least 2). Once the
+	/// projection exceeds the iterations left in the budget of Step, the island
+	/// stops. The iterations cut are
+	/// reported in b2Profile::velocityIterationsSaved and the island records.
+	/// Requires a positive velocity threshold. 0 disables it, the default.
+	void SetAdaptiveIterations(int32 iterations);
+	int32 GetAdaptiveIterations() const { return m_adaptiveIterations; }
+
 	/// Is the world locked (in the middle of a time step).
 	bool IsLocked() const;
 
@@ -223,6 +497,61 @@ public:
 	/// @warning this should be called outside of a time step.
 	void Dump();
 
+	/// Hash the state of the bodies, in body list order: user id, type, awake
+	/// flag, position, angle and velocities. Optionally also hash the
+	/// impulses of the touching manifold points, by point key and independent
+	/// of the contact list order. The hash is a fast non-cryptographic 64-bit
+	/// hash, equal for worlds in the same state on any platform.
+	/// @param precision with a positive precision, values are rounded to the
+	/// nearest multiple of it before hashing, so that worlds that differ by
+	/// less hash alike (except across rounding boundaries). With 0 the exact
+	/// bits are hashed.
+	/// @param contacts also hash the contact impulses.
+	uint64 GetStateHash(float32 precision, bool contacts) const;
+
+	/// Get the number of rows GetBodyStates will write.
+	/// @param dynamicOnly only count dynamic bodies.
+	int32 GetBodyStateCount(bool dynamicOnly) const;
+
+	/// Write the state of the bodies, in creation order (the reverse of the
+	/// body list), into a row-major
+	/// buffer of e_bodyStateColumnCount float64 columns (see b2BodyStateColumn).
+	/// The id column holds the body user id.
+	/// @param buffer destination, at least bufferSize float64 values.
+	/// @param bufferSize the number of float64 values available in buffer.
+	/// @param dynamicOnly skip static and kinematic bodies.
+	/// @return the number of rows written, or -1 if the buffer is too small.
+	int32 GetBodyStates(float64* buffer, int32 bufferSize, bool dynamicOnly) const;
+
+	/// Set the position, angle and velocities of bodies by user id, from rows
+	/// laid out like those of GetBodyStates (the mass and inertia columns are
+	/// ignored), as SetTransform, SetLinearVelocity and SetAngularVelocity
+	/// would. The fixtures are moved in the broad-phase body by body but new
+	/// contacts are only looked for once, after the whole batch. Nothing is
+	/// changed unless every id matches exactly one body.
+	/// @param data rows of e_bodyStateColumnCount float64 values.
+	/// @param dataSize the number of float64 values in data.
+	/// @return the number of bodies set, or -1 if an id matches no body or
+	/// several bodies, or appears twice in data.
+	/// @warning This function is locked during callbacks.
+	int32 SetBodyStates(const float64* data, int32 dataSize);
+
+	/// Splat fields of the dynamic bodies, at their origins, and of the contact
+	/// points recorded in the last step (see SetRecordContacts) onto the nodes
+	/// of a regular grid with the normalized 2D poly6 kernel. The weights of
+	/// each point are (h^2 - r^2)^3 for the nodes closer than h, scaled to sum
+	/// to one over the grid. Node (i, j) is at lower + (i * resX, j * resY).
+	/// @param data the b2GridChannel of each output channel.
+	/// @param dataSize the number of channels.
+	/// @param buffer destination, channel-major with the x index before the
+	/// y index, at least dataSize * countX * countY float32 values.
+	/// @param bufferSize the number of float32 values available in buffer.
+	/// @return the number of points splatted, or -1 if the buffer is too small.
+	int32 RasterizeToGrid(const int32* data, int32 dataSize,
+						  float64 lowerX, float64 lowerY, float64 resX, float64 resY,
+						  int32 countX, int32 countY, float64 supportRadius,
+						  float32* buffer, int32 bufferSize) const;
+
 private:
 
 	// m_flags
@@ -239,14 +568,32 @@ private:
 	friend class b2Controller;
 
 	void Solve(const b2TimeStep& step);
+	void SolveIslandTasks(const b2TimeStep& step, b2ContactRecord* records,
+						  b2IslandSolveContext* context, int32 islandCount, int32 taskCount);
 	void SolveTOI(const b2TimeStep& step);
 
+	void PreSolveContactBatch();
+	void PostSolveContactBatch();
+
+	// Body arrays, see SetBodyArrays
+	void AppendBodyArrays(b2Body* b);
+	void RebuildBodyArrays();
+	void WriteBodyArrays(const b2Body* b);
+
+	// Free a buffer that outside views may read, see LockBuffers
+	void FreeBuffer(void* buffer, int32 size);
+
 	void DrawJoint(b2Joint* joint);
 	void DrawShape(b2Fixture* shape, const b2Transform& xf, const b2Color& color);
 
 	b2BlockAllocator m_blockAllocator;
 	b2StackAllocator m_stackAllocator;
 
+	// Island solving threads, NULL for the serial solve. Each worker
+	// thread has its own stack allocator.
+	b2ThreadPool* m_threadPool;
+	b2StackAllocator* m_threadAllocators;
+
 	int32 m_flags;
 
 	b2ContactManager m_contactManager;
@@ -256,11 +603,13 @@ private:
 
 	int32 m_bodyCount;
 	int32 m_jointCount;
+	uint32 m_version;
 
 	b2Vec2 m_gravity;
 	bool m_allowSleep;
 
 	b2DestructionListener* m_destructionListener;
+	b2BatchContactListener* m_batchContactListener;
 	b2Draw* m_debugDraw;
 
 	// This is used to compute the time step ratio to
@@ -272,10 +621,72 @@ private:
 	bool m_continuousPhysics;
 	bool m_subStepping;
     bool m_convergenceRates;
+	bool m_recordContacts;
+	bool m_recordIslands;
+	bool m_coloredSolver;
+	bool m_simdSolver;
+	bool m_parallelCollide;
+	b2SolverType m_solverType;
+	float32 m_relaxation;
+
+	// Convergence rate buffers of m_profile, grown as needed
+	int32 m_velocityLambdaCapacity;
+	int32 m_positionLambdaCapacity;
+
+	// Per step contact table, grown as needed
+	b2ContactRecord* m_contactRecords;
+	int32 m_contactRecordCount;
+	int32 m_contactRecordCapacity;
+
+	// Per step island and contact convergence tables, grown as needed
+	b2IslandRecord* m_islandRecords;
+	int32 m_islandRecordCount;
+	int32 m_islandRecordCapacity;
+	b2ContactLambdaRecord* m_lambdaRecords;
+	int32 m_lambdaRecordCount;
+	int32 m_lambdaRecordCapacity;
+
+	// Ring buffer of the last step profiles, the next one is written at
+	// m_profileHistoryIndex
+	b2ProfileRecord* m_profileHistory;
+	int32 m_profileHistoryCount;
+	int32 m_profileHistoryCapacity;
+	int32 m_profileHistoryIndex;
+
+	// Contact batch of the batch contact listener, grown as needed
+	b2ContactBatch m_contactBatch;
+	b2Contact** m_batchContacts;
+	int32 m_contactBatchCapacity;
+
+	// Warm starting impulses for the next step
+	b2WarmStartImpulse* m_warmStartImpulses;
+	int32 m_warmStartImpulseCount;
+	int32 m_warmStartImpulseCapacity;
+	bool m_hasWarmStartImpulses;
+	bool m_warmStartByKey;
+
+	// State of the dynamic bodies, column-major with a stride of the
+	// capacity, and the body of each row. NULL when disabled.
+	float32* m_bodyArrays;
+	b2Body** m_bodyArrayBodies;
+	int32 m_bodyArrayCount;
+	int32 m_bodyArrayCapacity;
+
+	// Buffers freed while locked, see LockBuffers
+	void** m_retiredBuffers;
+	int32 m_retiredBufferCount;
+	int32 m_retiredBufferCapacity;
+	int32 m_bufferLockCount;
+
+	// Warm starting field for the next step, allocated with its data
+	b2WarmStartField* m_warmStartField;
+	int32 m_warmStartFieldCapacity;
+	bool m_hasWarmStartField;
 
     // These are used for early stopping
     float32 m_velocityThreshold;
     float32 m_positionThreshold;
+	int32 m_adaptiveIterations;
 
 	bool m_stepComplete;
 
@@ -327,6 +738,11 @@ inline int32 b2World::GetContactCount() const
 	return m_contactManager.m_contactCount;
 }
 
+inline uint32 b2World::GetVersion() const
+{
+	return m_version + m_contactManager.m_version;
+}
+
 inline void b2World::SetGravity(const b2Vec2& gravity)
 {
 	m_gravity = gravity;
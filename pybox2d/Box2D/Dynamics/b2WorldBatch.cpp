@@ -0,0 +1,107 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+#include <Box2D/Dynamics/b2WorldBatch.h>
+#include <Box2D/Dynamics/b2World.h>
+#include <Box2D/Dynamics/Contacts/b2ContactSolver.h>
+#include <Box2D/Common/b2ThreadPool.h>
+#include <stddef.h>
+#include <string.h>
+
+struct b2WorldBatchContext
+{
+	b2World** worlds;
+	float32 timeStep;
+	int32 velocityIterations;
+	int32 positionIterations;
+	int32 stepCount;
+	const b2WorldBatchOutput* output;
+};
+
+// Step one world of the batch, storing the output of each step.
+static void b2StepWorldTask(void* userData, int32 index, int32 threadIndex)
+{
+	B2_NOT_USED(threadIndex);
+
+	const b2WorldBatchContext* context = (const b2WorldBatchContext*)userData;
+	const b2WorldBatchOutput* output = context->output;
+	b2World* world = context->worlds[index];
+
+	for (int32 step = 0; step < context->stepCount; ++step)
+	{
+		world->Step(context->timeStep, context->velocityIterations, context->positionIterations);
+
+		if (output == NULL)
+		{
+			continue;
+		}
+
+		int32 entry = index * context->stepCount + step;
+
+		if (output->bodyStates || output->bodyCounts)
+		{
+			int32 count = world->GetBodyStateCount(output->dynamicOnly);
+			if (output->bodyStates && count <= output->bodyCapacity)
+			{
+				float64* states = output->bodyStates + (ptrdiff_t)entry * output->bodyCapacity * e_bodyStateColumnCount;
+				world->GetBodyStates(states, output->bodyCapacity * e_bodyStateColumnCount, output->dynamicOnly);
+			}
+
+			if (output->bodyCounts)
+			{
+				output->bodyCounts[entry] = count;
+			}
+		}
+
+		if (output->contactRecords || output->recordCounts)
+		{
+			int32 count = world->GetContactRecordCount();
+			if (output->contactRecords)
+			{
+				b2ContactRecord* records = output->contactRecords + (ptrdiff_t)entry * output->recordCapacity;
+				memcpy(records, world->GetContactRecords(),
+					   b2Min(count, output->recordCapacity) * sizeof(b2ContactRecord));
+			}
+
+			if (output->recordCounts)
+			{
+				output->recordCounts[entry] = count;
+			}
+		}
+	}
+}
+
+void b2StepWorlds(b2World** worlds, int32 worldCount, float32 timeStep,
+				  int32 velocityIterations, int32 positionIterations, int32 stepCount,
+				  int32 threadCount, const b2WorldBatchOutput* output)
+{
+	b2Assert(threadCount > 0);
+
+	b2WorldBatchContext context;
+	context.worlds = worlds;
+	context.timeStep = timeStep;
+	context.velocityIterations = velocityIterations;
+	context.positionIterations = positionIterations;
+	context.stepCount = stepCount;
+	context.output = output;
+
+	b2ThreadPool threadPool(b2Min(threadCount, b2Max(worldCount, 1)));
+	threadPool.ParallelFor(b2StepWorldTask, &context, worldCount);
+}
@@ -0,0 +1,62 @@
+/*
+* Deep-Contact -- https://github.com/s0lucien/Deep-Contact
+*
+* Copyright (c) 2026 The Deep-Contact authors
+*
+* This software is provided 'as-is', without any express or implied
+* warranty.  In no event will the authors be held liable for any damages
+* arising from the use of this software.
+* Permission is granted to anyone to use this software for any purpose,
+* including commercial applications, and to alter it and redistribute it
+* freely, subject to the following restrictions:
+* 1. The origin of this software must not be misrepresented; you must not
+* claim that you wrote the original software. If you use this software
+* in a product, an acknowledgment in the product documentation would be
+* appreciated but is not required.
+* 2. Altered source versions must be plainly marked as such, and must not be
+* misrepresented as being the original software.
+* 3. This notice may not be removed or altered from any source distribution.
+*/
+
+#ifndef B2_WORLD_BATCH_H
+#define B2_WORLD_BATCH_H
+
+#include <Box2D/Common/b2Settings.h>
+
+class b2World;
+struct b2ContactRecord;
+
+/// Optional per step output of b2StepWorlds. Arrays left NULL are not written.
+/// Entries are indexed by [world][step].
+struct b2WorldBatchOutput
+{
+	/// Body states as written by b2World::GetBodyStates, with room for
+	/// bodyCapacity rows per world and step.
+	float64* bodyStates;
+	int32 bodyCapacity;
+	bool dynamicOnly;
+
+	/// The number of body states of each world and step. If they do not fit,
+	/// none are written.
+	int32* bodyCounts;
+
+	/// Contact records as returned by b2World::GetContactRecords, with room
+	/// for recordCapacity records per world and step. The worlds must record
+	/// contacts.
+	b2ContactRecord* contactRecords;
+	int32 recordCapacity;
+
+	/// The number of contact records of each world and step. Records that do
+	/// not fit are not written.
+	int32* recordCounts;
+};
+
+/// Step each of the worlds stepCount times, the worlds in parallel on
+/// threadCount threads (including the calling thread). The worlds must be
+/// distinct and must not call back into Python. If stepping a world throws,
+/// the other worlds are still stepped and the first exception is rethrown.
+void b2StepWorlds(b2World** worlds, int32 worldCount, float32 timeStep,
+				  int32 velocityIterations, int32 positionIterations, int32 stepCount,
+				  int32 threadCount, const b2WorldBatchOutput* output);
+
+#endif
@@ -118,6 +118,47 @@ public:
 	}
 };
 
+/// The manifold points of the contacts about to be solved in a time step,
+/// in structure of arrays form with one entry per point. The points of a
+/// contact are adjacent and share its index in contactIds.
+/// See b2BatchContactListener.
+struct b2ContactBatch
+{
+	int32 count;				///< number of points
+	int32 contactCount;			///< number of contacts
+	int32* contactIds;			///< index of the contact of each point
+	int32* master;				///< user id of body A
+	int32* slave;				///< user id of body B
+	float32* px;				///< world point
+	float32* py;
+	float32* nx;				///< world normal, from A to B
+	float32* ny;
+	float32* normalImpulses;	///< normal impulse of each point
+	float32* tangentImpulses;	///< tangent impulse of each point
+	uint64* keys;				///< key of each point, see b2MakeContactKey
+};
+
+/// Implement this class to get the contacts of a time step in bulk, with one
+/// call before and one call after the solver instead of one call per contact.
+/// The batch holds the contacts that are touching, enabled, not sensors and
+/// touch an awake body. Both calls get the same batch, with the same points
+/// in the same order.
+/// @warning You cannot create/destroy Box2D entities inside these callbacks.
+class b2BatchContactListener
+{
+public:
+	virtual ~b2BatchContactListener() {}
+
+	/// Called after the contacts are updated and before they are solved. The
+	/// impulses hold the impulses carried over from the last step, changes to
+	/// them are used to warm start the solver.
+	virtual void PreSolve(b2ContactBatch* batch) { B2_NOT_USED(batch); }
+
+	/// Called after the solver is finished, the impulses hold the solved
+	/// impulses. Time of impact sub-steps are not reported.
+	virtual void PostSolve(b2ContactBatch* batch) { B2_NOT_USED(batch); }
+};
+
 /// Callback class for AABB queries.
 /// See b2World::Query
 class b2QueryCallback
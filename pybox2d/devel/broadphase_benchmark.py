@@ -0,0 +1,65 @@
+# Compares the dynamic tree and the uniform grid broad-phase on piles of
+# equal radius circles falling into a box, as in the generated scenes.
+#
+# Usage: python broadphase_benchmark.py [steps] [count ...]
+import sys
+import time
+
+import numpy as np
+import Box2D
+
+radius = 0.5
+timeStep = 1.0 / 100
+velocityIterations = 50
+positionIterations = 20
+# Fat AABB size of the circles
+cellSize = 2 * radius + 2 * 0.1
+
+steps = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+counts = [int(n) for n in sys.argv[2:]] or [1000, 10000, 100000]
+
+
+def create_world(count, **kwargs):
+    world = Box2D.b2World(gravity=(0, -10), **kwargs)
+
+    # Circles on a jittered lattice, in a box twice as high as the lattice is wide
+    side = int(np.ceil(np.sqrt(count)))
+    spacing = 2.2 * radius
+    width = side * spacing
+    world.CreateStaticBody(shapes=[
+        Box2D.b2EdgeShape(vertices=[(0, 0), (width, 0)]),
+        Box2D.b2EdgeShape(vertices=[(0, 0), (0, 2 * width)]),
+        Box2D.b2EdgeShape(vertices=[(width, 0), (width, 2 * width)]),
+    ])
+
+    rng = np.random.RandomState(0)
+    i = np.arange(count)
+    positions = np.column_stack(((i % side + 0.5) * spacing, (i // side + 0.5) * spacing))
+    positions += rng.uniform(-0.1, 0.1, positions.shape)
+    world.CreateCircleBodies(positions, radius, density=1, friction=0.5)
+    return world
+
+
+def run(world):
+    times = {'step': [], 'collide': [], 'solve': [], 'solveTOI': [], 'broadphase': []}
+    for _ in range(steps):
+        world.Step(timeStep, velocityIterations, positionIterations)
+        profile = world.GetProfile()
+        for name in times:
+            times[name].append(getattr(profile, name))
+    return dict((name, np.mean(values)) for name, values in times.items())
+
+
+print("%8s %-6s %10s %10s %10s %10s %10s %10s" %
+      ('circles', 'broad', 'create s', 'step ms', 'collide', 'solve', 'solveTOI', 'broadphase'))
+for count in counts:
+    for name, kwargs in (('tree', {}),
+                         ('grid', {'broadPhaseType': Box2D.b2_uniformGridBroadPhase,
+                                   'gridCellSize': cellSize})):
+        start = time.time()
+        world = create_world(count, **kwargs)
+        created = time.time() - start
+        result = run(world)
+        print("%8d %-6s %10.2f %10.2f %10.2f %10.2f %10.2f %10.2f" %
+              (count, name, created, result['step'], result['collide'],
+               result['solve'], result['solveTOI'], result['broadphase']))
@@ -116,14 +116,17 @@ if use_kwargs:
 
 # depending on the platform, add extra compilation arguments. hopefully if the platform
 # isn't windows, g++ will be used; -Wno-unused then would suppress some annoying warnings
-# about the Box2D source.
+# about the Box2D source, and -pthread links the threads used to solve islands.
 if sys.platform in ('win32', 'win64'):
     extra_args=['-I.']
+    extra_link_args=[]
 else:
-    extra_args=['-I.', '-Wno-unused']
+    extra_args=['-I.', '-Wno-unused', '-pthread']
+    extra_link_args=['-pthread']
 
 pybox2d_extension = \
-    Extension('Box2D._Box2D', box2d_source_files, extra_compile_args=extra_args, language='c++')
+    Extension('Box2D._Box2D', box2d_source_files, extra_compile_args=extra_args,
+              extra_link_args=extra_link_args, language='c++')
 
 LONG_DESCRIPTION = \
 """ 2D physics library Box2D %s for usage in Python.
@@ -1,9 +1,15 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import unittest
+import gc
 import Box2D
 import sys
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 class testWorld (unittest.TestCase):
     def setUp(self):
         pass
@@ -19,6 +25,41 @@ class testWorld (unittest.TestCase):
         except Exception:
             self.fail("Failed to create world (%s)" % sys.exc_info()[1])
 
+    def test_list_views(self):
+        world = Box2D.b2World(gravity=(0, -10))
+        ground = world.CreateStaticBody(shapes=Box2D.b2EdgeShape(vertices=[(-10, 0), (10, 0)]))
+        boxes = [world.CreateDynamicBody(position=(i, 0.5)) for i in range(3)]
+        for box in boxes:
+            box.CreatePolygonFixture(box=(0.5, 0.5), density=1)
+
+        bodies = world.bodies
+        self.assertIsInstance(bodies, tuple)
+        self.assertIs(world.bodies, bodies)
+        self.assertEqual(list(bodies), [ground] + boxes)
+        self.assertEqual(world.contacts, ())
+
+        version = world.version
+        world.Step(1.0 / 60, 8, 3)
+        self.assertNotEqual(world.version, version)
+        self.assertIsNot(world.bodies, bodies)
+        contacts = world.contacts
+        self.assertEqual(len(contacts), world.contactCount)
+        self.assertIs(world.contacts, contacts)
+
+        joint = world.CreateRevoluteJoint(bodyA=boxes[0], bodyB=boxes[1], anchor=(0.5, 0.5))
+        self.assertEqual(world.joints, (joint,))
+        world.DestroyJoint(joint)
+        self.assertEqual(world.joints, ())
+
+        # Contacts destroyed outside of a step
+        boxes[2].DestroyFixture(boxes[2].fixtures[0])
+        self.assertEqual(len(world.contacts), world.contactCount)
+        self.assertLess(len(world.contacts), len(contacts))
+
+        world.DestroyBody(boxes[0])
+        self.assertEqual(list(world.bodies), [ground] + boxes[1:])
+        self.assertEqual(len(world.contacts), world.contactCount)
+
     def test_helloworld(self):
         gravity = Box2D.b2Vec2(0, -10)
          
@@ -61,6 +102,1085 @@ class testWorld (unittest.TestCase):
             world.Step(timeStep, vel_iters, pos_iters)
             world.ClearForces()
 
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_body_states(self):
+        world = Box2D.b2World(gravity=(0, -10))
+        world.CreateStaticBody(position=(0, -1), userId=100,
+                               shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        bodies = [world.CreateDynamicBody(position=(i, 2), userId=i, angle=0.1 * i)
+                  for i in range(3)]
+        for body in bodies:
+            body.CreateCircleFixture(radius=0.5, density=1)
+        for i in range(10):
+            world.Step(1.0 / 60, 6, 2)
+
+        states = world.GetBodyStates()
+        self.assertEqual(states.shape, (3, len(world.bodyStateColumns)))
+        self.assertEqual(states.dtype, numpy.float64)
+        for row in states:
+            body = bodies[int(row[0])]
+            self.assertEqual(body.userId, int(row[0]))
+            self.assertAlmostEqual(row[1], body.position.x)
+            self.assertAlmostEqual(row[2], body.position.y)
+            self.assertAlmostEqual(row[3], body.mass)
+            self.assertAlmostEqual(row[4], body.inertia)
+            self.assertAlmostEqual(row[5], body.linearVelocity.x)
+            self.assertAlmostEqual(row[6], body.linearVelocity.y)
+            self.assertAlmostEqual(row[7], body.angle)
+            self.assertAlmostEqual(row[8], body.angularVelocity)
+
+        out = numpy.zeros((8, len(world.bodyStateColumns)))
+        states = world.GetBodyStates(dynamicOnly=False, out=out)
+        self.assertEqual(states.shape[0], 4)
+        self.assertTrue(numpy.shares_memory(states, out))
+        self.assertEqual(list(states[:, 0]), [b.userId for b in world.bodies])
+        self.assertRaises(ValueError, world.GetBodyStates, out=numpy.zeros((1, 9)))
+        self.assertRaises(TypeError, world.GetBodyStates,
+                          out=numpy.zeros((4, 9), dtype=numpy.float32))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_contact_records(self):
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        ground = world.CreateStaticBody(position=(0, 0), userId=0,
+                                        shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        for i in range(1, 6):
+            body = world.CreateDynamicBody(position=(0.1 * i, 1 + 0.9 * i), userId=i)
+            body.CreateCircleFixture(radius=0.5, density=1, friction=0.3)
+        for i in range(30):
+            world.Step(1.0 / 60, 10, 10)
+
+        records = world.GetContactRecords()
+        self.assertEqual(records.dtype.names,
+                         tuple(name for name, _ in world.contactRecordFields))
+        solved = [c for c in world.contacts if c.touching]
+        self.assertEqual(len(records), sum(c.manifold.pointCount for c in solved))
+
+        impulses = {}
+        for c in solved:
+            key = (c.fixtureA.body.userId, c.fixtureB.body.userId)
+            impulses[key] = [p.normalImpulse for p in c.manifold.points]
+        for record in records:
+            key = (int(record['master']), int(record['slave']))
+            self.assertIn(key, impulses)
+            self.assertAlmostEqual(record['ni'], impulses[key][0], places=5)
+            self.assertAlmostEqual(record['nx'] ** 2 + record['ny'] ** 2, 1, places=5)
+
+        world.recordContacts = False
+        world.Step(1.0 / 60, 10, 10)
+        self.assertEqual(len(world.GetContactRecords()), 0)
+        self.assertEqual(len(records), sum(c.manifold.pointCount for c in solved))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_rasterize_to_grid(self):
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        world.CreateStaticBody(userId=0, shapes=Box2D.b2LoopShape(
+            vertices=[(0, 0), (4, 0), (4, 6), (0, 6)]))
+        rng = numpy.random.RandomState(3)
+        world.CreateCircleBodies(numpy.column_stack((rng.uniform(0.5, 3.5, 30), rng.uniform(0.5, 5.5, 30))),
+                                 0.25, density=1, friction=0.5)
+        for i in range(40):
+            world.Step(1.0 / 60, 8, 3)
+        for body in world.bodies[1:]:
+            body.angularVelocity = rng.uniform(-1, 1)
+
+        # Splat every point on its own, over all the nodes
+        h = 0.5
+        xs, ys = numpy.arange(0, 4 + 0.25, 0.25), numpy.arange(0, 5 + 0.2, 0.2)
+        X, Y = numpy.meshgrid(xs, ys, indexing='ij')
+
+        def splat(positions, values):
+            grid = numpy.zeros(X.shape)
+            for (px, py), value in zip(positions, values):
+                r2 = (X - px) ** 2 + (Y - py) ** 2
+                w = numpy.where(r2 < h * h, (h * h - r2) ** 3, 0)
+                if w.sum() > 0:
+                    grid += w / w.sum() * value
+            return grid
+
+        states = world.GetBodyStates()
+        records = world.GetContactRecords()
+        self.assertGreater(len(records), 0)
+        channels = ['omega', 'ni', 'mass', 'ny']
+        grids = world.RasterizeToGrid((0, 0), (4, 5), (0.25, 0.2), h, channels=channels)
+        self.assertEqual(grids.shape, (4, len(xs), len(ys)))
+        self.assertEqual(grids.dtype, numpy.float32)
+        columns = list(world.bodyStateColumns)
+        expected = [splat(states[:, 1:3], states[:, columns.index('omega')]),
+                    splat(numpy.column_stack((records['px'], records['py'])), records['ni']),
+                    splat(states[:, 1:3], states[:, columns.index('mass')]),
+                    splat(numpy.column_stack((records['px'], records['py'])), records['ny'])]
+        for grid, reference in zip(grids, expected):
+            self.assertTrue(numpy.allclose(grid, reference, rtol=1e-4, atol=1e-5))
+        # The mass of the bodies within the grid is kept
+        self.assertAlmostEqual(grids[2].sum(), states[:, columns.index('mass')].sum(), places=3)
+
+        out = numpy.full(grids.shape, numpy.nan, dtype=numpy.float32)
+        self.assertIs(world.RasterizeToGrid((0, 0), (4, 5), (0.25, 0.2), h, channels, out=out), out)
+        self.assertTrue(numpy.array_equal(out, grids))
+        self.assertEqual(world.RasterizeToGrid((0, 0), (4, 5), 0.25, h).shape,
+                         (len(world.gridChannels), 17, 21))
+        self.assertRaises(ValueError, world.RasterizeToGrid, (0, 0), (4, 5), 0.25, h, ['pressure'])
+        self.assertRaises(ValueError, world.RasterizeToGrid, (0, 0), (4, 5), 0.25, h, kernel='cubic')
+        self.assertRaises(ValueError, world.RasterizeToGrid, (0, 0), (4, 5), 0.25, h, out=out)
+
+        # The contact channels need the recorded contacts, the body channels do not
+        world.recordContacts = False
+        for channel in ('nx', 'ny', 'ni', 'ti'):
+            self.assertRaises(ValueError, world.RasterizeToGrid, (0, 0), (4, 5), 0.25, h, ['mass', channel])
+        self.assertTrue(numpy.array_equal(world.RasterizeToGrid((0, 0), (4, 5), (0.25, 0.2), h, ['mass']),
+                                          grids[2:3]))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_warm_start_impulses(self):
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        world.CreateStaticBody(position=(0, 0), userId=0,
+                               shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        for i in range(1, 6):
+            body = world.CreateDynamicBody(position=(0.1 * i, 1 + 0.9 * i), userId=i)
+            body.CreateCircleFixture(radius=0.5, density=1, friction=0.3)
+        for i in range(30):
+            world.Step(1.0 / 60, 10, 10)
+
+        records = world.GetContactRecords()
+        self.assertGreater(len(records), 1)
+        first = records[0]
+        world.SetWarmStartImpulses([first['master']], [first['slave']],
+                                   [first['px']], [first['py']], [0.125], [0.25])
+        world.Step(1.0 / 60, 10, 10)
+
+        for record in world.GetContactRecords():
+            if (record['master'], record['slave']) == (first['master'], first['slave']):
+                self.assertAlmostEqual(record['warm_ni'], 0.125)
+                self.assertAlmostEqual(record['warm_ti'], 0.25)
+            else:
+                self.assertEqual(record['warm_ni'], 0)
+                self.assertEqual(record['warm_ti'], 0)
+
+        # Consumed by the step, the built-in warm starting is back
+        world.Step(1.0 / 60, 10, 10)
+        self.assertTrue(any(world.GetContactRecords()['warm_ni'] != 0))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_warm_start_field(self):
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        for i in range(1, 6):
+            body = world.CreateDynamicBody(position=(0.1 * i, 1 + 0.9 * i), userId=i)
+            body.CreateCircleFixture(radius=0.5, density=1, friction=0.3)
+        for i in range(30):
+            world.Step(1.0 / 60, 10, 10)
+
+        # Both interpolations reproduce linear fields inside of the grid
+        xs, ys = numpy.arange(-2, 2.01, 0.5), numpy.arange(0, 6.01, 0.25)
+        X, Y = numpy.meshgrid(xs, ys, indexing='ij')
+        for interpolation in ('bilinear', 'bicubic'):
+            clone = world.Clone()
+            clone.SetWarmStartField(1 + 0.5 * X + 0.25 * Y, 0.125 * X, (-2, 0), (0.5, 0.25), interpolation)
+            clone.Step(1.0 / 60, 10, 10)
+            records = clone.GetContactRecords()
+            self.assertGreater(len(records), 1)
+            for record in records:
+                self.assertAlmostEqual(record['warm_ni'], 1 + 0.5 * record['px'] + 0.25 * record['py'], places=4)
+                self.assertAlmostEqual(record['warm_ti'], 0.125 * record['px'], places=4)
+
+        # Points outside of the grid take the border values, normal impulses are
+        # not negative
+        world.SetWarmStartField([[-1, 2], [-1, 2]], [[0.5, 0.5], [0.5, 0.5]], (0, -20), 0.1)
+        clone = world.Clone()
+        world.Step(1.0 / 60, 10, 10)
+        records = world.GetContactRecords()
+        self.assertTrue(numpy.all(records['warm_ni'] == 2))
+        self.assertTrue(numpy.all(records['warm_ti'] == 0.5))
+        clone.Step(1.0 / 60, 10, 10)
+        self.assertTrue(numpy.array_equal(clone.GetContactRecords(), records))
+
+        # Consumed by the step
+        world.Step(1.0 / 60, 10, 10)
+        self.assertFalse(numpy.all(world.GetContactRecords()['warm_ni'] == 2))
+
+        # Replaced by impulses set afterwards
+        world.SetWarmStartField([[1]], [[1]], (0, 0), 1)
+        world.SetKeyedWarmStartImpulses([], [], [])
+        world.Step(1.0 / 60, 10, 10)
+        self.assertTrue(numpy.all(world.GetContactRecords()['warm_ni'] == 0))
+
+        self.assertRaises(ValueError, world.SetWarmStartField, [[1]], [[1]], (0, 0), 1, 'nearest')
+        self.assertRaises(ValueError, world.SetWarmStartField, [[1, 2]], [[1]], (0, 0), 1)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_create_circle_bodies(self):
+        def create_world():
+            world = Box2D.b2World(gravity=(0, -10))
+            world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(10, 1)))
+            return world
+
+        rng = numpy.random.RandomState(0)
+        positions = numpy.column_stack((rng.uniform(-9, 9, 100), rng.uniform(2, 20, 100)))
+        radii = rng.uniform(0.2, 0.5, 100)
+
+        bulk = create_world()
+        ids = bulk.CreateCircleBodies(positions, radii, density=2, friction=0.5, allowSleep=False)
+        self.assertEqual(list(ids), list(range(1, 101)))
+        self.assertEqual(bulk.bodyCount, 101)
+        body = bulk.bodies[-1]
+        self.assertEqual(body.type, Box2D.b2_dynamicBody)
+        self.assertIsNone(body.userData)
+        self.assertFalse(body.sleepingAllowed)
+        fixture = body.fixtures[0]
+        self.assertAlmostEqual(fixture.shape.radius, radii[-1], places=6)
+        self.assertEqual((fixture.density, fixture.restitution), (2, 0))
+        self.assertAlmostEqual(fixture.friction, 0.5)
+
+        single = create_world()
+        for i in range(100):
+            single.CreateDynamicBody(position=positions[i], userId=i + 1, allowSleep=False,
+                                     fixtures=Box2D.b2FixtureDef(shape=Box2D.b2CircleShape(radius=radii[i]),
+                                                                 density=2, friction=0.5))
+        for i in range(60):
+            bulk.Step(1.0 / 60, 8, 3)
+            single.Step(1.0 / 60, 8, 3)
+        self.assertTrue(numpy.array_equal(bulk.GetBodyStates(False), single.GetBodyStates(False)))
+
+        ids = bulk.CreateCircleBodies([(0, 30), (1, 30)], 0.5, ids=[107, 109])
+        self.assertEqual(list(ids), [107, 109])
+        self.assertEqual([b.userId for b in bulk.bodies[-2:]], [107, 109])
+        self.assertRaises(ValueError, bulk.CreateCircleBodies, [(0, 30), (1, 30)], [0.5, 0.5, 0.5])
+
+        # Bad radii and ids, nothing is created
+        count = bulk.bodyCount
+        for radii, ids in ((-1, None), (0, None), (numpy.nan, None), (0.5, [7]), (0.5, [200, 200]),
+                           (0.5, [-1]), (0.5, [2 ** 22]), (0.5, [2 ** 21 - 1]), (0.5, [200.5])):
+            self.assertRaises(ValueError, bulk.CreateCircleBodies, [(0, 30)] * numpy.size(ids), radii, ids=ids)
+        self.assertEqual(bulk.bodyCount, count)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_contact_keys(self):
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        world.CreateStaticBody(userId=0, shapes=Box2D.b2LoopShape(
+            vertices=[(-5, 0), (5, 0), (5, 20), (-5, 20)]))
+        for i in range(1, 41):
+            body = world.CreateDynamicBody(position=(-4.5 + 0.9 * (i % 11), 1 + 0.4 * i), userId=i)
+            if i % 2:
+                body.CreateCircleFixture(radius=0.4, density=1, friction=0.3)
+            else:
+                body.CreatePolygonFixture(box=(0.4, 0.3), density=1, friction=0.3)
+        for i in range(120):
+            world.Step(1.0 / 60, 8, 3)
+
+        # Unique, and the same for a persisting point
+        records = world.GetContactRecords()
+        keys = records['key']
+        self.assertEqual(len(numpy.unique(keys)), len(keys))
+        self.assertEqual(sorted(keys), sorted(c.GetKey(j) for c in world.contacts if c.touching
+                                              for j in range(c.manifold.pointCount)))
+        self.assertTrue(numpy.array_equal(keys >> 43, records['master']))
+        self.assertTrue(numpy.array_equal((keys >> 22) & (2 ** 21 - 1), records['slave']))
+        world.Step(1.0 / 60, 8, 3)
+        self.assertGreater(len(numpy.intersect1d(world.GetContactRecords()['key'], keys)),
+                           len(keys) // 2)
+
+        # A copy steps the points the world is about to solve, hand its
+        # solved impulses to the world to warm start them
+        copy = world.Clone()
+        copy.Step(1.0 / 60, 8, 3)
+        expected = copy.GetContactRecords()
+        world.SetKeyedWarmStartImpulses(expected['key'][1:], expected['ni'][1:], expected['ti'][1:])
+        world.Step(1.0 / 60, 8, 3)
+        records = world.GetContactRecords()
+        self.assertTrue(numpy.array_equal(records['key'], expected['key']))
+        self.assertEqual(records['warm_ni'][0], 0)
+        self.assertTrue(numpy.array_equal(records['warm_ni'][1:], expected['ni'][1:]))
+        self.assertTrue(numpy.array_equal(records['warm_ti'][1:], expected['ti'][1:]))
+        self.assertRaises(ValueError, world.SetKeyedWarmStartImpulses, [1, 2], [0], [0])
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_clone(self):
+        world = Box2D.b2World(gravity=(0, -10))
+        groundData = object()
+        world.CreateStaticBody(position=(0, 0), userId=0, userData=groundData,
+                               shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        for i in range(1, 20):
+            body = world.CreateDynamicBody(position=(0.3 * (i % 5), 1 + 0.9 * i), userId=i,
+                                           userData={'id': i})
+            body.CreateCircleFixture(radius=0.5, density=1, friction=0.3)
+        for i in range(60):
+            world.Step(1.0 / 60, 10, 10)
+
+        refcount = sys.getrefcount(groundData)
+        clone = world.Clone()
+        self.assertTrue(clone.thisown)
+        self.assertEqual(sys.getrefcount(groundData), refcount + 1)
+        self.assertEqual(clone.bodyCount, world.bodyCount)
+        self.assertEqual(clone.contactCount, world.contactCount)
+        self.assertEqual(clone.proxyCount, world.proxyCount)
+        self.assertTrue(numpy.array_equal(clone.GetBodyStates(False), world.GetBodyStates(False)))
+        self.assertEqual([b.userData for b in clone.bodies], [b.userData for b in world.bodies])
+        for c1, c2 in zip(world.contacts, clone.contacts):
+            self.assertEqual(c1.fixtureA.body.userId, c2.fixtureA.body.userId)
+            self.assertEqual([p.normalImpulse for p in c1.manifold.points],
+                             [p.normalImpulse for p in c2.manifold.points])
+
+        for i in range(60):
+            world.Step(1.0 / 60, 10, 10)
+            clone.Step(1.0 / 60, 10, 10)
+        self.assertTrue(numpy.array_equal(clone.GetBodyStates(False), world.GetBodyStates(False)))
+
+        clone.bodies[1].linearVelocity = (100, 0)
+        self.assertNotEqual(world.bodies[1].linearVelocity.x, 100)
+
+        copied = world.Clone(copyUserData=True)
+        copied.bodies[1].userData['id'] = -1
+        self.assertEqual(world.bodies[1].userData['id'], 1)
+        del clone, copied
+        gc.collect()
+        self.assertEqual(sys.getrefcount(groundData), refcount)
+
+        world.CreateRevoluteJoint(bodyA=world.bodies[1], bodyB=world.bodies[2])
+        self.assertRaises(AssertionError, world.Clone)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_thread_count(self):
+        def create_world(threadCount):
+            world = Box2D.b2World(gravity=(0, -10), recordContacts=True,
+                                  convergenceRates=True, threadCount=threadCount)
+            world.CreateStaticBody(position=(0, 0), userId=0,
+                                   shapes=Box2D.b2PolygonShape(box=(30, 1)))
+            # Separate piles on a shared ground, the last one held by a joint
+            for i in range(1, 41):
+                pile = i % 4
+                body = world.CreateDynamicBody(position=(15 * pile - 22 + 0.1 * (i % 3), 1.5 + 0.5 * i),
+                                               userId=i)
+                body.CreateCircleFixture(radius=0.5, density=1, friction=0.3)
+            world.CreateRevoluteJoint(bodyA=world.bodies[0], bodyB=world.bodies[4],
+                                      anchor=world.bodies[4].position)
+            return world
+
+        serial = create_world(1)
+        threaded = create_world(4)
+        self.assertEqual(serial.threadCount, 1)
+        self.assertEqual(threaded.threadCount, 4)
+        for i in range(120):
+            serial.Step(1.0 / 60, 20, 10)
+            threaded.Step(1.0 / 60, 20, 10)
+            self.assertTrue(numpy.array_equal(threaded.GetBodyStates(False), serial.GetBodyStates(False)))
+            self.assertTrue(numpy.array_equal(threaded.GetContactRecords(), serial.GetContactRecords()))
+
+        profile, threadedProfile = serial.GetProfile(), threaded.GetProfile()
+        self.assertGreater(profile.contactsSolved, 0)
+        for name in ('velocityIterations', 'positionIterations', 'contactsSolved',
+                     'maxIslandVelocityIterations', 'velocityLambdaTwoNorms', 'positionLambdas'):
+            self.assertTrue(numpy.array_equal(getattr(threadedProfile, name), getattr(profile, name)))
+        self.assertEqual([b.awake for b in threaded.bodies], [b.awake for b in serial.bodies])
+
+        threaded.DestroyJoint(threaded.joints[0])
+        self.assertEqual(threaded.Clone().threadCount, 4)
+        threaded.threadCount = 1
+        self.assertEqual(threaded.threadCount, 1)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_colored_solver(self):
+        def create_world(threadCount):
+            world = Box2D.b2World(gravity=(0, -10), coloredSolver=True,
+                                  convergenceRates=True, threadCount=threadCount)
+            world.CreateStaticBody(position=(0, 0), userId=0,
+                                   shapes=[Box2D.b2PolygonShape(box=(5, 1)),
+                                           Box2D.b2EdgeShape(vertices=[(-5, 0), (-5, 40)]),
+                                           Box2D.b2EdgeShape(vertices=[(5, 0), (5, 40)])])
+            for i in range(1, 201):
+                body = world.CreateDynamicBody(position=(-4.5 + 0.9 * (i % 11), 1.5 + 0.2 * i),
+                                               userId=i)
+                body.CreateCircleFixture(radius=0.4, density=1, friction=0.3)
+            return world
+
+        self.assertFalse(Box2D.b2World().coloredSolver)
+        serial = create_world(1)
+        threaded = create_world(3)
+        for i in range(300):
+            serial.Step(1.0 / 60, 30, 10)
+            threaded.Step(1.0 / 60, 30, 10)
+        self.assertTrue(numpy.array_equal(threaded.GetBodyStates(False), serial.GetBodyStates(False)))
+        self.assertTrue(numpy.array_equal(threaded.GetProfile().velocityLambdaTwoNorms,
+                                          serial.GetProfile().velocityLambdaTwoNorms))
+
+        # The pile came to rest inside the box
+        self.assertGreater(serial.GetProfile().contactsSolved, 300)
+        states = serial.GetBodyStates()
+        self.assertTrue(numpy.all(numpy.abs(states[:, 5:7]) < 0.5))
+        self.assertTrue(numpy.all(states[:, 2] > 1))
+        self.assertTrue(serial.Clone().coloredSolver)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_simd_solver(self):
+        def create_world(simdSolver, threadCount):
+            world = Box2D.b2World(gravity=(0, -10), coloredSolver=True, simdSolver=simdSolver,
+                                  convergenceRates=True, threadCount=threadCount)
+            world.CreateStaticBody(position=(0, 0), userId=0,
+                                   shapes=[Box2D.b2PolygonShape(box=(5, 1)),
+                                           Box2D.b2EdgeShape(vertices=[(-5, 0), (-5, 40)]),
+                                           Box2D.b2EdgeShape(vertices=[(5, 0), (5, 40)])])
+            for i in range(1, 401):
+                body = world.CreateDynamicBody(position=(-4.5 + 0.9 * (i % 11), 1.5 + 0.1 * i),
+                                               userId=i)
+                body.CreateCircleFixture(radius=0.4, density=1, friction=0.3)
+            return world
+
+        self.assertFalse(Box2D.b2World().simdSolver)
+        colored = create_world(False, 1)
+        simd = create_world(True, 1)
+        threaded = create_world(True, 3)
+        for i in range(120):
+            colored.Step(1.0 / 60, 30, 10)
+            simd.Step(1.0 / 60, 30, 10)
+            threaded.Step(1.0 / 60, 30, 10)
+        for world in (simd, threaded):
+            self.assertTrue(numpy.array_equal(world.GetBodyStates(False), colored.GetBodyStates(False)))
+            self.assertTrue(numpy.array_equal(world.GetProfile().velocityLambdaTwoNorms,
+                                              colored.GetProfile().velocityLambdaTwoNorms))
+            self.assertTrue(numpy.array_equal(world.GetProfile().velocityLambdaInfNorms,
+                                              colored.GetProfile().velocityLambdaInfNorms))
+        self.assertTrue(simd.Clone().simdSolver)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_solver_type(self):
+        def solve_pile(solverType, relaxation=1.0, coloredSolver=False):
+            world = Box2D.b2World(gravity=(0, -10), solverType=solverType, relaxation=relaxation,
+                                  coloredSolver=coloredSolver, velocityThreshold=1e-4)
+            world.CreateStaticBody(shapes=[Box2D.b2PolygonShape(box=(3, 1)),
+                                           Box2D.b2EdgeShape(vertices=[(-3, 0), (-3, 20)]),
+                                           Box2D.b2EdgeShape(vertices=[(3, 0), (3, 20)])])
+            for i in range(60):
+                body = world.CreateDynamicBody(position=(-2.5 + 0.9 * (i % 6), 1.5 + 0.2 * i))
+                body.CreateCircleFixture(radius=0.4, density=1, friction=0.3)
+
+            iterations = 0
+            for i in range(120):
+                world.Step(1.0 / 60, 1000, 10)
+                iterations += world.GetProfile().velocityIterations
+            states = world.GetBodyStates()
+            self.assertTrue(numpy.all(numpy.isfinite(states)))
+            self.assertTrue(numpy.all(states[:, 2] > 1.3))
+            return world, iterations
+
+        world, pgs = solve_pile(Box2D.b2_pgsSolver)
+        self.assertEqual(Box2D.b2World().solverType, Box2D.b2_pgsSolver)
+        self.assertEqual(Box2D.b2World().relaxation, 1.0)
+        self.assertRaises(AssertionError, setattr, world, 'relaxation', 2.0)
+
+        for solverType, relaxation in ((Box2D.b2_sorSolver, 1.6), (Box2D.b2_nesterovSolver, 1.0),
+                                       (Box2D.b2_nncgSolver, 1.0)):
+            world, iterations = solve_pile(solverType, relaxation)
+            self.assertLess(iterations, 0.75 * pgs)
+            self.assertEqual(world.Clone().solverType, solverType)
+            solve_pile(solverType, relaxation, coloredSolver=True)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_adaptive_iterations(self):
+        def create_world(adaptiveIterations, threadCount=1):
+            world = Box2D.b2World(gravity=(0, -10), velocityThreshold=1e-3, recordIslands=True,
+                                  adaptiveIterations=adaptiveIterations, threadCount=threadCount)
+            world.CreateStaticBody(shapes=Box2D.b2LoopShape(vertices=[(-12, 0), (12, 0), (12, 40), (-12, 40)]))
+            world.CreateStaticBody(shapes=Box2D.b2PolygonShape(box=(0.5, 5, (0, 5), 0)))
+            i = numpy.arange(200)
+            # Two piles, one on each side of the wall
+            x = numpy.where(i % 2, 1, -11) + (i // 2) % 10 + 0.5
+            world.CreateCircleBodies(numpy.column_stack((x, (i // 20) * 1.1 + 1)), 0.5, density=1)
+            return world
+
+        budget = 200
+        fixed, adaptive, threaded = create_world(0), create_world(10), create_world(10, threadCount=2)
+        saved = 0
+        for i in range(120):
+            for world in (fixed, adaptive, threaded):
+                world.Step(1.0 / 60, budget, 10)
+            self.assertEqual(fixed.GetProfile().velocityIterationsSaved, 0)
+            self.assertTrue(numpy.all(fixed.GetIslandRecords()['velocityIterationsSaved'] == 0))
+
+            profile = adaptive.GetProfile()
+            islands = adaptive.GetIslandRecords()
+            self.assertEqual(islands['velocityIterationsSaved'].sum(), profile.velocityIterationsSaved)
+            self.assertEqual(threaded.GetProfile().velocityIterationsSaved, profile.velocityIterationsSaved)
+            self.assertTrue(numpy.array_equal(threaded.GetIslandRecords(), islands))
+
+            # Stopped islands did not reach the threshold and report the rest of the budget
+            stopped = islands[islands['velocityIterationsSaved'] > 0]
+            self.assertTrue(numpy.all(stopped['velocityIterations'] + stopped['velocityIterationsSaved'] == budget))
+            self.assertTrue(numpy.all(stopped['velocityIterations'] >= 10))
+            self.assertTrue(numpy.all(stopped['velocityLambdaTwoNorm'] > 1e-3))
+            saved += profile.velocityIterationsSaved
+
+        self.assertGreater(saved, 0)
+
+        # From the same state, the budget only ever cuts iterations
+        probe = fixed.Clone()
+        probe.adaptiveIterations = 10
+        for world in (fixed, probe):
+            world.Step(1.0 / 60, budget, 10)
+        self.assertLessEqual(probe.GetProfile().velocityIterations, fixed.GetProfile().velocityIterations)
+        self.assertTrue(numpy.all(adaptive.GetBodyStates()[:, 2] > 0.4))
+        self.assertEqual(adaptive.Clone().adaptiveIterations, 10)
+        self.assertEqual(Box2D.b2World().adaptiveIterations, 0)
+        self.assertRaises(AssertionError, setattr, adaptive, 'adaptiveIterations', 1)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_profile_history(self):
+        world = Box2D.b2World(gravity=(0, -10), profileHistory=5, threadCount=2)
+        world.CreateStaticBody(shapes=Box2D.b2PolygonShape(box=(10, 1)))
+        i = numpy.arange(50)
+        world.CreateCircleBodies(numpy.column_stack((i % 10 - 4.5, i // 10 + 2)), 0.5, density=1)
+        self.assertEqual(len(world.GetProfileHistory()), 0)
+
+        names = [name for name, _ in world.profileRecordFields]
+        profiles = []
+        for step in range(13):
+            world.Step(1.0 / 60, 10, 5)
+            profile = world.GetProfile()
+            profiles.append(tuple(getattr(profile, name) for name in names))
+            history = world.GetProfileHistory()
+            self.assertEqual(len(history), min(step + 1, 5))
+            expected = numpy.array(profiles[-5:], dtype=history.dtype)
+            self.assertTrue(numpy.array_equal(history, expected))
+        self.assertTrue(numpy.all(history['contactsSolved'] > 0))
+
+        clone = world.Clone()
+        self.assertEqual(clone.profileHistory, 0)
+        self.assertEqual(len(clone.GetProfileHistory()), 0)
+        world.profileHistory = 3
+        self.assertEqual(len(world.GetProfileHistory()), 0)
+        world.profileHistory = 0
+        world.Step(1.0 / 60, 10, 5)
+        self.assertEqual(len(world.GetProfileHistory()), 0)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_record_islands(self):
+        def create_world(threadCount):
+            world = Box2D.b2World(gravity=(0, -10), recordIslands=True, threadCount=threadCount)
+            world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(20, 1)))
+            for i in range(1, 31):
+                # Three separate stacks
+                body = world.CreateDynamicBody(position=(-10 + 10 * (i % 3), 1.5 + 0.9 * (i // 3)),
+                                               userId=i)
+                body.CreateCircleFixture(radius=0.45, density=1)
+            return world
+
+        serial = create_world(1)
+        threaded = create_world(3)
+        for i in range(60):
+            serial.Step(1.0 / 60, 10, 5)
+            threaded.Step(1.0 / 60, 10, 5)
+            self.assertTrue(numpy.array_equal(threaded.GetIslandRecords(), serial.GetIslandRecords()))
+            self.assertTrue(numpy.array_equal(threaded.GetContactLambdaRecords(),
+                                              serial.GetContactLambdaRecords()))
+
+        islands = serial.GetIslandRecords()
+        contacts = serial.GetContactLambdaRecords()
+        profile = serial.GetProfile()
+        self.assertEqual(len(islands), 3)
+        self.assertEqual(islands['contactCount'].sum(), profile.contactsSolved)
+        self.assertEqual(len(contacts), profile.contactsSolved)
+        self.assertEqual(islands['velocityIterations'].sum(), profile.velocityIterations)
+        self.assertEqual(islands['velocityIterations'].max(), profile.maxIslandVelocityIterations)
+        self.assertEqual(islands['positionIterations'].sum(), profile.positionIterations)
+
+        # An island's final norm is the largest of its contacts'
+        for i, island in enumerate(islands):
+            norms = contacts['lambdaTwoNorm'][contacts['island'] == i]
+            self.assertEqual(len(norms), island['contactCount'])
+            self.assertEqual(norms.max(), island['velocityLambdaTwoNorm'])
+
+        self.assertTrue(serial.Clone().recordIslands)
+        self.assertEqual(len(Box2D.b2World().GetIslandRecords()), 0)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_step_worlds(self):
+        def create_world(seed):
+            rng = numpy.random.RandomState(seed)
+            world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+            world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(5, 1)))
+            for i in range(1, 21):
+                body = world.CreateDynamicBody(position=(rng.uniform(-4, 4), 1.5 + 0.9 * i), userId=i)
+                body.CreateCircleFixture(radius=0.4, density=1)
+            return world
+
+        worlds = [create_world(seed) for seed in range(5)]
+        copies = [world.Clone() for world in worlds]
+        stepCount = 40
+        recordDtype = numpy.dtype(list(Box2D.b2World.contactRecordFields))
+        bodyStates = numpy.zeros((5, stepCount, 20, 9))
+        bodyCounts = numpy.zeros((5, stepCount), dtype=numpy.int32)
+        contactRecords = numpy.zeros((5, stepCount, 100), dtype=recordDtype)
+        recordCounts = numpy.zeros((5, stepCount), dtype=numpy.int32)
+        Box2D.b2StepWorlds(worlds, 1.0 / 60, 8, 3, stepCount, threadCount=3,
+                           bodyStates=bodyStates, bodyCounts=bodyCounts,
+                           contactRecords=contactRecords, recordCounts=recordCounts)
+
+        for i, world in enumerate(copies):
+            for step in range(stepCount):
+                world.Step(1.0 / 60, 8, 3)
+                records = world.GetContactRecords()
+                self.assertEqual(bodyCounts[i, step], 20)
+                self.assertTrue(numpy.array_equal(bodyStates[i, step], world.GetBodyStates()))
+                self.assertEqual(recordCounts[i, step], len(records))
+                self.assertTrue(numpy.array_equal(contactRecords[i, step, :len(records)], records))
+            self.assertTrue(numpy.array_equal(worlds[i].GetBodyStates(), world.GetBodyStates()))
+        self.assertGreater(recordCounts.max(), 0)
+
+        self.assertRaises(ValueError, Box2D.b2StepWorlds, worlds, 1.0 / 60, 8, 3, 2,
+                          bodyStates=bodyStates)
+        self.assertRaises(ValueError, Box2D.b2StepWorlds, [worlds[0], worlds[0]], 1.0 / 60, 8, 3)
+        class Listener(Box2D.b2ContactListener):
+            pass
+        worlds[1].contactListener = Listener()
+        self.assertRaises(ValueError, Box2D.b2StepWorlds, worlds, 1.0 / 60, 8, 3)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_batch_contact_listener(self):
+        class Listener(Box2D.b2BatchContactListener):
+            def PreSolve(self, batch):
+                self.pre = (batch.contactCount, batch.master.copy(), batch.slave.copy(),
+                            batch.px.copy(), batch.py.copy())
+                batch.normalImpulses[:] = 0.25
+                batch.tangentImpulses[:] = -0.125
+
+            def PostSolve(self, batch):
+                self.normalImpulses = batch.normalImpulses.copy()
+                self.tangentImpulses = batch.tangentImpulses.copy()
+                self.contactIds = batch.contactIds.copy()
+                self.keys = batch.keys.copy()
+
+        world = Box2D.b2World(gravity=(0, -10), recordContacts=True)
+        world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(5, 1)))
+        for i in range(1, 21):
+            body = world.CreateDynamicBody(position=(-4 + 0.41 * i, 1.5 + 0.5 * (i % 3)), userId=i)
+            body.CreateCircleFixture(radius=0.4, density=1)
+
+        listener = Listener()
+        world.batchContactListener = listener
+        for _ in range(30):
+            world.Step(1.0 / 60, 8, 3)
+
+        # The batch and the records hold the same points, in a different order.
+        # The records compute the world points from the solver's positions.
+        def rows(master, slave, px, py, *columns):
+            order = numpy.lexsort((numpy.round(py, 4), numpy.round(px, 4), slave, master))
+            return [numpy.asarray(c)[order] for c in (master, slave, px, py) + columns]
+
+        records = world.GetContactRecords()
+        self.assertGreater(len(records), 0)
+        contactCount, master, slave, px, py = listener.pre
+        self.assertEqual(contactCount, listener.contactIds.max() + 1)
+        self.assertTrue(numpy.all(records['warm_ni'] == numpy.float32(0.25)))
+        self.assertTrue(numpy.all(records['warm_ti'] == numpy.float32(-0.125)))
+        batch = rows(master, slave, px, py, listener.normalImpulses, listener.tangentImpulses)
+        recorded = rows(records['master'], records['slave'], records['px'], records['py'],
+                        records['ni'], records['ti'])
+        for b, r in zip(batch[:4], recorded[:4]):
+            self.assertTrue(numpy.allclose(b, r, rtol=0, atol=1e-6))
+        for b, r in zip(batch[4:], recorded[4:]):
+            self.assertTrue(numpy.array_equal(b, r))
+
+        # The keys pair the points up exactly
+        order, recordOrder = numpy.argsort(listener.keys), numpy.argsort(records['key'])
+        self.assertTrue(numpy.array_equal(listener.keys[order], records['key'][recordOrder]))
+        self.assertTrue(numpy.array_equal(listener.normalImpulses[order], records['ni'][recordOrder]))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_uniform_grid(self):
+        class Query(Box2D.b2QueryCallback):
+            def __init__(self):
+                super(Query, self).__init__()
+                self.ids = []
+
+            def ReportFixture(self, fixture):
+                self.ids.append(fixture.body.userId)
+                return True
+
+        class RayCast(Box2D.b2RayCastCallback):
+            def __init__(self):
+                super(RayCast, self).__init__()
+                self.ids = []
+
+            def ReportFixture(self, fixture, point, normal, fraction):
+                self.ids.append(fixture.body.userId)
+                return 1.0
+
+        def create_world(**kwargs):
+            world = Box2D.b2World(gravity=(0, -10), **kwargs)
+            # Longer than b2_gridMaxProxyCells cells
+            world.CreateStaticBody(userId=0, shapes=Box2D.b2PolygonShape(box=(60, 0.5)))
+            for i in range(1, 301):
+                body = world.CreateDynamicBody(userId=i)
+                body.CreateCircleFixture(radius=0.5, density=1)
+            return world
+
+        tree = create_world()
+        grid = create_world(broadPhaseType=Box2D.b2_uniformGridBroadPhase, gridCellSize=1.2)
+        self.assertEqual(grid.broadPhaseType, Box2D.b2_uniformGridBroadPhase)
+        self.assertAlmostEqual(grid.gridCellSize, 1.2, places=6)
+
+        rng = numpy.random.RandomState(0)
+        for _ in range(5):
+            positions = rng.uniform(-12, 12, (300, 2))
+            for world in (tree, grid):
+                for body, position in zip(sorted(world.bodies, key=lambda b: b.userId)[1:], positions):
+                    body.position = position
+                world.Step(0, 8, 3)
+
+            pairs = [sorted((c.fixtureA.body.userId, c.fixtureB.body.userId) for c in world.contacts)
+                     for world in (tree, grid)]
+            self.assertGreater(len(pairs[0]), 0)
+            self.assertEqual(pairs[0], pairs[1])
+
+            for _ in range(20):
+                lower = rng.uniform(-14, 12, 2)
+                aabb = Box2D.b2AABB(lowerBound=lower, upperBound=lower + rng.uniform(0, 8, 2))
+                p1, p2 = rng.uniform(-14, 14, (2, 2))
+                ids = []
+                for world in (tree, grid):
+                    query, rayCast = Query(), RayCast()
+                    world.QueryAABB(query, aabb)
+                    world.RayCast(rayCast, p1, p2)
+                    ids.append((sorted(query.ids), sorted(rayCast.ids)))
+                self.assertEqual(ids[0], ids[1])
+
+        # Clones keep the grid and step identically
+        grid.ClearForces()
+        copy = grid.Clone()
+        self.assertEqual(copy.broadPhaseType, Box2D.b2_uniformGridBroadPhase)
+        for _ in range(30):
+            grid.Step(1.0 / 60, 8, 3)
+            copy.Step(1.0 / 60, 8, 3)
+        self.assertTrue(numpy.array_equal(grid.GetBodyStates(), copy.GetBodyStates()))
+
+        def set_type():
+            tree.broadPhaseType = Box2D.b2_uniformGridBroadPhase
+        self.assertRaises(AssertionError, set_type)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_body_arrays(self):
+        def create_world(bodyArrays):
+            world = Box2D.b2World(gravity=(0, -10), bodyArrays=bodyArrays)
+            world.CreateStaticBody(userId=0, shapes=Box2D.b2LoopShape(
+                vertices=[(-10, 0), (10, 0), (10, 30), (-10, 30)]))
+            world.CreateKinematicBody(position=(0, 8), angularVelocity=1, userId=1,
+                                      shapes=Box2D.b2PolygonShape(box=(3, 0.2)))
+            rng = numpy.random.RandomState(5)
+            for i in range(40):
+                body = world.CreateDynamicBody(position=(rng.uniform(-9, 9), rng.uniform(1, 25)),
+                                               angle=rng.uniform(-1, 1), userId=i + 2)
+                # Off-center fixtures, the origin is not the center of mass
+                body.CreatePolygonFixture(box=(0.3, 0.2, (0.2, 0.1), 0), density=1 + i % 3)
+            world.CreateDynamicBody(position=(0, 28), linearVelocity=(0, -300), bullet=True, userId=50,
+                                    shapes=Box2D.b2CircleShape(radius=0.1), shapeFixture=Box2D.b2FixtureDef(density=1))
+            return world
+
+        def check(world):
+            view = world.GetBodyArrayView()
+            states = world.GetBodyStates()
+            self.assertEqual(view.shape, (len(world.bodyArrayColumns), len(states)))
+            columns = list(world.bodyStateColumns)
+            for name, stateName in (('px', 'px'), ('py', 'py'), ('angle', 'theta'),
+                                    ('vx', 'vx'), ('vy', 'vy'), ('omega', 'omega')):
+                self.assertTrue(numpy.array_equal(view[world.bodyArrayColumns.index(name)],
+                                                  states[:, columns.index(stateName)].astype(numpy.float32)), name)
+            invMass = view[world.bodyArrayColumns.index('invMass')]
+            self.assertTrue(numpy.allclose(invMass, 1 / states[:, columns.index('mass')]))
+
+        world, plain = create_world(True), create_world(False)
+        self.assertTrue(world.bodyArrays)
+        self.assertFalse(plain.bodyArrays)
+        self.assertRaises(ValueError, plain.GetBodyArrayView)
+        check(world)
+
+        def both(action):
+            for w in (world, plain):
+                action(w)
+            check(world)
+
+        for i in range(240):
+            for w in (world, plain):
+                w.Step(1.0 / 60, 8, 3)
+            check(world)
+            if i == 60:
+                both(lambda w: w.bodies[5].__setattr__('transform', ((1, 20), 0.5)))
+                both(lambda w: w.bodies[6].__setattr__('linearVelocity', (3, 4)))
+                both(lambda w: w.bodies[7].ApplyLinearImpulse((1, 2), w.bodies[7].worldCenter + (0.1, 0), True))
+                both(lambda w: w.bodies[8].ApplyAngularImpulse(0.5, True))
+                both(lambda w: w.bodies[9].__setattr__('fixedRotation', True))
+                both(lambda w: w.bodies[10].__setattr__('awake', False))
+            if i == 120:
+                both(lambda w: w.DestroyBody(w.bodies[12]))
+                both(lambda w: w.bodies[13].__setattr__('type', Box2D.b2_staticBody))
+                both(lambda w: w.bodies[1].__setattr__('type', Box2D.b2_dynamicBody))
+                both(lambda w: w.CreateCircleBodies([(0, 20), (1, 20)], 0.3, density=2))
+                both(lambda w: w.bodies[14].__setattr__('massData', Box2D.b2MassData(mass=3, I=2)))
+            if i == 180:
+                both(lambda w: w.ShiftOrigin((1, 2)))
+                clone = world.Clone()
+                self.assertTrue(clone.bodyArrays)
+                check(clone)
+        self.assertTrue(numpy.array_equal(world.GetBodyStates(False), plain.GetBodyStates(False)))
+        self.assertTrue(any(not b.awake for b in world.bodies[2:]))
+
+        world.bodyArrays = False
+        self.assertRaises(ValueError, world.GetBodyArrayView)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_body_array_view_lifetime(self):
+        def create_world():
+            world = Box2D.b2World(gravity=(0, -10), bodyArrays=True)
+            world.CreateCircleBodies([(0, 1), (2, 1), (4, 1)], 0.5, density=1)
+            return world
+
+        # The view keeps the world alive
+        view = create_world().GetBodyArrayView()
+        gc.collect()
+        self.assertTrue(numpy.array_equal(view[1], [1, 1, 1]))
+
+        # Once the arrays move, the old view reads NaN instead of freed memory
+        world = create_world()
+        view = world.GetBodyArrayView()
+        world.CreateCircleBodies([(i, 5) for i in range(40)], 0.5, density=1)
+        self.assertTrue(numpy.all(numpy.isnan(view)))
+        self.assertTrue(numpy.all(numpy.isfinite(world.GetBodyArrayView())))
+        view = world.GetBodyArrayView()
+        world.bodyArrays = False
+        self.assertTrue(numpy.all(numpy.isnan(view)))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_set_body_states(self):
+        world = Box2D.b2World(gravity=(0, -10), bodyArrays=True)
+        world.CreateStaticBody(shapes=Box2D.b2LoopShape(vertices=[(0, 0), (20, 0), (20, 40), (0, 40)]))
+        i = numpy.arange(200)
+        ids = world.CreateCircleBodies(numpy.column_stack((i % 15 + 1.5, i // 15 * 1.2 + 1)), 0.5, density=1)
+        for _ in range(60):
+            world.Step(1.0 / 60, 8, 3)
+        snapshot = world.GetBodyStates()
+        for _ in range(60):
+            world.Step(1.0 / 60, 8, 3)
+        other = world.Clone()
+
+        world.SetBodyStates(snapshot)
+        self.assertTrue(numpy.array_equal(world.GetBodyStates(), snapshot))
+        self.assertTrue(numpy.array_equal(world.GetBodyArrayView()[0], snapshot[:, 1].astype(numpy.float32)))
+
+        # Same as the body setters, with the same contacts found
+        bodies = dict((body.userId, body) for body in other.bodies)
+        for id, px, py, mass, inertia, vx, vy, theta, omega in snapshot:
+            body = bodies[int(id)]
+            body.transform = ((px, py), theta)
+            body.linearVelocity = (vx, vy)
+            body.angularVelocity = omega
+        self.assertTrue(numpy.array_equal(other.GetBodyStates(), snapshot))
+
+        def pairs(w):
+            return sorted((c.fixtureA.body.userId, c.fixtureB.body.userId) for c in w.contacts)
+        self.assertEqual(pairs(world), pairs(other))
+
+        # Columns, broadcast, and all or nothing on bad ids
+        world.SetBodyStates(ids[:2], [3, 5], 30, 0.5, 0, 0, 1)
+        states = world.GetBodyStates()
+        self.assertTrue(numpy.allclose(states[:2, 1:3], [(3, 30), (5, 30)]))
+        self.assertTrue(numpy.allclose(states[:2, 7:9], (0.5, 1)))
+        self.assertRaises(ValueError, world.SetBodyStates, [ids[2], 9999], 0, 0, 0, 0, 0, 0)
+        self.assertRaises(ValueError, world.SetBodyStates, [ids[2], ids[2]], 0, 0, 0, 0, 0, 0)
+        self.assertRaises(ValueError, world.SetBodyStates, numpy.zeros((2, 3)))
+        self.assertRaises(ValueError, world.SetBodyStates, [ids[2] + 0.5], 0, 0, 0, 0, 0, 0)
+        self.assertRaises(ValueError, world.SetBodyStates, [numpy.nan], 0, 0, 0, 0, 0, 0)
+        self.assertRaises(ValueError, world.SetBodyStates, ids[2:4])
+        self.assertTrue(numpy.array_equal(world.GetBodyStates(), states))
+
+        # Columns left out keep the current values
+        world.SetBodyStates(ids[2:4], px=[4, 6], py=32)
+        expected = states.copy()
+        expected[2:4, 1:3] = [(4, 32), (6, 32)]
+        self.assertTrue(numpy.array_equal(world.GetBodyStates(), expected))
+        world.SetBodyStates(ids[2:4], vx=1, vy=[2, 3])
+        expected[2:4, 5:7] = [(1, 2), (1, 3)]
+        self.assertTrue(numpy.array_equal(world.GetBodyStates(), expected))
+        world.Step(1.0 / 60, 8, 3)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_state_hash(self):
+        def create_world(threadCount):
+            world = Box2D.b2World(gravity=(0, -10), threadCount=threadCount)
+            world.CreateStaticBody(shapes=Box2D.b2LoopShape(vertices=[(0, 0), (20, 0), (20, 40), (0, 40)]))
+            i = numpy.arange(300)
+            world.CreateCircleBodies(numpy.column_stack((i % 15 + 1.5, i // 15 * 1.2 + 1)), 0.5, density=1)
+            return world
+
+        serial, threaded = create_world(1), create_world(3)
+        hashes = set()
+        for i in range(60):
+            for world in (serial, threaded):
+                world.Step(1.0 / 60, 8, 3)
+            self.assertEqual(serial.StateHash(), threaded.StateHash())
+            self.assertEqual(serial.StateHash(contacts=True), threaded.StateHash(contacts=True))
+            hashes.add(serial.StateHash())
+        self.assertEqual(len(hashes), 60)
+        self.assertNotEqual(serial.StateHash(), serial.StateHash(contacts=True))
+
+        clone = serial.Clone()
+        for precision in (0.0, 1e-3):
+            self.assertEqual(clone.StateHash(precision, True), serial.StateHash(precision, True))
+
+        # A tiny change shows in the exact hash only
+        body = clone.bodies[100]
+        body.linearVelocity = body.linearVelocity + (1e-6, 0)
+        self.assertNotEqual(clone.StateHash(), serial.StateHash())
+        self.assertEqual(clone.StateHash(1e-3), serial.StateHash(1e-3))
+        body.linearVelocity = body.linearVelocity + (1e-2, 0)
+        self.assertNotEqual(clone.StateHash(1e-3), serial.StateHash(1e-3))
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_parallel_collide(self):
+        class Listener(Box2D.b2ContactListener):
+            def __init__(self):
+                super(Listener, self).__init__()
+                self.events = []
+
+            def record(self, name, contact):
+                self.events.append((name, contact.fixtureA.body.userId, contact.fixtureB.body.userId))
+
+            def BeginContact(self, contact):
+                self.record('begin', contact)
+
+            def EndContact(self, contact):
+                self.record('end', contact)
+
+            def PreSolve(self, contact, oldManifold):
+                self.record('presolve', contact)
+
+        def create_world(parallelCollide):
+            world = Box2D.b2World(gravity=(0, -10), recordContacts=True, threadCount=3,
+                                  parallelCollide=parallelCollide)
+            world.CreateStaticBody(userId=0, shapes=[Box2D.b2PolygonShape(box=(10, 1)),
+                                                     Box2D.b2PolygonShape(box=(1, 1, (0, 4), 0))])
+            world.bodies[0].fixtures[1].sensor = True
+            # A row of boxes falls asleep before a kinematic box lands on it
+            world.CreateStaticBody(position=(40, 0), userId=301, shapes=Box2D.b2PolygonShape(box=(10, 1)))
+            for i in range(10):
+                body = world.CreateDynamicBody(position=(35.5 + i, 1.5), userId=302 + i)
+                body.CreatePolygonFixture(box=(0.5, 0.5), density=1, friction=0.3)
+            world.CreateKinematicBody(position=(38, 2.8), linearVelocity=(0, -0.1), userId=312,
+                                      shapes=Box2D.b2PolygonShape(box=(1, 0.5)))
+            for i in range(1, 301):
+                body = world.CreateDynamicBody(position=(-9.5 + 0.95 * (i % 20), 1.5 + 0.1 * i),
+                                               userId=i)
+                if i % 3:
+                    body.CreateCircleFixture(radius=0.4, density=1, friction=0.3)
+                else:
+                    body.CreatePolygonFixture(box=(0.4, 0.3), density=1, friction=0.3)
+            return world
+
+        self.assertFalse(Box2D.b2World().parallelCollide)
+        serial = create_world(False)
+        parallel = create_world(True)
+        listeners = [Listener(), Listener()]
+        serial.contactListener, parallel.contactListener = listeners
+        for i in range(400):
+            if i == 300:
+                # Drop a box on the pile and filter out the contacts of the
+                # last bodies created
+                for world in (serial, parallel):
+                    world.CreateDynamicBody(position=(0, 30), userId=313).CreatePolygonFixture(
+                        box=(2, 0.5), density=5)
+                    for body in world.bodies[-30:]:
+                        body.fixtures[0].filterData = Box2D.b2Filter(groupIndex=-1)
+            serial.Step(1.0 / 60, 8, 3)
+            parallel.Step(1.0 / 60, 8, 3)
+            self.assertTrue(numpy.array_equal(parallel.GetBodyStates(False), serial.GetBodyStates(False)))
+            self.assertTrue(numpy.array_equal(parallel.GetContactRecords(), serial.GetContactRecords()))
+
+        self.assertGreater(len(serial.contacts), 2 * 128)
+        self.assertGreater(len(listeners[0].events), 0)
+        self.assertEqual(listeners[1].events, listeners[0].events)
+        self.assertEqual(len(parallel.contacts), len(serial.contacts))
+        self.assertTrue(parallel.Clone().parallelCollide)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_step_threads(self):
+        import threading
+
+        class Listener(Box2D.b2ContactListener):
+            def __init__(self):
+                super(Listener, self).__init__()
+                self.count = 0
+
+            def PreSolve(self, contact, oldManifold):
+                self.count += 1
+
+        def create_world(seed):
+            rng = numpy.random.RandomState(seed)
+            world = Box2D.b2World(gravity=(0, -10))
+            world.CreateStaticBody(shapes=Box2D.b2PolygonShape(box=(5, 1)))
+            for i in range(20):
+                body = world.CreateDynamicBody(position=(rng.uniform(-4, 4), 2.5 + 0.9 * i))
+                body.CreateCircleFixture(radius=0.4, density=1)
+            return world
+
+        def run(world):
+            for _ in range(60):
+                world.Step(1.0 / 60, 8, 3)
+
+        worlds = [create_world(seed) for seed in range(4)]
+        copies = [world.Clone() for world in worlds]
+        listeners = [Listener(), Listener()]
+        worlds[0].contactListener, copies[0].contactListener = listeners
+
+        threads = [threading.Thread(target=run, args=(world,)) for world in worlds]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        for world, copy in zip(worlds, copies):
+            run(copy)
+            self.assertTrue(numpy.array_equal(world.GetBodyStates(), copy.GetBodyStates()))
+        self.assertGreater(listeners[0].count, 0)
+        self.assertEqual(listeners[0].count, listeners[1].count)
+
+        class FailingListener(Box2D.b2ContactListener):
+            def PreSolve(self, contact, oldManifold):
+                raise RuntimeError('PreSolve')
+
+        copies[1].contactListener = FailingListener()
+        self.assertRaises(RuntimeError, copies[1].Step, 1.0 / 60, 8, 3)
+
+    @unittest.skipIf(numpy is None, "numpy not available")
+    def test_convergence_buffers(self):
+        world = Box2D.b2World(gravity=(0, -10))
+        world.CreateStaticBody(shapes=Box2D.b2PolygonShape(box=(5, 1)))
+        for i in range(5):
+            world.CreateDynamicBody(position=(0, 1.5 + i)).CreateCircleFixture(radius=0.5, density=1)
+
+        world.Step(1.0 / 60, 8, 3)
+        self.assertEqual(len(world.GetProfile().positionLambdas), 0)
+
+        world.convergenceRates = True
+        world.Step(1.0 / 60, 8, 3)
+        profile = world.GetProfile()
+        norms = profile.velocityLambdaTwoNorms
+        self.assertEqual(norms.dtype, numpy.float32)
+        self.assertEqual(len(norms), profile.maxIslandVelocityIterations)
+        self.assertEqual(len(profile.positionLambdas), profile.maxIslandPositionIterations)
+        self.assertFalse(norms.flags.writeable)
+
+        # The views share the world's buffers, which are reused between steps
+        address = norms.__array_interface__['data'][0]
+        world.Step(1.0 / 60, 6, 3)
+        self.assertEqual(world.GetProfile().velocityLambdaTwoNorms.__array_interface__['data'][0], address)
+        world.Step(1.0 / 60, 40, 3)
+        self.assertGreater(world.GetProfile().maxIslandVelocityIterations, 8)
+
+        # Grown buffers leave the old views reading NaN instead of freed memory
+        self.assertTrue(numpy.all(numpy.isnan(norms)))
+
+        # The views keep the world alive
+        norms = world.GetProfile().velocityLambdaInfNorms
+        expected = norms.copy()
+        del world, profile
+        gc.collect()
+        self.assertTrue(numpy.array_equal(norms, expected))
+
 if __name__ == '__main__':
     unittest.main()
 
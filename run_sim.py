@@ -1,32 +1,7 @@
-from Box2D import b2ContactListener
 from xml_convert import XMLExporter
 import numpy as np
 import time
 
-class ContactListener(b2ContactListener):
-    def __init__(self, exporter: XMLExporter):
-        super(ContactListener, self).__init__()
-
-        self.xml_exp = exporter
-        self.reset()
-
-    # Reset the counter in preparation for a new step
-    def reset(self):
-        self.counter = 0
-
-    # Store all pre-solve contact information
-    def PreSolve(self, contact, _):
-        # We give the contact an index so that we can recognize it later
-        contact.userData = self.counter
-        self.counter += contact.manifold.pointCount
-
-        self.xml_exp.snapshot_contact(contact)
-
-    # Store post-solve impulses
-    def PostSolve(self, contact, impulse):
-        self.xml_exp.snapshot_impulse(contact, impulse)
-
-
 from opencv_draw import OpencvDrawFuncs
 import matplotlib.pyplot as plt
 from pathlib import Path
@@ -50,10 +25,9 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
     if write_profile:
         # Enable saving of runtime information
         world.convergenceRates = True
+        # The world keeps the timings and counters of every step natively
+        world.profileHistory = sim_params.steps
         totalStepTimes          = []
-        contactsSolved          = []
-        totalVelocityIterations = []
-        totalPositionIterations = []
         velocityLambdaTwoNorms  = []
         velocityLambdaInfNorms  = []
         positionLambdas         = []
@@ -63,16 +37,20 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
         result = {}
     
     if write_xml and (model is None):
-        # Initialize XML exporter
+        # Initialize XML exporter, contacts are recorded natively by the world
         xml_exp = XMLExporter(world, export_path)
-
-        # Initialize contact listener
-        listener = ContactListener(xml_exp)
-        world.contactListener = listener
+        world.recordContacts = True
+    else:
+        write_xml = False
         
-    # Attach model as listener if given a model
-    if model:
+    # Attach model as listener if given a model, models that set their
+    # predictions in bulk read the recorded contacts instead
+    if model and model.usesContactListener:
         world.contactListener = model
+    elif model and model.usesBatchContactListener:
+        world.batchContactListener = model
+    elif model:
+        world.recordContacts = True
     else:
         world.warmStarting = False
             
@@ -82,17 +60,11 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
     for i in range(sim_params.steps):
         if verbose: print("\nStep: ", world.userData.step, "...")
 
-        # Reset the contact listener
-        if write_xml: listener.reset()
-
-        if world.GetProfile().contactsSolved > 0 and write_xml:
+        if write_xml:
             xml_file = f"{world.userData.name}_{str(world.userData.step).zfill(6)}.xml"
-            if verbose: print("Saving to xml ...",xml_file )
-            # Reset xml exporter and take snapshot of bodies
+            # Reset xml exporter and take snapshot of bodies before the step
             xml_exp.reset()
             xml_exp.snapshot_bodies()
-    #         xml_exp.snapshot_contacts()
-            xml_exp.save_snapshot(xml_file)
         
         # Start step timer    
         if write_profile: step = time.time()
@@ -103,6 +75,15 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
     
         # Tell the world to take a step
         world.Step(sim_params.timeStep, sim_params.velocityIterations, sim_params.positionIterations)
+        if model:
+            model.PostStep(world)
+
+        if write_xml and world.GetProfile().contactsSolved > 0:
+            if verbose: print("Saving to xml ...",xml_file )
+            # Add the contacts solved during the step
+            xml_exp.snapshot_contact_records(world.GetContactRecords())
+            xml_exp.save_snapshot(xml_file)
+
         world.userData.tick()
         world.ClearForces()
         
@@ -112,14 +93,11 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
             
             # Extract and store profiling data
             profile = world.GetProfile()
-            contactsSolved.append(profile.contactsSolved)
-
-            totalVelocityIterations.append(profile.maxIslandVelocityIterations)
-            totalPositionIterations.append(profile.maxIslandPositionIterations)
 
-            velocityLambdaTwoNorms.append(profile.velocityLambdaTwoNorms)
-            velocityLambdaInfNorms.append(profile.velocityLambdaInfNorms)
-            positionLambdas.append(profile.positionLambdas)
+            # The profile's arrays are views reused by the next step
+            velocityLambdaTwoNorms.append(profile.velocityLambdaTwoNorms.copy())
+            velocityLambdaInfNorms.append(profile.velocityLambdaInfNorms.copy())
+            positionLambdas.append(profile.positionLambdas.copy())
             
             if model:
                 normalPairs.append(model.normalPairs)
@@ -131,6 +109,9 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
             
             # Print results
             if verbose and write_profile:
+                history = world.GetProfileHistory()
+                totalVelocityIterations = history['maxIslandVelocityIterations']
+                totalPositionIterations = history['maxIslandPositionIterations']
                 print("Velocity:")
                 print("Total   = %d"   % np.sum(totalVelocityIterations))
                 print("Average = %.2f" % np.mean(totalVelocityIterations))
@@ -157,11 +138,14 @@ def run_simulation(world, sim_params:RunSimParams, export_path:Path, verbose=Fal
     if write_png: plt.close()
     if write_profile:
             # Store results
+        history = world.GetProfileHistory()
         result["totalStepTimes"] = totalStepTimes
-        result["contactsSolved"] = contactsSolved
+        result["contactsSolved"] = history['contactsSolved'].tolist()
 
-        result["totalVelocityIterations"] = totalVelocityIterations
-        result["totalPositionIterations"] = totalPositionIterations
+        result["totalVelocityIterations"] = history['maxIslandVelocityIterations'].tolist()
+        result["totalPositionIterations"] = history['maxIslandPositionIterations'].tolist()
+        # Per phase timings of each step, in milliseconds
+        result["profiles"] = history
 
         result["velocityLambdaTwoNorms"] = velocityLambdaTwoNorms
         result["velocityLambdaInfNorms"] = velocityLambdaInfNorms
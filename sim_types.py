@@ -72,11 +72,19 @@ class dcCircleShape:
     '''
     a wrapper class used for storing/loading circles to xml and back
     '''
+    density = 1
+    friction = 0.5
+    restitution = 0
+
     def __init__(self, radius):
         self.radius = radius
-        self.fixture = b2FixtureDef(shape=b2CircleShape(radius=self.radius,
-                                                   pos=(0, 0)),
-                               density=1, friction=0.5, restitution=0)
+
+    @property
+    def fixture(self):
+        return b2FixtureDef(shape=b2CircleShape(radius=self.radius,
+                                                pos=(0, 0)),
+                            density=self.density, friction=self.friction,
+                            restitution=self.restitution)
 
     def __repr__(self):
         return "dcCircleShape(radius={0})".format(self.radius)
@@ -1,7 +1,6 @@
-import random
 import pandas as pd
 
-from Box2D import b2ContactListener, b2World, b2FixtureDef, b2Vec2
+from Box2D import b2ContactListener, b2BatchContactListener
 
 import numpy as np
 
@@ -44,104 +43,43 @@ class CustomContactListener(b2ContactListener):
             self.df_c.loc[n_c+i].ti = tangent
 
 
-# Creates a copy of the given world by creating copies of all bodies
+# Creates an exact copy of the given world, including its contacts and their
+# warm starting impulses. The bodies' userData is shared with the given world
 def copyWorld(world):
-    copy = b2World(gravity=world.gravity, doSleep=world.allowSleeping)
-
-    copy.continuousPhysics  = world.continuousPhysics
-
-    copy.velocityThreshold = world.velocityThreshold
-    copy.positionThreshold = world.positionThreshold
-
-    for body in world.bodies:
-        fixtures = []
-        for fixture in body.fixtures:
-            fixtures.append(b2FixtureDef(
-                shape=fixture.shape,
-                density=fixture.density,
-                restitution=fixture.restitution,
-                friction=fixture.friction
-            ))
-
-        copy.CreateBody(
-            type=body.type,
-            fixtures=fixtures,
-            userData=body.userData,
-            position=b2Vec2(body.position.x, body.position.y),
-            angle=body.angle,
-            linearVelocity=b2Vec2(body.linearVelocity.x, body.linearVelocity.y),
-            angularVelocity=body.angularVelocity
-        )
-
-    for body in copy.bodies:
-        body.sleepingAllowed = False
-
+    return world.Clone()
 
-    return copy
 
-
-# Stores normal and tangential impulse predictions for a contact in a dictionary
-# The fact that there might be more than one contact between bodies makes this
-# a bit more complicated, it is solved by also using coordinates
+# Stores normal and tangential impulse predictions for the points of a contact in
+# a dictionary, keyed by the points' contact keys (see b2Contact.GetKey), which
+# identify a point for as long as it persists, also in a copy of the world
 def storePredictions(predictionDict, contact, predictions):
-    idA = contact.fixtureA.body.userData.id
-    idB = contact.fixtureB.body.userData.id
-    key = (idA, idB)
-
-    if key in predictionDict:
-        storedPredictions = predictionDict[key]
-    else:
-        storedPredictions = []
-        predictionDict[key] = storedPredictions
-
     for i in range(len(predictions)):
-        worldPoint = contact.worldManifold.points[i]
-        px = worldPoint[0]
-        py = worldPoint[1]
+        predictionDict[contact.GetKey(i)] = (predictions[i][0], predictions[i][1])
 
-        ni = predictions[i][0]
-        ti = predictions[i][1]
 
-        storedPredictions.append([px, py, ni, ti])
-
-
-# Stores the normal and tangential impulse prediction for a contact from a dictionary
-# The fact that there might be more than one contact between bodies makes this
-# a bit more complicated, it is solved by also using coordinates
+# Gets the normal and tangential impulse predictions for the points of a contact
+# from a dictionary filled by storePredictions, zeros for points without one
 def getPredictions(predictionDict, contact):
-    idA = contact.fixtureA.body.userData.id
-    idB = contact.fixtureB.body.userData.id
-    key = (idA, idB)
-
-    if key in predictionDict:
-        storedPredictions = predictionDict[(idA, idB)]
-    else:
-        print("Contact not found in prediction dict")
-        return [[0,0], [0,0]]
-
-    predictions = []
-    for i in range(contact.manifold.pointCount):
-        worldPoint = contact.worldManifold.points[i]
-        px = worldPoint[0]
-        py = worldPoint[1]
-
-        # We choose the predictions whose position is closest to the position of the contact point
-        # Might be bad in case of extreme behaviour like very high velocities
-        pred = min(storedPredictions, key=lambda p: (px-p[0])**2 + (py-p[1])**2)
+    return [predictionDict.get(contact.GetKey(i), (0, 0))
+            for i in range(contact.manifold.pointCount)]
 
-        predictions.append(pred[2:4])
 
-    return predictions
 
-
-
-# A model has three functions - __init__, Step and PreSolve.
+# A model has four functions - __init__, Step, PreSolve and PostStep.
 # __init__ takes different input for different models, depending on what they need
 # Step and PreSolve takes the same input for all models, irregardless of whether a
 # specific model needs the input, in order to make switching models easy
+# PostStep is called with the world after it has taken a step
 # NOTE: This is not actually a model intended to be used, simply an example and a
 # way to unify some behaviour across other models
 class Model(b2ContactListener):
+    # Models that set their predictions through world.SetWarmStartImpulses in Step
+    # set this to False, and are then not attached to the world as contact listener
+    usesContactListener = True
+    # Models that get all contacts of a step at once set this to True, and are
+    # attached to the world as batch contact listener instead
+    usesBatchContactListener = False
+
     # Initializes the Model
     def __init__(self):
         super(Model, self).__init__()
@@ -177,121 +115,117 @@ class Model(b2ContactListener):
             self.normalPairs.append((pred_ni, res_ni))
             self.tangentPairs.append((pred_ti, res_ti))
 
+    # Called after the world has taken a step
+    def PostStep(self, world):
+        pass
 
-# A model which effectively disables warm-starting, by using 0's as starting iterates
-class NoWarmStartModel(Model):
-    def __init__(self):
-        super(NoWarmStartModel, self).__init__()
 
-    def Step(self, world, timeStep, velocityIterations, positionIterations):
-        super(NoWarmStartModel, self).Step(
-            world, timeStep, velocityIterations, positionIterations
-        )
+# A model which hands its predictions to the world in bulk, through
+# world.SetWarmStartImpulses, so the world steps without any Python callbacks.
+# The world must have recordContacts set, the recorded warm starting and solved
+# impulses are used for error calculations
+class NativeModel(Model):
+    usesContactListener = False
 
-    # Predicts 0's
-    def PreSolve(self, contact, _):
-        for i in range(contact.manifold.pointCount):
-            point = contact.manifold.points[i]
-            point.normalImpulse = 0
-            point.tangentImpulse = 0
+    def __init__(self):
+        super(NativeModel, self).__init__()
 
     # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        for i in range(contact.manifold.pointCount):
-            ni = impulse.normalImpulses[i]
-            ti = impulse.tangentImpulses[i]
-
-            self.normalPairs.append((0, ni))
-            self.tangentPairs.append((0, ti))
+    def PostStep(self, world):
+        records = world.GetContactRecords()
+        self.normalPairs = list(zip(records['warm_ni'], records['ni']))
+        self.tangentPairs = list(zip(records['warm_ti'], records['ti']))
 
 
+# A model which gets all contacts of a step at once, through the world's
+# batchContactListener, instead of one PreSolve/PostSolve call per contact.
+# The contacts come as numpy arrays of a b2ContactBatch, one entry per contact
+# point. Subclasses implement Predict, which returns the normal and tangential
+# impulse predictions for all points of the batch
+class BatchModel(b2BatchContactListener):
+    usesContactListener = False
+    usesBatchContactListener = True
 
-# A model which does nothing, resulting in the simulator using the built-in warm-starting
-class BuiltinWarmStartModel(Model):
     def __init__(self):
-        super(BuiltinWarmStartModel, self).__init__()
+        super(BatchModel, self).__init__()
 
     def Step(self, world, timeStep, velocityIterations, positionIterations):
-        super(BuiltinWarmStartModel, self).Step(
-            world, timeStep, velocityIterations, positionIterations
-        )
+        self.normalPairs = []
+        self.tangentPairs = []
 
-    # Uses last steps results as predictions
-    def PreSolve(self, contact, _):
-        predictions = []
-        for p in contact.manifold.points:
-            predictions.append([p.normalImpulse, p.tangentImpulse])
+    # Returns the predicted normal and tangential impulses of the batch's points,
+    # by default the impulses of last step, as the built-in warm starting does
+    def Predict(self, batch):
+        return batch.normalImpulses, batch.tangentImpulses
 
-        storePredictions(self.predictionDict, contact, predictions)
+    # Hands the predictions to the world
+    def PreSolve(self, batch):
+        normal, tangent = self.Predict(batch)
+        batch.normalImpulses[:] = normal
+        batch.tangentImpulses[:] = tangent
+        self.predictions = (batch.normalImpulses.copy(), batch.tangentImpulses.copy())
 
     # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        super(BuiltinWarmStartModel, self).PostSolve(contact, impulse)
+    def PostSolve(self, batch):
+        self.normalPairs = list(zip(self.predictions[0], batch.normalImpulses))
+        self.tangentPairs = list(zip(self.predictions[1], batch.tangentImpulses))
 
+    # Called after the world has taken a step
+    def PostStep(self, world):
+        pass
 
 
-# Provides a very bad prediction, irregardless of input
-class BadModel(Model):
+# A model which effectively disables warm-starting, by using 0's as starting iterates
+class NoWarmStartModel(BatchModel):
     def __init__(self):
-        super(BadModel, self).__init__()
-        self.p = 50
+        super(NoWarmStartModel, self).__init__()
 
-    def Step(self, world, timeStep, velocityIterations, positionIterations):
-        super(BadModel, self).Step(
-            world, timeStep, velocityIterations, positionIterations
-        )
+    # Predicts 0's
+    def Predict(self, batch):
+        return 0, 0
 
-    def PreSolve(self, contact, _):
-        for point in contact.manifold.points:
-            point.normalImpulse = self.p
-            point.tangentImpulse = self.p
 
-    # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        for i in range(contact.manifold.pointCount):
-            ni = impulse.normalImpulses[i]
-            ti = impulse.tangentImpulses[i]
 
-            self.normalPairs.append((self.p, ni))
-            self.tangentPairs.append((self.p, ti))
+# A model which does nothing, resulting in the simulator using the built-in warm-starting
+class BuiltinWarmStartModel(BatchModel):
+    def __init__(self):
+        super(BuiltinWarmStartModel, self).__init__()
+
+
+
+# Provides a very bad prediction, irregardless of input
+class BadModel(BatchModel):
+    def __init__(self):
+        super(BadModel, self).__init__()
+        self.p = 50
+
+    def Predict(self, batch):
+        return self.p, self.p
 
 
 
 # A model which predicts a random, some-what 'reasonable' set of impulses
-class RandomModel(Model):
+class RandomModel(BatchModel):
     # We manually choose a seed to ensure the same 'random' numbers each time
     def __init__(self, seed):
         super(RandomModel, self).__init__()
 
-        random.seed(seed)
+        self.random = np.random.RandomState(seed)
 
-    def Step(self, world, timeStep, velocityIterations, positionIterations):
-        super(RandomModel, self).Step(
-            world, timeStep, velocityIterations, positionIterations
-        )
+    def Predict(self, batch):
+        # Normal impulses seems to be in the range 0 to 5
+        normal = self.random.uniform(0, 5, batch.count)
 
-    def PreSolve(self, contact, _):
-        predictions = []
-        for point in contact.manifold.points:
-            # Normal impulses seems to be in the range 0 to 5
-            point.normalImpulse = random.uniform(0, 5)
+        # Tangential impulses seems to be in the range -2 to 2
+        tangent = self.random.uniform(-2, 2, batch.count)
 
-            # Tangential impulses seems to be in the range -2 to 2
-            point.tangentImpulse = random.uniform(-2, 2)
-
-            predictions.append([point.normalImpulse, point.tangentImpulse])
-
-        storePredictions(self.predictionDict, contact, predictions)
-
-    # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        super(RandomModel, self).PostSolve(contact, impulse)
+        return normal, tangent
 
 
 
 # A model which creates a copy of the current world, asks that copy to take a step,
 # and reports the results back to the original world rounded to set accuracy
-class CopyWorldModel(Model):
+class CopyWorldModel(NativeModel):
     # 'accuracy' is the argument passed to round, i.e. the number of decimals to round up to
     # if not set, no rounding is done
     def __init__(self, accuracy=None):
@@ -300,109 +234,52 @@ class CopyWorldModel(Model):
         self.accuracy = accuracy
 
     # Creates a copy of the world, tells it to take a step
-    # and prepares a dictionary with impulse-results for use by Predict
+    # and hands the resulting impulses to the world as warm starting impulses
     def Step(self, world, timeStep, velocityIterations, positionIterations):
         super(CopyWorldModel, self).Step(
             world, timeStep, velocityIterations, positionIterations
         )
 
         copy = copyWorld(world)
+        copy.recordContacts = True
         copy.Step(timeStep, velocityIterations, positionIterations)
 
-        for contact in copy.contacts:
-            res = []
-            for p in contact.manifold.points:
-                if self.accuracy != None:
-                    normal = round(p.normalImpulse, self.accuracy)
-                    tangent = round(p.tangentImpulse, self.accuracy)
-                else:
-                    normal = p.normalImpulse
-                    tangent = p.tangentImpulse
-
-                res.append([normal, tangent])
+        records = copy.GetContactRecords()
+        normal = records['ni']
+        tangent = records['ti']
+        if self.accuracy != None:
+            normal = np.round(normal, self.accuracy)
+            tangent = np.round(tangent, self.accuracy)
 
-            storePredictions(self.predictionDict, contact, res)
+        # The copy solved the same contact points the world is about to solve
+        world.SetKeyedWarmStartImpulses(records['key'], normal, tangent)
 
-    # Predict a result by looking up in dictionary
-    def PreSolve(self, contact, old):
-        super(CopyWorldModel, self).PreSolve(contact, old)
 
-    # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        super(CopyWorldModel, self).PostSolve(contact, impulse)
-
-from sph_grid import Grid, dataframe_to_grid
 # A model which takes the impulses from last step, similar to how the build-in
 # warm start works, but then transfers them onto a grid, from the grid back
 # to the particles, and then uses the results as predictions
-class IdentityGridModel(Model):
+class IdentityGridModel(NativeModel):
     def __init__(self, p_ll, p_ur, xRes, yRes, h):
         super(IdentityGridModel, self).__init__()
 
-        # Initialize the grid
-        self.G = Grid(p_ll,p_ur,(xRes,yRes))
+        # The grid, as in sph_grid.Grid
+        self.p_ll = p_ll
+        self.p_ur = p_ur
+        self.res = (xRes, yRes)
         self.h = h
-        self.contact_channels = ['ni','ti']
-
-        # Create custom contact listener
-        self.ContactListener = CustomContactListener()
 
     def Step(self, world, timeStep, velocityIterations, positionIterations):
         super(IdentityGridModel, self).Step(
             world, timeStep, velocityIterations, positionIterations
         )
 
-        # Reset
-        self.ContactListener.reset()
-
-        # Create a copy of world and step
+        # Create a copy of world and step, recording the solved contacts
         copy = copyWorld(world)
-        copy.contactListener = self.ContactListener
+        copy.recordContacts = True
 
         copy.Step(timeStep, velocityIterations, positionIterations)
 
-        df_c = self.ContactListener.df_c
-        N = df_c.shape[0]
-        if N == 0:
-            return
-
-        # Transfer from particles to grids
-        c_grids={}
-        for c in self.contact_channels:
-            c_grids[c]=dataframe_to_grid(G=self.G,channel=c,df=df_c,support_radius=self.h)
-            c_grids[c]=np.flip(c_grids[c])
-
-        # Extract contact positions
-        c_pos =[(i,j) for i,j in zip(df_c.px.values,df_c.py.values)]
-
-        # Transfer from grids to particles
-        c_preds={}
-        for c in self.contact_channels:
-            c_preds[c]=self.G.collect(c_grids[c],c_pos)
-
-
-        # Store predictions
-        for i in range(N):
-            row = df_c.loc[i]
-            master = int(row['master'])
-            slave = int(row['slave'])
-            key = (master, slave)
-
-            px = row['px']
-            py = row['py']
-
-#             import pdb; pdb.set_trace()
-            prediction = [px, py] + [c_preds['ni'][i],c_preds['ti'][i]]
-            
-            if key in self.predictionDict:
-                self.predictionDict[key].append(prediction)
-            else:
-                self.predictionDict[key] = [prediction]
-
-    # Set impulses based on stored predictions
-    def PreSolve(self, contact, old):
-        super(IdentityGridModel, self).PreSolve(contact, old)
-
-    # Store impulse predictions and results for error calculations
-    def PostSolve(self, contact, impulse):
-        super(IdentityGridModel, self).PostSolve(contact, impulse)
\ No newline at end of file
+        # Transfer from particles to grids, and let the world sample the grids
+        # at its contact points
+        ni, ti = copy.RasterizeToGrid(self.p_ll, self.p_ur, self.res, self.h, channels=['ni', 'ti'])
+        world.SetWarmStartField(ni, ti, self.p_ll, self.res, interpolation='bicubic')
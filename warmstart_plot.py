@@ -22,9 +22,9 @@ def preprocess_profiles(model_profiles,maxVelocityIterations, maxPositionIterati
     velocityLambdaTwoLists = [list(filter(lambda l: l[-1] != 0, res["velocityLambdaTwoNorms"])) for res in results]
 
     # Pad convergence rates to be same length, which is the max, by repeating the last element
-    paddedVelocityLambdaInfLists = [[l + [l[-1]]*(maxVelocityIterations-len(l)) for l in lambdas]
+    paddedVelocityLambdaInfLists = [[list(l) + [l[-1]]*(maxVelocityIterations-len(l)) for l in lambdas]
                                      for lambdas in velocityLambdaInfLists]
-    paddedVelocityLambdaTwoLists = [[l + [l[-1]]*(maxVelocityIterations-len(l)) for l in lambdas]
+    paddedVelocityLambdaTwoLists = [[list(l) + [l[-1]]*(maxVelocityIterations-len(l)) for l in lambdas]
                                      for lambdas in velocityLambdaTwoLists]
 
     # We transform the data into an array
@@ -57,7 +57,7 @@ def preprocess_profiles(model_profiles,maxVelocityIterations, maxPositionIterati
     positionLambdaLists = [list(filter(lambda l: l[-1] != 0, res["positionLambdas"])) for res in results]
 
     # Pad convergence rates to be same length, which is the max, by repeating the last element
-    paddedPositionLambdaLists = [[l + [l[-1]]*(maxPositionIterations-len(l)) for l in lambdas]
+    paddedPositionLambdaLists = [[list(l) + [l[-1]]*(maxPositionIterations-len(l)) for l in lambdas]
                                  for lambdas in positionLambdaLists]
 
     # We transform the data into an array
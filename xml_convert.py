@@ -1,4 +1,4 @@
-from Box2D import (b2World, b2Body, b2Contact,b2_dynamicBody, b2Vec2)
+from Box2D import (b2World, b2Body, b2Contact,b2_dynamicBody, b2_staticBody, b2Vec2)
 from xml.etree.ElementTree import Element, SubElement
 from xml.etree import ElementTree
 from xml.dom import minidom
@@ -8,42 +8,55 @@ from pathlib import Path
 
 
 def body_to_xml(body: b2Body):
+    return _body_xml(body, body.userData.id, body.mass, body.inertia,
+                     body.position.x, body.position.y,
+                     body.linearVelocity.x, body.linearVelocity.y,
+                     body.angle, body.angularVelocity)
+
+
+# Same as body_to_xml, but takes the values from a row of b2World.GetBodyStates
+def body_state_to_xml(body: b2Body, state):
+    id, px, py, mass, inertia, vx, vy, theta, omega = (float(v) for v in state)
+    return _body_xml(body, int(id), mass, inertia, px, py, vx, vy, theta, omega)
+
+
+def _body_xml(body: b2Body, id, mass, inertia, px, py, vx, vy, theta, omega):
     body_xml = Element('body')
-    body_xml.set('index', str(body.userData.id))
+    body_xml.set('index', str(id))
 
-    if body.type is b2_dynamicBody :
+    if body.type == b2_dynamicBody :
         type  = 'free'
-    elif body.type is 0:
+    elif body.type == b2_staticBody:
         type = 'fixed'
     else :
         raise Exception("unidentified body type encountered")
     body_xml.set('type', type)
 
     # mass
-    mass = SubElement(body_xml, 'mass')
-    mass.set('value', str(body.mass))
+    mass_xml = SubElement(body_xml, 'mass')
+    mass_xml.set('value', str(mass))
 
     # inertia
-    inertia = SubElement(body_xml, "inertia")
-    inertia.set('value', str(body.inertia))
+    inertia_xml = SubElement(body_xml, "inertia")
+    inertia_xml.set('value', str(inertia))
 
     # position
     pos = SubElement(body_xml, 'position')
-    pos.set('x', str(body.position.x))
-    pos.set('y', str(body.position.y))
+    pos.set('x', str(px))
+    pos.set('y', str(py))
 
     # velocity
     v = SubElement(body_xml, 'velocity')
-    v.set('vx', str(body.linearVelocity.x))
-    v.set('vy', str(body.linearVelocity.y))
+    v.set('vx', str(vx))
+    v.set('vy', str(vy))
 
     # orientation
     angle = SubElement(body_xml, 'angle')
-    angle.set('theta', str(body.angle))
+    angle.set('theta', str(theta))
 
     # spin
     spin = SubElement(body_xml, 'angular_velocity')
-    spin.set('omega', str(body.angularVelocity))
+    spin.set('omega', str(omega))
 
     # shape
     shape = SubElement(body_xml, 'shape')
@@ -110,6 +123,7 @@ def xml_2_b2bodies (world:b2World, xmlStr):
             )
 
         bod.userData = BodyData(b_id=id, shape=shape)
+        bod.userId = id
         bod.mass = mass
         bod.inertia = inertia
         bod.linearVelocity = b2Vec2(vx, vy)
@@ -151,10 +165,9 @@ class XMLExporter:
 
     # Store all bodies in the world as xml
     def snapshot_bodies(self):
-        for b in self.world.bodies:
-            xb = body_to_xml(b)
-            if xb is not None:
-                self.bodies.append(xb)
+        states = self.world.GetBodyStates(dynamicOnly=False)
+        for b, state in zip(self.world.bodies, states):
+            self.bodies.append(body_state_to_xml(b, state))
 
     # Store all contacts in the world as xml
     def snapshot_contacts(self):
@@ -168,6 +181,27 @@ class XMLExporter:
             # import pdb; pdb.set_trace()
             self.contacts.append(ct_pt)
 
+    # Store the contact table recorded by the world during the last step
+    # (see b2World.recordContacts), including the solved impulses
+    def snapshot_contact_records(self, records):
+        for index, r in enumerate(records):
+            ct_xml = SubElement(self.contacts, 'contact')
+            ct_xml.set('index', str(index))
+            ct_xml.set('master', str(int(r['master'])))
+            ct_xml.set('slave', str(int(r['slave'])))
+
+            point_xml = SubElement(ct_xml, 'position')
+            point_xml.set('x', str(float(r['px'])))
+            point_xml.set('y', str(float(r['py'])))
+
+            normal_xml = SubElement(ct_xml, 'normal')
+            normal_xml.set('nx', str(float(r['nx'])))
+            normal_xml.set('ny', str(float(r['ny'])))
+
+            impulse_xml = SubElement(ct_xml, 'impulse')
+            impulse_xml.set('ni', str(float(r['ni'])))
+            impulse_xml.set('ti', str(float(r['ti'])))
+
     # Add the given impulse to the already-existing xml representing the given contact
     def snapshot_impulse(self, contact:b2Contact, impulse):
         for i in range(contact.manifold.pointCount):